@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
 from aiogram import F, Router
 from aiogram.filters import Command
@@ -31,7 +31,10 @@ from app.storage.db import (
     get_driver_by_id,
     User,
     upsert_user,
-    get_all_users,
+    get_users_page,
+    get_users_stats,
+    get_drivers_page,
+    get_driver_status_counts,
     get_user_by_id,
     get_user_order_history,
     block_user,
@@ -47,6 +50,7 @@ from app.utils.visual import (
     get_karma_emoji,
     create_box,
 )
+from app.handlers.keyboards import pagination_buttons, parse_pagination_callback
 from app.handlers.pricing_settings_handlers import create_pricing_handlers
 
 
@@ -87,6 +91,11 @@ def admin_menu_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+# Розмір сторінки списків адміна (кожен запис - окреме повідомлення з кнопками)
+CLIENTS_PAGE_SIZE = 10
+DRIVERS_PAGE_SIZE = 10
+
+
 def cancel_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[[KeyboardButton(text=CANCEL_TEXT)]],
@@ -227,58 +236,26 @@ def create_router(config: AppConfig) -> Router:
         if not message.from_user or not is_admin(message.from_user.id):
             return
         
-        from app.storage.db_connection import db_manager
+        from app.storage.admin_metrics import get_admin_metrics
         
         try:
-            async with db_manager.connect(config.database_path) as db:
-                # Total orders
-                async with db.execute("SELECT COUNT(*) FROM orders") as cur:
-                    total_orders = (await cur.fetchone())[0]
-                
-                # Completed orders
-                async with db.execute("SELECT COUNT(*) FROM orders WHERE status = 'completed'") as cur:
-                    completed_orders = (await cur.fetchone())[0]
-                
-                # Active drivers
-                async with db.execute("SELECT COUNT(*) FROM drivers WHERE status = 'approved'") as cur:
-                    active_drivers = (await cur.fetchone())[0]
-                
-                # Pending driver applications
-                async with db.execute("SELECT COUNT(*) FROM drivers WHERE status = 'pending'") as cur:
-                    pending_drivers = (await cur.fetchone())[0]
-                
-                # Total revenue
-                async with db.execute("SELECT SUM(fare_amount) FROM orders WHERE status = 'completed'") as cur:
-                    row = await cur.fetchone()
-                    total_revenue = row[0] if row[0] else 0.0
-                
-                # Total commission
-                async with db.execute("SELECT SUM(commission) FROM orders WHERE status = 'completed'") as cur:
-                    row = await cur.fetchone()
-                    total_commission = row[0] if row[0] else 0.0
-                
-                # Unpaid commissions
-                async with db.execute("SELECT SUM(commission) FROM payments WHERE commission_paid = 0") as cur:
-                    row = await cur.fetchone()
-                    unpaid_commission = row[0] if row[0] else 0.0
-                
-                # Total users
-                async with db.execute("SELECT COUNT(*) FROM users") as cur:
-                    total_users = (await cur.fetchone())[0]
-                
-                text = (
-                    "📊 <b>Статистика системи</b>\n\n"
-                    f"📦 Всього замовлень: {total_orders}\n"
-                    f"✅ Виконано: {completed_orders}\n"
-                    f"🚗 Активних водіїв: {active_drivers}\n"
-                    f"⏳ Водіїв на модерації: {pending_drivers}\n\n"
-                    f"💵 Загальний дохід: {total_revenue:.2f} грн\n"
-                    f"💰 Загальна комісія: {total_commission:.2f} грн\n"
-                    f"⚠️ Несплачена комісія: {unpaid_commission:.2f} грн\n"
-                    f"👥 Всього користувачів: {total_users}"
-                )
-                
-                await message.answer(text, reply_markup=admin_menu_keyboard())
+            # Всі цифри одним запитом, повторні відкриття - з кешу
+            metrics = await get_admin_metrics(config.database_path)
+            
+            text = (
+                "📊 <b>Статистика системи</b>\n\n"
+                f"📦 Всього замовлень: {metrics.total_orders}\n"
+                f"✅ Виконано: {metrics.completed_orders}\n"
+                f"🚗 Активних водіїв: {metrics.approved_drivers}\n"
+                f"⏳ Водіїв на модерації: {metrics.pending_drivers}\n\n"
+                f"💵 Загальний дохід: {metrics.total_revenue:.2f} грн\n"
+                f"💰 Загальна комісія: {metrics.total_commission:.2f} грн\n"
+                f"⚠️ Несплачена комісія: {metrics.unpaid_commission:.2f} грн\n"
+                f"👥 Всього користувачів: {metrics.total_users}\n\n"
+                f"🕒 Оновлено {metrics.age_seconds} с тому"
+            )
+            
+            await message.answer(text, reply_markup=admin_menu_keyboard())
         
         except Exception as e:
             logger.error(f"❌ Помилка отримання статистики: {e}")
@@ -452,34 +429,114 @@ def create_router(config: AppConfig) -> Router:
         await state.clear()
         await message.answer("✅ Тарифи успішно оновлено!", reply_markup=admin_menu_keyboard())
 
+    async def send_driver_card(message: Message, driver) -> None:
+        """Картка водія зі списку (активний або заблокований)"""
+        from app.storage.db import get_driver_average_rating
+        
+        # Отримати несплачену комісію водія
+        unpaid_commission = await get_driver_unpaid_commission(config.database_path, driver.tg_user_id)
+        
+        # Середній рейтинг
+        avg_rating = await get_driver_average_rating(config.database_path, driver.tg_user_id)
+        rating_text = f"{avg_rating:.1f}⭐" if avg_rating else "Немає оцінок"
+        
+        # Карма та кількість поїздок
+        karma = driver.karma if driver.karma is not None else 100
+        total_orders = driver.total_orders or 0
+        
+        # Емодзі для карми
+        karma_emoji = "🟢" if karma >= 80 else "🟡" if karma >= 50 else "🔴"
+        
+        if driver.status == "rejected":
+            kb = InlineKeyboardMarkup(
+                inline_keyboard=[
+                    [
+                        InlineKeyboardButton(text="✅ Розблокувати", callback_data=f"admin_driver:unblock:{driver.id}"),
+                        InlineKeyboardButton(text="💬 Написати", url=f"tg://user?id={driver.tg_user_id}")
+                    ],
+                    [InlineKeyboardButton(text="🗑️ Видалити", callback_data=f"admin_driver:delete:{driver.id}")]
+                ]
+            )
+            
+            text = (
+                f"👤 <b>{driver.full_name}</b> 🚫\n"
+                f"📱 {driver.phone}\n"
+                f"🏙️ {driver.city or 'Не вказано'}\n"
+                f"🚗 {driver.car_make} {driver.car_model} ({driver.car_plate})\n"
+                f"📊 Рейтинг: {rating_text}\n"
+                f"{karma_emoji} Карма: {karma}/100\n"
+                f"🚕 Поїздок: {total_orders}\n"
+                f"💳 Несплачена комісія: <b>{unpaid_commission:.2f} грн</b>\n"
+                f"🆔 ID: {driver.id}"
+            )
+        else:
+            priority = driver.priority or 0
+            online_status = "🟢 Онлайн" if driver.online else "🔴 Офлайн"
+            priority_badge = "⭐" if priority > 0 else ""
+            toggle_text = "⭐ Вимкнути пріоритет" if priority > 0 else "⭐ Увімкнути пріоритет"
+            
+            kb = InlineKeyboardMarkup(
+                inline_keyboard=[
+                    [
+                        InlineKeyboardButton(text="🚫 Заблокувати", callback_data=f"admin_driver:block:{driver.id}"),
+                        InlineKeyboardButton(text="💬 Написати", url=f"tg://user?id={driver.tg_user_id}")
+                    ],
+                    [InlineKeyboardButton(text=toggle_text, callback_data=f"admin_driver:priority_toggle:{driver.id}")],
+                    [InlineKeyboardButton(text="📊 Статистика", callback_data=f"admin_driver:stats:{driver.id}")],
+                    [InlineKeyboardButton(text="🗑️ Видалити", callback_data=f"admin_driver:delete:{driver.id}")]
+                ]
+            )
+            
+            text = (
+                f"👤 <b>{driver.full_name}</b> {priority_badge} {online_status}\n"
+                f"📱 {driver.phone}\n"
+                f"🏙️ {driver.city or 'Не вказано'}\n"
+                f"🚗 {driver.car_make} {driver.car_model} ({driver.car_plate})\n"
+                f"🎯 Клас: {driver.car_class}\n"
+                f"⭐ Пріоритет: {'Увімкнено' if priority > 0 else 'Вимкнено'}\n"
+                f"📊 Рейтинг: {rating_text}\n"
+                f"{karma_emoji} Карма: {karma}/100\n"
+                f"🚕 Поїздок: {total_orders}\n"
+                f"💳 Несплачена комісія: <b>{unpaid_commission:.2f} грн</b>\n"
+                f"🆔 ID: {driver.id}"
+            )
+        
+        await message.answer(text, reply_markup=kb, parse_mode="HTML")
+    
+    async def send_drivers_page(
+        message: Message,
+        status: str,
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+    ) -> None:
+        """Сторінка водіїв зі статусом status + кнопки ◀️/▶️"""
+        page = await get_drivers_page(
+            config.database_path, status=status, after=after, before=before, limit=DRIVERS_PAGE_SIZE
+        )
+        if not page.items:
+            await message.answer("📭 Більше водіїв немає", parse_mode="HTML")
+            return
+        
+        for driver in page.items:
+            await send_driver_card(message, driver)
+        
+        nav = pagination_buttons(f"admin:drivers_page:{status}", page)
+        if nav:
+            await message.answer(
+                f"📄 Показано {len(page.items)} водіїв",
+                reply_markup=InlineKeyboardMarkup(inline_keyboard=[nav])
+            )
+
     @router.message(F.text == "🚗 Водії")
     async def show_drivers_list(message: Message) -> None:
-        """Показати список всіх водіїв"""
+        """Показати список водіїв (сторінками, від нових до старих)"""
         if not message.from_user or not is_admin(message.from_user.id):
             return
         
-        from app.storage.db_connection import db_manager
+        # Кількість за статусами - один GROUP BY, без завантаження рядків
+        counts = await get_driver_status_counts(config.database_path)
         
-        async with db_manager.connect(config.database_path) as db:
-            # Отримати всіх водіїв (додаємо поле priority)
-            async with db.execute(
-                """
-                SELECT id, tg_user_id, full_name, phone, car_make, car_model, car_plate,
-                       car_class, status, city, online, created_at, priority
-                FROM drivers
-                ORDER BY 
-                    CASE status
-                        WHEN 'approved' THEN 1
-                        WHEN 'pending' THEN 2
-                        WHEN 'rejected' THEN 3
-                        ELSE 4
-                    END,
-                    created_at DESC
-                """
-            ) as cur:
-                drivers = await cur.fetchall()
-        
-        if not drivers:
+        if not counts:
             await message.answer(
                 "👥 <b>Водіїв немає</b>\n\n"
                 "Поки що жоден водій не зареєструвався.",
@@ -488,13 +545,11 @@ def create_router(config: AppConfig) -> Router:
             )
             return
         
-        # Розділити за статусами
-        approved_drivers = [d for d in drivers if d[8] == "approved"]
-        pending_drivers = [d for d in drivers if d[8] == "pending"]
-        rejected_drivers = [d for d in drivers if d[8] == "rejected"]
+        approved_count = counts.get("approved", 0)
+        pending_count = counts.get("pending", 0)
+        rejected_count = counts.get("rejected", 0)
         
-        # Відправити кожну категорію окремо
-        if approved_drivers:
+        if approved_count:
             # Показати стан глобального тумблера пріоритизації
             priority_mode = await get_priority_mode()
             kb_mode = InlineKeyboardMarkup(
@@ -506,138 +561,50 @@ def create_router(config: AppConfig) -> Router:
             )
             await message.answer(
                 (
-                    f"✅ <b>Активні водії ({len(approved_drivers)})</b>\n\n"
+                    f"✅ <b>Активні водії ({approved_count})</b>\n\n"
                     f"Глобальний пріоритет: <b>{'Увімкнено' if priority_mode else 'Вимкнено'}</b>"
                 ),
                 reply_markup=kb_mode,
                 parse_mode="HTML"
             )
-            for d in approved_drivers:
-                (
-                    driver_id,
-                    tg_user_id,
-                    full_name,
-                    phone,
-                    car_make,
-                    car_model,
-                    car_plate,
-                    car_class,
-                    status,
-                    city,
-                    online,
-                    created_at,
-                    priority,
-                ) = d
-
-                online_status = "🟢 Онлайн" if online else "🔴 Офлайн"
-                priority_badge = "⭐" if (priority or 0) > 0 else ""
-                toggle_text = "⭐ Вимкнути пріоритет" if (priority or 0) > 0 else "⭐ Увімкнути пріоритет"
-                
-                # Отримати несплачену комісію водія
-                unpaid_commission = await get_driver_unpaid_commission(config.database_path, tg_user_id)
-                
-                # Отримати додаткову статистику водія
-                from app.storage.db import get_driver_average_rating
-                driver = await get_driver_by_id(config.database_path, driver_id)
-                
-                # Середній рейтинг
-                avg_rating = await get_driver_average_rating(config.database_path, tg_user_id)
-                rating_text = f"{avg_rating:.1f}⭐" if avg_rating else "Немає оцінок"
-                
-                # Карма та кількість поїздок
-                karma = driver.karma if driver else 100
-                total_orders = driver.total_orders if driver else 0
-                
-                # Емодзі для карми
-                karma_emoji = "🟢" if karma >= 80 else "🟡" if karma >= 50 else "🔴"
-
-                kb = InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [
-                            InlineKeyboardButton(text="🚫 Заблокувати", callback_data=f"admin_driver:block:{driver_id}"),
-                            InlineKeyboardButton(text="💬 Написати", url=f"tg://user?id={tg_user_id}")
-                        ],
-                        [InlineKeyboardButton(text=toggle_text, callback_data=f"admin_driver:priority_toggle:{driver_id}")],
-                        [InlineKeyboardButton(text="📊 Статистика", callback_data=f"admin_driver:stats:{driver_id}")],
-                        [InlineKeyboardButton(text="🗑️ Видалити", callback_data=f"admin_driver:delete:{driver_id}")]
-                    ]
-                )
-
-                text = (
-                    f"👤 <b>{full_name}</b> {priority_badge} {online_status}\n"
-                    f"📱 {phone}\n"
-                    f"🏙️ {city or 'Не вказано'}\n"
-                    f"🚗 {car_make} {car_model} ({car_plate})\n"
-                    f"🎯 Клас: {car_class}\n"
-                    f"⭐ Пріоритет: {'Увімкнено' if (priority or 0) > 0 else 'Вимкнено'}\n"
-                    f"📊 Рейтинг: {rating_text}\n"
-                    f"{karma_emoji} Карма: {karma}/100\n"
-                    f"🚕 Поїздок: {total_orders}\n"
-                    f"💳 Несплачена комісія: <b>{unpaid_commission:.2f} грн</b>\n"
-                    f"🆔 ID: {driver_id}"
-                )
-
-                await message.answer(text, reply_markup=kb, parse_mode="HTML")
+            await send_drivers_page(message, "approved")
         
-        if pending_drivers:
+        if pending_count:
             await message.answer(
-                f"⏳ <b>На модерації ({len(pending_drivers)})</b>\n\n"
+                f"⏳ <b>На модерації ({pending_count})</b>\n\n"
                 "Використовуйте '👥 Модерація водіїв' для схвалення",
                 parse_mode="HTML"
             )
         
-        if rejected_drivers:
+        if rejected_count:
             await message.answer(
-                f"❌ <b>Заблоковані ({len(rejected_drivers)})</b>",
+                f"❌ <b>Заблоковані ({rejected_count})</b>",
+                reply_markup=InlineKeyboardMarkup(
+                    inline_keyboard=[[InlineKeyboardButton(
+                        text="📋 Показати заблокованих",
+                        callback_data="admin:drivers_page:rejected:n:0"
+                    )]]
+                ),
                 parse_mode="HTML"
             )
-            for d in rejected_drivers:
-                driver_id, tg_user_id, full_name, phone, car_make, car_model, car_plate, \
-                    car_class, status, city, online, created_at, priority = d
-                
-                # Отримати несплачену комісію водія
-                unpaid_commission = await get_driver_unpaid_commission(config.database_path, tg_user_id)
-                
-                # Отримати додаткову статистику водія
-                from app.storage.db import get_driver_average_rating
-                driver = await get_driver_by_id(config.database_path, driver_id)
-                
-                # Середній рейтинг
-                avg_rating = await get_driver_average_rating(config.database_path, tg_user_id)
-                rating_text = f"{avg_rating:.1f}⭐" if avg_rating else "Немає оцінок"
-                
-                # Карма та кількість поїздок
-                karma = driver.karma if driver else 100
-                total_orders = driver.total_orders if driver else 0
-                
-                # Емодзі для карми
-                karma_emoji = "🟢" if karma >= 80 else "🟡" if karma >= 50 else "🔴"
-                
-                kb = InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [
-                            InlineKeyboardButton(text="✅ Розблокувати", callback_data=f"admin_driver:unblock:{driver_id}"),
-                            InlineKeyboardButton(text="💬 Написати", url=f"tg://user?id={tg_user_id}")
-                        ],
-                        [InlineKeyboardButton(text="🗑️ Видалити", callback_data=f"admin_driver:delete:{driver_id}")]
-                    ]
-                )
-                
-                text = (
-                    f"👤 <b>{full_name}</b> 🚫\n"
-                    f"📱 {phone}\n"
-                    f"🏙️ {city or 'Не вказано'}\n"
-                    f"🚗 {car_make} {car_model} ({car_plate})\n"
-                    f"📊 Рейтинг: {rating_text}\n"
-                    f"{karma_emoji} Карма: {karma}/100\n"
-                    f"🚕 Поїздок: {total_orders}\n"
-                    f"💳 Несплачена комісія: <b>{unpaid_commission:.2f} грн</b>\n"
-                    f"🆔 ID: {driver_id}"
-                )
-                
-                await message.answer(text, reply_markup=kb, parse_mode="HTML")
         
         await message.answer("🔙 Головне меню:", reply_markup=admin_menu_keyboard())
+    
+    @router.callback_query(F.data.startswith("admin:drivers_page:"))
+    async def drivers_page_callback(call: CallbackQuery) -> None:
+        """Наступна/попередня сторінка списку водіїв"""
+        if not call.from_user or not is_admin(call.from_user.id):
+            await call.answer("❌ Немає доступу", show_alert=True)
+            return
+        
+        prefix, after, before = parse_pagination_callback(call.data)
+        status = prefix.rsplit(":", 1)[-1]
+        await call.answer()
+        try:
+            await call.message.edit_reply_markup(reply_markup=None)
+        except Exception:
+            pass
+        await send_drivers_page(call.message, status, after, before)
 
     # Обробник для модерації водіїв (approve/reject)
     @router.callback_query(F.data.startswith("drv:"))
@@ -1118,43 +1085,51 @@ def create_router(config: AppConfig) -> Router:
         
         logger.info(f"✅ Адмін #{message.from_user.id} оновив номер картки для комісії")
     
-    @router.message(F.text == "👤 Клієнти")
-    async def show_clients_list(message: Message) -> None:
-        """Показати список всіх клієнтів"""
-        if not message.from_user or not is_admin(message.from_user.id):
-            return
-        
-        clients = await get_all_users(config.database_path, role="client")
-        
-        if not clients:
-            await message.answer(
-                "👤 <b>Клієнтів немає</b>\n\n"
-                "Поки що жоден клієнт не зареєструвався.",
-                reply_markup=admin_menu_keyboard(),
-                parse_mode="HTML"
-            )
+    async def send_clients_page(
+        message: Message,
+        blocked: bool,
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+    ) -> None:
+        """Сторінка активних/заблокованих клієнтів + кнопки ◀️/▶️"""
+        page = await get_users_page(
+            config.database_path, role="client", blocked=blocked,
+            after=after, before=before, limit=CLIENTS_PAGE_SIZE
+        )
+        if not page.items:
+            await message.answer("📭 Більше клієнтів немає", parse_mode="HTML")
             return
         
-        # Розділити за статусом (заблоковані/активні)
-        active_clients = [c for c in clients if not c.is_blocked]
-        blocked_clients = [c for c in clients if c.is_blocked]
-        
-        # Показати активних клієнтів
-        if active_clients:
-            text = f"👤 <b>Активні клієнти ({len(active_clients)})</b>\n\n"
-            
-            for client in active_clients[:20]:  # Показати перші 20
+        for client in page.items:
+            if blocked:
+                text = (
+                    f"👤 <b>{client.full_name}</b>\n"
+                    f"📱 {client.phone}\n"
+                    f"🚫 ЗАБЛОКОВАНИЙ\n"
+                )
+                
+                kb = InlineKeyboardMarkup(
+                    inline_keyboard=[
+                        [
+                            InlineKeyboardButton(
+                                text="✅ Розблокувати",
+                                callback_data=f"admin:client_unblock:{client.user_id}"
+                            )
+                        ]
+                    ]
+                )
+            else:
                 # Іконки для статусу
                 city_emoji = f"🏙 {client.city}" if client.city else "🌍 Місто не вказано"
                 karma_emoji = get_karma_emoji(client.karma)
                 
-                text += (
+                text = (
                     f"👤 <b>{client.full_name}</b>\n"
                     f"📱 {client.phone}\n"
                     f"{city_emoji}\n"
                     f"{karma_emoji} Карма: {client.karma}/100\n"
                     f"📦 Замовлень: {client.total_orders} (скасовано: {client.cancelled_orders})\n"
-                    f"📅 Зареєстрований: {client.created_at.strftime('%d.%m.%Y')}\n"
+                    f"📅 Зареєстрований: {client.created_at.strftime('%d.%m.%Y') if client.created_at else '—'}\n"
                 )
                 
                 # Кнопки керування
@@ -1178,56 +1153,77 @@ def create_router(config: AppConfig) -> Router:
                         ]
                     ]
                 )
-                
-                await message.answer(text, reply_markup=kb, parse_mode="HTML")
-                text = ""  # Очистити для наступного клієнта
             
-            if len(active_clients) > 20:
-                await message.answer(
-                    f"... і ще {len(active_clients) - 20} клієнтів",
-                    parse_mode="HTML"
-                )
+            await message.answer(text, reply_markup=kb, parse_mode="HTML")
         
-        # Показати заблокованих клієнтів
-        if blocked_clients:
-            text = f"\n🚫 <b>Заблоковані клієнти ({len(blocked_clients)})</b>\n\n"
-            
-            for client in blocked_clients[:10]:
-                text += (
-                    f"👤 <b>{client.full_name}</b>\n"
-                    f"📱 {client.phone}\n"
-                    f"🚫 ЗАБЛОКОВАНИЙ\n"
-                )
-                
-                kb = InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [
-                            InlineKeyboardButton(
-                                text="✅ Розблокувати",
-                                callback_data=f"admin:client_unblock:{client.user_id}"
-                            )
-                        ]
-                    ]
-                )
-                
-                await message.answer(text, reply_markup=kb, parse_mode="HTML")
-                text = ""
+        nav = pagination_buttons(f"admin:clients_page:{1 if blocked else 0}", page)
+        if nav:
+            await message.answer(
+                f"📄 Показано {len(page.items)} клієнтів",
+                reply_markup=InlineKeyboardMarkup(inline_keyboard=[nav])
+            )
+    
+    @router.message(F.text == "👤 Клієнти")
+    async def show_clients_list(message: Message) -> None:
+        """Показати список клієнтів (сторінками, від нових до старих)"""
+        if not message.from_user or not is_admin(message.from_user.id):
+            return
+        
+        # Підсумки - один агрегат, рядки - лише поточна сторінка
+        stats = await get_users_stats(config.database_path, role="client")
+        
+        if not stats.total:
+            await message.answer(
+                "👤 <b>Клієнтів немає</b>\n\n"
+                "Поки що жоден клієнт не зареєструвався.",
+                reply_markup=admin_menu_keyboard(),
+                parse_mode="HTML"
+            )
+            return
         
-        # Показати загальну статистику
-        total_orders = sum(c.total_orders for c in clients)
-        avg_karma = sum(c.karma for c in clients) / len(clients) if clients else 0
+        if stats.active:
+            await message.answer(f"👤 <b>Активні клієнти ({stats.active})</b>", parse_mode="HTML")
+            await send_clients_page(message, blocked=False)
+        
+        if stats.blocked:
+            await message.answer(
+                f"🚫 <b>Заблоковані клієнти ({stats.blocked})</b>",
+                reply_markup=InlineKeyboardMarkup(
+                    inline_keyboard=[[InlineKeyboardButton(
+                        text="📋 Показати заблокованих",
+                        callback_data="admin:clients_page:1:n:0"
+                    )]]
+                ),
+                parse_mode="HTML"
+            )
         
         stats_text = (
             f"\n📊 <b>Загальна статистика:</b>\n\n"
-            f"👥 Всього клієнтів: {len(clients)}\n"
-            f"✅ Активних: {len(active_clients)}\n"
-            f"🚫 Заблокованих: {len(blocked_clients)}\n"
-            f"📦 Всього замовлень: {total_orders}\n"
-            f"⭐ Середня карма: {avg_karma:.1f}/100"
+            f"👥 Всього клієнтів: {stats.total}\n"
+            f"✅ Активних: {stats.active}\n"
+            f"🚫 Заблокованих: {stats.blocked}\n"
+            f"📦 Всього замовлень: {stats.total_orders}\n"
+            f"⭐ Середня карма: {stats.avg_karma:.1f}/100"
         )
         
         await message.answer(stats_text, reply_markup=admin_menu_keyboard(), parse_mode="HTML")
     
+    @router.callback_query(F.data.startswith("admin:clients_page:"))
+    async def clients_page_callback(call: CallbackQuery) -> None:
+        """Наступна/попередня сторінка списку клієнтів"""
+        if not call.from_user or not is_admin(call.from_user.id):
+            await call.answer("❌ Немає доступу", show_alert=True)
+            return
+        
+        prefix, after, before = parse_pagination_callback(call.data)
+        blocked = prefix.rsplit(":", 1)[-1]
+        await call.answer()
+        try:
+            await call.message.edit_reply_markup(reply_markup=None)
+        except Exception:
+            pass
+        await send_clients_page(call.message, blocked == "1", after, before)
+    
     @router.callback_query(F.data.startswith("admin:client_info:"))
     async def show_client_info(call: CallbackQuery) -> None:
         """Показати детальну інформацію про клієнта"""
@@ -1893,24 +1889,21 @@ def create_router(config: AppConfig) -> Router:
             await call.answer("❌ Немає доступу", show_alert=True)
             return
         
-        from app.storage.db import get_online_drivers_count
-        online_count = await get_online_drivers_count(config.database_path)
+        # Кнопка 🔄 Оновити - свіжі цифри одним запитом (і заодно прогріти кеш для 📊 Статистика)
+        from app.storage.admin_metrics import refresh_admin_metrics
+        from app.utils.demand_tracker import get_demand_tracker
+        metrics = await refresh_admin_metrics(config.database_path)
         
-        # Отримати кількість водіїв за статусами
-        from app.storage.db_connection import db_manager
-        async with db_manager.connect(config.database_path) as db:
-            async with db.execute("SELECT status, COUNT(*) FROM drivers GROUP BY status") as cur:
-                status_counts = dict(await cur.fetchall())
-            
-            async with db.execute("SELECT COUNT(*) FROM users") as cur:
-                users_count = (await cur.fetchone())[0]
-            
-            async with db.execute("SELECT COUNT(*) FROM orders") as cur:
-                orders_count = (await cur.fetchone())[0]
+        # Онлайн водії - з лічильників у пам'яті
+        tracker = get_demand_tracker()
+        await tracker.ensure_ready(config.database_path)
+        online_count = tracker.online_drivers()
         
-        approved_count = status_counts.get("approved", 0)
-        pending_count = status_counts.get("pending", 0)
-        rejected_count = status_counts.get("rejected", 0)
+        users_count = metrics.total_users
+        orders_count = metrics.total_orders
+        approved_count = metrics.approved_drivers
+        pending_count = metrics.pending_drivers
+        rejected_count = metrics.rejected_drivers
         
         text = (
             "⚙️ <b>Налаштування системи</b>\n\n"
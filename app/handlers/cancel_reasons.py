@@ -11,6 +11,7 @@ from app.storage.db import (
     cancel_order_by_client,
     get_user_by_id,
 )
+from app.utils.message_render import edit_message_text
 
 logger = logging.getLogger(__name__)
 
@@ -80,14 +81,7 @@ def create_router(config: AppConfig) -> Router:
         success = await cancel_order_by_client(config.database_path, order_id, call.from_user.id)
         
         if success:
-            # 🛑 Зупинити всі менеджери для цього замовлення
-            from app.utils.live_location_manager import LiveLocationManager
-            from app.utils.priority_order_manager import PriorityOrderManager
-            from app.utils.order_timeout import cancel_order_timeout
-            
-            await LiveLocationManager.stop_tracking(order_id)
-            PriorityOrderManager.cancel_priority_timer(order_id)
-            cancel_order_timeout(order_id)
+            # 🛑 Таймери і live location зупиняють підписники подій замовлення (app/utils/order_events.py)
             
             await call.answer("✅ Замовлення скасовано")
             
@@ -135,11 +129,12 @@ def create_router(config: AppConfig) -> Router:
                     logger.info(f"🔔 Скасування з причиною #{order_id}: group_id={group_id}, city={client_city}, msg_id={order.group_message_id}, reason={reason_text}")
                     
                     if group_id:
-                        await call.bot.edit_message_text(
+                        await edit_message_text(
+                            call.bot,
+                            group_id,
+                            order.group_message_id,
                             f"❌ <b>ЗАМОВЛЕННЯ #{order_id} СКАСОВАНО КЛІЄНТОМ</b>\n\n"
                             f"Причина: {reason_text}",
-                            chat_id=group_id,
-                            message_id=order.group_message_id
                         )
                         logger.info(f"✅ Скасування #{order_id} з причиною надіслано в групу")
                     else:
@@ -11,7 +11,7 @@ from aiogram.types import (
 from app.config.config import AppConfig
 from app.storage.db import (
     get_user_by_id,
-    get_user_order_history,
+    get_order_history_page,
 )
 
 
@@ -61,7 +61,8 @@ def create_router(config: AppConfig) -> Router:
         if not message.from_user:
             return
         
-        orders = await get_user_order_history(config.database_path, message.from_user.id, limit=10)
+        page = await get_order_history_page(config.database_path, user_id=message.from_user.id, limit=10)
+        orders = page.items
         
         if not orders:
             await message.answer(
@@ -22,61 +22,29 @@ from app.config.config import AppConfig
 # Глобальний set для захисту від подвійного натискання "Завершити поїздку"
 _finishing_orders = set()
 
-# Глобальний словник для збереження message_id повідомлень водія по замовленню
-# Формат: {order_id: [message_id1, message_id2, ...]}
-_order_messages: dict[int, list[int]] = {}
-
-
-def add_order_message(order_id: int, message_id: int) -> None:
-    """Додати message_id до списку повідомлень замовлення"""
-    if order_id not in _order_messages:
-        _order_messages[order_id] = []
-    _order_messages[order_id].append(message_id)
-    logger.debug(f"📝 Збережено message_id={message_id} для замовлення #{order_id}")
-
-
-async def clear_order_messages(bot, chat_id: int, order_id: int) -> None:
-    """Видалити всі повідомлення замовлення з чату водія"""
-    if order_id not in _order_messages:
-        logger.debug(f"🔍 Немає збережених повідомлень для замовлення #{order_id}")
-        return
-    
-    message_ids = _order_messages.pop(order_id)
-    logger.info(f"🧹 Очищення {len(message_ids)} повідомлень для замовлення #{order_id}")
-    
-    deleted_count = 0
-    for msg_id in message_ids:
-        try:
-            await bot.delete_message(chat_id=chat_id, message_id=msg_id)
-            deleted_count += 1
-        except Exception as e:
-            logger.debug(f"⚠️ Не вдалося видалити message_id={msg_id}: {e}")
-    
-    logger.info(f"✅ Видалено {deleted_count}/{len(message_ids)} повідомлень з чату водія")
 from app.storage.db import (
     get_driver_by_tg_user_id,
     get_driver_by_id,
     get_order_by_id,
     accept_order,
     start_order,
-    complete_order,
+    complete_order_with_payment,
     get_driver_earnings_today,
     get_driver_detailed_earnings_today,
     get_active_order_for_driver,
     cancel_order_by_driver,
     get_driver_unpaid_commission,
-    get_driver_order_history,
+    get_order_history_page,
     mark_commission_paid,
-    Payment,
-    insert_payment,
-    get_latest_tariff,
     update_driver_location,
     set_driver_online_status,
     get_online_drivers_count,
-    get_driver_tips_total,
+    get_driver_panel_summary,
 )
+from app.storage.pricing_snapshot import get_pricing_snapshot
+from app.storage.message_ledger import order_scope, record_message
+from app.handlers.keyboards import pagination_buttons, parse_pagination_callback
 from app.utils.rate_limiter import check_rate_limit, get_time_until_reset, format_time_remaining
-from app.utils.order_timeout import cancel_order_timeout
 from app.utils.visual import (
     format_earnings_infographic,
     format_driver_stats,
@@ -172,16 +140,11 @@ def create_router(config: AppConfig) -> Router:
         # ⭐ ПЕРЕВІРКА АКТИВНОГО ЗАМОВЛЕННЯ
         active_order = await get_active_order_for_driver(config.database_path, driver.id)
         
-        # Заробіток
-        earnings, commission = await get_driver_earnings_today(config.database_path, message.from_user.id)
-        net = earnings - commission
-        
-        # Чайові
-        tips = 0.0
-        try:
-            tips = await get_driver_tips_total(config.database_path, message.from_user.id)
-        except:
-            tips = 0.0
+        # Заробіток за сьогодні та чайові - один запит до driver_daily_stats
+        summary = await get_driver_panel_summary(config.database_path, message.from_user.id)
+        earnings, commission = summary.earnings_today, summary.commission_today
+        net = summary.net_today
+        tips = summary.tips_total
         
         # Статус
         status = "🟢 Онлайн" if driver.online else "🔴 Офлайн"
@@ -376,7 +339,7 @@ def create_router(config: AppConfig) -> Router:
         
         # Відправити повідомлення і зберегти message_id для подальшого видалення
         sent_msg = await message.answer(text, reply_markup=kb, disable_web_page_preview=True)
-        add_order_message(order.id, sent_msg.message_id)
+        await record_message(config.database_path, sent_msg.chat.id, order_scope(order.id), sent_msg.message_id)
 
     @router.message(F.text == "🚀 Почати роботу")
     async def start_work(message: Message) -> None:
@@ -811,9 +774,8 @@ def create_router(config: AppConfig) -> Router:
             await call.message.edit_text("📊 <b>Статистика</b>\n\nОберіть період:", reply_markup=kb)
         await call.answer()
     
-    @router.callback_query(F.data == "stats:today")
-    async def show_stats_today(call: CallbackQuery) -> None:
-        """Статистика за сьогодні"""
+    async def show_period_stats(call: CallbackQuery, days: int, title: str, period_text: str) -> None:
+        """Статистика водія за останні `days` діб (агрегати рахує БД)"""
         if not call.from_user:
             return
         
@@ -822,58 +784,11 @@ def create_router(config: AppConfig) -> Router:
             await call.answer("❌ Водія не знайдено", show_alert=True)
             return
         
-        # Отримати статистику за сьогодні
-        from datetime import datetime, timedelta, timezone
-        from app.storage.db import get_driver_order_history
-        
-        # Сьогодні з початку дня
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Всі замовлення водія
-        all_orders = await get_driver_order_history(config.database_path, driver.tg_user_id, limit=100)
-        
-        # Фільтрувати за сьогодні
-        today_orders = []
-        for order in all_orders:
-            if order.created_at:
-                order_time = order.created_at
-                if isinstance(order_time, str):
-                    try:
-                        order_time = datetime.fromisoformat(order_time)
-                    except:
-                        continue
-                
-                if isinstance(order_time, datetime):
-                    if order_time.replace(tzinfo=timezone.utc) >= today_start:
-                        today_orders.append(order)
-        
-        # Підрахунок
-        total_orders = len(today_orders)
-        completed_orders = len([o for o in today_orders if o.status == 'completed'])
-        cancelled_orders = len([o for o in today_orders if o.status == 'cancelled'])
-        
-        earnings = sum(o.fare_amount for o in today_orders if o.status == 'completed' and o.fare_amount)
+        from app.storage.driver_stats import get_driver_period_stats
+        from app.utils.kyiv_time import kyiv_days_range
         
-        # Отримати комісію з тарифу
-        from app.storage.db import get_latest_tariff
-        tariff = await get_latest_tariff(config.database_path)
-        commission_rate = tariff.commission_percent if tariff else 0.02
-        commission = earnings * commission_rate
-        net = earnings - commission
-        commission_percent = int(commission_rate * 100)
-        
-        text = (
-            f"📊 <b>СТАТИСТИКА ЗА СЬОГОДНІ</b>\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"📦 <b>Всього замовлень:</b> {total_orders}\n"
-            f"✅ <b>Виконано:</b> {completed_orders}\n"
-            f"❌ <b>Скасовано:</b> {cancelled_orders}\n\n"
-            f"💰 <b>Заробіток:</b> {earnings:.0f} грн\n"
-            f"💳 <b>Комісія ({commission_percent}%):</b> {commission:.0f} грн\n"
-            f"💵 <b>Чистий:</b> {net:.0f} грн\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"📅 Дата: {datetime.now().strftime('%d.%m.%Y')}"
-        )
+        start, end = kyiv_days_range(days)
+        stats = await get_driver_period_stats(config.database_path, driver.id, start, end)
         
         kb = InlineKeyboardMarkup(
             inline_keyboard=[
@@ -882,156 +797,24 @@ def create_router(config: AppConfig) -> Router:
         )
         
         if call.message:
-            await call.message.edit_text(text, reply_markup=kb)
+            await call.message.edit_text(format_driver_stats(stats, title, period_text), reply_markup=kb)
         await call.answer()
     
+    @router.callback_query(F.data == "stats:today")
+    async def show_stats_today(call: CallbackQuery) -> None:
+        """Статистика за сьогодні"""
+        from app.utils.kyiv_time import kyiv_now
+        await show_period_stats(call, 1, "СТАТИСТИКА ЗА СЬОГОДНІ", f"Дата: {kyiv_now().strftime('%d.%m.%Y')}")
+    
     @router.callback_query(F.data == "stats:week")
     async def show_stats_week(call: CallbackQuery) -> None:
         """Статистика за тиждень"""
-        if not call.from_user:
-            return
-        
-        driver = await get_driver_by_tg_user_id(config.database_path, call.from_user.id)
-        if not driver:
-            await call.answer("❌ Водія не знайдено", show_alert=True)
-            return
-        
-        from datetime import datetime, timedelta, timezone
-        from app.storage.db import get_driver_order_history
-        
-        # 7 днів тому
-        week_start = datetime.now(timezone.utc) - timedelta(days=7)
-        
-        all_orders = await get_driver_order_history(config.database_path, driver.tg_user_id, limit=200)
-        
-        week_orders = []
-        for order in all_orders:
-            if order.created_at:
-                order_time = order.created_at
-                if isinstance(order_time, str):
-                    try:
-                        order_time = datetime.fromisoformat(order_time)
-                    except:
-                        continue
-                
-                if isinstance(order_time, datetime):
-                    if order_time.replace(tzinfo=timezone.utc) >= week_start:
-                        week_orders.append(order)
-        
-        total_orders = len(week_orders)
-        completed_orders = len([o for o in week_orders if o.status == 'completed'])
-        cancelled_orders = len([o for o in week_orders if o.status == 'cancelled'])
-        
-        earnings = sum(o.fare_amount for o in week_orders if o.status == 'completed' and o.fare_amount)
-        
-        # Отримати комісію з тарифу
-        from app.storage.db import get_latest_tariff
-        tariff = await get_latest_tariff(config.database_path)
-        commission_rate = tariff.commission_percent if tariff else 0.02
-        commission = earnings * commission_rate
-        net = earnings - commission
-        commission_percent = int(commission_rate * 100)
-        
-        # Середнє за день
-        avg_per_day = earnings / 7 if earnings > 0 else 0
-        
-        text = (
-            f"📊 <b>СТАТИСТИКА ЗА ТИЖДЕНЬ</b>\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"📦 <b>Всього замовлень:</b> {total_orders}\n"
-            f"✅ <b>Виконано:</b> {completed_orders}\n"
-            f"❌ <b>Скасовано:</b> {cancelled_orders}\n\n"
-            f"💰 <b>Заробіток:</b> {earnings:.0f} грн\n"
-            f"💳 <b>Комісія ({commission_percent}%):</b> {commission:.0f} грн\n"
-            f"💵 <b>Чистий:</b> {net:.0f} грн\n\n"
-            f"📈 <b>Середнє/день:</b> {avg_per_day:.0f} грн\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"📅 Період: останні 7 днів"
-        )
-        
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="« Назад", callback_data="work:stats")]
-            ]
-        )
-        
-        if call.message:
-            await call.message.edit_text(text, reply_markup=kb)
-        await call.answer()
+        await show_period_stats(call, 7, "СТАТИСТИКА ЗА ТИЖДЕНЬ", "Період: останні 7 днів")
     
     @router.callback_query(F.data == "stats:month")
     async def show_stats_month(call: CallbackQuery) -> None:
         """Статистика за місяць"""
-        if not call.from_user:
-            return
-        
-        driver = await get_driver_by_tg_user_id(config.database_path, call.from_user.id)
-        if not driver:
-            await call.answer("❌ Водія не знайдено", show_alert=True)
-            return
-        
-        from datetime import datetime, timedelta, timezone
-        from app.storage.db import get_driver_order_history
-        
-        # 30 днів тому
-        month_start = datetime.now(timezone.utc) - timedelta(days=30)
-        
-        all_orders = await get_driver_order_history(config.database_path, driver.tg_user_id, limit=500)
-        
-        month_orders = []
-        for order in all_orders:
-            if order.created_at:
-                order_time = order.created_at
-                if isinstance(order_time, str):
-                    try:
-                        order_time = datetime.fromisoformat(order_time)
-                    except:
-                        continue
-                
-                if isinstance(order_time, datetime):
-                    if order_time.replace(tzinfo=timezone.utc) >= month_start:
-                        month_orders.append(order)
-        
-        total_orders = len(month_orders)
-        completed_orders = len([o for o in month_orders if o.status == 'completed'])
-        cancelled_orders = len([o for o in month_orders if o.status == 'cancelled'])
-        
-        earnings = sum(o.fare_amount for o in month_orders if o.status == 'completed' and o.fare_amount)
-        
-        # Отримати комісію з тарифу
-        from app.storage.db import get_latest_tariff
-        tariff = await get_latest_tariff(config.database_path)
-        commission_rate = tariff.commission_percent if tariff else 0.02
-        commission = earnings * commission_rate
-        net = earnings - commission
-        commission_percent = int(commission_rate * 100)
-        
-        # Середнє за день
-        avg_per_day = earnings / 30 if earnings > 0 else 0
-        
-        text = (
-            f"📊 <b>СТАТИСТИКА ЗА МІСЯЦЬ</b>\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"📦 <b>Всього замовлень:</b> {total_orders}\n"
-            f"✅ <b>Виконано:</b> {completed_orders}\n"
-            f"❌ <b>Скасовано:</b> {cancelled_orders}\n\n"
-            f"💰 <b>Заробіток:</b> {earnings:.0f} грн\n"
-            f"💳 <b>Комісія ({commission_percent}%):</b> {commission:.0f} грн\n"
-            f"💵 <b>Чистий:</b> {net:.0f} грн\n\n"
-            f"📈 <b>Середнє/день:</b> {avg_per_day:.0f} грн\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"📅 Період: останні 30 днів"
-        )
-        
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="« Назад", callback_data="work:stats")]
-            ]
-        )
-        
-        if call.message:
-            await call.message.edit_text(text, reply_markup=kb)
-        await call.answer()
+        await show_period_stats(call, 30, "СТАТИСТИКА ЗА МІСЯЦЬ", "Період: останні 30 днів")
 
     # ⭐ ЛОГІКА LIVE LOCATION:
     # - Live location відправляється АВТОМАТИЧНО при прийнятті замовлення
@@ -1306,9 +1089,27 @@ def create_router(config: AppConfig) -> Router:
         
         await call.answer("❌ Оплату відхилено, водія сповіщено", show_alert=True)
 
+    async def render_driver_history(driver_tg_id: int, after=None, before=None):
+        """Текст і кнопки сторінки історії поїздок водія (None якщо поїздок немає)"""
+        page = await get_order_history_page(
+            config.database_path, driver_tg_id=driver_tg_id, after=after, before=before, limit=5
+        )
+        if not page.items:
+            return None, None
+        
+        text = "📜 <b>Історія поїздок:</b>\n\n"
+        for o in page.items:
+            text += f"{o.created_at.strftime('%d.%m %H:%M') if o.created_at else ''} "
+            text += f"{o.pickup_address[:20]}... → {o.destination_address[:20]}...\n"
+            text += f"   💰 {o.fare_amount or 0:.0f} грн\n\n"
+        
+        nav = pagination_buttons("drv_history", page)
+        kb = InlineKeyboardMarkup(inline_keyboard=[nav]) if nav else None
+        return text, kb
+
     @router.message(F.text == "📜 Історія поїздок")
     async def history(message: Message) -> None:
-        """Історія"""
+        """Історія (сторінками по 5, кнопки ◀️/▶️)"""
         if not message.from_user:
             return
         
@@ -1317,21 +1118,31 @@ def create_router(config: AppConfig) -> Router:
         if await check_driver_blocked_and_notify(config.database_path, message):
             return
         
-        orders = await get_driver_order_history(config.database_path, message.from_user.id, limit=5)
+        text, kb = await render_driver_history(message.from_user.id)
         
-        if not orders:
+        if not text:
             await message.answer(
                 "📜 Поки немає поїздок",
                 reply_markup=driver_panel_keyboard()
             )
             return
         
-        text = "📜 <b>Останні 5 поїздок:</b>\n\n"
-        for i, o in enumerate(orders, 1):
-            text += f"{i}. {o.pickup_address[:20]}... → {o.destination_address[:20]}...\n"
-            text += f"   💰 {o.fare_amount or 0:.0f} грн\n\n"
+        await message.answer(text, reply_markup=kb or driver_panel_keyboard())
+    
+    @router.callback_query(F.data.startswith("drv_history:"))
+    async def history_page(call: CallbackQuery) -> None:
+        """Наступна/попередня сторінка історії поїздок"""
+        if not call.from_user:
+            return
         
-        await message.answer(text, reply_markup=driver_panel_keyboard())
+        _, after, before = parse_pagination_callback(call.data)
+        text, kb = await render_driver_history(call.from_user.id, after, before)
+        await call.answer()
+        if text:
+            try:
+                await call.message.edit_text(text, reply_markup=kb)
+            except Exception:
+                pass
 
     # FSM для геолокації водія
     class DriverLocationStates(StatesGroup):
@@ -1510,12 +1321,6 @@ def create_router(config: AppConfig) -> Router:
             await state.clear()
             return
         
-        order = await get_order_by_id(config.database_path, order_id)
-        if not order or order.status != "pending":
-            await message.answer("❌ Замовлення вже прийнято іншим водієм")
-            await state.clear()
-            return
-        
         lat = message.location.latitude
         lon = message.location.longitude
         
@@ -1524,10 +1329,10 @@ def create_router(config: AppConfig) -> Router:
         
         logger.info(f"📍 Водій {driver.full_name} надіслав геолокацію {lat}, {lon} для прийняття замовлення #{order_id}")
         
-        # ПРИЙНЯТИ ЗАМОВЛЕННЯ
-        success = await accept_order(config.database_path, order_id, driver.id)
+        # ПРИЙНЯТИ ЗАМОВЛЕННЯ (compare-and-set: None якщо інший водій випередив)
+        order = await accept_order(config.database_path, order_id, driver.id)
         
-        if not success:
+        if not order:
             await message.answer(
                 "❌ Не вдалося прийняти замовлення\n"
                 "(Можливо, хтось вас випередив)",
@@ -1536,10 +1341,7 @@ def create_router(config: AppConfig) -> Router:
             await state.clear()
             return
         
-        # СКАСУВАТИ ТАЙМЕРИ
-        cancel_order_timeout(order_id)
-        from app.utils.priority_order_manager import PriorityOrderManager
-        PriorityOrderManager.cancel_priority_timer(order_id)
+        # Таймери пошуку скасовує підписник order.accepted (app/utils/order_events.py)
         
         logger.info(f"✅ Замовлення #{order_id} прийнято водієм {driver.id}")
         
@@ -1661,7 +1463,7 @@ def create_router(config: AppConfig) -> Router:
             "🚗 Використовуйте кнопки для керування поїздкою:",
             reply_markup=kb_trip
         )
-        add_order_message(order_id, sent_msg.message_id)
+        await record_message(config.database_path, sent_msg.chat.id, order_scope(order_id), sent_msg.message_id)
         
         # Очистити FSM стан
         await state.clear()
@@ -1688,18 +1490,12 @@ def create_router(config: AppConfig) -> Router:
             await state.clear()
             return
         
-        order = await get_order_by_id(config.database_path, order_id)
-        if not order or order.status != "pending":
-            await message.answer("❌ Замовлення вже прийнято іншим водієм", reply_markup=driver_panel_keyboard())
-            await state.clear()
-            return
-        
         logger.info(f"⚠️ Водій {driver.id} відмовився від надсилання геолокації для замовлення #{order_id}")
         
-        # ПРИЙНЯТИ ЗАМОВЛЕННЯ БЕЗ ГЕОЛОКАЦІЇ
-        success = await accept_order(config.database_path, order_id, driver.id)
+        # ПРИЙНЯТИ ЗАМОВЛЕННЯ БЕЗ ГЕОЛОКАЦІЇ (compare-and-set: None якщо інший водій випередив)
+        order = await accept_order(config.database_path, order_id, driver.id)
         
-        if not success:
+        if not order:
             await message.answer(
                 "❌ Не вдалося прийняти замовлення\n"
                 "(Можливо, хтось вас випередив)",
@@ -1708,10 +1504,7 @@ def create_router(config: AppConfig) -> Router:
             await state.clear()
             return
         
-        # СКАСУВАТИ ТАЙМЕРИ
-        cancel_order_timeout(order_id)
-        from app.utils.priority_order_manager import PriorityOrderManager
-        PriorityOrderManager.cancel_priority_timer(order_id)
+        # Таймери пошуку скасовує підписник order.accepted (app/utils/order_events.py)
         
         logger.info(f"✅ Замовлення #{order_id} прийнято водієм {driver.id} БЕЗ live location")
         
@@ -1800,7 +1593,7 @@ def create_router(config: AppConfig) -> Router:
             "🚗 Використовуйте кнопки для керування поїздкою:",
             reply_markup=kb_trip
         )
-        add_order_message(order_id, sent_msg.message_id)
+        await record_message(config.database_path, sent_msg.chat.id, order_scope(order_id), sent_msg.message_id)
         
         # Очистити FSM стан
         await state.clear()
@@ -2058,48 +1851,27 @@ def create_router(config: AppConfig) -> Router:
         distance_m = order.distance_m if order.distance_m else 0
         duration_s = order.duration_s if order.duration_s else 0
         # Отримати поточний тариф для комісії
-        from app.storage.db import get_latest_tariff, insert_payment, Payment
-        tariff = await get_latest_tariff(config.database_path)
-        commission_rate = tariff.commission_percent if tariff else 0.02
+        commission_rate = (await get_pricing_snapshot(config.database_path)).commission_percent
         commission = fare * commission_rate
         
-        await complete_order(
+        # Замовлення, payment (облік комісії), карма та лічильник водія - однією транзакцією
+        success = await complete_order_with_payment(
             config.database_path,
             order_id,
             driver.id,
             fare,
             distance_m,
             duration_s,
-            commission
-        )
-        
-        # 🛑 Зупинити всі менеджери для цього замовлення
-        from app.utils.live_location_manager import LiveLocationManager
-        from app.utils.priority_order_manager import PriorityOrderManager
-        from app.utils.order_timeout import cancel_order_timeout
-        
-        await LiveLocationManager.stop_tracking(order_id)
-        PriorityOrderManager.cancel_priority_timer(order_id)
-        cancel_order_timeout(order_id)
-        
-        # Запис у payments для обліку комісії
-        payment = Payment(
-            id=None,
-            order_id=order_id,
-            driver_id=driver.id,
-            amount=fare,
-            commission=commission,
-            commission_paid=False,
+            commission,
             payment_method=order.payment_method or 'cash',
-            created_at=datetime.now(timezone.utc),
         )
-        await insert_payment(config.database_path, payment)
+        if not success:
+            await call.answer("❌ Не вдалося завершити замовлення", show_alert=True)
+            return
         
-        await call.answer(f"✅ Завершено! {fare:.0f} грн", show_alert=True)
+        # 🛑 Таймери, live location і очищення чату водія - підписники order.completed (app/utils/order_events.py)
         
-        # 🧹 ОЧИСТИТИ ЧАТ ВОДІЯ - видалити всі повідомлення про замовлення
-        if call.from_user:
-            await clear_order_messages(call.bot, call.from_user.id, order_id)
+        await call.answer(f"✅ Завершено! {fare:.0f} грн", show_alert=True)
         
         if call.message:
             await call.message.edit_text(f"✅ Поїздка завершена!\n💰 {fare:.0f} грн")
@@ -2542,42 +2314,25 @@ def create_router(config: AppConfig) -> Router:
         distance_m = order.distance_m if order.distance_m else 0
         duration_s = order.duration_s if order.duration_s else 0
         
-        from app.storage.db import get_latest_tariff, insert_payment, Payment
-        tariff = await get_latest_tariff(config.database_path)
-        commission_rate = tariff.commission_percent if tariff else 0.02
+        commission_rate = (await get_pricing_snapshot(config.database_path)).commission_percent
         commission = fare * commission_rate
         
-        await complete_order(
+        # Замовлення, payment, карма та лічильник водія - однією транзакцією
+        success = await complete_order_with_payment(
             config.database_path,
             order.id,
             driver.id,
             fare,
             distance_m,
             duration_s,
-            commission
+            commission,
+            payment_method=order.payment_method or 'cash',
         )
+        if not success:
+            await message.answer("❌ Не вдалося завершити замовлення. Спробуйте ще раз.")
+            return
         
-        # 🛑 Зупинити всі менеджери для цього замовлення
-        from app.utils.live_location_manager import LiveLocationManager
-        from app.utils.priority_order_manager import PriorityOrderManager
-        from app.utils.order_timeout import cancel_order_timeout
-        
-        await LiveLocationManager.stop_tracking(order.id)
-        PriorityOrderManager.cancel_priority_timer(order.id)
-        cancel_order_timeout(order.id)
-        
-        # Запис у payments
-        payment = Payment(
-            id=None,
-            order_id=order.id,
-            driver_id=driver.id,
-            amount=fare,
-            commission=commission,
-            commission_paid=False,
-            payment_method=order.payment_method or 'cash',  # ✅ ДОДАНО
-            created_at=datetime.now(timezone.utc)
-        )
-        await insert_payment(config.database_path, payment)
+        # 🛑 Таймери, live location і очищення чату водія - підписники order.completed (app/utils/order_events.py)
         
         # 🌟 Відправити запит на оцінку водія клієнту
         try:
@@ -2652,15 +2407,7 @@ def create_router(config: AppConfig) -> Router:
         success = await cancel_order_by_driver(config.database_path, order.id, driver.id, "Водій відмовився")
         
         if success:
-            # 🛑 Зупинити всі менеджери для цього замовлення
-            from app.utils.live_location_manager import LiveLocationManager
-            from app.utils.priority_order_manager import PriorityOrderManager
-            from app.utils.order_timeout import cancel_order_timeout
-            
-            await LiveLocationManager.stop_tracking(order.id)
-            PriorityOrderManager.cancel_priority_timer(order.id)
-            cancel_order_timeout(order.id)
-            logger.info(f"✅ Всі менеджери зупинено для скасованого замовлення #{order.id}")
+            # 🛑 Таймери і live location зупиняють підписники подій замовлення (app/utils/order_events.py)
             
             # ⚠️ ЗМЕНШИТИ КАРМУ ВОДІЯ за відмову
             from app.storage.db import decrease_driver_karma
@@ -2720,7 +2467,7 @@ def create_router(config: AppConfig) -> Router:
             return
         
         # Зберегти message_id повідомлення водія (текст кнопки)
-        add_order_message(order.id, message.message_id)
+        await record_message(config.database_path, message.chat.id, order_scope(order.id), message.message_id)
         
         # Повідомити клієнта (коротке повідомлення)
         try:
@@ -2755,7 +2502,7 @@ def create_router(config: AppConfig) -> Router:
             f"✅ <b>Клієнт отримав повідомлення про ваше прибуття</b>",
             reply_markup=kb
         )
-        add_order_message(order.id, sent_msg.message_id)
+        await record_message(config.database_path, sent_msg.chat.id, order_scope(order.id), sent_msg.message_id)
     
     @router.message(F.text == "✅ КЛІЄНТ В АВТО")
     async def client_in_car(message: Message) -> None:
@@ -2773,7 +2520,7 @@ def create_router(config: AppConfig) -> Router:
             return
         
         # Зберегти message_id повідомлення водія (текст кнопки)
-        add_order_message(order.id, message.message_id)
+        await record_message(config.database_path, message.chat.id, order_scope(order.id), message.message_id)
         
         # Оновити статус на "in_progress"
         await start_order(config.database_path, order.id, driver.id)
@@ -2810,7 +2557,7 @@ def create_router(config: AppConfig) -> Router:
             f"✅ <b>Клієнт отримав повідомлення про початок поїздки</b>",
             reply_markup=kb
         )
-        add_order_message(order.id, sent_msg.message_id)
+        await record_message(config.database_path, sent_msg.chat.id, order_scope(order.id), sent_msg.message_id)
     
     @router.message(F.text == "🏁 ЗАВЕРШИТИ ПОЇЗДКУ")
     async def finish_trip(message: Message) -> None:
@@ -2836,7 +2583,7 @@ def create_router(config: AppConfig) -> Router:
             order = await get_active_order_for_driver(config.database_path, driver.id)
             if order:
                 # Зберегти message_id повідомлення водія (текст кнопки)
-                add_order_message(order.id, message.message_id)
+                await record_message(config.database_path, message.chat.id, order_scope(order.id), message.message_id)
             
             # Спочатку перевірити чи є взагалі замовлення у водія (для діагностики)
             from app.storage.db_connection import db_manager
@@ -2863,8 +2610,7 @@ def create_router(config: AppConfig) -> Router:
             
             # Розрахунок
             fare = order.fare_amount if order.fare_amount else 100.0
-            tariff = await get_latest_tariff(config.database_path)
-            commission_percent = tariff.commission_percent if tariff else 0.02
+            commission_percent = (await get_pricing_snapshot(config.database_path)).commission_percent
             commission = fare * commission_percent
             net_earnings = fare - commission
             
@@ -2872,16 +2618,17 @@ def create_router(config: AppConfig) -> Router:
             distance_m = order.distance_m if order.distance_m else 0
             duration_s = 0  # Можна додати розрахунок тривалості пізніше
             
-            # Завершити замовлення
+            # Завершити замовлення: статус, payment, карма та лічильник водія - однією транзакцією
             logger.info(f"💾 Спроба завершити замовлення #{order.id} (поточний статус: {order.status})")
-            success = await complete_order(
+            success = await complete_order_with_payment(
                 config.database_path,
                 order.id,
                 driver.id,
                 fare,
                 distance_m,
                 duration_s,
-                commission
+                commission,
+                payment_method=order.payment_method or 'cash',
             )
             
             if not success:
@@ -2891,32 +2638,7 @@ def create_router(config: AppConfig) -> Router:
             
             logger.info(f"✅ Замовлення #{order.id} успішно завершено")
             
-            # 🛑 Зупинити всі менеджери для цього замовлення
-            from app.utils.live_location_manager import LiveLocationManager
-            from app.utils.priority_order_manager import PriorityOrderManager
-            from app.utils.order_timeout import cancel_order_timeout
-            
-            await LiveLocationManager.stop_tracking(order.id)
-            PriorityOrderManager.cancel_priority_timer(order.id)
-            cancel_order_timeout(order.id)
-            logger.info(f"✅ Всі менеджери зупинено для замовлення #{order.id}")
-            
-            # Зберегти платіж
-            payment = Payment(
-                id=None,
-                driver_id=driver.id,
-                order_id=order.id,
-                amount=fare,
-                commission=commission,
-                commission_paid=False,
-                payment_method=order.payment_method or 'cash',
-                created_at=datetime.now(timezone.utc)
-            )
-            await insert_payment(config.database_path, payment)
-            
-            # ⭐ ЗБІЛЬШИТИ КАРМУ ВОДІЯ за успішне замовлення
-            from app.storage.db import increase_driver_karma
-            await increase_driver_karma(config.database_path, driver.id)
+            # 🛑 Таймери, live location і очищення чату водія - підписники order.completed (app/utils/order_events.py)
             
             # Повідомити клієнта з кнопками оцінки
             try:
@@ -2950,9 +2672,6 @@ def create_router(config: AppConfig) -> Router:
             except Exception as e:
                 logger.error(f"Failed to notify client: {e}")
             
-            # 🧹 ОЧИСТИТИ ЧАТ ВОДІЯ - видалити всі повідомлення про замовлення
-            await clear_order_messages(message.bot, message.chat.id, order.id)
-            
             # Повернути панель водія
             commission_percent = int(commission_percent * 100)
             await message.answer(
@@ -3314,16 +3033,11 @@ def create_router(config: AppConfig) -> Router:
         # Перевірка активного замовлення
         active_order = await get_active_order_for_driver(config.database_path, driver.id)
         
-        # Заробіток
-        earnings, commission = await get_driver_earnings_today(config.database_path, call.from_user.id)
-        net = earnings - commission
-        
-        # Чайові
-        tips = 0.0
-        try:
-            tips = await get_driver_tips_total(config.database_path, call.from_user.id)
-        except:
-            tips = 0.0
+        # Заробіток за сьогодні та чайові - один запит до driver_daily_stats
+        summary = await get_driver_panel_summary(config.database_path, call.from_user.id)
+        earnings, commission = summary.earnings_today, summary.commission_today
+        net = summary.net_today
+        tips = summary.tips_total
         
         # Статус
         status = "🟢 Онлайн" if driver.online else "🔴 Офлайн"
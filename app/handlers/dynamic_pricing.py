@@ -2,10 +2,11 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
-from typing import Tuple
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
 
 from app.config.config import AppConfig
+from app.utils.kyiv_time import HOURS_PER_WEEK, KYIV_TZ, to_kyiv
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,8 @@ def get_surge_multiplier(
     night_percent: float = 50.0,
     peak_hours_percent: float = 30.0,
     weekend_percent: float = 20.0,
-    monday_morning_percent: float = 15.0
+    monday_morning_percent: float = 15.0,
+    now: Optional[datetime] = None
 ) -> Tuple[float, str]:
     """
     Отримати множник підвищення та причину
@@ -26,11 +28,12 @@ def get_surge_multiplier(
         peak_hours_percent: % надбавки за піковий час (з БД)
         weekend_percent: % надбавки за вихідні (з БД)
         monday_morning_percent: % надбавки за понеділок вранці (з БД)
+        now: Момент розрахунку (за замовчуванням - поточний час; рахується за Києвом)
     
     Returns:
         (multiplier, reason) - множник та текст причини
     """
-    now = datetime.now()
+    now = datetime.now(KYIV_TZ) if now is None else to_kyiv(now)
     hour = now.hour
     day_of_week = now.weekday()  # 0 = Monday, 6 = Sunday
     
@@ -67,6 +70,51 @@ def get_surge_multiplier(
     return multiplier, reason_text
 
 
+# Понеділок 00:00 - точка відліку для слотів тижня (дата довільна, лише день тижня)
+_WEEK_START = datetime(2024, 1, 1, tzinfo=KYIV_TZ)
+
+
+def build_surge_table(
+    city: str = "Київ",
+    night_percent: float = 50.0,
+    peak_hours_percent: float = 30.0,
+    weekend_percent: float = 20.0,
+    monday_morning_percent: float = 15.0,
+    overrides: Iterable = ()
+) -> Tuple[Tuple[float, str], ...]:
+    """
+    Таблиця часових націнок на тиждень: 168 слотів (день тижня × година, київський час).
+    
+    Слот = hour_of_week(now); значення ті ж, що повертає get_surge_multiplier.
+    
+    Args:
+        overrides: Ручні слоти адміна (SurgeSlotOverride), що діють у потрібну добу -
+            замінюють розраховане значення. Разові (valid_on) мають пріоритет над щотижневими,
+            слоти конкретного міста - над загальними (city=None)
+    
+    Returns:
+        Кортеж з 168 пар (multiplier, reason)
+    """
+    table = [
+        get_surge_multiplier(
+            city, night_percent, peak_hours_percent, weekend_percent, monday_morning_percent,
+            _WEEK_START + timedelta(hours=slot)
+        )
+        for slot in range(HOURS_PER_WEEK)
+    ]
+    
+    # Щотижневі, потім разові; в кожній групі загальні, потім міські - пізніші перезаписують
+    for override in sorted(overrides, key=lambda o: (o.valid_on is not None, o.city is not None)):
+        if override.city is not None and override.city != city:
+            continue
+        slot = override.weekday * 24 + override.hour
+        multiplier = 1.0 + override.percent / 100.0
+        reason = override.reason or "Особливий тариф"
+        table[slot] = (multiplier, f"{reason} (+{override.percent:.0f}%)")
+    
+    return tuple(table)
+
+
 def get_weather_multiplier(weather_percent: float = 0.0) -> Tuple[float, str]:
     """
     Множник за погодою
@@ -178,7 +226,24 @@ async def calculate_dynamic_price(
     # Фінальна ціна
     final_price = base_fare * total_multiplier
     
-    # Пояснення
+    explanation = build_price_explanation(
+        time_mult, time_reason, weather_mult, weather_reason, demand_mult, demand_reason
+    )
+    
+    logger.debug("Dynamic pricing: base=%s, final=%s, multiplier=%s", base_fare, final_price, total_multiplier)
+    
+    return final_price, explanation, total_multiplier
+
+
+def build_price_explanation(
+    time_mult: float,
+    time_reason: str,
+    weather_mult: float,
+    weather_reason: str,
+    demand_mult: float,
+    demand_reason: str
+) -> str:
+    """Текст пояснення ціни для клієнта (по рядку на кожен фактор)"""
     reasons = []
     if time_reason:
         reasons.append(f"• {time_reason}: +{int((time_mult-1)*100)}%")
@@ -190,13 +255,8 @@ async def calculate_dynamic_price(
         reasons.append(f"• {demand_reason}: {sign}{change}%")
     
     if not reasons:
-        explanation = "Базовий тариф"
-    else:
-        explanation = "\n".join(reasons)
-    
-    logger.info(f"Dynamic pricing: base={base_fare}, final={final_price}, multiplier={total_multiplier}")
-    
-    return final_price, explanation, total_multiplier
+        return "Базовий тариф"
+    return "\n".join(reasons)
 
 
 def get_surge_emoji(multiplier: float) -> str:
@@ -0,0 +1,206 @@
+"""Розрахунок вартості для всіх класів авто за один прохід"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.handlers.car_classes import get_car_class_multiplier
+from app.handlers.dynamic_pricing import (
+    build_price_explanation,
+    build_surge_table,
+    get_demand_multiplier,
+    get_surge_emoji,
+    get_weather_multiplier,
+)
+from app.storage.pricing_snapshot import PricingSnapshot
+from app.utils.kyiv_time import hour_of_week, kyiv_now, to_kyiv
+
+logger = logging.getLogger(__name__)
+
+
+# Порядок класів у кнопках вибору
+CLASS_ORDER = ("economy", "standard", "comfort", "business")
+
+
+@dataclass(frozen=True)
+class DemandState:
+    """Поточний попит/пропозиція для міста"""
+    online_drivers: int
+    pending_orders: int
+
+
+@dataclass(frozen=True)
+class SurgeState:
+    """Динамічна націнка (однакова для всіх класів і всіх поїздок в одному проході)"""
+    multiplier: float
+    explanation: str
+    emoji: str
+
+
+@dataclass(frozen=True)
+class FareQuote:
+    """Ціни всіх класів для однієї поїздки"""
+    base_fare: float
+    prices: Dict[str, float]
+    multiplier: float
+    explanation: str
+    emoji: str
+
+    def price(self, car_class: str) -> float:
+        """Ціна класу (невідомий клас - як економ)"""
+        return self.prices.get(car_class, self.prices["economy"])
+
+
+class FareEngine:
+    """
+    Калькулятор вартості, зібраний з одного PricingSnapshot.
+
+    - Тариф і множники класів розпаковуються один раз при створенні
+    - Часові націнки - готова таблиця на 168 годин тижня (по місту, з ручними слотами адміна;
+      якщо є разові слоти на дату - перебудовується раз на київську добу)
+    - Націнки за часом/погодою/попитом рахуються один раз на прохід,
+      а не для кожного класу окремо
+    - quote_batch() рахує багато поїздок з тією ж націнкою (симуляції, прев'ю для адміна)
+    """
+
+    def __init__(self, snapshot: PricingSnapshot):
+        self.version = snapshot.version
+        self._pricing = snapshot.pricing
+        self._surge_overrides = snapshot.surge_overrides
+        self._has_dated_overrides = any(o.valid_on is not None for o in snapshot.surge_overrides)
+        self._surge_tables: Dict[str, Tuple[Tuple[float, str], ...]] = {}
+        self._surge_day: Optional[date] = None
+
+        tariff = snapshot.tariff
+        self._has_tariff = tariff is not None
+        if tariff:
+            self._base = tariff.base_fare
+            self._per_km = tariff.per_km
+            self._per_minute = tariff.per_minute
+            self._minimum = tariff.minimum
+
+        custom = snapshot.class_multipliers
+        self._class_multipliers: Tuple[Tuple[str, float], ...] = tuple(
+            (key, custom[key] if key in custom else get_car_class_multiplier(key))
+            for key in CLASS_ORDER
+        )
+
+    @property
+    def has_tariff(self) -> bool:
+        return self._has_tariff
+
+    def surge_table(self, city: str = "Київ", now: Optional[datetime] = None) -> Tuple[Tuple[float, str], ...]:
+        """Таблиця часових націнок міста (будується один раз на версію знімка і добу разових слотів)"""
+        if self._has_dated_overrides:
+            day = to_kyiv(now or kyiv_now()).date()
+            if day != self._surge_day:
+                # Разовий слот діє лише свою добу - минулі і майбутні в таблицю не потрапляють
+                self._surge_tables.clear()
+                self._surge_day = day
+        table = self._surge_tables.get(city)
+        if table is None:
+            p = self._pricing
+            overrides = [o for o in self._surge_overrides if o.applies_on(self._surge_day)]
+            table = build_surge_table(
+                city, p.night_percent, p.peak_hours_percent,
+                p.weekend_percent, p.monday_morning_percent, overrides
+            )
+            self._surge_tables[city] = table
+        return table
+
+    def surge(
+        self,
+        demand: DemandState,
+        city: str = "Київ",
+        now: Optional[datetime] = None,
+        zone_multiplier: float = 1.0
+    ) -> SurgeState:
+        """
+        Динамічна націнка з тими ж правилами, що й calculate_dynamic_price.
+
+        zone_multiplier - додаткова націнка району подачі (app.utils.geo_surge)
+        """
+        p = self._pricing
+        now = now or kyiv_now()
+        time_mult, time_reason = self.surge_table(city, now)[hour_of_week(now)]
+        weather_mult, weather_reason = get_weather_multiplier(p.weather_percent)
+        demand_mult, demand_reason = get_demand_multiplier(
+            demand.online_drivers, demand.pending_orders, p.no_drivers_percent,
+            p.demand_very_high_percent, p.demand_high_percent,
+            p.demand_medium_percent, p.demand_low_discount_percent
+        )
+        multiplier = time_mult * weather_mult * demand_mult * zone_multiplier
+        explanation = build_price_explanation(
+            time_mult, time_reason, weather_mult, weather_reason, demand_mult, demand_reason
+        )
+        if zone_multiplier > 1.0:
+            explanation += f"\n• Високий попит у вашому районі: +{int(round((zone_multiplier - 1) * 100))}%"
+        return SurgeState(multiplier, explanation, get_surge_emoji(multiplier))
+
+    def _quote_with_surge(self, distance_km: float, duration_minutes: float, surge: SurgeState) -> FareQuote:
+        base_fare = max(
+            self._minimum,
+            self._base + (distance_km * self._per_km) + (duration_minutes * self._per_minute)
+        )
+        total = surge.multiplier
+        prices = {key: (base_fare * class_mult) * total for key, class_mult in self._class_multipliers}
+        return FareQuote(base_fare, prices, total, surge.explanation, surge.emoji)
+
+    def quote(
+        self,
+        distance_km: float,
+        duration_minutes: float,
+        demand: DemandState,
+        city: str = "Київ",
+        now: Optional[datetime] = None,
+        zone_multiplier: float = 1.0
+    ) -> Optional[FareQuote]:
+        """
+        Ціни всіх класів для однієї поїздки.
+
+        Returns:
+            FareQuote або None якщо тариф не налаштований
+        """
+        if not self._has_tariff:
+            return None
+        surge = self.surge(demand, city, now, zone_multiplier)
+        quote = self._quote_with_surge(distance_km, duration_minutes, surge)
+        logger.debug(
+            "💰 Fare quote v%s: %.1f км, %.0f хв, base=%.2f, multiplier=%.2f",
+            self.version, distance_km, duration_minutes, quote.base_fare, surge.multiplier,
+        )
+        return quote
+
+    def quote_batch(
+        self,
+        trips: Iterable[Tuple[float, float]],
+        demand: DemandState,
+        city: str = "Київ",
+        now: Optional[datetime] = None,
+        zone_multiplier: float = 1.0
+    ) -> List[FareQuote]:
+        """
+        Ціни для багатьох поїздок (distance_km, duration_minutes) з однією націнкою.
+
+        Порожній список якщо тариф не налаштований.
+        """
+        if not self._has_tariff:
+            return []
+        surge = self.surge(demand, city, now, zone_multiplier)
+        return [self._quote_with_surge(km, minutes, surge) for km, minutes in trips]
+
+
+# Останній зібраний engine (перезбирається при зміні версії знімка)
+_engine: Optional[FareEngine] = None
+
+
+def get_fare_engine(snapshot: PricingSnapshot) -> FareEngine:
+    """Отримати FareEngine для знімка ціноутворення"""
+    global _engine
+    engine = _engine
+    if engine is None or engine.version != snapshot.version:
+        engine = FareEngine(snapshot)
+        _engine = engine
+    return engine
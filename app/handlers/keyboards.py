@@ -1,8 +1,15 @@
 """Клавіатури для різних станів бота"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup, InlineKeyboardButton, InlineKeyboardMarkup
 
 from app.config.config import AVAILABLE_CITIES
 
+if TYPE_CHECKING:
+    from app.storage.db import KeysetPage
+
 
 def main_menu_keyboard(
     is_registered: bool = False, 
@@ -129,3 +136,30 @@ def driver_city_selection_keyboard() -> InlineKeyboardMarkup:
     for city in AVAILABLE_CITIES:
         buttons.append([InlineKeyboardButton(text=f"📍 {city}", callback_data=f"driver_city:{city}")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def pagination_buttons(prefix: str, page: KeysetPage) -> List[InlineKeyboardButton]:
+    """Кнопки ◀️/▶️ для KeysetPage: callback_data = {prefix}:{p|n}:{курсор}"""
+    buttons = []
+    if page.prev_cursor is not None:
+        buttons.append(InlineKeyboardButton(text="◀️ Назад", callback_data=f"{prefix}:p:{page.prev_cursor}"))
+    if page.next_cursor is not None:
+        buttons.append(InlineKeyboardButton(text="▶️ Далі", callback_data=f"{prefix}:n:{page.next_cursor}"))
+    return buttons
+
+
+def parse_pagination_callback(data: str) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    {prefix}:{p|n}:{курсор} -> (prefix, after, before).
+    
+    Без курсора (або курсор 0) - перша сторінка.
+    """
+    parts = data.rsplit(":", 2)
+    if len(parts) < 3 or parts[1] not in ("p", "n") or not parts[2].isdigit():
+        return data, None, None
+    prefix, direction, cursor = parts[0], parts[1], int(parts[2])
+    if not cursor:
+        return prefix, None, None
+    if direction == "p":
+        return prefix, None, cursor
+    return prefix, cursor, None
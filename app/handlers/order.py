@@ -23,19 +23,22 @@ from app.storage.db import (
     insert_order,
     get_user_by_id,
     get_user_order_history,
-    get_latest_tariff,
     update_order_group_message,
     cancel_order_by_client,
     get_order_by_id,
     get_user_active_order,
     increase_order_fare,
 )
+from app.storage.pricing_snapshot import get_pricing_snapshot
+from app.storage.message_ledger import ORDER_FLOW
 from app.utils.maps import get_distance_and_duration, geocode_address, reverse_geocode_with_places, reverse_geocode
 from app.utils.privacy import mask_phone_number
 from app.utils.validation import validate_address, validate_comment
 from app.utils.rate_limiter import check_rate_limit, get_time_until_reset, format_time_remaining
 from app.utils.order_timeout import start_order_timeout
-from app.handlers.car_classes import CAR_CLASSES, calculate_fare_with_class
+from app.utils.chat_cleanup import OrderFlowLedgerMiddleware, schedule_chat_cleanup
+from app.utils.message_render import edit_message_text
+from app.handlers.car_classes import CAR_CLASSES
 from app.utils.visual import (
     format_process_message,
     get_status_emoji,
@@ -46,32 +49,6 @@ from app.utils.visual import (
 logger = logging.getLogger(__name__)
 
 
-async def clean_chat_history(bot, chat_id: int, current_message_id: int, count: int = 20) -> None:
-    """
-    Видалити попередні повідомлення для чистоти чату
-    
-    Args:
-        bot: Bot instance
-        chat_id: ID чату
-        current_message_id: ID поточного повідомлення
-        count: Скільки попередніх повідомлень видалити (за замовчуванням 20)
-    """
-    deleted = 0
-    for i in range(1, count + 1):
-        try:
-            await bot.delete_message(
-                chat_id=chat_id,
-                message_id=current_message_id - i
-            )
-            deleted += 1
-        except Exception:
-            # Ігноруємо помилки (повідомлення може бути вже видалене)
-            pass
-    
-    if deleted > 0:
-        logger.info(f"🧹 Очищено {deleted} повідомлень в чаті {chat_id}")
-
-
 # Експортовані класи для використання в інших модулях
 class OrderStates(StatesGroup):
     pickup = State()  # Спочатку звідки
@@ -85,6 +62,10 @@ class OrderStates(StatesGroup):
 def create_router(config: AppConfig) -> Router:
     router = Router(name="order")
 
+    # Реєстр повідомлень процесу оформлення (для очищення чату після підтвердження)
+    router.message.middleware(OrderFlowLedgerMiddleware(config.database_path))
+    router.callback_query.middleware(OrderFlowLedgerMiddleware(config.database_path))
+
     CANCEL_TEXT = "❌ Скасувати"
     SKIP_TEXT = "⏩ Пропустити"
     CONFIRM_TEXT = "✅ Підтвердити"
@@ -144,56 +125,26 @@ def create_router(config: AppConfig) -> Router:
             await state.update_data(distance_km=distance_km, duration_minutes=duration_minutes)
             logger.warning(f"⚠️ Використовую приблизну відстань: {distance_km} км")
         
-        # Отримати тариф
-        tariff = await get_latest_tariff(config.database_path)
-        if not tariff:
+        # Тариф та налаштування ціноутворення - зі знімка (без запитів до БД)
+        snapshot = await get_pricing_snapshot(config.database_path)
+        if not snapshot.tariff:
             await message.answer("❌ Помилка: тариф не налаштований. Зверніться до адміністратора.")
             await state.clear()
             return
         
-        # Розрахувати базову ціну (для економ класу)
-        base_fare = tariff.base_fare + (distance_km * tariff.per_km) + (duration_minutes * tariff.per_minute)
-        if base_fare < tariff.minimum:
-            base_fare = tariff.minimum
-        
-        # Розрахувати ЦІНУ З УРАХУВАННЯМ ДИНАМІКИ для КОЖНОГО класу
-        car_class_prices = {}
-        car_class_explanations = {}
-        from app.handlers.dynamic_pricing import calculate_dynamic_price, get_surge_emoji
-        from app.storage.db import get_online_drivers_count, get_pricing_settings
+        # Розрахувати ЦІНУ З УРАХУВАННЯМ ДИНАМІКИ для всіх класів за один прохід
+        from app.handlers.fare_engine import CLASS_ORDER, get_fare_engine
+        from app.utils.demand_tracker import get_demand_state
+        from app.utils.geo_surge import get_zone_multiplier
         city = data.get('city', 'Київ') or 'Київ'
-        online_count = await get_online_drivers_count(config.database_path, city)
-        pending_orders_estimate = 5
-        
-        # Отримати всі налаштування ціноутворення з БД
-        pricing = await get_pricing_settings(config.database_path)
-        
-        # Якщо налаштування не знайдено - використати дефолтні значення
-        if pricing is None:
-            from app.storage.db import PricingSettings
-            pricing = PricingSettings()
-        
-        # Створити словник множників класів для передачі в calculate_fare_with_class
-        custom_multipliers = {
-            "economy": pricing.economy_multiplier,
-            "standard": pricing.standard_multiplier,
-            "comfort": pricing.comfort_multiplier,
-            "business": pricing.business_multiplier
-        }
+        demand = await get_demand_state(config.database_path, city)
+        zone_mult = get_zone_multiplier(pickup_lat, pickup_lon)
         
-        for class_key in ["economy", "standard", "comfort", "business"]:
-            class_fare = calculate_fare_with_class(base_fare, class_key, custom_multipliers)
-            final_price, explanation, total_mult = await calculate_dynamic_price(
-                class_fare, city, online_count, pending_orders_estimate,
-                pricing.night_percent, pricing.weather_percent,
-                pricing.peak_hours_percent, pricing.weekend_percent,
-                pricing.monday_morning_percent, pricing.no_drivers_percent,
-                pricing.demand_very_high_percent, pricing.demand_high_percent,
-                pricing.demand_medium_percent, pricing.demand_low_discount_percent
-            )
-            car_class_prices[class_key] = round(final_price, 2)
-            emoji = get_surge_emoji(total_mult)
-            car_class_explanations[class_key] = (emoji, explanation)
+        quote = get_fare_engine(snapshot).quote(
+            distance_km, duration_minutes, demand, city, zone_multiplier=zone_mult
+        )
+        car_class_prices = {key: round(quote.prices[key], 2) for key in CLASS_ORDER}
+        car_class_explanations = {key: (quote.emoji, quote.explanation) for key in CLASS_ORDER}
         
         # Створити кнопки з цінами для кожного класу
         buttons = []
@@ -906,41 +857,24 @@ def create_router(config: AppConfig) -> Router:
         class_name = get_car_class_name(car_class)
         # Зафіксувати обрану суму (перерахунок як при відображенні)
         data = await state.get_data()
-        tariff = await get_latest_tariff(config.database_path)
+        snapshot = await get_pricing_snapshot(config.database_path)
+        if not snapshot.tariff:
+            await call.message.answer("❌ Помилка: тариф не налаштований. Зверніться до адміністратора.")
+            return
         distance_km = data.get("distance_km", 5.0)
         duration_minutes = data.get("duration_minutes", 15.0)
-        base_fare = tariff.base_fare + (distance_km * tariff.per_km) + (duration_minutes * tariff.per_minute)
-        if base_fare < tariff.minimum:
-            base_fare = tariff.minimum
-        from app.handlers.dynamic_pricing import calculate_dynamic_price
-        from app.storage.db import get_online_drivers_count, get_pricing_settings
+        from app.handlers.fare_engine import get_fare_engine
+        from app.utils.demand_tracker import get_demand_state
+        from app.utils.geo_surge import get_zone_multiplier
         city = data.get('city', 'Київ') or 'Київ'
-        online_count = await get_online_drivers_count(config.database_path, city)
-        
-        # Отримати всі налаштування ціноутворення з БД
-        pricing = await get_pricing_settings(config.database_path)
-        
-        # Якщо налаштування не знайдено - використати дефолтні значення
-        if pricing is None:
-            from app.storage.db import PricingSettings
-            pricing = PricingSettings()
-        
-        custom_multipliers = {
-            "economy": pricing.economy_multiplier,
-            "standard": pricing.standard_multiplier,
-            "comfort": pricing.comfort_multiplier,
-            "business": pricing.business_multiplier
-        }
+        demand = await get_demand_state(config.database_path, city)
+        zone_mult = get_zone_multiplier(data.get("pickup_lat"), data.get("pickup_lon"))
         
-        class_fare = calculate_fare_with_class(base_fare, car_class, custom_multipliers)
-        final_price, explanation, total_mult = await calculate_dynamic_price(
-            class_fare, city, online_count, 5,
-            pricing.night_percent, pricing.weather_percent,
-            pricing.peak_hours_percent, pricing.weekend_percent,
-            pricing.monday_morning_percent, pricing.no_drivers_percent,
-            pricing.demand_very_high_percent, pricing.demand_high_percent,
-            pricing.demand_medium_percent, pricing.demand_low_discount_percent
+        quote = get_fare_engine(snapshot).quote(
+            distance_km, duration_minutes, demand, city, zone_multiplier=zone_mult
         )
+        final_price = quote.price(car_class)
+        explanation = quote.explanation
         await state.update_data(estimated_fare=final_price, fare_explanation=explanation)
 
         # Перейти до коментаря
@@ -1519,9 +1453,8 @@ def create_router(config: AppConfig) -> Router:
                 await state.clear()
                 return
         
-        # 🧹 Очистити всі попередні повідомлення процесу замовлення
-        if message and message.message_id:
-            await clean_chat_history(message.bot, user_id, message.message_id, count=50)
+        # 🧹 Очистити повідомлення процесу замовлення (по реєстру, у фоні)
+        schedule_chat_cleanup(message.bot, config.database_path, user_id, ORDER_FLOW)
         
         data = await state.get_data()
         
@@ -1597,41 +1530,20 @@ def create_router(config: AppConfig) -> Router:
                     logger.info(f"📤 Відправка в групу: відстань {km:.1f} км")
                     
                     # Розрахунок з ТІЄЮ Ж ЛОГІКОЮ що і для клієнта
-                    tariff = await get_latest_tariff(config.database_path)
-                    if tariff:
+                    snapshot = await get_pricing_snapshot(config.database_path)
+                    if snapshot.tariff:
                         # Базовий тариф
-                        base_fare = max(
-                            tariff.minimum,
-                            tariff.base_fare + (km * tariff.per_km) + (minutes * tariff.per_minute)
-                        )
+                        base_fare = snapshot.base_fare(km, minutes)
                         
                         # Застосувати клас авто (ТАК ЯК ДЛЯ КЛІЄНТА!)
                         from app.handlers.car_classes import calculate_fare_with_class, get_car_class_name
-                        from app.storage.db import get_online_drivers_count, get_pricing_settings
-                        
-                        # Отримати налаштування ціноутворення
-                        pricing = await get_pricing_settings(config.database_path)
-                        
-                        # Якщо налаштування не знайдено - використати дефолтні значення
-                        if pricing is None:
-                            from app.storage.db import PricingSettings
-                            pricing = PricingSettings()
                         
-                        custom_multipliers = {
-                            "economy": pricing.economy_multiplier,
-                            "standard": pricing.standard_multiplier,
-                            "comfort": pricing.comfort_multiplier,
-                            "business": pricing.business_multiplier
-                        }
+                        custom_multipliers = snapshot.class_multipliers
                         
                         car_class = data.get('car_class', 'economy')
                         class_fare = calculate_fare_with_class(base_fare, car_class, custom_multipliers)
                         
-                        # Динамічне ціноутворення (ТАК ЯК ДЛЯ КЛІЄНТА!)
-                        from app.handlers.dynamic_pricing import calculate_dynamic_price, get_surge_emoji
-                        
-                        city = client_city or data.get('city', 'Київ')
-                        online_count = await get_online_drivers_count(config.database_path, city)
+                        from app.handlers.dynamic_pricing import get_surge_emoji
                         
                         # НЕ перераховуємо ціну — беремо зафіксовану
                         estimated_fare = data.get('estimated_fare') or class_fare
@@ -2037,14 +1949,7 @@ def create_router(config: AppConfig) -> Router:
         success = await cancel_order_by_client(config.database_path, order_id, call.from_user.id)
         
         if success:
-            # 🛑 Зупинити всі менеджери для цього замовлення
-            from app.utils.live_location_manager import LiveLocationManager
-            from app.utils.priority_order_manager import PriorityOrderManager
-            from app.utils.order_timeout import cancel_order_timeout
-            
-            await LiveLocationManager.stop_tracking(order_id)
-            PriorityOrderManager.cancel_priority_timer(order_id)
-            cancel_order_timeout(order_id)
+            # 🛑 Таймери і live location зупиняють підписники подій замовлення (app/utils/order_events.py)
             
             # 🚗 ПОВІДОМИТИ ВОДІЯ якщо замовлення було прийнято
             if order.driver_id and order.status == 'accepted':
@@ -2102,11 +2007,12 @@ def create_router(config: AppConfig) -> Router:
 
                     async def _try_edit(chat_id: int) -> bool:
                         try:
-                            await call.bot.edit_message_text(
+                            await edit_message_text(
+                                call.bot,
+                                chat_id,
+                                order.group_message_id,
                                 "❌ <b>ЗАМОВЛЕННЯ СКАСОВАНО КЛІЄНТОМ</b>\n\n"
                                 f"Замовлення #{order_id} скасовано клієнтом.",
-                                chat_id=chat_id,
-                                message_id=order.group_message_id
                             )
                             return True
                         except Exception as ee:
@@ -2271,10 +2177,11 @@ def create_router(config: AppConfig) -> Router:
                             f"&travelmode=driving'>Відкрити маршрут на Google Maps</a>"
                         )
                     
-                    await call.bot.edit_message_text(
-                        chat_id=group_id,
-                        message_id=order.group_message_id,
-                        text=(
+                    await edit_message_text(
+                        call.bot,
+                        group_id,
+                        order.group_message_id,
+                        (
                             f"🚖 <b>ЗАМОВЛЕННЯ #{order_id}</b>\n\n"
                             f"💰 <b>ВАРТІСТЬ: {int(new_fare)} грн</b> 💰\n"
                             f"⬆️ <b>+{int(increase_amount)} грн</b> (клієнт підвищив!)\n"
@@ -2337,14 +2244,7 @@ def create_router(config: AppConfig) -> Router:
         success = await cancel_order_by_client(config.database_path, order_id, call.from_user.id)
         
         if success:
-            # 🛑 Зупинити всі менеджери для цього замовлення
-            from app.utils.live_location_manager import LiveLocationManager
-            from app.utils.priority_order_manager import PriorityOrderManager
-            from app.utils.order_timeout import cancel_order_timeout
-            
-            await LiveLocationManager.stop_tracking(order_id)
-            PriorityOrderManager.cancel_priority_timer(order_id)
-            cancel_order_timeout(order_id)
+            # 🛑 Таймери і live location зупиняють підписники подій замовлення (app/utils/order_events.py)
             
             await call.answer("✅ Замовлення скасовано", show_alert=True)
             
@@ -2364,11 +2264,12 @@ def create_router(config: AppConfig) -> Router:
 
                     async def _try_edit(chat_id: int) -> bool:
                         try:
-                            await call.bot.edit_message_text(
-                                chat_id=chat_id,
-                                message_id=order.group_message_id,
-                                text=f"❌ <b>ЗАМОВЛЕННЯ #{order_id} СКАСОВАНО КЛІЄНТОМ</b>\n\n"
-                                     f"📍 Маршрут: {order.pickup_address} → {order.destination_address}"
+                            await edit_message_text(
+                                call.bot,
+                                chat_id,
+                                order.group_message_id,
+                                f"❌ <b>ЗАМОВЛЕННЯ #{order_id} СКАСОВАНО КЛІЄНТОМ</b>\n\n"
+                                f"📍 Маршрут: {order.pickup_address} → {order.destination_address}",
                             )
                             return True
                         except Exception as ee:
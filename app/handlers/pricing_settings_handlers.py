@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 from aiogram import F, Router
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 
@@ -150,6 +151,7 @@ def create_pricing_handlers(router: Router, config, is_admin, SettingsStates, ge
                 [InlineKeyboardButton(text="🔥 Піковий час", callback_data="timesurge:peak")],
                 [InlineKeyboardButton(text="🎉 Вихідні", callback_data="timesurge:weekend")],
                 [InlineKeyboardButton(text="📅 Понеділок вранці", callback_data="timesurge:monday")],
+                [InlineKeyboardButton(text="🗓 Окремі години (свята)", callback_data="settings:surge_slots")],
                 [InlineKeyboardButton(text="🔙 Назад", callback_data="settings:back_to_main")]
             ]
         )
@@ -233,6 +235,141 @@ def create_pricing_handlers(router: Router, config, is_admin, SettingsStates, ge
         else:
             await message.answer("❌ Помилка збереження")
     
+    # ==================== РУЧНІ СЛОТИ (СВЯТА) ====================
+    
+    WEEKDAY_NAMES = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Нд"]
+    
+    def parse_slot_day(value: str):
+        """"1".."7" - щотижня: (weekday, None); "31.12" або "31.12.2026" - разово: (weekday, дата)"""
+        if "." not in value:
+            weekday = int(value) - 1
+            if not 0 <= weekday <= 6:
+                raise ValueError()
+            return weekday, None
+        
+        from datetime import date
+        from app.utils.kyiv_time import kyiv_now
+        today = kyiv_now().date()
+        parts = value.split(".")
+        day, month = int(parts[0]), int(parts[1])
+        if len(parts) > 2:
+            valid_on = date(int(parts[2]), month, day)
+        else:
+            # Без року - найближча така дата
+            valid_on = date(today.year, month, day)
+            if valid_on < today:
+                valid_on = date(today.year + 1, month, day)
+        if valid_on < today:
+            raise ValueError()
+        return valid_on.weekday(), valid_on
+    
+    def slot_day_label(weekday: int, valid_on) -> str:
+        if valid_on is None:
+            return WEEKDAY_NAMES[weekday]
+        return f"{valid_on:%d.%m.%Y} ({WEEKDAY_NAMES[weekday]})"
+    
+    @router.callback_query(F.data == "settings:surge_slots")
+    async def show_surge_slots(call: CallbackQuery) -> None:
+        """Показати ручні націнки на окремі години тижня"""
+        if not call.from_user or not is_admin(call.from_user.id):
+            return
+        
+        await call.answer()
+        from app.storage.db import get_surge_slot_overrides
+        from app.utils.kyiv_time import kyiv_now
+        overrides = await get_surge_slot_overrides(config.database_path)
+        today = kyiv_now().date()
+        
+        if overrides:
+            lines = [
+                f"• #{o.id} {slot_day_label(o.weekday, o.valid_on)} {o.hour:02d}:00 "
+                f"({o.city or 'всі міста'}): <b>+{o.percent:.0f}%</b> {o.reason or ''}"
+                f"{' ⌛ минула' if o.valid_on and o.valid_on < today else ''}"
+                for o in overrides
+            ]
+            slots_text = "\n".join(lines)
+        else:
+            slots_text = "<i>Немає</i>"
+        
+        text = (
+            "🗓 <b>ОКРЕМІ ГОДИНИ (київський час)</b>\n\n"
+            "Замінюють часову націнку на конкретну годину тижня або окремої дати.\n\n"
+            f"{slots_text}\n\n"
+            "━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+            "📝 Додати/змінити:\n"
+            "<code>/surge_slot день година відсоток [місто] [причина]</code>\n"
+            "• день: 1 (Пн) ... 7 (Нд) - щотижня, або дата ДД.ММ[.РРРР] - лише цього дня\n"
+            "• година: 0-23\n"
+            "• місто: назва або <code>*</code> для всіх міст\n"
+            "Наприклад: <code>/surge_slot 31.12 22 60 * Новий рік</code>\n\n"
+            "🗑 Видалити: <code>/surge_slot_del ID</code>"
+        )
+        
+        kb = InlineKeyboardMarkup(
+            inline_keyboard=[
+                [InlineKeyboardButton(text="🔙 Назад", callback_data="settings:time_surges")]
+            ]
+        )
+        
+        await call.message.edit_text(text, reply_markup=kb)
+    
+    @router.message(Command("surge_slot"))
+    async def save_surge_slot(message: Message, command: CommandObject) -> None:
+        """Зберегти ручну націнку на слот тижня"""
+        if not message.from_user or not is_admin(message.from_user.id):
+            return
+        
+        parts = (command.args or "").split(maxsplit=4)
+        try:
+            weekday, valid_on = parse_slot_day(parts[0])
+            hour = int(parts[1])
+            percent = float(parts[2])
+            if not (0 <= hour <= 23 and 0 <= percent <= 200):
+                raise ValueError()
+        except (ValueError, IndexError):
+            await message.answer(
+                "❌ Формат: <code>/surge_slot день(1-7 або ДД.ММ[.РРРР], не в минулому) "
+                "година(0-23) відсоток(0-200) [місто|*] [причина]</code>"
+            )
+            return
+        
+        city = parts[3] if len(parts) > 3 and parts[3] != "*" else None
+        reason = parts[4] if len(parts) > 4 else None
+        
+        from app.storage.db import SurgeSlotOverride, upsert_surge_slot_override
+        success = await upsert_surge_slot_override(
+            config.database_path,
+            SurgeSlotOverride(
+                id=None, city=city, weekday=weekday, hour=hour, percent=percent, reason=reason, valid_on=valid_on
+            )
+        )
+        
+        if success:
+            await message.answer(
+                f"✅ Націнку збережено: {slot_day_label(weekday, valid_on)} {hour:02d}:00 "
+                f"({city or 'всі міста'}) <b>+{percent:.0f}%</b>"
+            )
+        else:
+            await message.answer("❌ Помилка збереження")
+    
+    @router.message(Command("surge_slot_del"))
+    async def delete_surge_slot(message: Message, command: CommandObject) -> None:
+        """Видалити ручну націнку"""
+        if not message.from_user or not is_admin(message.from_user.id):
+            return
+        
+        try:
+            override_id = int((command.args or "").strip())
+        except ValueError:
+            await message.answer("❌ Формат: <code>/surge_slot_del ID</code>")
+            return
+        
+        from app.storage.db import delete_surge_slot_override
+        if await delete_surge_slot_override(config.database_path, override_id):
+            await message.answer(f"✅ Націнку #{override_id} видалено")
+        else:
+            await message.answer("❌ Націнку не знайдено")
+    
     # ==================== ПОПИТ ====================
     
     @router.callback_query(F.data == "settings:demand")
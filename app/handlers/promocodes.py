@@ -144,9 +144,9 @@ async def apply_promocode(db_path: str, code: str, user_id: int, fare: float) ->
 
 
 async def use_promocode(db_path: str, promocode_id: int, user_id: int, order_id: int, discount_amount: float) -> None:
-    """Записати використання промокоду"""
+    """Записати використання промокоду (запис + лічильник в одній транзакції)"""
     from app.storage.db_connection import db_manager
-    async with db_manager.connect(db_path) as db:
+    async with db_manager.unit_of_work(db_path) as db:
         # Додати використання
         await db.execute(
             """
@@ -161,7 +161,6 @@ async def use_promocode(db_path: str, promocode_id: int, user_id: int, order_id:
             "UPDATE promocodes SET uses_count = uses_count + 1 WHERE id = ?",
             (promocode_id,)
         )
-        await db.commit()
 
 
 def create_router(config: AppConfig) -> Router:
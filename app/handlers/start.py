@@ -20,7 +20,8 @@ from aiogram.types import (
 
 from app.config.config import AppConfig
 from app.storage.db import get_user_by_id, User, upsert_user
-from app.handlers.keyboards import main_menu_keyboard
+from app.handlers.keyboards import main_menu_keyboard, pagination_buttons, parse_pagination_callback
+from app.utils.message_render import edit_message_text
 
 logger = logging.getLogger(__name__)
 
@@ -285,10 +286,10 @@ def create_router(config: AppConfig) -> Router:
         except:
             pass
         
-        # Отримати актуальну комісію з БД
-        from app.storage.db import get_latest_tariff
-        tariff = await get_latest_tariff(config.database_path)
-        commission_percent = tariff.commission_percent * 100 if tariff else 2.0
+        # Отримати актуальну комісію (знімок ціноутворення)
+        from app.storage.pricing_snapshot import get_pricing_snapshot
+        snapshot = await get_pricing_snapshot(config.database_path)
+        commission_percent = snapshot.commission_percent * 100
         
         help_text = (
             "ℹ️ <b>Як користуватися ботом?</b>\n\n"
@@ -514,14 +515,7 @@ def create_router(config: AppConfig) -> Router:
         success = await cancel_order_by_client(config.database_path, order_id, call.from_user.id)
         
         if success:
-            # 🛑 Зупинити всі менеджери для цього замовлення
-            from app.utils.live_location_manager import LiveLocationManager
-            from app.utils.priority_order_manager import PriorityOrderManager
-            from app.utils.order_timeout import cancel_order_timeout
-            
-            await LiveLocationManager.stop_tracking(order_id)
-            PriorityOrderManager.cancel_priority_timer(order_id)
-            cancel_order_timeout(order_id)
+            # 🛑 Таймери і live location зупиняють підписники подій замовлення (app/utils/order_events.py)
             
             # ⚠️ ЗМЕНШИТИ КАРМУ КЛІЄНТА за скасування
             from app.storage.db import decrease_client_karma
@@ -560,11 +554,12 @@ def create_router(config: AppConfig) -> Router:
                     group_id = get_city_group_id(config, client_city)
                     
                     if group_id:
-                        await call.bot.edit_message_text(
-                            chat_id=group_id,
-                            message_id=order.group_message_id,
-                            text=f"❌ <b>ЗАМОВЛЕННЯ #{order.id} СКАСОВАНО КЛІЄНТОМ</b>\n\n"
-                                 f"📍 Маршрут: {order.pickup_address} → {order.destination_address}"
+                        await edit_message_text(
+                            call.bot,
+                            group_id,
+                            order.group_message_id,
+                            f"❌ <b>ЗАМОВЛЕННЯ #{order.id} СКАСОВАНО КЛІЄНТОМ</b>\n\n"
+                            f"📍 Маршрут: {order.pickup_address} → {order.destination_address}",
                         )
                 except Exception as e:
                     # Якщо повідомлення вже видалене - це не помилка
@@ -661,14 +656,18 @@ def create_router(config: AppConfig) -> Router:
             f"Ви можете зателефонувати водієві за цим номером."
         )
     
-    @router.callback_query(F.data == "profile:history")
+    @router.callback_query(F.data.startswith("profile:history"))
     async def show_order_history(call: CallbackQuery) -> None:
-        """Показати історію замовлень"""
+        """Показати історію замовлень (сторінками по 10, кнопки ◀️/▶️)"""
         if not call.from_user:
             return
         
-        from app.storage.db import get_user_order_history
-        orders = await get_user_order_history(config.database_path, call.from_user.id, limit=10)
+        from app.storage.db import get_order_history_page
+        _, after, before = parse_pagination_callback(call.data)
+        page = await get_order_history_page(
+            config.database_path, user_id=call.from_user.id, after=after, before=before, limit=10
+        )
+        orders = page.items
         
         if not orders:
             kb = InlineKeyboardMarkup(inline_keyboard=[
@@ -699,7 +698,9 @@ def create_router(config: AppConfig) -> Router:
                 text += f"💰 {o.fare_amount:.0f} грн\n"
             text += "\n"
         
+        nav = pagination_buttons("profile:history", page)
         kb = InlineKeyboardMarkup(inline_keyboard=[
+            *([nav] if nav else []),
             [InlineKeyboardButton(text="⬅️ Повернутися", callback_data="profile:back")]
         ])
         
@@ -897,8 +898,8 @@ def create_router(config: AppConfig) -> Router:
         if not call.from_user:
             return
         
-        from app.storage.db import get_user_order_history
-        orders = await get_user_order_history(config.database_path, call.from_user.id, limit=10)
+        from app.storage.db import get_order_history_page
+        orders = (await get_order_history_page(config.database_path, user_id=call.from_user.id, limit=10)).items
         
         if not orders:
             await call.answer("📜 У вас поки немає замовлень", show_alert=True)
@@ -36,81 +36,37 @@ def create_router(config: AppConfig) -> Router:
     logger.info(f"🔧 Config webapp_url: {config.webapp_url}")
     logger.info("=" * 80)
     
-    # ⭐⭐⭐ ТЕСТОВИЙ ОБРОБНИК - спіймає ВСІ повідомлення в webapp router
-    @router.message()
-    async def test_catch_all(message: Message, state: FSMContext) -> None:
-        """Діагностичний обробник - ловить ВСЕ"""
-        logger.info("=" * 80)
-        logger.info("🚨 WEBAPP ROUTER: Caught a message (any type)!")
-        logger.info(f"  User: {message.from_user.id}")
-        logger.info(f"  Content type: {message.content_type}")
-        logger.info(f"  Has web_app_data attr: {hasattr(message, 'web_app_data')}")
-        
-        if hasattr(message, 'web_app_data') and message.web_app_data:
-            logger.info(f"  ✅ web_app_data IS PRESENT!")
-            logger.info(f"  web_app_data.data: {message.web_app_data.data}")
-        else:
-            logger.info(f"  ❌ web_app_data is None or missing")
-            
-        logger.info(f"  Message model_dump keys: {list(message.model_dump().keys())}")
-        logger.info("=" * 80)
-    
     @router.message(F.web_app_data)
     async def handle_webapp_data(message: Message, state: FSMContext) -> None:
         """
         Обробник даних з WebApp (карти)
         """
-        logger.info("=" * 80)
-        logger.info(f"🗺 WEBAPP F.web_app_data HANDLER TRIGGERED!")
-        logger.info(f"🗺 WEBAPP DATA RECEIVED from user {message.from_user.id}")
-        logger.info("=" * 80)
-        logger.info(f"📦 Message object: {message}")
-        logger.info(f"📦 Message type: {message.content_type}")
-        logger.info(f"📦 Has web_app_data: {hasattr(message, 'web_app_data')}")
-        logger.info(f"📦 web_app_data is None: {message.web_app_data is None}")
+        logger.info("🗺 WebApp data від користувача %s", message.from_user.id)
+        logger.debug("📦 Message object: %r", message)
         
         if not message.web_app_data:
-            logger.error("=" * 60)
-            logger.error("❌ ERROR: message.web_app_data is None!")
-            logger.error("=" * 60)
-            logger.error(f"Message dict: {message.model_dump()}")
+            logger.error("❌ ERROR: message.web_app_data is None (message %s)", message.message_id)
             await message.answer("❌ Помилка: не отримано даних з WebApp")
             return
         
         try:
             # Парсинг даних з WebApp
             raw_data = message.web_app_data.data
-            logger.info(f"📦 Raw WebApp data string: '{raw_data}'")
-            logger.info(f"📦 Data type: {type(raw_data)}")
-            logger.info(f"📦 Data length: {len(raw_data)}")
-            
-            logger.info("🔧 Parsing JSON...")
+            logger.debug("📦 Raw WebApp data: %r", raw_data)
             data = json.loads(raw_data)
-            logger.info(f"✅ Parsed JSON successfully: {data}")
-            logger.info(f"🔍 Data keys: {list(data.keys())}")
-            logger.info(f"🔍 Data type field: '{data.get('type')}'")
             
             if data.get('type') == 'location':
-                logger.info("✅ Data type is 'location'")
-                
                 latitude = data.get('latitude')
                 longitude = data.get('longitude')
                 
-                logger.info(f"📍 Extracted coordinates:")
-                logger.info(f"  - latitude: {latitude} (type: {type(latitude)})")
-                logger.info(f"  - longitude: {longitude} (type: {type(longitude)})")
-                
                 if not latitude or not longitude:
-                    logger.error(f"❌ Missing coordinates! lat={latitude}, lon={longitude}")
+                    logger.error("❌ Missing coordinates! lat=%s, lon=%s", latitude, longitude)
                     await message.answer("❌ Помилка: не вдалося отримати координати")
                     return
                 
-                logger.info("✅ Coordinates are valid")
-                
                 # Отримати адресу з координат (reverse geocoding)
-                logger.info(f"🌍 Calling reverse_geocode({latitude}, {longitude})...")
                 address = await reverse_geocode("", latitude, longitude)
-                logger.info(f"✅ Reverse geocoding result: '{address}'")
+                logger.debug("✅ Reverse geocoding result: %r", address)
                 
                 if not address:
                     address = f"📍 Координати: {latitude:.6f}, {longitude:.6f}"
@@ -121,13 +77,10 @@ def create_router(config: AppConfig) -> Router:
                 state_data = await state.get_data()
                 
                 waiting_for = state_data.get('waiting_for')
-                logger.info(f"📍 WebApp location received:")
-                logger.info(f"  - Latitude: {latitude}")
-                logger.info(f"  - Longitude: {longitude}")
-                logger.info(f"  - Address: {address}")
-                logger.info(f"  - Current state: {current_state}")
-                logger.info(f"  - Waiting for: {waiting_for}")
-                logger.info(f"  - All state data keys: {list(state_data.keys())}")
+                logger.debug(
+                    "📍 WebApp location: %s, %s -> %s (state=%s, waiting_for=%s, keys=%s)",
+                    latitude, longitude, address, current_state, waiting_for, list(state_data),
+                )
                 
                 # Перевірити в якому стані користувач (pickup або destination)
                 # ВАЖЛИВО: перевіряємо waiting_for ПЕРШИМ (надійніший спосіб!)
@@ -141,8 +94,9 @@ def create_router(config: AppConfig) -> Router:
                         waiting_for=None,  # Очистити, щоб не було конфліктів
                     )
                     
-                    logger.info(f"✅ WebApp pickup збережено: {address} ({latitude}, {longitude})")
-                    logger.info(f"📦 State після збереження pickup: {await state.get_data()}")
+                    logger.info("✅ WebApp pickup збережено: %s (%s, %s)", address, latitude, longitude)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("📦 State після збереження pickup: %s", await state.get_data())
                     
                     # Перейти до наступного кроку - destination
                     from app.handlers.order import OrderStates
@@ -182,8 +136,9 @@ def create_router(config: AppConfig) -> Router:
                         waiting_for=None,  # Очистити, щоб не було конфліктів
                     )
                     
-                    logger.info(f"✅ WebApp destination збережено: {address} ({latitude}, {longitude})")
-                    logger.info(f"📦 State після збереження destination: {await state.get_data()}")
+                    logger.info("✅ WebApp destination збережено: %s (%s, %s)", address, latitude, longitude)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("📦 State після збереження destination: %s", await state.get_data())
                     
                     # Показати повідомлення про розрахунок
                     await message.answer(
@@ -210,58 +165,48 @@ def create_router(config: AppConfig) -> Router:
                     
                     # Розрахувати відстань
                     from app.utils.maps import get_distance_and_duration
-                    from app.storage.db import get_latest_tariff, get_pricing_settings, get_online_drivers_count
-                    from app.handlers.car_classes import calculate_fare_with_class, get_car_class_name, CAR_CLASSES
-                    from app.handlers.dynamic_pricing import calculate_dynamic_price, get_surge_emoji
+                    from app.storage.pricing_snapshot import get_pricing_snapshot
+                    from app.handlers.car_classes import get_car_class_name, CAR_CLASSES
+                    from app.handlers.fare_engine import get_fare_engine
+                    from app.utils.demand_tracker import get_demand_state
+                    from app.utils.geo_surge import get_zone_multiplier
                     
                     distance_km = None
                     duration_minutes = None
                     
                     if pickup_lat and pickup_lon and dest_lat and dest_lon:
-                        logger.info(f"📏 Розраховую відстань: ({pickup_lat},{pickup_lon}) → ({dest_lat},{dest_lon})")
+                        logger.debug("📏 Розраховую відстань: (%s,%s) → (%s,%s)", pickup_lat, pickup_lon, dest_lat, dest_lon)
                         result = await get_distance_and_duration("", pickup_lat, pickup_lon, dest_lat, dest_lon)
                         if result:
                             distance_m, duration_s = result
                             distance_km = distance_m / 1000.0
                             duration_minutes = duration_s / 60.0
                             await state.update_data(distance_km=distance_km, duration_minutes=duration_minutes, distance_m=distance_m, duration_s=duration_s)
-                            logger.info(f"✅ Відстань: {distance_km:.1f} км, час: {duration_minutes:.0f} хв")
+                            logger.debug("✅ Відстань: %.1f км, час: %.0f хв", distance_km, duration_minutes)
                     
                     if not distance_km:
                         distance_km = 5.0
                         duration_minutes = 15
                         await state.update_data(distance_km=distance_km, duration_minutes=duration_minutes)
                     
-                    # Отримати тариф
-                    tariff = await get_latest_tariff(config.database_path)
-                    if not tariff:
+                    # Тариф та налаштування ціноутворення (знімок без запитів до БД)
+                    snapshot = await get_pricing_snapshot(config.database_path)
+                    if not snapshot.tariff:
                         await message.answer("❌ Помилка: тариф не налаштований. Зверніться до адміністратора.")
                         return
                     
-                    # Базовий тариф
-                    base_fare = max(
-                        tariff.minimum,
-                        tariff.base_fare + (distance_km * tariff.per_km) + (duration_minutes * tariff.per_minute)
-                    )
-                    
-                    # Отримати налаштування ціноутворення
-                    pricing = await get_pricing_settings(config.database_path)
-                    if pricing is None:
-                        from app.storage.db import PricingSettings
-                        pricing = PricingSettings()
-                    
-                    custom_multipliers = {
-                        "economy": pricing.economy_multiplier,
-                        "standard": pricing.standard_multiplier,
-                        "comfort": pricing.comfort_multiplier,
-                        "business": pricing.business_multiplier
-                    }
-                    
                     # Отримати місто клієнта для динамічного ціноутворення
                     from app.storage.db import get_user_by_id
                     user = await get_user_by_id(config.database_path, message.from_user.id)
                     client_city = user.city if user and user.city else None
-                    online_count = await get_online_drivers_count(config.database_path, client_city)
+                    demand = await get_demand_state(config.database_path, client_city)
+                    
+                    # Ціни всіх класів за один прохід
+                    quote = get_fare_engine(snapshot).quote(
+                        distance_km, duration_minutes, demand, client_city or "Київ",
+                        zone_multiplier=get_zone_multiplier(pickup_lat, pickup_lon)
+                    )
+                    base_fare = quote.base_fare
                     
                     # Показати класи з цінами
                     kb_buttons = []
@@ -270,12 +215,9 @@ def create_router(config: AppConfig) -> Router:
                     await state.update_data(base_fare=base_fare)
                     
                     for car_class_id, car_class_data in CAR_CLASSES.items():
-                        class_fare = calculate_fare_with_class(base_fare, car_class_id, custom_multipliers)
-                        
-                        # calculate_dynamic_price повертає (final_price, explanation, total_multiplier)
-                        final_fare, explanation, surge_mult = await calculate_dynamic_price(class_fare, client_city, online_count, 0)
-                        
-                        surge_emoji = get_surge_emoji(surge_mult)
+                        final_fare = quote.price(car_class_id)
+                        surge_mult = quote.multiplier
+                        surge_emoji = quote.emoji
                         class_name = get_car_class_name(car_class_id)
                         
                         button_text = f"{car_class_data['emoji']} {class_name}: {final_fare:.0f} грн"
@@ -291,7 +233,7 @@ def create_router(config: AppConfig) -> Router:
                     kb_buttons.append([InlineKeyboardButton(text="❌ Скасувати", callback_data="cancel_order")])
                     kb = InlineKeyboardMarkup(inline_keyboard=kb_buttons)
                     
-                    logger.info(f"✅ Відправляю кнопки вибору класу авто (distance: {distance_km:.1f} km)")
+                    logger.debug("✅ Відправляю кнопки вибору класу авто (distance: %.1f km)", distance_km)
                     
                     await message.answer(
                         f"🚗 <b>Оберіть клас автомобіля</b>\n\n"
@@ -314,23 +256,13 @@ def create_router(config: AppConfig) -> Router:
                         f"Будь ласка, почніть замовлення спочатку /order"
                     )
                 
-                logger.info(f"📍 WebApp location processed: {latitude}, {longitude} -> {address}")
+                logger.info("📍 WebApp location processed: %s, %s -> %s", latitude, longitude, address)
                 
         except json.JSONDecodeError as e:
-            logger.error("=" * 60)
-            logger.error("❌ JSON DECODE ERROR")
-            logger.error("=" * 60)
-            logger.error(f"Error: {e}")
-            logger.error(f"Raw data that failed: '{message.web_app_data.data}'")
-            logger.error("=" * 60)
+            logger.error("❌ JSON DECODE ERROR: %s; raw data: %r", e, message.web_app_data.data)
             await message.answer("❌ Помилка обробки даних з карти (невірний формат JSON)")
         except Exception as e:
-            logger.error("=" * 60)
-            logger.error("❌ EXCEPTION in WebApp handler")
-            logger.error("=" * 60)
-            logger.error(f"Exception type: {type(e).__name__}")
-            logger.error(f"Exception message: {e}", exc_info=True)
-            logger.error("=" * 60)
+            logger.error("❌ EXCEPTION in WebApp handler: %s: %s", type(e).__name__, e, exc_info=True)
             await message.answer("❌ Виникла помилка. Спробуйте ще раз.")
     
     return router
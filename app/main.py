@@ -1,42 +1,61 @@
 from __future__ import annotations
 
 import asyncio
+import importlib
 import logging
 import os
 import signal
 import sys
+import time
+
+# Початок імпорту модуля - для фази "імпорт" у профілі запуску
+_IMPORT_STARTED = time.monotonic()
 
-from aiogram import Dispatcher, Bot
-from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.fsm.strategy import FSMStrategy
 from aiohttp import web
 
 from app.config.config import load_config
-from app.handlers.order import create_router as create_order_router
-from app.handlers.start import create_router as create_start_router
-from app.handlers.registration import create_registration_router
-from app.handlers.driver import create_router as create_driver_router
-from app.handlers.admin import create_router as create_admin_router
-from app.handlers.driver_panel import create_router as create_driver_panel_router
-from app.handlers.client import create_router as create_client_router
-from app.handlers.ratings import create_router as create_ratings_router
-from app.handlers.saved_addresses import create_router as create_saved_addresses_router
-from app.handlers.cancel_reasons import create_router as create_cancel_reasons_router
-from app.handlers.chat import create_router as create_chat_router
-from app.handlers.promocodes import create_router as create_promocodes_router
-from app.handlers.sos import create_router as create_sos_router
-from app.handlers.live_tracking import create_router as create_live_tracking_router
-from app.handlers.tips import create_router as create_tips_router
-# Реферальна програма прибрана
-# from app.handlers.referral import create_router as create_referral_router
-from app.handlers.client_rating import create_router as create_client_rating_router
-from app.handlers.voice_input import create_router as create_voice_input_router
-# Розширена аналітика ПРИБРАНО - не потрібна
-# from app.handlers.driver_analytics import create_router as create_driver_analytics_router
-from app.handlers.webapp import create_router as create_webapp_router  # WebApp з картою
 from app.storage.db import init_db
 from app.utils.scheduler import start_scheduler
+from app.utils.leader_election import MULTI_INSTANCE, stop_leader_election, wait_for_leadership
+from app.utils.logging_setup import setup_logging
+from app.utils.metrics import render_metrics
+from app.utils.startup import get_startup_profile, warm_caches
+
+# Роутери в порядку реєстрації (порядок важливий!): (модуль, фабрика)
+# Модулі обробників (і aiogram з pydantic-моделями types - більша частина імпорту)
+# імпортуються у фоновому потоці, поки main() ініціалізує БД
+ROUTERS = [
+    ("app.handlers.webapp", "create_router"),  # WebApp ПЕРШИМ (обробляє web_app_data!)
+    ("app.handlers.start", "create_router"),
+    ("app.handlers.registration", "create_registration_router"),  # Registration module
+    ("app.handlers.saved_addresses", "create_router"),  # Збережені адреси - ПЕРЕД order (state має пріоритет!)
+    ("app.handlers.order", "create_router"),  # Order перед Client!
+    ("app.handlers.admin", "create_router"),  # Admin ПЕРЕД driver_panel (пріоритет адміна!)
+    ("app.handlers.driver_panel", "create_router"),
+    ("app.handlers.driver", "create_router"),
+    ("app.handlers.ratings", "create_router"),
+    ("app.handlers.cancel_reasons", "create_router"),  # Причини скасування
+    ("app.handlers.chat", "create_router"),  # Чат
+    ("app.handlers.promocodes", "create_router"),  # Промокоди
+    ("app.handlers.sos", "create_router"),  # SOS
+    ("app.handlers.live_tracking", "create_router"),  # Живе відстеження
+    ("app.handlers.tips", "create_router"),  # Чайові
+    # ("app.handlers.referral", "create_router"),  # Реферальна програма - ПРИБРАНО
+    ("app.handlers.client_rating", "create_router"),  # Рейтинг клієнтів
+    ("app.handlers.voice_input", "create_router"),  # Голосовий ввід
+    # ("app.handlers.driver_analytics", "create_router"),  # Аналітика водія - ПРИБРАНО
+    ("app.handlers.client", "create_router"),  # Client останній
+]
+
+
+def import_router_factories() -> list:
+    """Імпортувати модулі обробників і повернути фабрики роутерів у порядку ROUTERS"""
+    return [getattr(importlib.import_module(module), factory) for module, factory in ROUTERS]
+
+
+async def _import_routers(startup) -> list:
+    async with startup.phase("імпорт обробників"):
+        return await asyncio.to_thread(import_router_factories)
 
 
 async def health_check(request):
@@ -44,6 +63,26 @@ async def health_check(request):
     return web.Response(text="OK", status=200)
 
 
+async def ready_check(request):
+    """Readiness: 200 лише після прогріву кешів, отримання оренди та налаштування webhook"""
+    profile = get_startup_profile()
+    return web.json_response(profile.as_dict(), status=200 if profile.ready else 503)
+
+
+# Якщо задано - /metrics лише з "Authorization: Bearer <токен>" (порт Render публічний)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Скільки при зупинці чекати обробки оновлень, що вже в польоті (Render дає 30 с після SIGTERM)
+SHUTDOWN_TIMEOUT_SECONDS = 20
+
+
+async def metrics_handler(request):
+    """Метрики процесу у форматі Prometheus (app/utils/metrics.py)"""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return web.Response(status=401)
+    return web.Response(text=render_metrics(), content_type="text/plain")
+
+
 async def telegram_webhook_handler(request, bot, dp):
     """
     Обробник Telegram webhook запитів
@@ -80,18 +119,23 @@ async def telegram_webhook_handler(request, bot, dp):
         return web.Response(status=500)
 
 
-async def start_webhook_server(bot=None, dp=None):
+async def start_webhook_server(bot=None, dp=None) -> web.AppRunner:
     """
     Запустити HTTP сервер для Webhook, health checks та статичних файлів
     
     Args:
         bot: Bot instance (для webhook)
         dp: Dispatcher instance (для webhook)
+    
+    Returns:
+        AppRunner - при зупинці runner.cleanup(): перестати приймати запити і дочекатися тих, що в польоті
     """
     app = web.Application()
     
     # Health check endpoints
     app.router.add_get('/health', health_check)
+    app.router.add_get('/ready', ready_check)
+    app.router.add_get('/metrics', metrics_handler)
     app.router.add_get('/', health_check)
     
     # ═══════════════════════════════════════════════════════════════
@@ -124,16 +168,15 @@ async def start_webhook_server(bot=None, dp=None):
     port = int(os.getenv('PORT', 8080))
     runner = web.AppRunner(app)
     await runner.setup()
-    site = web.TCPSite(runner, '0.0.0.0', port)
+    site = web.TCPSite(runner, '0.0.0.0', port, shutdown_timeout=SHUTDOWN_TIMEOUT_SECONDS)
     await site.start()
     logging.info(f"🌐 HTTP server started on port {port}")
+    return runner
 
 
 async def main() -> None:
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # Рівні по модулях, JSON, запис логів у фоновому потоці (app/utils/logging_setup.py)
+    setup_logging()
     
     logger = logging.getLogger(__name__)
 
@@ -163,61 +206,90 @@ async def main() -> None:
             logger.warning("⚠️  Використовую SQLite (дані будуть втрачені при рестарті!)")
         
         logger.info("="*60)
-        
-        startup_delay = 60  # Збільшено до 60 секунд для PostgreSQL + міграції!
-        logging.info(f"⏳ Затримка запуску {startup_delay}s для graceful shutdown старого процесу...")
-        for i in range(startup_delay):
-            if i % 10 == 0:
-                logging.info(f"⏳ Очікування... {startup_delay - i}s залишилось")
-            await asyncio.sleep(1)
 
-    config = load_config()
-    await init_db(config.database_path)
+    # Без фіксованої затримки: старий процес передає роботу через оренду лідера (app/utils/startup.py)
+    startup = get_startup_profile()
+    startup.record("імпорт", _IMPORT_STARTED)
+
+    # aiogram і модулі обробників (найважча частина імпорту) вантажаться у потоці паралельно з БД
+    router_factories = asyncio.create_task(_import_routers(startup))
+
+    async with startup.phase("БД"):
+        config = load_config()
+        await init_db(config.database_path)
+
+    factories = await router_factories
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from aiogram.fsm.strategy import FSMStrategy
 
     bot = Bot(token=config.bot.token, default=DefaultBotProperties(parse_mode="HTML"))
+
+    # 🧹 Надіслані повідомлення процесу замовлення потрапляють у реєстр (очищення чату)
+    from app.utils.chat_cleanup import MessageLedgerRequestMiddleware
+    bot.session.middleware(MessageLedgerRequestMiddleware())
+
+    # 📨 Побічні ефекти змін статусу замовлення (таймери, live location, чат водія)
+    from app.utils.order_events import register_order_event_subscribers
+    register_order_event_subscribers(bot, config.database_path)
     
     # ⭐ FSM Strategy: GLOBAL_USER - зберігати стан тільки по user_id (не chat_id)
     # Це дозволяє водію натискати "Прийняти" в групі, а надсилати геолокацію в приватний чат
+    # MULTI_INSTANCE: наступне оновлення користувача може прийти в інший процес - стан FSM у спільній БД
+    if MULTI_INSTANCE:
+        from app.storage.fsm_storage import DatabaseStorage
+        storage = DatabaseStorage(config.database_path)
+    else:
+        storage = MemoryStorage()
     dp = Dispatcher(
-        storage=MemoryStorage(),
+        storage=storage,
         fsm_strategy=FSMStrategy.GLOBAL_USER  # Тільки user_id, без прив'язки до chat_id
     )
 
-    # Include all routers (порядок важливий!)
-    logger.info("=" * 80)
-    logger.info("📦 REGISTERING ROUTERS...")
-    logger.info("=" * 80)
+    async with startup.phase("роутери"):
+        # Include all routers (порядок важливий!)
+        logger.info("=" * 80)
+        logger.info("📦 REGISTERING ROUTERS...")
+        logger.info("=" * 80)
     
-    webapp_router = create_webapp_router(config)
-    logger.info(f"✅ webapp_router created: {webapp_router}")
-    logger.info(f"✅ webapp_router name: {webapp_router.name}")
-    logger.info(f"✅ webapp_router observers count: {len(webapp_router.observers)}")
-    dp.include_router(webapp_router)  # WebApp ПЕРШИМ (обробляє web_app_data!)
-    logger.info("✅ webapp_router registered in dispatcher")
-    
-    dp.include_router(create_start_router(config))
-    dp.include_router(create_registration_router(config))  # Registration module
-    dp.include_router(create_saved_addresses_router(config))  # Збережені адреси - ПЕРЕД order (state має пріоритет!)
-    dp.include_router(create_order_router(config))  # Order перед Client!
-    dp.include_router(create_admin_router(config))  # Admin ПЕРЕД driver_panel (пріоритет адміна!)
-    dp.include_router(create_driver_panel_router(config))
-    dp.include_router(create_driver_router(config))
-    dp.include_router(create_ratings_router(config))
-    dp.include_router(create_cancel_reasons_router(config))  # Причини скасування
-    dp.include_router(create_chat_router(config))  # Чат
-    dp.include_router(create_promocodes_router(config))  # Промокоди
-    dp.include_router(create_sos_router(config))  # SOS
-    dp.include_router(create_live_tracking_router(config))  # Живе відстеження
-    dp.include_router(create_tips_router(config))  # Чайові
-    # dp.include_router(create_referral_router(config))  # Реферальна програма - ПРИБРАНО
-    dp.include_router(create_client_rating_router(config))  # Рейтинг клієнтів
-    dp.include_router(create_voice_input_router(config))  # Голосовий ввід
-    # dp.include_router(create_driver_analytics_router(config))  # Аналітика водія - ПРИБРАНО
-    dp.include_router(create_client_router(config))  # Client останній
+        for create_router in factories:
+            router = create_router(config)
+            dp.include_router(router)
+            logger.info(f"✅ {router.name} registered in dispatcher")
+
+        # 📈 Метрики оновлень, обробників, Telegram API і станів FSM (/metrics)
+        from app.utils.telegram_metrics import instrument_dispatcher
+        instrument_dispatcher(dp, bot)
 
+    # === ВИЗНАЧЕННЯ РЕЖИМУ: WEBHOOK або POLLING ===
+    use_webhook = bool(
+        os.getenv('WEBHOOK_URL') or 
+        os.getenv('RENDER') or 
+        os.getenv('PRODUCTION')
+    )
+    
+    # HTTP сервер одразу: /health відповідає під час підготовки, /ready - 503 до готовності
+    async with startup.phase("HTTP сервер"):
+        runner = await start_webhook_server(bot if use_webhook else None, dp if use_webhook else None)
+    
     # Start scheduled tasks (картка адміна береться з БД автоматично)
     await start_scheduler(bot, config.database_path)
     
+    # Прогрів кешів паралельно з очікуванням оренди (старий процес звільняє її при зупинці)
+    async def _lease_phase():
+        if MULTI_INSTANCE:
+            return
+        async with startup.phase("оренда"):
+            logging.info("⏳ Очікую оренду лідера (попередній процес має завершитись)...")
+            await wait_for_leadership()
+    
+    async def _cache_phase():
+        async with startup.phase("кеші"):
+            await warm_caches(config.database_path)
+    
+    await asyncio.gather(_cache_phase(), _lease_phase())
+    
     logging.info("🚀 Bot started successfully!")
     
     # Перевірка інформації про бота
@@ -227,12 +299,8 @@ async def main() -> None:
     except Exception as e:
         logging.warning(f"⚠️ Не вдалося отримати інфо про бота: {e}")
     
-    # === ВИЗНАЧЕННЯ РЕЖИМУ: WEBHOOK або POLLING ===
-    use_webhook = bool(
-        os.getenv('WEBHOOK_URL') or 
-        os.getenv('RENDER') or 
-        os.getenv('PRODUCTION')
-    )
+    # Кеші теплі, оренда наша - процес готовий приймати оновлення (webhook/polling - далі)
+    startup.mark_ready()
     
     if use_webhook:
         # ========================================
@@ -257,11 +325,13 @@ async def main() -> None:
         
         try:
             # Встановити webhook в Telegram
-            await bot.set_webhook(
-                url=webhook_url,
-                drop_pending_updates=True,
-                allowed_updates=dp.resolve_used_update_types()
-            )
+            # Оновлення, що накопичились під час передачі роботи, не викидаються
+            async with startup.phase("webhook"):
+                await bot.set_webhook(
+                    url=webhook_url,
+                    drop_pending_updates=False,
+                    allowed_updates=dp.resolve_used_update_types()
+                )
             
             # Перевірити що webhook встановлено
             webhook_info = await bot.get_webhook_info()
@@ -279,26 +349,46 @@ async def main() -> None:
             use_webhook = False
         
         if use_webhook:
-            # Запустити HTTP сервер з webhook handler
-            await start_webhook_server(bot, dp)
-            
             logging.info("🎯 Webhook сервер запущено!")
             logging.info("⚡ Бот отримуватиме оновлення МИТТЄВО")
             logging.info("💰 Економія ресурсів: ~90%")
             
+            # SIGTERM (деплой) - звільнити оренду, щоб новий процес підхопив роботу одразу
+            stop_event = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                try:
+                    loop.add_signal_handler(sig, stop_event.set)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            
             # Тримати сервер запущеним
             try:
-                # Чекати безкінечно (сервер працює в фоні)
-                await asyncio.Event().wait()
+                # Чекати до сигналу зупинки (сервер працює в фоні)
+                await stop_event.wait()
+                logging.info("🛑 Отримано сигнал зупинки")
             except (KeyboardInterrupt, SystemExit):
                 logging.info("🛑 Отримано сигнал зупинки")
             finally:
-                # Видалити webhook при зупинці
+                startup.mark_not_ready()
+                # Спершу зупинити приймання /webhook і дочекатися оновлень у польоті (dp.feed_update),
+                # потім звільнити оренду - новий процес не обробляє їх паралельно зі старим
+                try:
+                    await runner.cleanup()
+                except Exception as e:
+                    logging.warning(f"⚠️ Помилка зупинки HTTP сервера: {e}")
+                await stop_leader_election()
+                # Webhook не видаляється: його вже міг встановити новий процес
+                try:
+                    from app.utils.order_events import drain_order_events
+                    await drain_order_events(timeout=5)
+                except Exception:
+                    pass
                 try:
-                    await bot.delete_webhook()
-                    logging.info("✅ Webhook видалено")
+                    await bot.session.close()
                 except Exception:
                     pass
+                logging.info("👋 Бот зупинено")
     
     if not use_webhook:
         # ========================================
@@ -309,6 +399,8 @@ async def main() -> None:
         logging.info("=" * 60)
         logging.info("⚠️ Для production рекомендовано використовувати WEBHOOK")
         logging.info("💡 Встановіть WEBHOOK_URL або PRODUCTION=1 для webhook")
+        if MULTI_INSTANCE:
+            logging.warning("⚠️ MULTI_INSTANCE з polling: Telegram віддає оновлення лише одному процесу - запускайте кілька екземплярів тільки з webhook")
         
         # Видалити webhook якщо був встановлений раніше
         try:
@@ -318,10 +410,6 @@ async def main() -> None:
         except Exception as e:
             logging.warning(f"⚠️ Не вдалося видалити webhook: {e}")
         
-        # ⭐ Запустити HTTP сервер БЕЗ webhook handler (тільки для статичних файлів)
-        asyncio.create_task(start_webhook_server(bot=None, dp=None))
-        logging.info("🌐 HTTP сервер запущено для статичних файлів (WebApp)")
-        
         # Запуск polling з retry при конфлікті
         max_retries = 3
         retry_delay = 10
@@ -353,10 +441,21 @@ async def main() -> None:
                         raise
         finally:
             # Cleanup
+            startup.mark_not_ready()
+            try:
+                await stop_leader_election()
+                from app.utils.order_events import drain_order_events
+                await drain_order_events(timeout=5)
+            except Exception:
+                pass
             try:
                 await bot.session.close()
             except Exception:
                 pass
+            try:
+                await runner.cleanup()
+            except Exception:
+                pass
             logging.info("👋 Бот зупинено")
 
 
@@ -0,0 +1,157 @@
+"""Метрики адмін-панелі (один запит до БД + короткий кеш)"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.storage.db_connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+# Скільки секунд показувати закешовані цифри без повторного запиту
+ADMIN_METRICS_TTL_SECONDS = 90
+# Фонове оновлення кешу (0 - вимкнено, тоді цифри перечитуються після TTL при відкритті панелі)
+ADMIN_METRICS_REFRESH_SECONDS = int(os.getenv("ADMIN_METRICS_REFRESH_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class AdminMetrics:
+    """Цифри для 📊 Статистика та ⚙️ Налаштування адмін-панелі"""
+    total_orders: int = 0
+    completed_orders: int = 0
+    total_revenue: float = 0.0
+    total_commission: float = 0.0
+    unpaid_commission: float = 0.0
+    total_users: int = 0
+    approved_drivers: int = 0
+    pending_drivers: int = 0
+    rejected_drivers: int = 0
+    loaded_at: float = 0.0
+
+    @property
+    def age_seconds(self) -> int:
+        return int(time.monotonic() - self.loaded_at)
+
+
+# Кожна таблиця читається один раз: умовні агрегати замість окремого COUNT/SUM на кожну цифру.
+# Несплачена комісія - з денних підсумків driver_daily_stats, а не з усіх payments.
+ADMIN_METRICS_QUERY = """
+    SELECT
+        o.total, o.completed, o.revenue, o.commission,
+        d.approved, d.pending, d.rejected,
+        (SELECT COALESCE(SUM(unpaid), 0) FROM driver_daily_stats),
+        (SELECT COUNT(*) FROM users)
+    FROM
+        (
+            SELECT
+                COUNT(*) AS total,
+                COALESCE(SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END), 0) AS completed,
+                COALESCE(SUM(CASE WHEN status = 'completed' THEN COALESCE(fare_amount, 0) ELSE 0 END), 0) AS revenue,
+                COALESCE(SUM(CASE WHEN status = 'completed' THEN COALESCE(commission, 0) ELSE 0 END), 0) AS commission
+            FROM orders
+        ) o,
+        (
+            SELECT
+                COALESCE(SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END), 0) AS approved,
+                COALESCE(SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END), 0) AS pending,
+                COALESCE(SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END), 0) AS rejected
+            FROM drivers
+        ) d
+"""
+
+
+async def load_admin_metrics(db_path: str) -> AdminMetrics:
+    """Прочитати всі метрики одним запитом (без кешу)"""
+    async with db_manager.connect(db_path) as db:
+        row = await db.fetchone(ADMIN_METRICS_QUERY)
+
+    # PostgreSQL повертає SUM як numeric/Decimal - приводимо явно
+    return AdminMetrics(
+        total_orders=int(row[0]),
+        completed_orders=int(row[1]),
+        total_revenue=float(row[2]),
+        total_commission=float(row[3]),
+        approved_drivers=int(row[4]),
+        pending_drivers=int(row[5]),
+        rejected_drivers=int(row[6]),
+        unpaid_commission=float(row[7]),
+        total_users=int(row[8]),
+        loaded_at=time.monotonic(),
+    )
+
+
+class AdminMetricsCache:
+    """
+    Останні AdminMetrics.
+
+    - Відкриття панелі в межах TTL не робить жодного запиту
+    - Паралельні виклики після закінчення TTL чекають на один спільний запит
+    - admin_metrics_task тримає кеш теплим, тому панель не чекає на БД зовсім
+    """
+
+    def __init__(self, ttl: float = ADMIN_METRICS_TTL_SECONDS):
+        self._ttl = ttl
+        self._metrics: Optional[AdminMetrics] = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, metrics: Optional[AdminMetrics]) -> bool:
+        return metrics is not None and (time.monotonic() - metrics.loaded_at) < self._ttl
+
+    async def get(self, db_path: str) -> AdminMetrics:
+        metrics = self._metrics
+        if self._is_fresh(metrics):
+            return metrics
+
+        async with self._lock:
+            metrics = self._metrics
+            if self._is_fresh(metrics):
+                return metrics
+            return await self._load(db_path)
+
+    async def refresh(self, db_path: str) -> AdminMetrics:
+        async with self._lock:
+            return await self._load(db_path)
+
+    def invalidate(self) -> None:
+        self._metrics = None
+
+    async def _load(self, db_path: str) -> AdminMetrics:
+        started = time.monotonic()
+        metrics = await load_admin_metrics(db_path)
+        self._metrics = metrics
+        logger.debug(f"📊 Admin metrics оновлено за {(time.monotonic() - started) * 1000:.0f} мс")
+        return metrics
+
+
+# Глобальний екземпляр кешу
+_metrics_cache = AdminMetricsCache()
+
+
+async def get_admin_metrics(db_path: str) -> AdminMetrics:
+    """Метрики адмін-панелі (з кешу, не старші за ADMIN_METRICS_TTL_SECONDS)"""
+    return await _metrics_cache.get(db_path)
+
+
+async def refresh_admin_metrics(db_path: str) -> AdminMetrics:
+    """Примусово перечитати метрики з БД (кнопка 🔄 Оновити)"""
+    return await _metrics_cache.refresh(db_path)
+
+
+def invalidate_admin_metrics() -> None:
+    """Скинути кеш метрик"""
+    _metrics_cache.invalidate()
+
+
+async def admin_metrics_task(db_path: str) -> None:
+    """Фонове оновлення кешу метрик кожні ADMIN_METRICS_REFRESH_SECONDS"""
+    while True:
+        try:
+            await _metrics_cache.refresh(db_path)
+        except Exception as e:
+            logger.error(f"❌ Помилка оновлення метрик адмін-панелі: {e}")
+        await asyncio.sleep(ADMIN_METRICS_REFRESH_SECONDS)
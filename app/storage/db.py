@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import List, Optional, Tuple, Union
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import os
 import logging
 
@@ -17,43 +17,15 @@ except ImportError:
 
 # Імпорт connection manager
 from app.storage.db_connection import db_manager
+from app.storage.row_mapping import RowShape, parse_db_datetime
 
 logger = logging.getLogger(__name__)
 
 
 # === HELPER ФУНКЦІЇ ДЛЯ ОБОХ БД ===
 
-def _parse_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
-    """
-    Безпечна конвертація datetime з БД.
-    - Якщо вже datetime об'єкт (PostgreSQL) - повернути як є
-    - Якщо рядок (SQLite) - конвертувати через fromisoformat()
-    - Якщо None - повернути None
-    """
-    if value is None:
-        return None
-    if isinstance(value, datetime):
-        return value
-    if isinstance(value, str):
-        try:
-            # Спробувати ISO 8601 (SQLite зберігає через isoformat)
-            return datetime.fromisoformat(value)
-        except Exception:
-            # Спробувати кілька відомих форматів
-            for fmt in (
-                "%Y-%m-%d %H:%M:%S%z",
-                "%Y-%m-%d %H:%M:%S.%f%z",
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%d %H:%M:%S.%f",
-            ):
-                try:
-                    return datetime.strptime(value, fmt)
-                except Exception:
-                    continue
-            # Якщо не вдалося розпарсити – повернути None щоб не падати
-            logger.debug(f"_parse_datetime: unsupported format '{value}'")
-            return None
-    return value
+# Безпечна конвертація datetime з БД (PostgreSQL - datetime як є, SQLite - fromisoformat)
+_parse_datetime = parse_db_datetime
 
 def _is_postgres() -> bool:
     """Перевірити чи використовується PostgreSQL"""
@@ -88,6 +60,24 @@ async def _close_connection(conn):
         await conn.close()
 
 
+def _invalidate_pricing_snapshot() -> None:
+    """Позначити кеш ціноутворення застарілим після зміни тарифу/налаштувань"""
+    from app.storage.pricing_snapshot import invalidate_pricing_snapshot
+    invalidate_pricing_snapshot()
+
+
+def _demand_tracker():
+    """Трекер попиту/пропозиції (лічильники для динамічного ціноутворення)"""
+    from app.utils.demand_tracker import get_demand_tracker
+    return get_demand_tracker()
+
+
+def _zone_tracker():
+    """Трекер зональної націнки (попит/пропозиція по районах)"""
+    from app.utils.geo_surge import get_zone_tracker
+    return get_zone_tracker()
+
+
 def _convert_query(query: str) -> str:
     """Конвертувати SQL для PostgreSQL"""
     if not _is_postgres():
@@ -117,7 +107,7 @@ class SavedAddress:
     created_at: datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     id: Optional[int]
     user_id: int  # client Telegram user id
@@ -153,419 +143,35 @@ class Order:
     payment_method: str = "cash"  # cash | card
 
 
-async def ensure_driver_columns(db_path: str) -> None:
-    """Міграція: додати відсутні колонки до drivers (ТІЛЬКИ для SQLite)"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    # Це міграція тільки для SQLite
-    if _is_postgres():
-        logger.debug("PostgreSQL: міграції drivers виконуються в init_postgres.py")
-        return
-    
-    async with db_manager.connect(db_path) as db:
-        # Перевірити чи таблиця drivers існує (SQLite синтаксис)
-        async with db.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='drivers'"
-        ) as cur:
-            table_exists = await cur.fetchone()
-        
-        if not table_exists:
-            logger.info("ℹ️  Таблиця drivers ще не створена, пропускаю міграцію")
-            return
-        
-        # Отримати поточні колонки (SQLite синтаксис)
-        async with db.execute("PRAGMA table_info(drivers)") as cur:
-            columns = await cur.fetchall()
-            col_names = [c[1] for c in columns]
-        
-        # Додати card_number якщо немає
-        if 'card_number' not in col_names:
-            logger.info("⚙️  Міграція: додаю колонку card_number...")
-            await db.execute("ALTER TABLE drivers ADD COLUMN card_number TEXT")
-            await db.commit()
-            logger.info("✅ Колонка card_number додана")
-        
-        # Додати car_class якщо немає
-        if 'car_class' not in col_names:
-            logger.info("⚙️  Міграція: додаю колонку car_class...")
-            await db.execute("ALTER TABLE drivers ADD COLUMN car_class TEXT NOT NULL DEFAULT 'economy'")
-            await db.commit()
-            logger.info("✅ Колонка car_class додана")
+# Колонки orders у порядку SELECT (спільні для всіх запитів, що повертають Order)
+_ORDER_ROW = RowShape(
+    Order,
+    (
+        "id", "user_id", "name", "phone", "pickup_address", "destination_address", "comment", "created_at",
+        "pickup_lat", "pickup_lon", "dest_lat", "dest_lon",
+        "driver_id", "distance_m", "duration_s", "fare_amount", "commission", "status",
+        "started_at", "finished_at", "group_message_id",
+        "car_class", "tip_amount", "payment_method",
+    ),
+    coalesce=("car_class", "payment_method"),
+)
 
 
 async def init_db(db_path: str) -> None:
-    """Ініціалізація бази даних (SQLite або PostgreSQL)"""
-    
-    # Перевірити чи це PostgreSQL
-    database_url = os.getenv("DATABASE_URL")
-    
-    if database_url and database_url.startswith("postgres"):
-        # PostgreSQL на Render
-        logger.info("🐘 Ініціалізація PostgreSQL...")
-        
-        # Конвертувати postgres:// на postgresql://
-        if database_url.startswith("postgres://"):
-            database_url = database_url.replace("postgres://", "postgresql://", 1)
-        
-        from app.storage.init_postgres import init_postgres_db
-        await init_postgres_db(database_url)
-        logger.info("✅ PostgreSQL готова!")
-        return
-    
-    # SQLite для локальної розробки
-    logger.info(f"📁 Ініціалізація SQLite: {db_path}")
-    
-    # Перевірити що папка існує
-    db_dir = os.path.dirname(db_path)
-    if db_dir and not os.path.exists(db_dir):
-        logger.info(f"📁 Створюю папку для БД: {db_dir}")
-        os.makedirs(db_dir, exist_ok=True)
-    
-    try:
-        logger.info("🔨 Відкриваю з'єднання з SQLite...")
-        async with db_manager.connect(db_path) as db:
-            logger.info("✅ З'єднання встановлено, створюю таблиці...")
-            # Збережені адреси
-            await db.execute(
-            """
-            CREATE TABLE IF NOT EXISTS saved_addresses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                emoji TEXT NOT NULL DEFAULT '📍',
-                address TEXT NOT NULL,
-                lat REAL,
-                lon REAL,
-                created_at TEXT NOT NULL
-            )
-            """
-        )
-        
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS orders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    phone TEXT NOT NULL,
-                    pickup_address TEXT NOT NULL,
-                    destination_address TEXT NOT NULL,
-                    comment TEXT,
-                    created_at TEXT NOT NULL,
-                    pickup_lat REAL,
-                    pickup_lon REAL,
-                    dest_lat REAL,
-                    dest_lon REAL,
-                    driver_id INTEGER,
-                    distance_m INTEGER,
-                    duration_s INTEGER,
-                    fare_amount REAL,
-                    commission REAL,
-                    status TEXT NOT NULL DEFAULT 'pending',
-                    started_at TEXT,
-                    finished_at TEXT,
-                    group_message_id INTEGER,
-                    car_class TEXT NOT NULL DEFAULT 'economy',
-                    tip_amount REAL,
-                    payment_method TEXT NOT NULL DEFAULT 'cash'
-                )
-                """
-            )
-            # Tariffs: single-row or versioned tariffs
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tariffs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    base_fare REAL NOT NULL,
-                    per_km REAL NOT NULL,
-                    per_minute REAL NOT NULL,
-                    minimum REAL NOT NULL,
-                    commission_percent REAL NOT NULL DEFAULT 0.02,
-                    night_tariff_percent REAL NOT NULL DEFAULT 50.0,
-                    weather_percent REAL NOT NULL DEFAULT 0.0,
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
-            
-            # ⭐ МІГРАЦІЯ: Додати нові колонки якщо їх немає
-            try:
-                await db.execute("ALTER TABLE tariffs ADD COLUMN night_tariff_percent REAL NOT NULL DEFAULT 50.0")
-                logger.info("✅ Додано колонку night_tariff_percent до tariffs")
-            except:
-                pass  # Колонка вже існує
-            
-            try:
-                await db.execute("ALTER TABLE tariffs ADD COLUMN weather_percent REAL NOT NULL DEFAULT 0.0")
-                logger.info("✅ Додано колонку weather_percent до tariffs")
-            except:
-                pass  # Колонка вже існує
-            
-            # ⭐⭐ МІГРАЦІЯ: Додати систему карми
-            try:
-                await db.execute("ALTER TABLE drivers ADD COLUMN karma INTEGER NOT NULL DEFAULT 100")
-                logger.info("✅ Додано колонку karma до drivers")
-            except:
-                pass  # Колонка вже існує
-            
-            try:
-                await db.execute("ALTER TABLE drivers ADD COLUMN total_orders INTEGER NOT NULL DEFAULT 0")
-                logger.info("✅ Додано колонку total_orders до drivers")
-            except:
-                pass
-            
-            try:
-                await db.execute("ALTER TABLE drivers ADD COLUMN rejected_orders INTEGER NOT NULL DEFAULT 0")
-                logger.info("✅ Додано колонку rejected_orders до drivers")
-            except:
-                pass
-
-            # ⭐ Додати колонку priority до drivers, якщо немає
-            try:
-                await db.execute("ALTER TABLE drivers ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
-                logger.info("✅ Додано колонку priority до drivers")
-            except:
-                pass
-
-            # Глобальні налаштування (app_settings)
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS app_settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT
-                )
-                """
-            )
-            
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN karma INTEGER NOT NULL DEFAULT 100")
-                logger.info("✅ Додано колонку karma до users")
-            except:
-                pass
-            
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN total_orders INTEGER NOT NULL DEFAULT 0")
-                logger.info("✅ Додано колонку total_orders до users")
-            except:
-                pass
-            
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN cancelled_orders INTEGER NOT NULL DEFAULT 0")
-                logger.info("✅ Додано колонку cancelled_orders до users")
-            except:
-                pass
-            
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN bonus_rides_available INTEGER NOT NULL DEFAULT 0")
-                logger.info("✅ Додано колонку bonus_rides_available до users")
-            except Exception as e:
-                logger.debug(f"Колонка bonus_rides_available вже існує або помилка: {e}")
-                pass
-            # Users: registered clients
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    full_name TEXT NOT NULL,
-                    phone TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    city TEXT,
-                    language TEXT NOT NULL DEFAULT 'uk',
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
-            # Міграція: додати нові колонки в users якщо їх немає
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN is_blocked INTEGER DEFAULT 0")
-            except Exception:
-                pass  # Колонка вже існує
-            
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN karma INTEGER DEFAULT 100")
-            except Exception:
-                pass
-            
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN total_orders INTEGER DEFAULT 0")
-            except Exception:
-                pass
-            
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN cancelled_orders INTEGER DEFAULT 0")
-            except Exception:
-                pass
-            
-            try:
-                await db.execute("ALTER TABLE users ADD COLUMN bonus_rides_available INTEGER DEFAULT 0")
-                logger.info("✅ Додано колонку bonus_rides_available до users (PostgreSQL)")
-            except Exception as e:
-                logger.debug(f"Колонка bonus_rides_available вже існує: {e}")
-                pass
-            
-            # Drivers: applications and active drivers
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS drivers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tg_user_id INTEGER NOT NULL,
-                    full_name TEXT NOT NULL,
-                    phone TEXT NOT NULL,
-                    car_make TEXT NOT NULL,
-                    car_model TEXT NOT NULL,
-                    car_plate TEXT NOT NULL,
-                    license_photo_file_id TEXT,
-                    city TEXT,
-                    status TEXT NOT NULL,  -- pending | approved | rejected
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    online INTEGER NOT NULL DEFAULT 0,
-                    last_lat REAL,
-                    last_lon REAL,
-                    last_seen_at TEXT,
-                    car_class TEXT NOT NULL DEFAULT 'economy',
-                    card_number TEXT,
-                    priority INTEGER NOT NULL DEFAULT 0
-                )
-                """
-            )
-            # Helpful indices
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders(user_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_orders_driver_id ON orders(driver_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_drivers_status ON drivers(status)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_drivers_tg_user ON drivers(tg_user_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_drivers_online ON drivers(online)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_drivers_priority ON drivers(priority)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_saved_addresses_user ON saved_addresses(user_id)")
-        
-            # Ratings table
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS ratings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    order_id INTEGER NOT NULL,
-                    from_user_id INTEGER NOT NULL,
-                    to_user_id INTEGER NOT NULL,
-                    rating INTEGER NOT NULL,
-                    comment TEXT,
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_ratings_to_user ON ratings(to_user_id)")
-        
-            # Client ratings (водії оцінюють клієнтів)
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS client_ratings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    order_id INTEGER NOT NULL,
-                    client_id INTEGER NOT NULL,
-                    driver_id INTEGER NOT NULL,
-                    rating INTEGER NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_client_ratings ON client_ratings(client_id)")
-        
-            # Tips (чайові)
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tips (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    order_id INTEGER NOT NULL UNIQUE,
-                    amount REAL NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
-        
-            # Referral program (реферальна програма)
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS referrals (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    referrer_id INTEGER NOT NULL,
-                    referred_id INTEGER NOT NULL,
-                    referral_code TEXT NOT NULL,
-                    bonus_amount REAL NOT NULL DEFAULT 50,
-                    referrer_bonus REAL NOT NULL DEFAULT 30,
-                    used INTEGER NOT NULL DEFAULT 0,
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_referrals_referrer ON referrals(referrer_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_referrals_code ON referrals(referral_code)")
-        
-            # Payments table
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS payments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    order_id INTEGER NOT NULL,
-                    driver_id INTEGER NOT NULL,
-                    amount REAL NOT NULL,
-                    commission REAL NOT NULL,
-                    commission_paid INTEGER NOT NULL DEFAULT 0,
-                    payment_method TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    commission_paid_at TEXT
-                )
-                """
-            )
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_payments_driver ON payments(driver_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_payments_commission_paid ON payments(commission_paid)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_payments_driver_unpaid ON payments(driver_id, commission_paid)")
-        
-            await db.commit()
-            
-            # Перевірити що таблиці створено
-            async with db.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
-            ) as cur:
-                tables = await cur.fetchall()
-                logger.info(f"📊 Створено таблиць: {len(tables)}")
-                if len(tables) > 0:
-                    table_names = [t[0] for t in tables]
-                    logger.info(f"📋 Таблиці: {', '.join(table_names)}")
-                else:
-                    logger.error("❌ ЖОДНОЇ таблиці не створено!")
-        
-        logger.info("✅ Всі таблиці SQLite створено!")
-    
-    except Exception as e:
-        logger.error(f"❌ ПОМИЛКА при створенні таблиць: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        raise
+    """
+    Схема БД (SQLite або PostgreSQL): застосувати нові версійні міграції (app/storage/migrations).
     
-    # Виконати міграції ПІСЛЯ створення всіх таблиць (ТІЛЬКИ для SQLite)
+    Якщо схема актуальна - один запит до schema_migrations.
+    """
     if not _is_postgres():
-        try:
-            await ensure_driver_columns(db_path)
-            # Міграція: додати commission_percent у tariffs якщо відсутнє
-            async with db_manager.connect(db_path) as db:
-                async with db.execute("PRAGMA table_info(tariffs)") as cur:
-                    cols = await cur.fetchall()
-                    col_names = [c[1] for c in cols]
-                if 'commission_percent' not in col_names:
-                    await db.execute("ALTER TABLE tariffs ADD COLUMN commission_percent REAL NOT NULL DEFAULT 0.02")
-                    await db.commit()
-            
-            logger.info("✅ SQLite міграції завершено успішно!")
-        
-        except Exception as e:
-            logger.error(f"❌ ПОМИЛКА при SQLite міграціях: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            raise
+        # Перевірити що папка існує
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            logger.info(f"📁 Створюю папку для БД: {db_dir}")
+            os.makedirs(db_dir, exist_ok=True)
     
-    logger.info("✅ init_db() завершено успішно!")
+    from app.storage.migrations import migrate
+    await migrate(db_path)
 
 
 async def insert_order(db_path: str, order: Order) -> int:
@@ -606,7 +212,17 @@ async def insert_order(db_path: str, order: Order) -> int:
             ),
         )
         await db.commit()
-        return cursor.lastrowid
+        order_id = cursor.lastrowid
+        
+        if order.status == "pending":
+            row = await db.fetchone("SELECT city FROM users WHERE user_id = ?", (order.user_id,))
+            _demand_tracker().order_created(order_id, row[0] if row else None, order.car_class)
+            if order.pickup_lat is not None and order.pickup_lon is not None:
+                _zone_tracker().pickup_requested(order.pickup_lat, order.pickup_lon)
+
+    from app.storage.order_state import emit_order_created
+    emit_order_created(replace(order, id=order_id))
+    return order_id
 
 
 async def update_order_group_message(db_path: str, order_id: int, message_id: int) -> bool:
@@ -670,44 +286,19 @@ async def cancel_order_by_client(db_path: str, order_id: int, user_id: int) -> b
     - completed (завершено)
     - cancelled (вже скасовано)
     """
-    async with db_manager.connect(db_path) as db:
-        # Спочатку отримати замовлення щоб зменшити карму водія якщо він був призначений
-        cur = await db.execute(
-            "SELECT driver_id, status FROM orders WHERE id = ? AND user_id = ?",
-            (order_id, user_id)
-        )
-        row = await cur.fetchone()
-        
-        if not row:
-            return False
-        
-        driver_id, status = row[0], row[1]
-        
-        # Перевірити чи можна скасувати
-        if status not in ('pending', 'accepted'):
-            return False
-        
-        # Скасувати замовлення
-        cur = await db.execute(
-            "UPDATE orders SET status = 'cancelled', finished_at = ? WHERE id = ? AND user_id = ? AND status IN ('pending', 'accepted')",
-            (datetime.now(timezone.utc), order_id, user_id),
-        )
-        await db.commit()
-        
-        # 🛑 Зупинити live location трекінг якщо був активний
-        try:
-            from app.utils.live_location_manager import LiveLocationManager
-            await LiveLocationManager.stop_tracking(order_id)
-        except Exception as e:
-            logger.warning(f"⚠️ Не вдалося зупинити live location: {e}")
-        
-        # Якщо водій був призначений (статус accepted) - повідомити водія
-        if driver_id and status == 'accepted':
-            logger.warning(f"⚠️ Клієнт скасував замовлення #{order_id}, водій #{driver_id} буде повідомлений")
-            # Тут не зменшуємо карму водія, бо це клієнт скасував, не водій
-            # Водій буде повідомлений в обробнику скасування
-        
-        return cur.rowcount > 0
+    from app.storage.order_state import transition_order
+    
+    order = await transition_order(db_path, "cancel_by_client", order_id, user_id=user_id)
+    if order is None:
+        return False
+    
+    # Якщо водій був призначений (статус accepted) - повідомити водія
+    if order.driver_id:
+        logger.warning(f"⚠️ Клієнт скасував замовлення #{order_id}, водій #{order.driver_id} буде повідомлений")
+        # Тут не зменшуємо карму водія, бо це клієнт скасував, не водій
+        # Водій буде повідомлений в обробнику скасування
+    
+    return True
 
 
 async def cancel_order_by_driver(db_path: str, order_id: int, driver_id: int, reason: str = "Driver cancelled") -> bool:
@@ -717,37 +308,17 @@ async def cancel_order_by_driver(db_path: str, order_id: int, driver_id: int, re
     Водій може скасувати тільки своє активне замовлення.
     Замовлення ПОВНІСТЮ скасовується (статус 'cancelled') БЕЗ штрафу для клієнта.
     """
-    async with db_manager.connect(db_path) as db:
-        # Перевірити що це замовлення цього водія
-        cur = await db.execute(
-            "SELECT id, user_id FROM orders WHERE id = ? AND driver_id = ? AND status IN ('accepted', 'in_progress')",
-            (order_id, driver_id)
-        )
-        row = await cur.fetchone()
-        
-        if not row:
-            return False
-        
-        user_id = row[1]
-        
-        # ПОВНІСТЮ скасувати замовлення (не повертати в pending!)
-        # Причина: клієнт не винен що водій відмовився
-        cur = await db.execute(
-            "UPDATE orders SET status = 'cancelled', driver_id = NULL, finished_at = ? WHERE id = ?",
-            (datetime.now(timezone.utc), order_id)
-        )
-        await db.commit()
-        
-        # 🛑 Зупинити live location трекінг якщо був активний
-        try:
-            from app.utils.live_location_manager import LiveLocationManager
-            await LiveLocationManager.stop_tracking(order_id)
-        except Exception as e:
-            logger.warning(f"⚠️ Не вдалося зупинити live location: {e}")
-        
-        # ВАЖЛИВО: Клієнт НЕ втрачає карму, бо скасував водій (не клієнт)
-        logger.warning(f"⚠️ Водій #{driver_id} скасував замовлення #{order_id}: {reason}. Замовлення ПОВНІСТЮ скасовано, карма клієнта #{user_id} НЕ зменшена")
-        return cur.rowcount > 0
+    from app.storage.order_state import transition_order
+    
+    # ПОВНІСТЮ скасувати замовлення (не повертати в pending!)
+    # Причина: клієнт не винен що водій відмовився
+    order = await transition_order(db_path, "cancel_by_driver", order_id, driver_id=driver_id)
+    if order is None:
+        return False
+    
+    # ВАЖЛИВО: Клієнт НЕ втрачає карму, бо скасував водій (не клієнт)
+    logger.warning(f"⚠️ Водій #{driver_id} скасував замовлення #{order_id}: {reason}. Замовлення ПОВНІСТЮ скасовано, карма клієнта #{order.user_id} НЕ зменшена")
+    return True
 
 
 async def get_active_order_for_driver(db_path: str, driver_id: int) -> Optional[Order]:
@@ -758,11 +329,8 @@ async def get_active_order_for_driver(db_path: str, driver_id: int) -> Optional[
     """
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, user_id, name, phone, pickup_address, destination_address, comment, created_at,
-                   pickup_lat, pickup_lon, dest_lat, dest_lon,
-                   driver_id, distance_m, duration_s, fare_amount, commission, status, started_at, finished_at, group_message_id,
-                   car_class, tip_amount, payment_method
+            f"""
+            SELECT {_ORDER_ROW.select_sql}
             FROM orders 
             WHERE driver_id = ? AND status IN ('accepted', 'in_progress')
             ORDER BY created_at DESC
@@ -775,32 +343,7 @@ async def get_active_order_for_driver(db_path: str, driver_id: int) -> Optional[
     if not row:
         return None
     
-    return Order(
-        id=row[0],
-        user_id=row[1],
-        name=row[2],
-        phone=row[3],
-        pickup_address=row[4],
-        destination_address=row[5],
-        comment=row[6],
-        created_at=_parse_datetime(row[7]),
-        pickup_lat=row[8],
-        pickup_lon=row[9],
-        dest_lat=row[10],
-        dest_lon=row[11],
-        driver_id=row[12],
-        distance_m=row[13],
-        duration_s=row[14],
-        fare_amount=row[15],
-        commission=row[16],
-        status=row[17],
-        started_at=_parse_datetime(row[18]),
-        finished_at=_parse_datetime(row[19]),
-        group_message_id=row[20],
-        car_class=row[21],
-        tip_amount=row[22],
-        payment_method=row[23],
-    )
+    return _ORDER_ROW.map_row(row)
 
 
 # ==================== Збережені адреси ====================
@@ -915,6 +458,20 @@ async def set_driver_online_status(db_path: str, driver_id: int, online: bool) -
             (1 if online else 0, datetime.now(timezone.utc), driver_id)
         )
         await db.commit()
+        
+        if cur.rowcount > 0:
+            row = await db.fetchone(
+                "SELECT city, car_class, status, tg_user_id, last_lat, last_lon FROM drivers WHERE id = ?",
+                (driver_id,)
+            )
+            if online:
+                if row and row[2] == 'approved':
+                    _demand_tracker().driver_online(driver_id, row[0], row[1] or "economy")
+                    _zone_tracker().driver_online(row[3], row[4], row[5])
+            else:
+                _demand_tracker().driver_offline(driver_id)
+                if row:
+                    _zone_tracker().driver_offline(row[3])
         return cur.rowcount > 0
 
 
@@ -938,20 +495,16 @@ async def get_online_drivers(db_path: str, city: Optional[str] = None) -> List[D
     """Отримати список онлайн водіїв"""
     async with db_manager.connect(db_path) as db:
         if city:
-            query = """
-                SELECT id, tg_user_id, full_name, phone, car_make, car_model, car_plate,
-                       license_photo_file_id, city, status, created_at, updated_at, online,
-                       last_lat, last_lon, last_seen_at, car_class, card_number, car_color, priority
+            query = f"""
+                SELECT {_DRIVER_LIST_ROW.select_sql}
                 FROM drivers
                 WHERE online = 1 AND status = 'approved' AND city = ?
                 ORDER BY priority DESC, last_seen_at DESC
             """
             params = (city,)
         else:
-            query = """
-                SELECT id, tg_user_id, full_name, phone, car_make, car_model, car_plate,
-                       license_photo_file_id, city, status, created_at, updated_at, online,
-                       last_lat, last_lon, last_seen_at, car_class, card_number, car_color, priority
+            query = f"""
+                SELECT {_DRIVER_LIST_ROW.select_sql}
                 FROM drivers
                 WHERE online = 1 AND status = 'approved'
                 ORDER BY priority DESC, last_seen_at DESC
@@ -960,31 +513,7 @@ async def get_online_drivers(db_path: str, city: Optional[str] = None) -> List[D
         
         async with db.execute(query, params) as cur:
             rows = await cur.fetchall()
-            return [
-                Driver(
-                    id=row[0],
-                    tg_user_id=row[1],
-                    full_name=row[2],
-                    phone=row[3],
-                    car_make=row[4],
-                    car_model=row[5],
-                    car_plate=row[6],
-                    license_photo_file_id=row[7],
-                    city=row[8],
-                    status=row[9],
-                    created_at=_parse_datetime(row[10]),
-                    updated_at=_parse_datetime(row[11]),
-                    online=bool(row[12]),
-                    last_lat=row[13],
-                    last_lon=row[14],
-                    last_seen_at=_parse_datetime(row[15]) if row[15] else None,
-                    car_class=row[16] if row[16] else "economy",
-                    card_number=row[17],
-                    car_color=row[18] if len(row) > 18 else None,  # ← ВИПРАВЛЕНО
-                    priority=(row[19] if len(row) > 19 else 0),  # ← ВИПРАВЛЕНО: було row[18]
-                )
-                for row in rows
-            ]
+            return _DRIVER_LIST_ROW.map_rows(rows)
 
 
 async def get_user_active_order(db_path: str, user_id: int) -> Optional[Order]:
@@ -993,11 +522,8 @@ async def get_user_active_order(db_path: str, user_id: int) -> Optional[Order]:
     """
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, user_id, name, phone, pickup_address, destination_address, comment, created_at,
-                   driver_id, distance_m, duration_s, fare_amount, commission, status,
-                   started_at, finished_at, pickup_lat, pickup_lon, dest_lat, dest_lon, group_message_id,
-                   car_class, tip_amount, payment_method
+            f"""
+            SELECT {_ORDER_ROW.select_sql}
             FROM orders
             WHERE user_id = ? AND status IN ('pending', 'accepted', 'in_progress')
             ORDER BY created_at DESC
@@ -1009,42 +535,14 @@ async def get_user_active_order(db_path: str, user_id: int) -> Optional[Order]:
             if not row:
                 return None
             
-            return Order(
-                id=row[0],
-                user_id=row[1],
-                name=row[2],
-                phone=row[3],
-                pickup_address=row[4],
-                destination_address=row[5],
-                comment=row[6],
-                created_at=_parse_datetime(row[7]),
-                driver_id=row[8],
-                distance_m=row[9],
-                duration_s=row[10],
-                fare_amount=row[11],
-                commission=row[12],
-                status=row[13],
-                started_at=_parse_datetime(row[14]) if row[14] else None,
-                finished_at=_parse_datetime(row[15]) if row[15] else None,
-                pickup_lat=row[16],
-                pickup_lon=row[17],
-                dest_lat=row[18],
-                dest_lon=row[19],
-                group_message_id=row[20],
-                car_class=row[21] if row[21] else "economy",
-                tip_amount=row[22],
-                payment_method=row[23] if row[23] else "cash",
-            )
+            return _ORDER_ROW.map_row(row)
 
 
 async def fetch_recent_orders(db_path: str, limit: int = 10) -> List[Order]:
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, user_id, name, phone, pickup_address, destination_address, comment, created_at,
-                   pickup_lat, pickup_lon, dest_lat, dest_lon,
-                   driver_id, distance_m, duration_s, fare_amount, commission, status, started_at, finished_at, group_message_id,
-                   car_class, tip_amount, payment_method
+            f"""
+            SELECT {_ORDER_ROW.select_sql}
             FROM orders
             ORDER BY id DESC
             LIMIT ?
@@ -1053,37 +551,7 @@ async def fetch_recent_orders(db_path: str, limit: int = 10) -> List[Order]:
         ) as cursor:
             rows = await cursor.fetchall()
 
-    orders: List[Order] = []
-    for row in rows:
-            orders.append(
-                Order(
-                    id=row[0],
-                    user_id=row[1],
-                    name=row[2],
-                    phone=row[3],
-                    pickup_address=row[4],
-                    destination_address=row[5],
-                    comment=row[6],
-                    created_at=_parse_datetime(row[7]),
-                    pickup_lat=row[8],
-                    pickup_lon=row[9],
-                    dest_lat=row[10],
-                    dest_lon=row[11],
-                    driver_id=row[12],
-                    distance_m=row[13],
-                    duration_s=row[14],
-                    fare_amount=row[15],
-                    commission=row[16],
-                    status=row[17],
-                    started_at=(_parse_datetime(row[18]) if row[18] else None),
-                    finished_at=(_parse_datetime(row[19]) if row[19] else None),
-                    group_message_id=row[20],
-                    car_class=row[21] if row[21] else "economy",
-                    tip_amount=row[22],
-                    payment_method=row[23] if row[23] else "cash",
-                )
-            )
-    return orders
+    return _ORDER_ROW.map_rows(rows)
 
 
 async def get_pending_orders(db_path: str, city: Optional[str] = None) -> List[Order]:
@@ -1091,11 +559,8 @@ async def get_pending_orders(db_path: str, city: Optional[str] = None) -> List[O
     Отримати всі очікуючі замовлення (pending)
     """
     async with db_manager.connect(db_path) as db:
-        query = """
-            SELECT id, user_id, name, phone, pickup_address, destination_address, comment, created_at,
-                   pickup_lat, pickup_lon, dest_lat, dest_lon,
-                   driver_id, distance_m, duration_s, fare_amount, commission, status, started_at, finished_at, group_message_id,
-                   car_class, tip_amount, payment_method
+        query = f"""
+            SELECT {_ORDER_ROW.select_sql}
             FROM orders
             WHERE status = 'pending'
             ORDER BY created_at DESC
@@ -1104,42 +569,12 @@ async def get_pending_orders(db_path: str, city: Optional[str] = None) -> List[O
         async with db.execute(query) as cur:
             rows = await cur.fetchall()
 
-    orders = []
-    for row in rows:
-        orders.append(
-            Order(
-                    id=row[0],
-                    user_id=row[1],
-                    name=row[2],
-                    phone=row[3],
-                    pickup_address=row[4],
-                    destination_address=row[5],
-                    comment=row[6],
-                    created_at=_parse_datetime(row[7]),
-                    pickup_lat=row[8],
-                    pickup_lon=row[9],
-                    dest_lat=row[10],
-                    dest_lon=row[11],
-                    driver_id=row[12],
-                    distance_m=row[13],
-                    duration_s=row[14],
-                    fare_amount=row[15],
-                    commission=row[16],
-                    status=row[17],
-                    started_at=(_parse_datetime(row[18]) if row[18] else None),
-                    finished_at=(_parse_datetime(row[19]) if row[19] else None),
-                    group_message_id=row[20],
-                    car_class=row[21] if row[21] else "economy",
-                    tip_amount=row[22] if row[22] is not None else 0.0,
-                    payment_method=row[23] if row[23] else "cash",
-            )
-        )
-    return orders
+    return _ORDER_ROW.map_rows(rows)
 
 
 # --- Users ---
 
-@dataclass
+@dataclass(slots=True)
 class User:
     user_id: int
     full_name: str
@@ -1155,6 +590,24 @@ class User:
     bonus_rides_available: int = 0  # Бонусні поїздки від адміна (додаткові до ліміту)
 
 
+_USER_ROW = RowShape(
+    User,
+    (
+        "user_id", "full_name", "phone", "role", "city", "language", "created_at",
+        "is_blocked", "karma", "total_orders", "cancelled_orders", "bonus_rides_available",
+    ),
+    coalesce=("language",),
+    expressions={
+        "is_blocked": "CASE WHEN is_blocked IS NULL THEN 0 WHEN is_blocked THEN 1 ELSE 0 END",
+        "karma": "COALESCE(karma, 100)",
+        "total_orders": "COALESCE(total_orders, 0)",
+        "cancelled_orders": "COALESCE(cancelled_orders, 0)",
+        "bonus_rides_available": "COALESCE(bonus_rides_available, 0)",
+    },
+    converters={"is_blocked": bool},
+)
+
+
 async def upsert_user(db_path: str, user: User) -> None:
     """
     Insert or replace a user profile. Uses user_id as a stable primary key.
@@ -1187,66 +640,155 @@ async def upsert_user(db_path: str, user: User) -> None:
 async def get_user_by_id(db_path: str, user_id: int) -> Optional[User]:
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """SELECT user_id, full_name, phone, role, city, language, created_at,
-               CASE WHEN is_blocked IS NULL THEN 0 WHEN is_blocked THEN 1 ELSE 0 END as is_blocked,
-               COALESCE(karma, 100) as karma,
-               COALESCE(total_orders, 0) as total_orders,
-               COALESCE(cancelled_orders, 0) as cancelled_orders,
-               COALESCE(bonus_rides_available, 0) as bonus_rides_available
-               FROM users WHERE user_id = ?""",
+            f"SELECT {_USER_ROW.select_sql} FROM users WHERE user_id = ?",
             (user_id,),
         ) as cursor:
             row = await cursor.fetchone()
     if not row:
         return None
-    return User(
-        user_id=row[0],
-        full_name=row[1],
-        phone=row[2],
-        role=row[3],
-        created_at=_parse_datetime(row[6]),
-        city=row[4],
-        language=row[5] if row[5] else "uk",
-        is_blocked=bool(row[7]),
-        karma=row[8],
-        total_orders=row[9],
-        cancelled_orders=row[10],
-        bonus_rides_available=row[11],
-    )
+    return _USER_ROW.map_row(row)
 
 
 async def get_all_users(db_path: str, role: str = "client") -> List[User]:
-    """Отримати всіх користувачів з певною роллю"""
+    """Отримати всіх користувачів з певною роллю (для списків в адмінці - get_users_page)"""
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """SELECT user_id, full_name, phone, role, city, language, created_at, 
-               CASE WHEN is_blocked IS NULL THEN 0 WHEN is_blocked THEN 1 ELSE 0 END as is_blocked, 
-               COALESCE(karma, 100) as karma,
-               COALESCE(total_orders, 0) as total_orders,
-               COALESCE(cancelled_orders, 0) as cancelled_orders,
-               COALESCE(bonus_rides_available, 0) as bonus_rides_available
-               FROM users WHERE role = ? ORDER BY created_at DESC""",
+            f"SELECT {_USER_ROW.select_sql} FROM users WHERE role = ? ORDER BY created_at DESC",
             (role,),
         ) as cursor:
             rows = await cursor.fetchall()
     
-    users = []
-    for row in rows:
-        users.append(User(
-            user_id=row[0],
-            full_name=row[1],
-            phone=row[2],
-            role=row[3],
-            created_at=_parse_datetime(row[6]),
-            city=row[4],
-            language=row[5] if row[5] else "uk",
-            is_blocked=bool(row[7]),
-            karma=row[8],
-            total_orders=row[9],
-            cancelled_orders=row[10],
-            bonus_rides_available=row[11],
-        ))
-    return users
+    return _USER_ROW.map_rows(rows)
+
+
+# --- Keyset-пагінація списків адміна ---
+
+@dataclass
+class KeysetPage:
+    """
+    Сторінка списку, відсортованого від нових до старих по (created_at, id).
+    
+    Курсор - id крайнього рядка сторінки (влазить у callback_data),
+    created_at курсора БД дістає сама підзапитом.
+    """
+    items: List[Any]
+    next_cursor: Optional[int] = None  # id останнього рядка, якщо є старіші
+    prev_cursor: Optional[int] = None  # id першого рядка, якщо є новіші
+
+
+async def _fetch_keyset_page(
+    db_path: str,
+    table: str,
+    columns: str,
+    key: str,
+    where: List[str],
+    params: List[Any],
+    after: Optional[int],
+    before: Optional[int],
+    limit: int,
+) -> Tuple[list, Optional[int], Optional[int]]:
+    """
+    Рядки сторінки + курсори (next, prev). Перша колонка в columns має бути key.
+    
+    after - сторінка старіших за рядок з цим id, before - новіших (кнопка "назад").
+    """
+    conditions = list(where)
+    params = list(params)
+    backwards = after is None and before is not None
+    cursor_id = before if backwards else after
+    if cursor_id is not None:
+        op = ">" if backwards else "<"
+        conditions.append(f"(created_at, {key}) {op} (SELECT created_at, {key} FROM {table} WHERE {key} = ?)")
+        params.append(cursor_id)
+    
+    order = "ASC" if backwards else "DESC"
+    query = (
+        f"SELECT {columns} FROM {table} "
+        f"WHERE {' AND '.join(conditions) if conditions else '1 = 1'} "
+        f"ORDER BY created_at {order}, {key} {order} LIMIT ?"
+    )
+    params.append(limit + 1)
+    
+    async with db_manager.connect(db_path) as db:
+        rows = await db.fetchall(query, tuple(params))
+    
+    has_more = len(rows) > limit
+    rows = list(rows[:limit])
+    if not rows:
+        return [], None, None
+    if backwards:
+        rows.reverse()
+        next_cursor = rows[-1][0]
+        prev_cursor = rows[0][0] if has_more else None
+    else:
+        next_cursor = rows[-1][0] if has_more else None
+        prev_cursor = rows[0][0] if cursor_id is not None else None
+    return rows, next_cursor, prev_cursor
+
+
+async def get_users_page(
+    db_path: str,
+    role: str = "client",
+    blocked: Optional[bool] = None,
+    city: Optional[str] = None,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    limit: int = 10,
+) -> KeysetPage:
+    """Сторінка користувачів (фільтри blocked/city - в SQL, курсор - user_id)"""
+    where = ["role = ?"]
+    params: List[Any] = [role]
+    if blocked is not None:
+        where.append("COALESCE(is_blocked, FALSE) = ?")
+        params.append(blocked)
+    if city:
+        where.append("city = ?")
+        params.append(city)
+    
+    rows, next_cursor, prev_cursor = await _fetch_keyset_page(
+        db_path, "users", _USER_ROW.select_sql, "user_id", where, params, after, before, limit
+    )
+    return KeysetPage(_USER_ROW.map_rows(rows), next_cursor, prev_cursor)
+
+
+@dataclass
+class UserListStats:
+    """Підсумки для шапки списку клієнтів"""
+    total: int = 0
+    blocked: int = 0
+    total_orders: int = 0
+    avg_karma: float = 0.0
+
+    @property
+    def active(self) -> int:
+        return self.total - self.blocked
+
+
+async def get_users_stats(db_path: str, role: str = "client", city: Optional[str] = None) -> UserListStats:
+    """Кількість (всього/заблоковані), замовлення та середня карма - одним агрегатом"""
+    query = """
+        SELECT
+            COUNT(*),
+            SUM(CASE WHEN is_blocked THEN 1 ELSE 0 END),
+            SUM(COALESCE(total_orders, 0)),
+            AVG(COALESCE(karma, 100))
+        FROM users
+        WHERE role = ?
+    """
+    params: List[Any] = [role]
+    if city:
+        query += " AND city = ?"
+        params.append(city)
+    async with db_manager.connect(db_path) as db:
+        row = await db.fetchone(query, tuple(params))
+    if not row or not row[0]:
+        return UserListStats()
+    return UserListStats(
+        total=int(row[0]),
+        blocked=int(row[1] or 0),
+        total_orders=int(row[2] or 0),
+        avg_karma=float(row[3] or 0),
+    )
 
 
 async def block_user(db_path: str, user_id: int) -> None:
@@ -1282,7 +824,7 @@ async def delete_user(db_path: str, user_id: int) -> bool:
 
 # --- Drivers ---
 
-@dataclass
+@dataclass(slots=True)
 class Driver:
     id: Optional[int]
     tg_user_id: int
@@ -1309,6 +851,24 @@ class Driver:
     priority: int = 0  # 1 = пріоритетний для прямих DM
 
 
+# Списки водіїв (без лічильників карми - вони беруть дефолти моделі)
+_DRIVER_LIST_ROW = RowShape(
+    Driver,
+    (
+        "id", "tg_user_id", "full_name", "phone", "car_make", "car_model", "car_plate", "license_photo_file_id", "status",
+        "created_at", "updated_at", "city", "online", "last_lat", "last_lon", "last_seen_at", "car_class", "card_number",
+        "car_color", "priority",
+    ),
+    coalesce=("car_class",),
+)
+# Картка водія (всі колонки)
+_DRIVER_ROW = RowShape(
+    Driver,
+    _DRIVER_LIST_ROW.columns + ("karma", "total_orders", "rejected_orders"),
+    coalesce=("car_class",),
+)
+
+
 async def create_driver_application(db_path: str, driver: Driver) -> int:
     async with db_manager.connect(db_path) as db:
         # Спробувати з car_color (нова колонка)
@@ -1375,9 +935,8 @@ async def update_driver_status(db_path: str, driver_id: int, status: str) -> Non
 async def fetch_pending_drivers(db_path: str, limit: int = 20) -> List[Driver]:
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, tg_user_id, full_name, phone, car_make, car_model, car_plate, license_photo_file_id, status,
-                   created_at, updated_at, city, online, last_lat, last_lon, last_seen_at, car_class, card_number, car_color, priority
+            f"""
+            SELECT {_DRIVER_LIST_ROW.select_sql}
             FROM drivers
             WHERE status = 'pending'
             ORDER BY id ASC
@@ -1386,101 +945,88 @@ async def fetch_pending_drivers(db_path: str, limit: int = 20) -> List[Driver]:
             (limit,),
         ) as cursor:
             rows = await cursor.fetchall()
-    drivers: List[Driver] = []
-    for r in rows:
-        drivers.append(
-            Driver(
-                id=r[0],
-                tg_user_id=r[1],
-                full_name=r[2],
-                phone=r[3],
-                car_make=r[4],
-                car_model=r[5],
-                car_plate=r[6],
-                license_photo_file_id=r[7],
-                status=r[8],
-                created_at=_parse_datetime(r[9]),
-                updated_at=_parse_datetime(r[10]),
-                city=r[11],
-                online=r[12],
-                last_lat=r[13],
-                last_lon=r[14],
-                last_seen_at=(_parse_datetime(r[15]) if r[15] else None),
-                car_class=r[16] if r[16] else "economy",
-                card_number=r[17],
-                car_color=r[18] if len(r) > 18 else None,  # ← ДОДАНО
-                priority=(r[19] if len(r) > 19 else 0),
-            )
-        )
-    return drivers
+    return _DRIVER_LIST_ROW.map_rows(rows)
 
 
 async def get_driver_by_id(db_path: str, driver_id: int) -> Optional[Driver]:
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, tg_user_id, full_name, phone, car_make, car_model, car_plate, license_photo_file_id, status,
-                   created_at, updated_at, city, online, last_lat, last_lon, last_seen_at, car_class, card_number, car_color, priority,
-                   karma, total_orders, rejected_orders
-            FROM drivers WHERE id = ?
-            """,
+            f"SELECT {_DRIVER_ROW.select_sql} FROM drivers WHERE id = ?",
             (driver_id,),
         ) as cursor:
             row = await cursor.fetchone()
     if not row:
         return None
-    return Driver(
-        id=row[0],
-        tg_user_id=row[1],
-        full_name=row[2],
-        phone=row[3],
-        car_make=row[4],
-        car_model=row[5],
-        car_plate=row[6],
-        license_photo_file_id=row[7],
-        status=row[8],
-        created_at=_parse_datetime(row[9]),
-        updated_at=_parse_datetime(row[10]),
-        city=row[11],
-        online=row[12],
-        last_lat=row[13],
-        last_lon=row[14],
-        last_seen_at=(_parse_datetime(row[15]) if row[15] else None),
-        car_class=row[16] if row[16] else "economy",
-        card_number=row[17],
-        car_color=row[18] if len(row) > 18 else None,
-        priority=(row[19] if len(row) > 19 else 0),
-        karma=(row[20] if len(row) > 20 else 100),
-        total_orders=(row[21] if len(row) > 21 else 0),
-        rejected_orders=(row[22] if len(row) > 22 else 0),
+    return _DRIVER_ROW.map_row(row)
+
+
+async def get_drivers_page(
+    db_path: str,
+    status: Optional[str] = None,
+    city: Optional[str] = None,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    limit: int = 10,
+) -> KeysetPage:
+    """Сторінка водіїв (фільтри status/city - в SQL, курсор - drivers.id)"""
+    where: List[str] = []
+    params: List[Any] = []
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if city:
+        where.append("city = ?")
+        params.append(city)
+    
+    rows, next_cursor, prev_cursor = await _fetch_keyset_page(
+        db_path, "drivers", _DRIVER_ROW.select_sql, "id", where, params, after, before, limit
     )
+    return KeysetPage(_DRIVER_ROW.map_rows(rows), next_cursor, prev_cursor)
+
+
+async def get_driver_status_counts(db_path: str, city: Optional[str] = None) -> dict:
+    """Кількість водіїв за статусами: {'approved': N, 'pending': N, ...}"""
+    query = "SELECT status, COUNT(*) FROM drivers"
+    params: Tuple[Any, ...] = ()
+    if city:
+        query += " WHERE city = ?"
+        params = (city,)
+    query += " GROUP BY status"
+    async with db_manager.connect(db_path) as db:
+        rows = await db.fetchall(query, params)
+    return {row[0]: int(row[1]) for row in rows}
 
 
 async def delete_driver_account(db_path: str, tg_user_id: int) -> bool:
     """Видалити акаунт водія (повністю з усіх таблиць)"""
-    async with db_manager.connect(db_path) as db:
-        try:
+    from app.storage.order_state import ACCEPTED, IN_PROGRESS, OFFERED, apply_transition, emit_transition
+    
+    events = []
+    try:
+        async with db_manager.unit_of_work(db_path) as db:
             # Отримати ID водія перед видаленням
-            cursor = await db.execute(
-                "SELECT id FROM drivers WHERE tg_user_id = ?",
-                (tg_user_id,)
-            )
-            row = await cursor.fetchone()
-            
+            row = await db.fetchone("SELECT id FROM drivers WHERE tg_user_id = ?", (tg_user_id,))
             if not row:
                 return False
             
             driver_id = row[0]
             
-            # Видалити всі пов'язані дані
-            # 1. Payments
-            await db.execute("DELETE FROM payments WHERE driver_id = ?", (driver_id,))
+            # 1. Замовлення водія - через машину станів, щоб підписники зупинили таймери і live location:
+            # прийняті/в дорозі скасовуються, запропоновані повертаються в пошук
+            for order_id, status in await db.fetchall(
+                "SELECT id, status FROM orders WHERE driver_id = ? AND status IN (?, ?, ?)",
+                (driver_id, OFFERED, ACCEPTED, IN_PROGRESS)
+            ):
+                if status == OFFERED:
+                    event = await apply_transition(db, "reject", order_id)
+                else:
+                    event = await apply_transition(db, "cancel_by_driver", order_id, driver_id=driver_id)
+                if event is not None:
+                    events.append(event)
             
-            # 2. Orders (де водій був призначений)
-            await db.execute(
-                "UPDATE orders SET driver_id = NULL, status = 'cancelled' WHERE driver_id = ? AND status NOT IN ('completed', 'cancelled')",
-                (driver_id,)
-            )
+            # 2. Payments
+            await db.execute("DELETE FROM payments WHERE driver_id = ?", (driver_id,))
+            await db.execute("DELETE FROM driver_daily_stats WHERE driver_id = ?", (driver_id,))
             
             # 3. Ratings (як водія)
             await db.execute("DELETE FROM ratings WHERE to_user_id = ?", (tg_user_id,))
@@ -1488,32 +1034,27 @@ async def delete_driver_account(db_path: str, tg_user_id: int) -> bool:
             # 4. Client ratings
             await db.execute("DELETE FROM client_ratings WHERE driver_id = ?", (driver_id,))
             
-            # 5. Driver applications (якщо є таблиця)
-            try:
-                await db.execute("DELETE FROM driver_applications WHERE tg_user_id = ?", (tg_user_id,))
-            except:
-                pass
-            
-            # 6. Сам запис водія
+            # 5. Сам запис водія
             await db.execute("DELETE FROM drivers WHERE id = ?", (driver_id,))
-            
-            await db.commit()
-            
-            logger.info(f"✅ Видалено акаунт водія {driver_id} (tg_user_id: {tg_user_id})")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Помилка видалення акаунта водія {tg_user_id}: {e}")
-            return False
+    except Exception as e:
+        logger.error(f"❌ Помилка видалення акаунта водія {tg_user_id}: {e}")
+        return False
+    
+    for event in events:
+        emit_transition(event)
+    
+    logger.info(
+        f"✅ Видалено акаунт водія {driver_id} (tg_user_id: {tg_user_id}), "
+        f"знято замовлень: {len(events)}"
+    )
+    return True
 
 
 async def get_driver_by_tg_user_id(db_path: str, tg_user_id: int) -> Optional[Driver]:
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, tg_user_id, full_name, phone, car_make, car_model, car_plate, license_photo_file_id, status,
-                   created_at, updated_at, city, online, last_lat, last_lon, last_seen_at, car_class, card_number, car_color, priority,
-                   karma, total_orders, rejected_orders
+            f"""
+            SELECT {_DRIVER_ROW.select_sql}
             FROM drivers WHERE tg_user_id = ? ORDER BY id DESC LIMIT 1
             """,
             (tg_user_id,),
@@ -1521,31 +1062,7 @@ async def get_driver_by_tg_user_id(db_path: str, tg_user_id: int) -> Optional[Dr
             row = await cursor.fetchone()
     if not row:
         return None
-    return Driver(
-        id=row[0],
-        tg_user_id=row[1],
-        full_name=row[2],
-        phone=row[3],
-        car_make=row[4],
-        car_model=row[5],
-        car_plate=row[6],
-        license_photo_file_id=row[7],
-        status=row[8],
-        created_at=_parse_datetime(row[9]),
-        updated_at=_parse_datetime(row[10]),
-        city=row[11],
-        online=row[12],
-        last_lat=row[13],
-        last_lon=row[14],
-        last_seen_at=(_parse_datetime(row[15]) if row[15] else None),
-        car_class=row[16] if row[16] else "economy",
-        card_number=row[17],
-        car_color=row[18] if len(row) > 18 else None,
-        priority=(row[19] if len(row) > 19 else 0),
-        karma=(row[20] if len(row) > 20 else 100),
-        total_orders=(row[21] if len(row) > 21 else 0),
-        rejected_orders=(row[22] if len(row) > 22 else 0),
-    )
+    return _DRIVER_ROW.map_row(row)
 
 
 async def set_driver_online(db_path: str, tg_user_id: int, online: bool) -> None:
@@ -1566,69 +1083,50 @@ async def update_driver_location(db_path: str, tg_user_id: int, lat: float, lon:
             (lat, lon, now, tg_user_id),
         )
         await db.commit()
+    
+    _zone_tracker().driver_moved(tg_user_id, lat, lon)
 
 
 async def offer_order_to_driver(db_path: str, order_id: int, driver_id: int) -> bool:
-    async with db_manager.connect(db_path) as db:
-        cur = await db.execute(
-            "UPDATE orders SET driver_id = ?, status = 'offered' WHERE id = ? AND status = 'pending'",
-            (driver_id, order_id),
-        )
-        await db.commit()
-        return cur.rowcount > 0
+    from app.storage.order_state import transition_order
+    return await transition_order(db_path, "offer", order_id, driver_id=driver_id) is not None
 
 
-async def accept_order(db_path: str, order_id: int, driver_id: int) -> bool:
-    """Accept order from group - set driver and status to accepted"""
-    async with db_manager.connect(db_path) as db:
-        # Нова логіка: замовлення має status='pending' і driver_id=NULL
-        # Перший водій хто клікне - отримує замовлення
-        cur = await db.execute(
-            (
-                "UPDATE orders \n"
-                "SET status = 'accepted', driver_id = ? \n"
-                "WHERE id = ? \n"
-                "  AND status = 'pending' \n"
-                "  AND driver_id IS NULL \n"
-                "  AND (SELECT car_class FROM drivers WHERE id = ?) = car_class"
-            ),
-            (driver_id, order_id, driver_id),
-        )
-        await db.commit()
-        return cur.rowcount > 0
+async def accept_order(db_path: str, order_id: int, driver_id: int) -> Optional[Order]:
+    """
+    Accept order - set driver and status to accepted.
+    
+    Перший водій хто клікне - отримує замовлення (pending, без водія, його клас авто).
+    Повертає оновлене замовлення або None, якщо його вже прийняв інший водій.
+    """
+    from app.storage.order_state import transition_order
+    return await transition_order(db_path, "accept", order_id, driver_id=driver_id)
 
 
 async def reject_order(db_path: str, order_id: int) -> bool:
     """Reject order by driver - set status back to pending"""
-    async with db_manager.connect(db_path) as db:
-        cur = await db.execute(
-            "UPDATE orders SET status = 'pending', driver_id = NULL WHERE id = ? AND status = 'offered'",
-            (order_id,),
-        )
-        await db.commit()
-        return cur.rowcount > 0
+    from app.storage.order_state import transition_order
+    return await transition_order(db_path, "reject", order_id) is not None
 
 
 async def add_rejected_driver(db_path: str, order_id: int, driver_db_id: int) -> None:
-    """Add driver to rejected list for this order (stored as JSON in a new table or field)"""
-    # For simplicity, we'll create a simple rejected_offers table
-    async with db_manager.connect(db_path) as db:
-        await db.execute(
-            "CREATE TABLE IF NOT EXISTS rejected_offers (order_id INTEGER, driver_id INTEGER, rejected_at TEXT)"
-        )
-        await db.execute(
+    """Add driver to rejected list for this order (таблиця rejected_offers створюється в init_db)"""
+    await add_rejected_drivers(db_path, order_id, [driver_db_id])
+
+
+async def add_rejected_drivers(db_path: str, order_id: int, driver_db_ids: List[int]) -> None:
+    """Записати відмови кількох водіїв одним batch INSERT"""
+    now = datetime.now(timezone.utc)
+    async with db_manager.unit_of_work(db_path) as db:
+        await db.executemany(
             "INSERT INTO rejected_offers (order_id, driver_id, rejected_at) VALUES (?, ?, ?)",
-            (order_id, driver_db_id, datetime.now(timezone.utc)),
+            [(order_id, driver_db_id, now) for driver_db_id in driver_db_ids],
         )
-        await db.commit()
 
 
 async def get_rejected_drivers_for_order(db_path: str, order_id: int) -> List[int]:
     """Get list of driver IDs who rejected this order"""
     async with db_manager.connect(db_path) as db:
-        await db.execute(
-            "CREATE TABLE IF NOT EXISTS rejected_offers (order_id INTEGER, driver_id INTEGER, rejected_at TEXT)"
-        )
         async with db.execute(
             "SELECT driver_id FROM rejected_offers WHERE order_id = ?",
             (order_id,),
@@ -1638,15 +1136,9 @@ async def get_rejected_drivers_for_order(db_path: str, order_id: int) -> List[in
 
 
 async def start_order(db_path: str, order_id: int, driver_id: int) -> bool:
-    now = datetime.now(timezone.utc)
-    async with db_manager.connect(db_path) as db:
-        # Дозволяємо оновити якщо замовлення ще не почалось (accepted) або вже в процесі (in_progress)
-        cur = await db.execute(
-            "UPDATE orders SET status = 'in_progress', started_at = COALESCE(started_at, ?) WHERE id = ? AND driver_id = ? AND status IN ('accepted', 'in_progress')",
-            (now, order_id, driver_id),
-        )
-        await db.commit()
-        return cur.rowcount > 0
+    """Почати поїздку (accepted -> in_progress; повторний виклик для in_progress не змінює started_at)"""
+    from app.storage.order_state import transition_order
+    return await transition_order(db_path, "start", order_id, driver_id=driver_id) is not None
 
 
 async def complete_order(
@@ -1658,51 +1150,29 @@ async def complete_order(
     duration_s: int,
     commission: float,
 ) -> bool:
-    import logging
-    logger = logging.getLogger(__name__)
+    """Завершити замовлення (без payment - див. complete_order_with_payment)"""
+    from app.storage.order_state import apply_transition, emit_transition
     
-    now = datetime.now(timezone.utc)
-    async with db_manager.connect(db_path) as db:
-        # Спочатку перевіримо поточний статус замовлення
-        async with db.execute(
-            "SELECT id, status, driver_id FROM orders WHERE id = ?",
-            (order_id,)
-        ) as check_cursor:
-            check_row = await check_cursor.fetchone()
-            if check_row:
-                current_status = check_row[1]
-                current_driver = check_row[2]
-                logger.info(f"🔍 complete_order: замовлення #{order_id}, поточний статус: {current_status}, driver_id: {current_driver}")
-                
-                if current_driver != driver_id:
-                    logger.error(f"❌ complete_order: замовлення #{order_id} належить водію {current_driver}, а не {driver_id}")
-                    return False
-                    
-                if current_status not in ('accepted', 'in_progress'):
-                    logger.error(f"❌ complete_order: замовлення #{order_id} має статус '{current_status}', не можна завершити")
-                    return False
-            else:
-                logger.error(f"❌ complete_order: замовлення #{order_id} не знайдено в БД")
-                return False
-        
-        # Тепер оновлюємо
-        cur = await db.execute(
-            """
-            UPDATE orders
-            SET status = 'completed', finished_at = ?, fare_amount = ?, distance_m = ?, duration_s = ?, commission = ?
-            WHERE id = ? AND driver_id = ? AND status IN ('accepted', 'in_progress')
-            """,
-            (now, fare_amount, distance_m, duration_s, commission, order_id, driver_id),
+    async with db_manager.unit_of_work(db_path) as db:
+        event = await apply_transition(
+            db, "complete", order_id,
+            driver_id=driver_id,
+            fare_amount=fare_amount,
+            distance_m=distance_m,
+            duration_s=duration_s,
+            commission=commission,
         )
-        await db.commit()
-        
-        rows_affected = cur.rowcount
-        if rows_affected > 0:
-            logger.info(f"✅ complete_order: замовлення #{order_id} успішно оновлено, статус → 'completed'")
-        else:
-            logger.error(f"❌ complete_order: замовлення #{order_id} НЕ оновлено (rows_affected=0)")
-        
-        return rows_affected > 0
+        # Разом з денними підсумками водія
+        if event is not None:
+            await _add_driver_daily_stats(db, driver_id, event.at, trips=1)
+    
+    if event is None:
+        logger.error(f"❌ complete_order: замовлення #{order_id} НЕ оновлено (не активне або належить іншому водію)")
+        return False
+    
+    emit_transition(event)
+    logger.info(f"✅ complete_order: замовлення #{order_id} успішно оновлено, статус → 'completed'")
+    return True
 
 
 async def finalize_order_after_rating(db_path: str, order_id: int) -> bool:
@@ -1710,28 +1180,15 @@ async def finalize_order_after_rating(db_path: str, order_id: int) -> bool:
     Завершує замовлення після оцінки клієнта.
     Використовується коли клієнт ставить оцінку або пропускає її.
     """
-    now = datetime.now(timezone.utc)
-    async with db_manager.connect(db_path) as db:
-        cur = await db.execute(
-            """
-            UPDATE orders
-            SET status = 'completed', finished_at = COALESCE(finished_at, ?)
-            WHERE id = ? AND status != 'completed' AND status != 'cancelled'
-            """,
-            (now, order_id),
-        )
-        await db.commit()
-        return cur.rowcount > 0
+    from app.storage.order_state import transition_order
+    return await transition_order(db_path, "finalize", order_id) is not None
 
 
 async def get_order_by_id(db_path: str, order_id: int) -> Optional[Order]:
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, user_id, name, phone, pickup_address, destination_address, comment, created_at,
-                   pickup_lat, pickup_lon, dest_lat, dest_lon,
-                   driver_id, distance_m, duration_s, fare_amount, commission, status, started_at, finished_at, group_message_id,
-                   car_class, tip_amount, payment_method
+            f"""
+            SELECT {_ORDER_ROW.select_sql}
             FROM orders WHERE id = ?
             """,
             (order_id,),
@@ -1739,40 +1196,14 @@ async def get_order_by_id(db_path: str, order_id: int) -> Optional[Order]:
             row = await cursor.fetchone()
     if not row:
         return None
-    return Order(
-        id=row[0],
-        user_id=row[1],
-        name=row[2],
-        phone=row[3],
-        pickup_address=row[4],
-        destination_address=row[5],
-        comment=row[6],
-        created_at=_parse_datetime(row[7]),
-        pickup_lat=row[8],
-        pickup_lon=row[9],
-        dest_lat=row[10],
-        dest_lon=row[11],
-        driver_id=row[12],
-        distance_m=row[13],
-        duration_s=row[14],
-        fare_amount=row[15],
-        commission=row[16],
-        status=row[17],
-        started_at=(_parse_datetime(row[18]) if row[18] else None),
-        finished_at=(_parse_datetime(row[19]) if row[19] else None),
-        group_message_id=row[20],
-        car_class=row[21] if row[21] else "economy",
-        tip_amount=row[22],
-        payment_method=row[23] if row[23] else "cash",
-    )
+    return _ORDER_ROW.map_row(row)
 
 
 async def fetch_online_drivers(db_path: str, limit: int = 50) -> List[Driver]:
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, tg_user_id, full_name, phone, car_make, car_model, car_plate, license_photo_file_id, status,
-                   created_at, updated_at, city, online, last_lat, last_lon, last_seen_at, car_class, card_number, car_color, priority
+            f"""
+            SELECT {_DRIVER_LIST_ROW.select_sql}
             FROM drivers WHERE status = 'approved' AND online = 1
             ORDER BY last_seen_at DESC
             LIMIT ?
@@ -1780,33 +1211,7 @@ async def fetch_online_drivers(db_path: str, limit: int = 50) -> List[Driver]:
             (limit,),
         ) as cursor:
             rows = await cursor.fetchall()
-    drivers: List[Driver] = []
-    for r in rows:
-        drivers.append(
-            Driver(
-                id=r[0],
-                tg_user_id=r[1],
-                full_name=r[2],
-                phone=r[3],
-                car_make=r[4],
-                car_model=r[5],
-                car_plate=r[6],
-                license_photo_file_id=r[7],
-                status=r[8],
-                created_at=_parse_datetime(r[9]),
-                updated_at=_parse_datetime(r[10]),
-                city=r[11],
-                online=r[12],
-                last_lat=r[13],
-                last_lon=r[14],
-                last_seen_at=(_parse_datetime(r[15]) if r[15] else None),
-                car_class=r[16] if r[16] else "economy",
-                card_number=r[17],
-                car_color=r[18] if len(r) > 18 else None,  # ← ДОДАНО
-                priority=(r[19] if len(r) > 19 else 0),
-            )
-        )
-    return drivers
+    return _DRIVER_LIST_ROW.map_rows(rows)
 
 
 # --- Ratings ---
@@ -1833,7 +1238,8 @@ class ClientRating:
 
 
 async def insert_rating(db_path: str, rating: Rating) -> int:
-    async with db_manager.connect(db_path) as db:
+    """Зберегти оцінку водія і оновити drivers.rating_sum/rating_count в одній транзакції"""
+    async with db_manager.unit_of_work(db_path) as db:
         cursor = await db.execute(
             """
             INSERT INTO ratings (order_id, from_user_id, to_user_id, rating, comment, created_at)
@@ -1841,24 +1247,44 @@ async def insert_rating(db_path: str, rating: Rating) -> int:
             """,
             (rating.order_id, rating.from_user_id, rating.to_user_id, rating.rating, rating.comment, rating.created_at),
         )
-        await db.commit()
+        await db.execute(
+            "UPDATE drivers SET rating_sum = rating_sum + ?, rating_count = rating_count + 1 WHERE tg_user_id = ?",
+            (rating.rating, rating.to_user_id),
+        )
         return cursor.lastrowid
 
 
 async def get_driver_average_rating(db_path: str, driver_user_id: int) -> Optional[float]:
-    async with db_manager.connect(db_path) as db:
-        async with db.execute(
-            "SELECT AVG(rating) FROM ratings WHERE to_user_id = ?",
-            (driver_user_id,),
-        ) as cursor:
-            row = await cursor.fetchone()
-    return row[0] if row and row[0] else None
+    """Середній рейтинг водія (за tg_user_id) або None, якщо оцінок немає"""
+    ratings = await get_average_ratings(db_path, [driver_user_id])
+    return ratings.get(driver_user_id)
+
+
+async def get_average_ratings(db_path: str, driver_user_ids: Sequence[int]) -> Dict[int, float]:
+    """
+    Середні рейтинги кількох водіїв одним запитом.
+
+    Returns:
+        {tg_user_id: середній рейтинг} - лише для водіїв, які мають оцінки
+    """
+    ids = list(dict.fromkeys(driver_user_ids))
+    if not ids:
+        return {}
+    placeholders = ", ".join("?" * len(ids))
+    async with db_manager.connect(db_path) as db:
+        rows = await db.fetchall(
+            f"SELECT tg_user_id, rating_sum, rating_count FROM drivers "
+            f"WHERE tg_user_id IN ({placeholders}) AND rating_count > 0",
+            tuple(ids),
+        )
+    return {row[0]: row[1] / row[2] for row in rows}
 
 
 # --- Client Ratings ---
 
 async def insert_client_rating(db_path: str, rating: ClientRating) -> int:
-    async with db_manager.connect(db_path) as db:
+    """Зберегти оцінку клієнта і оновити users.rating_sum/rating_count в одній транзакції"""
+    async with db_manager.unit_of_work(db_path) as db:
         cursor = await db.execute(
             """
             INSERT INTO client_ratings (order_id, client_id, driver_id, rating, created_at)
@@ -1866,55 +1292,50 @@ async def insert_client_rating(db_path: str, rating: ClientRating) -> int:
             """,
             (rating.order_id, rating.client_id, rating.driver_id, rating.rating, rating.created_at),
         )
-        await db.commit()
+        await db.execute(
+            "UPDATE users SET rating_sum = rating_sum + ?, rating_count = rating_count + 1 WHERE user_id = ?",
+            (rating.rating, rating.client_id),
+        )
         return cursor.lastrowid
 
 
 async def get_client_average_rating(db_path: str, client_id: int) -> Optional[float]:
+    """Середній рейтинг клієнта або None, якщо оцінок немає"""
     async with db_manager.connect(db_path) as db:
-        async with db.execute(
-            "SELECT AVG(rating) FROM client_ratings WHERE client_id = ?",
+        row = await db.fetchone(
+            "SELECT rating_sum, rating_count FROM users WHERE user_id = ? AND rating_count > 0",
             (client_id,),
-        ) as cursor:
-            row = await cursor.fetchone()
-    return row[0] if row and row[0] else None
+        )
+    return row[0] / row[1] if row else None
 
 
 # --- Tips ---
 
 async def add_tip_to_order(db_path: str, order_id: int, amount: float) -> bool:
+    now = datetime.now(timezone.utc)
     async with db_manager.connect(db_path) as db:
         try:
-            await db.execute(
-                "INSERT INTO tips (order_id, amount, created_at) VALUES (?, ?, ?)",
-                (order_id, amount, datetime.now(timezone.utc))
-            )
-            await db.commit()
+            async with db.transaction():
+                await db.execute(
+                    "INSERT INTO tips (order_id, amount, created_at) VALUES (?, ?, ?)",
+                    (order_id, amount, now)
+                )
+                row = await db.fetchone("SELECT driver_id FROM orders WHERE id = ?", (order_id,))
+                if row and row[0]:
+                    await _add_driver_daily_stats(db, row[0], now, tips=amount)
             return True
         except:
             return False
 
 
 async def get_driver_tips_total(db_path: str, driver_tg_id: int) -> float:
-    """Отримати загальну суму чайових водія"""
+    """Отримати загальну суму чайових водія (з денних підсумків)"""
     async with db_manager.connect(db_path) as db:
-        # Get driver DB id
-        async with db.execute("SELECT id FROM drivers WHERE tg_user_id = ?", (driver_tg_id,)) as cur:
-            row = await cur.fetchone()
-        if not row:
-            return 0.0
-        driver_db_id = row[0]
-        
-        async with db.execute(
-            """
-            SELECT SUM(t.amount) FROM tips t
-            JOIN orders o ON t.order_id = o.id
-            WHERE o.driver_id = ?
-            """,
-            (driver_db_id,)
-        ) as cur:
-            row = await cur.fetchone()
-    return row[0] if row and row[0] else 0.0
+        row = await db.fetchone(
+            f"SELECT SUM(tips) FROM driver_daily_stats WHERE driver_id = {_DRIVER_ID}",
+            (driver_tg_id,)
+        )
+    return float(row[0]) if row and row[0] else 0.0
 
 
 # --- Referral Program ---
@@ -1996,15 +1417,81 @@ class Payment:
 
 async def insert_payment(db_path: str, payment: Payment) -> int:
     async with db_manager.connect(db_path) as db:
-        cursor = await db.execute(
+        async with db.transaction():
+            cursor = await db.execute(
+                """
+                INSERT INTO payments (order_id, driver_id, amount, commission, commission_paid, payment_method, created_at, commission_paid_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (payment.order_id, payment.driver_id, payment.amount, payment.commission, 1 if payment.commission_paid else 0, payment.payment_method, payment.created_at, payment.commission_paid_at if payment.commission_paid_at else None),
+            )
+            await _add_driver_daily_stats(
+                db, payment.driver_id, payment.created_at,
+                gross=payment.amount,
+                cash=payment.amount if payment.payment_method == 'cash' else 0.0,
+                card=payment.amount if payment.payment_method == 'card' else 0.0,
+                commission=payment.commission,
+                unpaid=0.0 if payment.commission_paid else payment.commission,
+            )
+        return cursor.lastrowid
+
+
+async def complete_order_with_payment(
+    db_path: str,
+    order_id: int,
+    driver_id: int,
+    fare_amount: float,
+    distance_m: int,
+    duration_s: int,
+    commission: float,
+    payment_method: str = "cash",
+    karma_bonus: int = 1,
+) -> bool:
+    """
+    Завершити поїздку одним unit of work: статус замовлення, payment,
+    денні підсумки водія, карма та лічильник поїздок водія.
+    
+    Або все записано, або нічого (замовлення вже завершене/чуже -> False без жодних змін).
+    Замінює послідовність complete_order + insert_payment + increase_driver_karma.
+    """
+    from app.storage.order_state import apply_transition, emit_transition
+    
+    now = datetime.now(timezone.utc)
+    async with db_manager.unit_of_work(db_path) as db:
+        event = await apply_transition(
+            db, "complete", order_id, now,
+            driver_id=driver_id,
+            fare_amount=fare_amount,
+            distance_m=distance_m,
+            duration_s=duration_s,
+            commission=commission,
+        )
+        if event is None:
+            logger.error(f"❌ complete_order_with_payment: замовлення #{order_id} не завершено (не активне або належить іншому водію)")
+            return False
+        
+        await db.execute(
             """
             INSERT INTO payments (order_id, driver_id, amount, commission, commission_paid, payment_method, created_at, commission_paid_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, 0, ?, ?, NULL)
             """,
-            (payment.order_id, payment.driver_id, payment.amount, payment.commission, 1 if payment.commission_paid else 0, payment.payment_method, payment.created_at, payment.commission_paid_at if payment.commission_paid_at else None),
+            (order_id, driver_id, fare_amount, commission, payment_method, now),
         )
-        await db.commit()
-        return cursor.lastrowid
+        await _add_driver_daily_stats(
+            db, driver_id, now,
+            trips=1,
+            gross=fare_amount,
+            cash=fare_amount if payment_method == 'cash' else 0.0,
+            card=fare_amount if payment_method == 'card' else 0.0,
+            commission=commission,
+            unpaid=commission,
+        )
+        if karma_bonus:
+            await db.execute(INCREASE_DRIVER_KARMA_UPDATE, (karma_bonus, karma_bonus, driver_id))
+    
+    emit_transition(event)
+    logger.info(f"✅ Замовлення #{order_id} завершено: {fare_amount:.0f} грн, комісія {commission:.2f} грн ({payment_method})")
+    return True
 
 
 async def mark_commission_paid(db_path: str, driver_tg_id: int) -> None:
@@ -2016,38 +1503,61 @@ async def mark_commission_paid(db_path: str, driver_tg_id: int) -> None:
         if not row:
             return
         driver_db_id = row[0]
-        await db.execute(
-            "UPDATE payments SET commission_paid = 1, commission_paid_at = ? WHERE driver_id = ? AND commission_paid = 0",
-            (now, driver_db_id),
-        )
-        await db.commit()
+        async with db.transaction():
+            await db.execute(
+                "UPDATE payments SET commission_paid = 1, commission_paid_at = ? WHERE driver_id = ? AND commission_paid = 0",
+                (now, driver_db_id),
+            )
+            await db.execute(
+                "UPDATE driver_daily_stats SET unpaid = 0 WHERE driver_id = ? AND unpaid != 0",
+                (driver_db_id,),
+            )
+
+
+# Запити заробітку за період: напіввідкритий інтервал [start, end) по created_at,
+# щоб працювали індекси (driver_id, created_at) / (driver_id, status, created_at).
+# DATE(created_at) = ? індекс не використовує і рахує добу по UTC, а не по Києву.
+_APPROVED_DRIVER_ID = "(SELECT id FROM drivers WHERE tg_user_id = ? AND status = 'approved')"
+
+DRIVER_PAYMENTS_PERIOD_QUERY = f"""
+    SELECT
+        SUM(CASE WHEN payment_method = 'cash' THEN amount ELSE 0 END),
+        SUM(CASE WHEN payment_method = 'card' THEN amount ELSE 0 END),
+        SUM(commission),
+        SUM(amount)
+    FROM payments
+    WHERE driver_id = {_APPROVED_DRIVER_ID}
+      AND created_at >= ? AND created_at < ?
+"""
+
+DRIVER_COMPLETED_ORDERS_PERIOD_QUERY = f"""
+    SELECT
+        COUNT(*),
+        SUM(COALESCE(duration_s, 0))
+    FROM orders
+    WHERE driver_id = {_APPROVED_DRIVER_ID}
+      AND status = 'completed'
+      AND created_at >= ? AND created_at < ?
+"""
 
 
 async def get_driver_earnings_today(db_path: str, driver_tg_id: int) -> Tuple[float, float]:
-    """Returns (total_earned, total_commission_owed) for today"""
+    """Returns (total_earned, total_commission_owed) for today (київська доба, рядок driver_daily_stats)"""
+    from app.utils.kyiv_time import kyiv_now
+    
     async with db_manager.connect(db_path) as db:
-        async with db.execute("SELECT id FROM drivers WHERE tg_user_id = ? AND status = 'approved'", (driver_tg_id,)) as cur:
-            row = await cur.fetchone()
-        if not row:
-            return (0.0, 0.0)
-        driver_db_id = row[0]
-        today = datetime.now(timezone.utc).date()
-        async with db.execute(
-            """
-            SELECT SUM(amount), SUM(commission) FROM payments
-            WHERE driver_id = ? AND DATE(created_at) = ?
-            """,
-            (driver_db_id, today),
-        ) as cur:
-            row = await cur.fetchone()
-    total_earned = row[0] if row and row[0] else 0.0
-    total_commission = row[1] if row and row[1] else 0.0
+        row = await db.fetchone(
+            f"SELECT gross, commission FROM driver_daily_stats WHERE driver_id = {_APPROVED_DRIVER_ID} AND day = ?",
+            (driver_tg_id, kyiv_now().date())
+        )
+    total_earned = float(row[0]) if row and row[0] else 0.0
+    total_commission = float(row[1]) if row and row[1] else 0.0
     return (total_earned, total_commission)
 
 
 async def get_driver_detailed_earnings_today(db_path: str, driver_tg_id: int) -> dict:
     """
-    Повертає детальну статистику заробітку водія за сьогодні
+    Повертає детальну статистику заробітку водія за сьогодні (київська доба)
     
     Returns:
         dict: {
@@ -2059,93 +1569,207 @@ async def get_driver_detailed_earnings_today(db_path: str, driver_tg_id: int) ->
             'hours_worked': float     # Відпрацьовано годин
         }
     """
+    from app.utils.kyiv_time import kyiv_days_range
+    
+    start, end = kyiv_days_range(1)
     async with db_manager.connect(db_path) as db:
-        # Отримати driver_id
-        async with db.execute(
-            "SELECT id FROM drivers WHERE tg_user_id = ? AND status = 'approved'",
-            (driver_tg_id,)
-        ) as cur:
-            row = await cur.fetchone()
-        
-        if not row:
-            return {
-                'total': 0.0,
-                'cash': 0.0,
-                'card': 0.0,
-                'commission': 0.0,
-                'trips_count': 0,
-                'hours_worked': 0.0
-            }
-        
-        driver_db_id = row[0]
-        today = datetime.now(timezone.utc).date()
-        
-        # Отримати розбивку по готівці та картці
-        async with db.execute(
-            """
-            SELECT 
-                SUM(CASE WHEN payment_method = 'cash' THEN amount ELSE 0 END) as cash_total,
-                SUM(CASE WHEN payment_method = 'card' THEN amount ELSE 0 END) as card_total,
-                SUM(commission) as total_commission,
-                SUM(amount) as total_amount
-            FROM payments
-            WHERE driver_id = ? AND DATE(created_at) = ?
-            """,
-            (driver_db_id, today)
-        ) as cur:
-            row = await cur.fetchone()
-        
-        cash = row[0] if row and row[0] else 0.0
-        card = row[1] if row and row[1] else 0.0
-        commission = row[2] if row and row[2] else 0.0
-        total = row[3] if row and row[3] else 0.0
-        
-        # Отримати кількість поїздок та тривалість
-        async with db.execute(
-            """
-            SELECT 
-                COUNT(*) as trips_count,
-                SUM(COALESCE(duration_s, 0)) as total_duration_seconds
-            FROM orders
-            WHERE driver_id = ? 
-            AND status = 'completed'
-            AND DATE(created_at) = ?
-            """,
-            (driver_db_id, today)
-        ) as cur:
-            row = await cur.fetchone()
-        
-        trips_count = row[0] if row and row[0] else 0
-        total_duration_seconds = row[1] if row and row[1] else 0
-        hours_worked = total_duration_seconds / 3600.0 if total_duration_seconds else 0.0
-        
-        # Якщо немає даних про тривалість, орієнтовно 20 хв на поїздку
-        if hours_worked == 0 and trips_count > 0:
-            hours_worked = (trips_count * 20) / 60.0
-        
-        return {
-            'total': total,
-            'cash': cash,
-            'card': card,
-            'commission': commission,
-            'trips_count': trips_count,
-            'hours_worked': hours_worked
-        }
+        # Розбивка по готівці та картці
+        payments_row = await db.fetchone(DRIVER_PAYMENTS_PERIOD_QUERY, (driver_tg_id, start, end))
+        # Кількість поїздок та тривалість
+        orders_row = await db.fetchone(DRIVER_COMPLETED_ORDERS_PERIOD_QUERY, (driver_tg_id, start, end))
+    
+    cash = float(payments_row[0]) if payments_row and payments_row[0] else 0.0
+    card = float(payments_row[1]) if payments_row and payments_row[1] else 0.0
+    commission = float(payments_row[2]) if payments_row and payments_row[2] else 0.0
+    total = float(payments_row[3]) if payments_row and payments_row[3] else 0.0
+    
+    trips_count = int(orders_row[0]) if orders_row and orders_row[0] else 0
+    total_duration_seconds = float(orders_row[1]) if orders_row and orders_row[1] else 0
+    hours_worked = total_duration_seconds / 3600.0 if total_duration_seconds else 0.0
+    
+    # Якщо немає даних про тривалість, орієнтовно 20 хв на поїздку
+    if hours_worked == 0 and trips_count > 0:
+        hours_worked = (trips_count * 20) / 60.0
+    
+    return {
+        'total': total,
+        'cash': cash,
+        'card': card,
+        'commission': commission,
+        'trips_count': trips_count,
+        'hours_worked': hours_worked
+    }
 
 
 async def get_driver_unpaid_commission(db_path: str, driver_tg_id: int) -> float:
+    """Несплачена комісія водія (з денних підсумків)"""
     async with db_manager.connect(db_path) as db:
-        async with db.execute("SELECT id FROM drivers WHERE tg_user_id = ? AND status = 'approved'", (driver_tg_id,)) as cur:
-            row = await cur.fetchone()
-        if not row:
-            return 0.0
-        driver_db_id = row[0]
-        async with db.execute(
-            "SELECT SUM(commission) FROM payments WHERE driver_id = ? AND commission_paid = 0",
-            (driver_db_id,),
-        ) as cur:
-            row = await cur.fetchone()
-    return row[0] if row and row[0] else 0.0
+        row = await db.fetchone(
+            f"SELECT SUM(unpaid) FROM driver_daily_stats WHERE driver_id = {_APPROVED_DRIVER_ID}",
+            (driver_tg_id,)
+        )
+    return float(row[0]) if row and row[0] else 0.0
+
+
+# --- Driver Daily Stats (денні підсумки) ---
+
+_DRIVER_ID = "(SELECT id FROM drivers WHERE tg_user_id = ?)"
+
+DRIVER_DAILY_STATS_UPSERT = """
+    INSERT INTO driver_daily_stats (driver_id, day, trips, gross, cash, card, commission, tips, unpaid)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (driver_id, day) DO UPDATE SET
+        trips = driver_daily_stats.trips + excluded.trips,
+        gross = driver_daily_stats.gross + excluded.gross,
+        cash = driver_daily_stats.cash + excluded.cash,
+        card = driver_daily_stats.card + excluded.card,
+        commission = driver_daily_stats.commission + excluded.commission,
+        tips = driver_daily_stats.tips + excluded.tips,
+        unpaid = driver_daily_stats.unpaid + excluded.unpaid
+"""
+
+# Панель водія: сьогоднішній рядок + підсумки за весь час одним проходом по PK (driver_id, day)
+DRIVER_PANEL_SUMMARY_QUERY = f"""
+    SELECT
+        SUM(CASE WHEN day = ? THEN gross ELSE 0 END),
+        SUM(CASE WHEN day = ? THEN commission ELSE 0 END),
+        SUM(CASE WHEN day = ? THEN trips ELSE 0 END),
+        SUM(tips),
+        SUM(unpaid)
+    FROM driver_daily_stats
+    WHERE driver_id = {_APPROVED_DRIVER_ID}
+"""
+
+
+@dataclass(frozen=True)
+class DriverPanelSummary:
+    """Дані для панелі водія: заробіток сьогодні, чайові та борг за весь час"""
+    earnings_today: float = 0.0
+    commission_today: float = 0.0
+    trips_today: int = 0
+    tips_total: float = 0.0
+    unpaid_commission: float = 0.0
+
+    @property
+    def net_today(self) -> float:
+        return self.earnings_today - self.commission_today
+
+
+async def _add_driver_daily_stats(
+    db,
+    driver_id: int,
+    at: datetime,
+    trips: int = 0,
+    gross: float = 0.0,
+    cash: float = 0.0,
+    card: float = 0.0,
+    commission: float = 0.0,
+    tips: float = 0.0,
+    unpaid: float = 0.0,
+) -> None:
+    """Додати приріст до денних підсумків водія (викликати всередині db.transaction())"""
+    from app.utils.kyiv_time import to_kyiv
+    
+    # executemany, а не execute: PostgresCursor дописує до INSERT "RETURNING id",
+    # а в driver_daily_stats колонки id немає - кожен запис падав би і повторювався
+    await db.executemany(
+        DRIVER_DAILY_STATS_UPSERT,
+        [(driver_id, to_kyiv(at).date(), trips, gross, cash, card, commission, tips, unpaid)],
+    )
+
+
+async def get_driver_panel_summary(db_path: str, driver_tg_id: int) -> DriverPanelSummary:
+    """Заробіток/комісія/поїздки за сьогодні, чайові та несплачена комісія - один запит"""
+    from app.utils.kyiv_time import kyiv_now
+    
+    today = kyiv_now().date()
+    async with db_manager.connect(db_path) as db:
+        row = await db.fetchone(DRIVER_PANEL_SUMMARY_QUERY, (today, today, today, driver_tg_id))
+    if not row:
+        return DriverPanelSummary()
+    return DriverPanelSummary(
+        earnings_today=float(row[0] or 0),
+        commission_today=float(row[1] or 0),
+        trips_today=int(row[2] or 0),
+        tips_total=float(row[3] or 0),
+        unpaid_commission=float(row[4] or 0),
+    )
+
+
+async def rebuild_driver_daily_stats(db_path: str) -> int:
+    """
+    Перерахувати driver_daily_stats з історії (payments, completed orders, tips).
+    
+    Returns:
+        Кількість записаних рядків (водій × день)
+    """
+    async with db_manager.connect(db_path) as db:
+        async with db.transaction():
+            rows = await fill_driver_daily_stats(db)
+    
+    logger.info(f"📊 driver_daily_stats перераховано: {rows} рядків")
+    return rows
+
+
+async def fill_driver_daily_stats(db) -> int:
+    """
+    Замінити driver_daily_stats підсумками з історії на відкритому з'єднанні
+    (викликати всередині транзакції - так її використовує і міграція 0003).
+    
+    Київська дата рахується в Python - однаково для SQLite і PostgreSQL.
+    """
+    from collections import defaultdict
+    from app.utils.kyiv_time import to_kyiv
+    
+    # (driver_id, day) -> [trips, gross, cash, card, commission, tips, unpaid]
+    totals = defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    
+    def bucket(driver_id, value):
+        at = _parse_datetime(value)
+        if driver_id is None or at is None:
+            return None
+        return totals[(driver_id, to_kyiv(at).date())]
+    
+    for driver_id, amount, commission, paid, method, created_at in await db.fetchall(
+        "SELECT driver_id, amount, commission, commission_paid, payment_method, created_at FROM payments"
+    ):
+        row = bucket(driver_id, created_at)
+        if row is None:
+            continue
+        amount, commission = float(amount or 0), float(commission or 0)
+        row[1] += amount
+        if method == 'cash':
+            row[2] += amount
+        elif method == 'card':
+            row[3] += amount
+        row[4] += commission
+        if not paid:
+            row[6] += commission
+    
+    for driver_id, finished_at in await db.fetchall(
+        "SELECT driver_id, COALESCE(finished_at, created_at) FROM orders WHERE status = 'completed' AND driver_id IS NOT NULL"
+    ):
+        row = bucket(driver_id, finished_at)
+        if row is not None:
+            row[0] += 1
+    
+    for driver_id, amount, created_at in await db.fetchall(
+        "SELECT o.driver_id, t.amount, t.created_at FROM tips t JOIN orders o ON t.order_id = o.id"
+    ):
+        row = bucket(driver_id, created_at)
+        if row is not None:
+            row[5] += float(amount or 0)
+    
+    await db.execute("DELETE FROM driver_daily_stats")
+    await db.executemany(
+        """
+        INSERT INTO driver_daily_stats (driver_id, day, trips, gross, cash, card, commission, tips, unpaid)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [(driver_id, day, *values) for (driver_id, day), values in totals.items()],
+    )
+    
+    return len(totals)
 
 
 # --- Order History ---
@@ -2153,11 +1777,8 @@ async def get_driver_unpaid_commission(db_path: str, driver_tg_id: int) -> float
 async def get_user_order_history(db_path: str, user_id: int, limit: int = 10) -> List[Order]:
     async with db_manager.connect(db_path) as db:
         async with db.execute(
-            """
-            SELECT id, user_id, name, phone, pickup_address, destination_address, comment, created_at,
-                   pickup_lat, pickup_lon, dest_lat, dest_lon,
-                   driver_id, distance_m, duration_s, fare_amount, commission, status, started_at, finished_at, group_message_id,
-                   car_class, tip_amount, payment_method
+            f"""
+            SELECT {_ORDER_ROW.select_sql}
             FROM orders
             WHERE user_id = ?
             ORDER BY id DESC
@@ -2166,156 +1787,77 @@ async def get_user_order_history(db_path: str, user_id: int, limit: int = 10) ->
             (user_id, limit),
         ) as cursor:
             rows = await cursor.fetchall()
-    orders: List[Order] = []
-    for row in rows:
-        orders.append(
-            Order(
-                id=row[0],
-                user_id=row[1],
-                name=row[2],
-                phone=row[3],
-                pickup_address=row[4],
-                destination_address=row[5],
-                comment=row[6],
-                created_at=_parse_datetime(row[7]),
-                pickup_lat=row[8],
-                pickup_lon=row[9],
-                dest_lat=row[10],
-                dest_lon=row[11],
-                driver_id=row[12],
-                distance_m=row[13],
-                duration_s=row[14],
-                fare_amount=row[15],
-                commission=row[16],
-                status=row[17],
-                started_at=(_parse_datetime(row[18]) if row[18] else None),
-                finished_at=(_parse_datetime(row[19]) if row[19] else None),
-                group_message_id=row[20],
-                car_class=row[21] if row[21] else "economy",
-                tip_amount=row[22],
-                payment_method=row[23] if row[23] else "cash",
-            )
-        )
-    return orders
+    return _ORDER_ROW.map_rows(rows)
 
 
 async def get_driver_order_history(db_path: str, driver_tg_id: int, limit: int = 10) -> List[Order]:
     async with db_manager.connect(db_path) as db:
-        # Get driver DB id
-        async with db.execute("SELECT id FROM drivers WHERE tg_user_id = ?", (driver_tg_id,)) as cur:
-            row = await cur.fetchone()
-        if not row:
-            return []
-        driver_db_id = row[0]
         async with db.execute(
-            """
-            SELECT id, user_id, name, phone, pickup_address, destination_address, comment, created_at,
-                   pickup_lat, pickup_lon, dest_lat, dest_lon,
-                   driver_id, distance_m, duration_s, fare_amount, commission, status, started_at, finished_at, group_message_id,
-                   car_class, tip_amount, payment_method
+            f"""
+            SELECT {_ORDER_ROW.select_sql}
             FROM orders
-            WHERE driver_id = ?
+            WHERE driver_id = (SELECT id FROM drivers WHERE tg_user_id = ?)
             ORDER BY id DESC
             LIMIT ?
             """,
-            (driver_db_id, limit),
+            (driver_tg_id, limit),
         ) as cursor:
             rows = await cursor.fetchall()
-    orders: List[Order] = []
-    for row in rows:
-        orders.append(
-            Order(
-                id=row[0],
-                user_id=row[1],
-                name=row[2],
-                phone=row[3],
-                pickup_address=row[4],
-                destination_address=row[5],
-                comment=row[6],
-                created_at=_parse_datetime(row[7]),
-                pickup_lat=row[8],
-                pickup_lon=row[9],
-                dest_lat=row[10],
-                dest_lon=row[11],
-                driver_id=row[12],
-                distance_m=row[13],
-                duration_s=row[14],
-                fare_amount=row[15],
-                commission=row[16],
-                status=row[17],
-                started_at=(_parse_datetime(row[18]) if row[18] else None),
-                finished_at=(_parse_datetime(row[19]) if row[19] else None),
-                group_message_id=row[20],
-                car_class=row[21] if row[21] else "economy",
-                tip_amount=row[22],
-                payment_method=row[23] if row[23] else "cash",
-            )
-        )
-    return orders
+    return _ORDER_ROW.map_rows(rows)
 
 
-async def _ensure_columns(db: aiosqlite.Connection) -> None:
-    async def has_column(table: str, column: str) -> bool:
-        async with db.execute(f"PRAGMA table_info({table})") as cur:
-            rows = await cur.fetchall()
-        return any(r[1] == column for r in rows)
-
-    # Best-effort add columns if missing
-    # Orders
-    if not await has_column('orders', 'pickup_lat'):
-        await db.execute("ALTER TABLE orders ADD COLUMN pickup_lat REAL")
-    if not await has_column('orders', 'pickup_lon'):
-        await db.execute("ALTER TABLE orders ADD COLUMN pickup_lon REAL")
-    if not await has_column('orders', 'dest_lat'):
-        await db.execute("ALTER TABLE orders ADD COLUMN dest_lat REAL")
-    if not await has_column('orders', 'dest_lon'):
-        await db.execute("ALTER TABLE orders ADD COLUMN dest_lon REAL")
-    if not await has_column('orders', 'driver_id'):
-        await db.execute("ALTER TABLE orders ADD COLUMN driver_id INTEGER")
-    if not await has_column('orders', 'distance_m'):
-        await db.execute("ALTER TABLE orders ADD COLUMN distance_m INTEGER")
-    if not await has_column('orders', 'duration_s'):
-        await db.execute("ALTER TABLE orders ADD COLUMN duration_s INTEGER")
-    if not await has_column('orders', 'fare_amount'):
-        await db.execute("ALTER TABLE orders ADD COLUMN fare_amount REAL")
-    if not await has_column('orders', 'commission'):
-        await db.execute("ALTER TABLE orders ADD COLUMN commission REAL")
-    if not await has_column('orders', 'status'):
-        await db.execute("ALTER TABLE orders ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'")
-    if not await has_column('orders', 'started_at'):
-        await db.execute("ALTER TABLE orders ADD COLUMN started_at TEXT")
-    if not await has_column('orders', 'finished_at'):
-        await db.execute("ALTER TABLE orders ADD COLUMN finished_at TEXT")
-    if not await has_column('orders', 'group_message_id'):
-        await db.execute("ALTER TABLE orders ADD COLUMN group_message_id INTEGER")
-    if not await has_column('orders', 'car_class'):
-        await db.execute("ALTER TABLE orders ADD COLUMN car_class TEXT NOT NULL DEFAULT 'economy'")
-    if not await has_column('orders', 'tip_amount'):
-        await db.execute("ALTER TABLE orders ADD COLUMN tip_amount REAL")
-    if not await has_column('orders', 'payment_method'):
-        await db.execute("ALTER TABLE orders ADD COLUMN payment_method TEXT NOT NULL DEFAULT 'cash'")
-
-    # Drivers
-    if not await has_column('drivers', 'online'):
-        await db.execute("ALTER TABLE drivers ADD COLUMN online INTEGER NOT NULL DEFAULT 0")
-    if not await has_column('drivers', 'last_lat'):
-        await db.execute("ALTER TABLE drivers ADD COLUMN last_lat REAL")
-    if not await has_column('drivers', 'last_lon'):
-        await db.execute("ALTER TABLE drivers ADD COLUMN last_lon REAL")
-    if not await has_column('drivers', 'last_seen_at'):
-        await db.execute("ALTER TABLE drivers ADD COLUMN last_seen_at TEXT")
-    if not await has_column('drivers', 'city'):
-        await db.execute("ALTER TABLE drivers ADD COLUMN city TEXT")
-    if not await has_column('drivers', 'car_class'):
-        await db.execute("ALTER TABLE drivers ADD COLUMN car_class TEXT NOT NULL DEFAULT 'economy'")
-    if not await has_column('drivers', 'card_number'):
-        await db.execute("ALTER TABLE drivers ADD COLUMN card_number TEXT")
-    
-    # Users
-    if not await has_column('users', 'city'):
-        await db.execute("ALTER TABLE users ADD COLUMN city TEXT")
-    if not await has_column('users', 'language'):
-        await db.execute("ALTER TABLE users ADD COLUMN language TEXT NOT NULL DEFAULT 'uk'")
+@dataclass(slots=True)
+class OrderSummary:
+    """Рядок історії замовлень для списків (без координат, телефону, комісії тощо)"""
+    id: int
+    created_at: datetime
+    status: str
+    fare_amount: Optional[float] = None
+    pickup_address: str = ""
+    destination_address: str = ""
+
+
+_ORDER_SUMMARY_ROW = RowShape(
+    OrderSummary,
+    ("id", "created_at", "status", "fare_amount", "pickup_address", "destination_address"),
+    coalesce=("pickup_address", "destination_address"),
+)
+
+
+# Проекції історії: форма рядка (колонки + mapper)
+ORDER_HISTORY_PROJECTIONS = {
+    "summary": _ORDER_SUMMARY_ROW,
+    "full": _ORDER_ROW,
+}
+
+
+async def get_order_history_page(
+    db_path: str,
+    user_id: Optional[int] = None,
+    driver_tg_id: Optional[int] = None,
+    projection: str = "summary",
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    limit: int = 10,
+) -> KeysetPage:
+    """
+    Сторінка історії замовлень клієнта (user_id) або водія (driver_tg_id), від нових до старих.
+    
+    projection: "summary" -> OrderSummary (для списків), "full" -> Order.
+    Курсор - id замовлення; сортування йде по індексах (user_id|driver_id, created_at, id).
+    """
+    shape = ORDER_HISTORY_PROJECTIONS[projection]
+    if user_id is not None:
+        where, params = ["user_id = ?"], [user_id]
+    elif driver_tg_id is not None:
+        where, params = ["driver_id = (SELECT id FROM drivers WHERE tg_user_id = ?)"], [driver_tg_id]
+    else:
+        raise ValueError("Потрібен user_id або driver_tg_id")
+    
+    rows, next_cursor, prev_cursor = await _fetch_keyset_page(
+        db_path, "orders", shape.select_sql, "id", where, params, after, before, limit
+    )
+    return KeysetPage(shape.map_rows(rows), next_cursor, prev_cursor)
 
 
 # --- Tariffs ---
@@ -2356,6 +1898,7 @@ async def insert_tariff(db_path: str, t: Tariff) -> int:
             )
         
         await db.commit()
+        _invalidate_pricing_snapshot()
         return cursor.lastrowid
 
 
@@ -2381,6 +1924,7 @@ async def update_tariff_multipliers(db_path: str, night_percent: float, weather_
             (night_percent, weather_percent, tariff_id)
         )
         await db.commit()
+        _invalidate_pricing_snapshot()
         
         logger.info(f"✅ Оновлено націнки: нічний={night_percent}%, погода={weather_percent}%")
         return cur.rowcount > 0
@@ -2442,20 +1986,38 @@ async def get_latest_tariff(db_path: str) -> Optional[Tariff]:
 
 # === СИСТЕМА КАРМИ ===
 
+# CASE замість GREATEST/LEAST - їх немає в SQLite; карма в межах 0..100
+DECREASE_DRIVER_KARMA_UPDATE = """
+    UPDATE drivers
+    SET karma = CASE WHEN karma - ? < 0 THEN 0 ELSE karma - ? END,
+        rejected_orders = rejected_orders + 1
+    WHERE id = ?
+"""
+DECREASE_CLIENT_KARMA_UPDATE = """
+    UPDATE users
+    SET karma = CASE WHEN karma - ? < 0 THEN 0 ELSE karma - ? END,
+        cancelled_orders = cancelled_orders + 1
+    WHERE user_id = ?
+"""
+INCREASE_DRIVER_KARMA_UPDATE = """
+    UPDATE drivers
+    SET karma = CASE WHEN karma + ? > 100 THEN 100 ELSE karma + ? END,
+        total_orders = total_orders + 1
+    WHERE id = ?
+"""
+INCREASE_CLIENT_KARMA_UPDATE = """
+    UPDATE users
+    SET karma = CASE WHEN karma + ? > 100 THEN 100 ELSE karma + ? END,
+        total_orders = total_orders + 1
+    WHERE user_id = ?
+"""
+
+
 async def decrease_driver_karma(db_path: str, driver_id: int, amount: int = 5) -> bool:
     """Зменшити карму водія (за відмову від замовлення)"""
     async with db_manager.connect(db_path) as db:
         try:
-            # Зменшити карму, але не нижче 0
-            await db.execute(
-                """
-                UPDATE drivers 
-                SET karma = GREATEST(0, karma - ?),
-                    rejected_orders = rejected_orders + 1
-                WHERE id = ?
-                """,
-                (amount, driver_id)
-            )
+            await db.execute(DECREASE_DRIVER_KARMA_UPDATE, (amount, amount, driver_id))
             await db.commit()
             logger.info(f"⚠️ Карма водія #{driver_id} зменшена на -{amount}")
             return True
@@ -2468,15 +2030,7 @@ async def decrease_client_karma(db_path: str, user_id: int, amount: int = 5) ->
     """Зменшити карму клієнта (за скасування замовлення)"""
     async with db_manager.connect(db_path) as db:
         try:
-            await db.execute(
-                """
-                UPDATE users 
-                SET karma = GREATEST(0, karma - ?),
-                    cancelled_orders = cancelled_orders + 1
-                WHERE user_id = ?
-                """,
-                (amount, user_id)
-            )
+            await db.execute(DECREASE_CLIENT_KARMA_UPDATE, (amount, amount, user_id))
             await db.commit()
             logger.info(f"⚠️ Карма клієнта #{user_id} зменшена на -{amount}")
             return True
@@ -2489,15 +2043,7 @@ async def increase_driver_karma(db_path: str, driver_id: int, amount: int = 1) -
     """Збільшити карму водія (за успішне замовлення), макс 100"""
     async with db_manager.connect(db_path) as db:
         try:
-            await db.execute(
-                """
-                UPDATE drivers 
-                SET karma = LEAST(100, karma + ?),
-                    total_orders = total_orders + 1
-                WHERE id = ?
-                """,
-                (amount, driver_id)
-            )
+            await db.execute(INCREASE_DRIVER_KARMA_UPDATE, (amount, amount, driver_id))
             await db.commit()
             logger.info(f"✅ Карма водія #{driver_id} збільшена на +{amount}")
             return True
@@ -2510,15 +2056,7 @@ async def increase_client_karma(db_path: str, user_id: int, amount: int = 1) ->
     """Збільшити карму клієнта (за успішне замовлення), макс 100"""
     async with db_manager.connect(db_path) as db:
         try:
-            await db.execute(
-                """
-                UPDATE users 
-                SET karma = LEAST(100, karma + ?),
-                    total_orders = total_orders + 1
-                WHERE user_id = ?
-                """,
-                (amount, user_id)
-            )
+            await db.execute(INCREASE_CLIENT_KARMA_UPDATE, (amount, amount, user_id))
             await db.commit()
             logger.info(f"✅ Карма клієнта #{user_id} збільшена на +{amount}")
             return True
@@ -2780,9 +2318,96 @@ async def upsert_pricing_settings(db_path: str, settings: PricingSettings) -> bo
                 )
             
             await db.commit()
+            _invalidate_pricing_snapshot()
             logger.info("✅ Налаштування ціноутворення збережено")
             return True
             
         except Exception as e:
             logger.error(f"❌ Помилка збереження pricing_settings: {e}")
             return False
+
+
+# ==================== Ручні часові націнки (слоти тижня) ====================
+
+@dataclass
+class SurgeSlotOverride:
+    """Націнка адміна на конкретну годину тижня (свята, події)"""
+    id: Optional[int]
+    city: Optional[str]  # None = всі міста
+    weekday: int  # 0 = понеділок, 6 = неділя
+    hour: int  # 0..23 за київським часом
+    percent: float  # % надбавки, замінює розраховану часову націнку
+    reason: Optional[str] = None
+    created_at: Optional[datetime] = None
+    valid_on: Optional[date] = None  # None = щотижня, дата = лише цієї київської доби
+
+    def applies_on(self, day: Optional[date]) -> bool:
+        """Чи діє слот у київську добу day"""
+        return self.valid_on is None or self.valid_on == day
+
+
+async def get_surge_slot_overrides(db_path: str) -> List[SurgeSlotOverride]:
+    """Всі ручні слоти націнок (разові - включно з минулими, їх пропускає FareEngine)"""
+    async with db_manager.connect(db_path) as db:
+        try:
+            async with db.execute(
+                "SELECT id, city, weekday, hour, percent, reason, created_at, valid_on "
+                "FROM surge_slot_overrides ORDER BY valid_on, weekday, hour"
+            ) as cur:
+                rows = await cur.fetchall()
+        except Exception as e:
+            logger.warning(f"⚠️ Помилка читання surge_slot_overrides: {e}")
+            return []
+    return [
+        SurgeSlotOverride(
+            id=row[0],
+            city=row[1],
+            weekday=row[2],
+            hour=row[3],
+            percent=row[4],
+            reason=row[5],
+            created_at=_parse_datetime(row[6]),
+            # PostgreSQL - date, SQLite - "YYYY-MM-DD"
+            valid_on=date.fromisoformat(str(row[7])[:10]) if row[7] else None,
+        )
+        for row in rows
+    ]
+
+
+async def upsert_surge_slot_override(db_path: str, override: SurgeSlotOverride) -> bool:
+    """Створити або замінити націнку на слот (місто + день + година; разова - ще й дата)"""
+    city_filter = "city IS NULL" if override.city is None else "city = ?"
+    valid_on_filter = "valid_on IS NULL" if override.valid_on is None else "valid_on = ?"
+    params = tuple(
+        value for value in (override.city, override.weekday, override.hour, override.valid_on)
+        if value is not None
+    )
+    async with db_manager.connect(db_path) as db:
+        try:
+            await db.execute(
+                f"DELETE FROM surge_slot_overrides WHERE {city_filter} AND weekday = ? AND hour = ? AND {valid_on_filter}",
+                params
+            )
+            await db.execute(
+                "INSERT INTO surge_slot_overrides (city, weekday, hour, percent, reason, created_at, valid_on) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (override.city, override.weekday, override.hour, override.percent,
+                 override.reason, datetime.now(timezone.utc), override.valid_on)
+            )
+            await db.commit()
+        except Exception as e:
+            logger.error(f"❌ Помилка збереження surge_slot_overrides: {e}")
+            return False
+    _invalidate_pricing_snapshot()
+    return True
+
+
+async def delete_surge_slot_override(db_path: str, override_id: int) -> bool:
+    """Видалити ручну націнку"""
+    async with db_manager.connect(db_path) as db:
+        cur = await db.execute("DELETE FROM surge_slot_overrides WHERE id = ?", (override_id,))
+        await db.commit()
+        deleted = cur.rowcount > 0
+    if deleted:
+        _invalidate_pricing_snapshot()
+    return deleted
@@ -1,9 +1,13 @@
 """Універсальний connection manager для SQLite та PostgreSQL"""
 import os
+import sys
 import logging
+import time
 from typing import Optional, Any
 from contextlib import asynccontextmanager
 
+from app.utils import metrics, tracing
+
 try:
     import asyncpg
 except ImportError:
@@ -11,6 +15,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Тривалість блоку "async with db_manager.connect(...)" за функцією, що його відкрила
+DB_SECONDS = metrics.histogram("taxi_db_seconds", "DB connection block duration per storage function", ("function",))
+DB_ERRORS = metrics.counter("taxi_db_errors_total", "DB blocks that raised, per storage function", ("function",))
+
 
 class DatabaseConnection:
     """Менеджер підключення до БД (автоматично SQLite або PostgreSQL)"""
@@ -37,12 +45,42 @@ class DatabaseConnection:
     
     def connect(self, db_path: str):
         """Отримати connection (автоматично SQLite або PostgreSQL)"""
-        return _connection_context(self, db_path)
+        return _connection_context(self, db_path, sys._getframe(1).f_code.co_name)
+    
+    @asynccontextmanager
+    async def unit_of_work(self, db_path: str):
+        """
+        Кілька записів одним блоком: одне підключення, одна транзакція.
+        
+        async with db_manager.unit_of_work(db_path) as db:
+            await db.execute(...)
+            await db.executemany(...)
+        
+        Commit при виході, rollback якщо блок впав (db.commit() всередині не викликати).
+        """
+        # Функція-власник: генератор <- __aenter__ contextlib <- виклик unit_of_work
+        async with _connection_context(self, db_path, sys._getframe(2).f_code.co_name) as db:
+            async with db.transaction():
+                yield db
 
 
 @asynccontextmanager
-async def _connection_context(manager: DatabaseConnection, db_path: str):
-    """Async context manager для підключення"""
+async def _connection_context(manager: DatabaseConnection, db_path: str, caller: str = "?"):
+    """Async context manager для підключення (тривалість блоку - метрика taxi_db_seconds{function=caller} і спан траси)"""
+    started = time.perf_counter()
+    try:
+        with tracing.span("db", function=caller):
+            async with _open_connection(manager, db_path) as adapter:
+                yield adapter
+    except Exception:
+        DB_ERRORS.inc(caller)
+        raise
+    finally:
+        DB_SECONDS.observe(time.perf_counter() - started, caller)
+
+
+@asynccontextmanager
+async def _open_connection(manager: DatabaseConnection, db_path: str):
     logger.debug(f"🔌 Відкриваю підключення до {manager.db_type}...")
     
     if manager.db_type == "postgres":
@@ -87,17 +125,13 @@ class SQLiteCursor:
     
     async def __aenter__(self):
         """Відкрити cursor через async context manager"""
-        if not self._cursor:
-            # Отримати cursor від connection
-            self._cursor = self.adapter.conn.execute(self.query, self.params or ())
-        # Відкрити реальний aiosqlite cursor
-        await self._cursor.__aenter__()
+        await self._execute()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Закрити cursor"""
         if self._cursor:
-            await self._cursor.__aexit__(exc_type, exc_val, exc_tb)
+            await self._cursor.close()
         return False
     
     def __await__(self):
@@ -116,8 +150,8 @@ class SQLiteCursor:
             return
         
         self._executed = True
-        # aiosqlite.Connection.execute() НЕ є coroutine - просто повертає cursor
-        self._cursor = self.adapter.conn.execute(self.query, self.params or ())
+        # aiosqlite.Connection.execute() повертає awaitable Result - запит виконується лише після await
+        self._cursor = await self.adapter.conn.execute(self.query, self.params or ())
     
     @property
     def lastrowid(self):
@@ -135,16 +169,12 @@ class SQLiteCursor:
     
     async def fetchone(self):
         """Отримати один рядок"""
-        if not self._cursor:
-            # aiosqlite.Connection.execute() НЕ є coroutine
-            self._cursor = self.adapter.conn.execute(self.query, self.params or ())
+        await self._execute()
         return await self._cursor.fetchone()
     
     async def fetchall(self):
         """Отримати всі рядки"""
-        if not self._cursor:
-            # aiosqlite.Connection.execute() НЕ є coroutine
-            self._cursor = self.adapter.conn.execute(self.query, self.params or ())
+        await self._execute()
         return await self._cursor.fetchall()
 
 
@@ -176,10 +206,28 @@ class SQLiteAdapter:
             params = self._convert_params(params)
         return SQLiteCursor(self, query, params)
     
+    async def executemany(self, query: str, params_seq) -> int:
+        """Один запит для багатьох наборів параметрів (batch INSERT/UPDATE), повертає кількість змінених рядків"""
+        params_list = [self._convert_params(params) for params in params_seq]
+        if not params_list:
+            return 0
+        cursor = await self.conn.executemany(query, params_list)
+        return cursor.rowcount
+    
     async def commit(self):
         """Зберегти зміни"""
         await self.conn.commit()
     
+    @asynccontextmanager
+    async def transaction(self):
+        """Атомарний блок: commit при успіху, rollback при помилці (db.commit() всередині не викликати)"""
+        try:
+            yield self
+        except BaseException:
+            await self.conn.rollback()
+            raise
+        await self.conn.commit()
+    
     async def fetchone(self, query: str, params=None):
         """Отримати один рядок"""
         if params:
@@ -240,10 +288,7 @@ class PostgresCursor:
                 # Спробувати з RETURNING id
                 try:
                     returning_query = self.query.rstrip(';') + ' RETURNING id'
-                    if self.params:
-                        result = await self.adapter.conn.fetchrow(returning_query, *self.params)
-                    else:
-                        result = await self.adapter.conn.fetchrow(returning_query)
+                    result = await self._fetchrow_savepoint(returning_query)
                     
                     if result and 'id' in result:
                         self._lastrowid = result['id']
@@ -290,6 +335,15 @@ class PostgresCursor:
                 except:
                     self._rowcount = 0
     
+    async def _fetchrow_savepoint(self, query: str):
+        """fetchrow; всередині transaction() - у savepoint, щоб невдала спроба не зламала всю транзакцію"""
+        conn = self.adapter.conn
+        params = self.params or ()
+        if conn.is_in_transaction():
+            async with conn.transaction():
+                return await conn.fetchrow(query, *params)
+        return await conn.fetchrow(query, *params)
+    
     @property
     def lastrowid(self):
         """Отримати ID останнього вставленого рядка"""
@@ -341,10 +395,28 @@ class PostgresAdapter:
         # Повертаємо PostgresCursor який підтримує async with
         return PostgresCursor(self, query, params)
     
+    async def executemany(self, query: str, params_seq) -> int:
+        """
+        Один запит для багатьох наборів параметрів (batch INSERT/UPDATE).
+        
+        asyncpg не повертає rowcount для executemany - повертаємо кількість наборів параметрів.
+        """
+        params_list = [tuple(params) for params in params_seq]
+        if not params_list:
+            return 0
+        await self.conn.executemany(self._convert_query(query), params_list)
+        return len(params_list)
+    
     async def commit(self):
         """PostgreSQL не потребує явного commit"""
         pass
     
+    @asynccontextmanager
+    async def transaction(self):
+        """Атомарний блок (поза ним кожен запит - окрема autocommit транзакція)"""
+        async with self.conn.transaction():
+            yield self
+    
     @property
     def lastrowid(self):
         """Емуляція lastrowid для PostgreSQL"""
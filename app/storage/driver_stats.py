@@ -0,0 +1,102 @@
+"""Статистика водія за період (агрегати рахує БД одним запитом)"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.storage.db_connection import db_manager
+
+
+# Орієнтовна тривалість поїздки, якщо duration_s не збережено
+FALLBACK_TRIP_MINUTES = 20
+
+
+@dataclass(frozen=True)
+class DriverPeriodStats:
+    """Агрегати замовлень водія за [start, end)"""
+    start: datetime
+    end: datetime
+    total_orders: int = 0
+    completed_orders: int = 0
+    cancelled_orders: int = 0
+    earnings: float = 0.0
+    commission: float = 0.0
+    cash: float = 0.0
+    card: float = 0.0
+    tips: float = 0.0
+    hours_worked: float = 0.0
+
+    @property
+    def net(self) -> float:
+        return self.earnings - self.commission
+
+    @property
+    def commission_percent(self) -> float:
+        """Фактична частка комісії від заробітку (%)"""
+        return self.commission / self.earnings * 100 if self.earnings else 0.0
+
+    @property
+    def days(self) -> int:
+        return max(1, round((self.end - self.start).total_seconds() / 86400))
+
+    @property
+    def avg_per_day(self) -> float:
+        return self.earnings / self.days
+
+
+DRIVER_PERIOD_STATS_QUERY = """
+    SELECT
+        COUNT(*),
+        SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN status = 'completed' THEN COALESCE(fare_amount, 0) ELSE 0 END),
+        SUM(CASE WHEN status = 'completed' THEN COALESCE(commission, 0) ELSE 0 END),
+        SUM(CASE WHEN status = 'completed' AND payment_method = 'card' THEN COALESCE(fare_amount, 0) ELSE 0 END),
+        SUM(CASE WHEN status = 'completed' THEN COALESCE(tip_amount, 0) ELSE 0 END),
+        SUM(CASE WHEN status = 'completed' THEN COALESCE(duration_s, 0) ELSE 0 END),
+        SUM(CASE WHEN status = 'completed' AND duration_s IS NULL THEN 1 ELSE 0 END)
+    FROM orders
+    WHERE driver_id = ? AND created_at >= ? AND created_at < ?
+"""
+
+
+async def get_driver_period_stats(
+    db_path: str,
+    driver_id: int,
+    start: datetime,
+    end: datetime
+) -> DriverPeriodStats:
+    """
+    Статистика водія за напіввідкритий інтервал [start, end).
+
+    Args:
+        driver_id: ID водія в БД (drivers.id)
+        start, end: Межі періоду (timezone-aware, див. app.utils.kyiv_time.kyiv_days_range)
+    """
+    async with db_manager.connect(db_path) as db:
+        row = await db.fetchone(DRIVER_PERIOD_STATS_QUERY, (driver_id, start, end))
+
+    if not row or not row[0]:
+        return DriverPeriodStats(start=start, end=end)
+
+    # PostgreSQL повертає SUM як numeric/Decimal - приводимо явно
+    earnings = float(row[3] or 0)
+    card = float(row[5] or 0)
+    hours_worked = (
+        float(row[7] or 0) / 3600.0
+        + int(row[8] or 0) * FALLBACK_TRIP_MINUTES / 60.0
+    )
+
+    return DriverPeriodStats(
+        start=start,
+        end=end,
+        total_orders=int(row[0]),
+        completed_orders=int(row[1] or 0),
+        cancelled_orders=int(row[2] or 0),
+        earnings=earnings,
+        commission=float(row[4] or 0),
+        cash=earnings - card,
+        card=card,
+        tips=float(row[6] or 0),
+        hours_worked=hours_worked,
+    )
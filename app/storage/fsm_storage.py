@@ -0,0 +1,69 @@
+"""
+Сховище станів FSM aiogram у БД бота (fsm_states)
+
+MULTI_INSTANCE=1: webhook приймає кожен процес, і наступне оновлення користувача може
+потрапити в інший процес - стан і дані кроків (оформлення замовлення, реєстрація,
+адреси з WebApp) мають бути спільними. MemoryStorage тримає їх у пам'яті одного процесу.
+
+Один рядок на ключ (бот, чат, користувач): state і data (JSON). Дані FSM у боті -
+рядки, числа, координати, id повідомлень - серіалізуються без втрат.
+Рядок без стану і даних видаляється.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from app.storage.db_connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+# executemany: PostgresCursor дописує до INSERT через execute() "RETURNING id", а колонки id тут немає
+UPSERT_STATE_SQL = """
+    INSERT INTO fsm_states (key, state, data) VALUES (?, ?, '{}')
+    ON CONFLICT (key) DO UPDATE SET state = excluded.state
+"""
+UPSERT_DATA_SQL = """
+    INSERT INTO fsm_states (key, state, data) VALUES (?, NULL, ?)
+    ON CONFLICT (key) DO UPDATE SET data = excluded.data
+"""
+DELETE_EMPTY_SQL = "DELETE FROM fsm_states WHERE key = ? AND state IS NULL AND data = '{}'"
+
+
+class DatabaseStorage(BaseStorage):
+    """FSM-сховище, спільне для всіх процесів, що працюють з однією БД"""
+
+    def __init__(self, db_path: str, key_builder: Optional[KeyBuilder] = None):
+        self.db_path = db_path
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+    async def _write(self, key: StorageKey, query: str, value: Optional[str]) -> None:
+        record_key = self.key_builder.build(key)
+        async with db_manager.connect(self.db_path) as db:
+            async with db.transaction():
+                await db.executemany(query, [(record_key, value)])
+                await db.executemany(DELETE_EMPTY_SQL, [(record_key,)])
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, UPSERT_STATE_SQL, state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        async with db_manager.connect(self.db_path) as db:
+            row = await db.fetchone("SELECT state FROM fsm_states WHERE key = ?", (self.key_builder.build(key),))
+        return row[0] if row else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._write(key, UPSERT_DATA_SQL, json.dumps(data, ensure_ascii=False))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        async with db_manager.connect(self.db_path) as db:
+            row = await db.fetchone("SELECT data FROM fsm_states WHERE key = ?", (self.key_builder.build(key),))
+        return json.loads(row[0]) if row and row[0] else {}
+
+    async def close(self) -> None:
+        pass
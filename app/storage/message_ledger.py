@@ -0,0 +1,100 @@
+"""
+Реєстр повідомлень по чатах (chat_messages)
+
+Для кожного чату зберігаються message_id, що належать певному процесу (scope):
+- ORDER_FLOW - оформлення замовлення клієнтом
+- order:<id> - повідомлення водія по конкретному замовленню
+
+Очищення чату видаляє рівно ці повідомлення, а не "останні N id підряд",
+і переживає перезапуск бота (раніше список жив у словнику в пам'яті).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from app.storage.db_connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+ORDER_FLOW = "order_flow"
+
+# Telegram дозволяє боту видаляти повідомлення не старші за 48 годин
+MESSAGE_DELETE_WINDOW = timedelta(hours=48)
+# Як часто прибирати записи, які вже не можна видалити
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def order_scope(order_id: int) -> str:
+    """Scope повідомлень конкретного замовлення"""
+    return f"order:{order_id}"
+
+
+async def record_messages(db_path: str, chat_id: int, scope: str, message_ids: Iterable[int]) -> int:
+    """Записати message_id в реєстр (повтори ігноруються)"""
+    now = datetime.now(timezone.utc)
+    params = [(chat_id, scope, message_id, now) for message_id in dict.fromkeys(message_ids)]
+    if not params:
+        return 0
+    async with db_manager.connect(db_path) as db:
+        count = await db.executemany(
+            """
+            INSERT INTO chat_messages (chat_id, scope, message_id, created_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (chat_id, scope, message_id) DO NOTHING
+            """,
+            params,
+        )
+        await db.commit()
+    return count
+
+
+async def record_message(db_path: str, chat_id: int, scope: str, message_id: int) -> None:
+    await record_messages(db_path, chat_id, scope, (message_id,))
+
+
+async def pop_messages(
+    db_path: str,
+    chat_id: int,
+    scope: str,
+    before: Optional[datetime] = None,
+) -> List[int]:
+    """
+    Забрати з реєстру повідомлення scope (DELETE ... RETURNING).
+
+    before - лише записані раніше цього моменту (повідомлення поточного кроку не чіпаються).
+    Два паралельні очищення не видалять одне повідомлення двічі - id отримає лише одне з них.
+    """
+    query = "DELETE FROM chat_messages WHERE chat_id = ? AND scope = ?"
+    params: tuple = (chat_id, scope)
+    if before is not None:
+        query += " AND created_at < ?"
+        params += (before,)
+    async with db_manager.connect(db_path) as db:
+        rows = await db.fetchall(f"{query} RETURNING message_id", params)
+        await db.commit()
+    return sorted(row[0] for row in rows)
+
+
+async def prune_messages(db_path: str) -> int:
+    """Прибрати записи, старші за MESSAGE_DELETE_WINDOW (їх Telegram вже не дасть видалити)"""
+    cutoff = datetime.now(timezone.utc) - MESSAGE_DELETE_WINDOW
+    async with db_manager.connect(db_path) as db:
+        cursor = await db.execute("DELETE FROM chat_messages WHERE created_at < ?", (cutoff,))
+        await db.commit()
+        return cursor.rowcount
+
+
+async def message_ledger_prune_task(db_path: str) -> None:
+    """Фонова чистка реєстру повідомлень кожні PRUNE_INTERVAL_SECONDS"""
+    while True:
+        try:
+            removed = await prune_messages(db_path)
+            if removed:
+                logger.info(f"🧹 Реєстр повідомлень: прибрано {removed} застарілих записів")
+        except Exception as e:
+            logger.error(f"❌ Помилка чистки реєстру повідомлень: {e}")
+        await asyncio.sleep(PRUNE_INTERVAL_SECONDS)
@@ -0,0 +1,114 @@
+"""
+Довести таблиці, створені до версійних міграцій, до поточної схеми
+
+Раніше init_db/init_postgres_db на кожному старті перевіряли колонки і дописували відсутні.
+Тут це робиться один раз. На новій БД таблиць ще немає - міграція нічого не робить,
+а 0002_baseline створює їх одразу в повному вигляді.
+"""
+from __future__ import annotations
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# (таблиця, колонка, визначення) - колонки, додані до таблиць після їх створення
+LEGACY_COLUMNS = [
+    ("tariffs", "commission_percent", "{float} NOT NULL DEFAULT 0.02"),
+    ("tariffs", "night_tariff_percent", "{float} NOT NULL DEFAULT 50.0"),
+    ("tariffs", "weather_percent", "{float} NOT NULL DEFAULT 0.0"),
+    ("orders", "cancel_reason", "TEXT"),
+    ("drivers", "card_number", "TEXT"),
+    ("drivers", "car_class", "TEXT NOT NULL DEFAULT 'economy'"),
+    ("drivers", "car_color", "TEXT"),
+    ("drivers", "priority", "INTEGER NOT NULL DEFAULT 0"),
+    ("drivers", "karma", "INTEGER NOT NULL DEFAULT 100"),
+    ("drivers", "total_orders", "INTEGER NOT NULL DEFAULT 0"),
+    ("drivers", "rejected_orders", "INTEGER NOT NULL DEFAULT 0"),
+    ("users", "is_blocked", "{bool} NOT NULL DEFAULT {false}"),
+    ("users", "karma", "INTEGER NOT NULL DEFAULT 100"),
+    ("users", "total_orders", "INTEGER NOT NULL DEFAULT 0"),
+    ("users", "cancelled_orders", "INTEGER NOT NULL DEFAULT 0"),
+    ("users", "bonus_rides_available", "INTEGER NOT NULL DEFAULT 0"),
+    ("client_ratings", "driver_id", "INTEGER"),
+]
+
+# Перерахунок rating_sum/rating_count з історії оцінок
+RATING_AGGREGATES_BACKFILL = {
+    "drivers": """
+        UPDATE drivers SET
+            rating_sum = COALESCE((SELECT SUM(rating) FROM ratings WHERE to_user_id = drivers.tg_user_id), 0),
+            rating_count = (SELECT COUNT(*) FROM ratings WHERE to_user_id = drivers.tg_user_id)
+    """,
+    "users": """
+        UPDATE users SET
+            rating_sum = COALESCE((SELECT SUM(rating) FROM client_ratings WHERE client_id = users.user_id), 0),
+            rating_count = (SELECT COUNT(*) FROM client_ratings WHERE client_id = users.user_id)
+    """,
+}
+
+# Індекси з різними назвами в старих SQLite/PostgreSQL схемах (0002 створює один на колонку)
+DUPLICATE_INDEXES = ("idx_drivers_tg_user", "idx_payments_driver_id", "idx_users_user_id")
+
+
+async def _upgrade_postgres_only(db, dialect) -> None:
+    """Старі версії схеми, що були лише в PostgreSQL"""
+    if await dialect.table_exists(db, "ratings"):
+        columns = await dialect.columns(db, "ratings")
+        if "driver_user_id" in columns and "to_user_id" not in columns:
+            await db.execute("ALTER TABLE ratings RENAME COLUMN driver_user_id TO to_user_id")
+            columns = (columns - {"driver_user_id"}) | {"to_user_id"}
+            logger.info("✅ ratings.driver_user_id перейменовано на to_user_id")
+        if "from_user_id" not in columns:
+            await db.execute("ALTER TABLE ratings ADD COLUMN from_user_id BIGINT")
+            await db.execute("UPDATE ratings SET from_user_id = to_user_id WHERE from_user_id IS NULL")
+            await db.execute("ALTER TABLE ratings ALTER COLUMN from_user_id SET NOT NULL")
+            logger.info("✅ Колонка ratings.from_user_id додана")
+
+    if await dialect.table_exists(db, "payments"):
+        columns = await dialect.columns(db, "payments")
+        if "commission" not in columns and "driver_tg_id" in columns:
+            # Стара структура (driver_tg_id, payment_type) несумісна - 0002 створить таблицю заново
+            await db.execute("DROP TABLE payments CASCADE")
+            logger.info("✅ Стара таблиця payments видалена")
+        elif "commission" not in columns:
+            for column, definition in (
+                ("order_id", "INTEGER"),
+                ("driver_id", "INTEGER"),
+                ("commission", "DOUBLE PRECISION"),
+                ("commission_paid", "INTEGER DEFAULT 0"),
+                ("payment_method", "TEXT"),
+                ("commission_paid_at", "TIMESTAMP WITH TIME ZONE"),
+            ):
+                if column not in columns:
+                    await db.execute(f"ALTER TABLE payments ADD COLUMN {column} {definition}")
+            logger.info("✅ Колонки payments додані")
+
+
+async def upgrade(db, dialect) -> None:
+    if dialect.is_postgres:
+        await _upgrade_postgres_only(db, dialect)
+
+    existing = {}
+    for table, column, definition in LEGACY_COLUMNS:
+        if table not in existing:
+            existing[table] = await dialect.columns(db, table) if await dialect.table_exists(db, table) else None
+        columns = existing[table]
+        if columns is None or column in columns:
+            continue
+        await db.execute(dialect.sql(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+        columns.add(column)
+        logger.info(f"✅ Колонка {table}.{column} додана")
+
+    for table, ratings_table in (("drivers", "ratings"), ("users", "client_ratings")):
+        columns = existing.get(table)
+        if columns is None or "rating_sum" in columns:
+            continue
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN rating_sum INTEGER NOT NULL DEFAULT 0")
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN rating_count INTEGER NOT NULL DEFAULT 0")
+        if await dialect.table_exists(db, ratings_table):
+            await db.execute(RATING_AGGREGATES_BACKFILL[table])
+        logger.info(f"✅ Додано {table}.rating_sum/rating_count (перераховано з історії оцінок)")
+
+    for index in DUPLICATE_INDEXES:
+        await db.execute(f"DROP INDEX IF EXISTS {index}")
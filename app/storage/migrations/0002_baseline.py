@@ -0,0 +1,367 @@
+"""
+Базова схема: усі таблиці та індекси
+
+Спільна для SQLite і PostgreSQL (типи - через dialect.sql). Таблиці, що вже є
+(старі БД після 0001), не змінюються; нова БД отримує повну схему одним кроком.
+Подальші зміни схеми - нові файли 0003_..., а не правки цього.
+"""
+from __future__ import annotations
+
+TABLES = [
+    # Збережені адреси
+    """
+    CREATE TABLE IF NOT EXISTS saved_addresses (
+        id {pk},
+        user_id {bigint} NOT NULL,
+        name TEXT NOT NULL,
+        emoji TEXT NOT NULL DEFAULT '📍',
+        address TEXT NOT NULL,
+        lat {float},
+        lon {float},
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Замовлення
+    """
+    CREATE TABLE IF NOT EXISTS orders (
+        id {pk},
+        user_id {bigint} NOT NULL,
+        name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        pickup_address TEXT NOT NULL,
+        destination_address TEXT NOT NULL,
+        comment TEXT,
+        created_at {ts} NOT NULL,
+        pickup_lat {float},
+        pickup_lon {float},
+        dest_lat {float},
+        dest_lon {float},
+        driver_id INTEGER,
+        distance_m INTEGER,
+        duration_s INTEGER,
+        fare_amount {float},
+        commission {float},
+        status TEXT NOT NULL DEFAULT 'pending',
+        started_at {ts},
+        finished_at {ts},
+        group_message_id {bigint},
+        car_class TEXT NOT NULL DEFAULT 'economy',
+        tip_amount {float},
+        payment_method TEXT NOT NULL DEFAULT 'cash',
+        cancel_reason TEXT
+    )
+    """,
+    # Тарифи
+    """
+    CREATE TABLE IF NOT EXISTS tariffs (
+        id {pk},
+        base_fare {float} NOT NULL,
+        per_km {float} NOT NULL,
+        per_minute {float} NOT NULL,
+        minimum {float} NOT NULL,
+        commission_percent {float} NOT NULL DEFAULT 0.02,
+        night_tariff_percent {float} NOT NULL DEFAULT 50.0,
+        weather_percent {float} NOT NULL DEFAULT 0.0,
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Користувачі
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id {bigint} PRIMARY KEY,
+        full_name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        role TEXT NOT NULL,
+        city TEXT,
+        language TEXT NOT NULL DEFAULT 'uk',
+        created_at {ts} NOT NULL,
+        is_blocked {bool} NOT NULL DEFAULT {false},
+        karma INTEGER NOT NULL DEFAULT 100,
+        total_orders INTEGER NOT NULL DEFAULT 0,
+        cancelled_orders INTEGER NOT NULL DEFAULT 0,
+        bonus_rides_available INTEGER NOT NULL DEFAULT 0,
+        rating_sum INTEGER NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # Водії: заявки та активні
+    """
+    CREATE TABLE IF NOT EXISTS drivers (
+        id {pk},
+        tg_user_id {bigint} NOT NULL,
+        full_name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        car_make TEXT NOT NULL,
+        car_model TEXT NOT NULL,
+        car_plate TEXT NOT NULL,
+        license_photo_file_id TEXT,
+        city TEXT,
+        status TEXT NOT NULL,
+        created_at {ts} NOT NULL,
+        updated_at {ts} NOT NULL,
+        online INTEGER NOT NULL DEFAULT 0,
+        last_lat {float},
+        last_lon {float},
+        last_seen_at {ts},
+        car_class TEXT NOT NULL DEFAULT 'economy',
+        card_number TEXT,
+        car_color TEXT,
+        priority INTEGER NOT NULL DEFAULT 0,
+        karma INTEGER NOT NULL DEFAULT 100,
+        total_orders INTEGER NOT NULL DEFAULT 0,
+        rejected_orders INTEGER NOT NULL DEFAULT 0,
+        rating_sum INTEGER NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # Відхилені водії для замовлення
+    """
+    CREATE TABLE IF NOT EXISTS order_rejected_drivers (
+        id {pk},
+        order_id INTEGER NOT NULL REFERENCES orders(id),
+        driver_id INTEGER NOT NULL REFERENCES drivers(id),
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Рейтинги водіїв
+    """
+    CREATE TABLE IF NOT EXISTS ratings (
+        id {pk},
+        order_id INTEGER NOT NULL REFERENCES orders(id),
+        from_user_id {bigint} NOT NULL,
+        to_user_id {bigint} NOT NULL,
+        rating INTEGER NOT NULL CHECK (rating >= 1 AND rating <= 5),
+        comment TEXT,
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Рейтинги клієнтів (водії оцінюють клієнтів)
+    """
+    CREATE TABLE IF NOT EXISTS client_ratings (
+        id {pk},
+        order_id INTEGER NOT NULL REFERENCES orders(id),
+        client_id {bigint} NOT NULL,
+        driver_id INTEGER NOT NULL,
+        rating INTEGER NOT NULL CHECK (rating >= 1 AND rating <= 5),
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Реферальні коди
+    """
+    CREATE TABLE IF NOT EXISTS referral_codes (
+        id {pk},
+        user_id {bigint} NOT NULL,
+        code TEXT NOT NULL UNIQUE,
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Реферальні використання
+    """
+    CREATE TABLE IF NOT EXISTS referral_usages (
+        id {pk},
+        referrer_user_id {bigint} NOT NULL,
+        referred_user_id {bigint} NOT NULL,
+        code TEXT NOT NULL,
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Промокоди
+    """
+    CREATE TABLE IF NOT EXISTS promo_codes (
+        id {pk},
+        code TEXT NOT NULL UNIQUE,
+        discount_percent {float} NOT NULL,
+        max_uses INTEGER,
+        current_uses INTEGER NOT NULL DEFAULT 0,
+        valid_from {ts},
+        valid_until {ts},
+        created_at {ts} NOT NULL,
+        created_by {bigint} NOT NULL
+    )
+    """,
+    # Використані промокоди
+    """
+    CREATE TABLE IF NOT EXISTS promo_code_usages (
+        id {pk},
+        promo_code_id INTEGER NOT NULL REFERENCES promo_codes(id),
+        user_id {bigint} NOT NULL,
+        order_id INTEGER REFERENCES orders(id),
+        used_at {ts} NOT NULL
+    )
+    """,
+    # Платежі (комісії)
+    """
+    CREATE TABLE IF NOT EXISTS payments (
+        id {pk},
+        order_id INTEGER NOT NULL,
+        driver_id INTEGER NOT NULL,
+        amount {float} NOT NULL,
+        commission {float} NOT NULL,
+        commission_paid INTEGER NOT NULL DEFAULT 0,
+        payment_method TEXT NOT NULL,
+        created_at {ts} NOT NULL,
+        commission_paid_at {ts}
+    )
+    """,
+    # Чайові
+    """
+    CREATE TABLE IF NOT EXISTS tips (
+        id {pk},
+        order_id INTEGER NOT NULL UNIQUE,
+        amount {float} NOT NULL,
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Реферальна програма
+    """
+    CREATE TABLE IF NOT EXISTS referrals (
+        id {pk},
+        referrer_id {bigint} NOT NULL,
+        referred_id {bigint} NOT NULL,
+        referral_code TEXT NOT NULL,
+        bonus_amount {float} NOT NULL DEFAULT 50,
+        referrer_bonus {float} NOT NULL DEFAULT 30,
+        used INTEGER NOT NULL DEFAULT 0,
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Водії, які відмовились від замовлення
+    """
+    CREATE TABLE IF NOT EXISTS rejected_offers (
+        order_id INTEGER NOT NULL,
+        driver_id INTEGER NOT NULL,
+        rejected_at {ts} NOT NULL
+    )
+    """,
+    # Реєстр повідомлень бота по чатах (очищення чату після замовлення)
+    """
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        chat_id {bigint} NOT NULL,
+        scope TEXT NOT NULL,
+        message_id {bigint} NOT NULL,
+        created_at {ts} NOT NULL,
+        PRIMARY KEY (chat_id, scope, message_id)
+    )
+    """,
+    # Оренда лідера для фонових задач
+    """
+    CREATE TABLE IF NOT EXISTS leader_leases (
+        name TEXT PRIMARY KEY,
+        holder TEXT NOT NULL,
+        expires_at {ts} NOT NULL
+    )
+    """,
+    # Налаштування ціноутворення
+    """
+    CREATE TABLE IF NOT EXISTS pricing_settings (
+        id {pk},
+        economy_multiplier {float} NOT NULL DEFAULT 1.0,
+        standard_multiplier {float} NOT NULL DEFAULT 1.3,
+        comfort_multiplier {float} NOT NULL DEFAULT 1.6,
+        business_multiplier {float} NOT NULL DEFAULT 2.0,
+        night_percent {float} NOT NULL DEFAULT 50.0,
+        peak_hours_percent {float} NOT NULL DEFAULT 30.0,
+        weekend_percent {float} NOT NULL DEFAULT 20.0,
+        monday_morning_percent {float} NOT NULL DEFAULT 15.0,
+        weather_percent {float} NOT NULL DEFAULT 0.0,
+        demand_very_high_percent {float} NOT NULL DEFAULT 40.0,
+        demand_high_percent {float} NOT NULL DEFAULT 25.0,
+        demand_medium_percent {float} NOT NULL DEFAULT 15.0,
+        demand_low_discount_percent {float} NOT NULL DEFAULT 10.0,
+        no_drivers_percent {float} NOT NULL DEFAULT 50.0,
+        created_at {ts} NOT NULL,
+        updated_at {ts} NOT NULL
+    )
+    """,
+    # Глобальні налаштування (картка адміна тощо)
+    """
+    CREATE TABLE IF NOT EXISTS app_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+    # Ручні часові націнки адміна (слот тижня: день + година, київський час)
+    """
+    CREATE TABLE IF NOT EXISTS surge_slot_overrides (
+        id {pk},
+        city TEXT,
+        weekday INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        percent {float} NOT NULL,
+        reason TEXT,
+        created_at {ts} NOT NULL
+    )
+    """,
+    # Денні підсумки водія (оновлюються разом з payments/orders/tips, день - київська дата)
+    """
+    CREATE TABLE IF NOT EXISTS driver_daily_stats (
+        driver_id INTEGER NOT NULL,
+        day {date} NOT NULL,
+        trips INTEGER NOT NULL DEFAULT 0,
+        gross {float} NOT NULL DEFAULT 0,
+        cash {float} NOT NULL DEFAULT 0,
+        card {float} NOT NULL DEFAULT 0,
+        commission {float} NOT NULL DEFAULT 0,
+        tips {float} NOT NULL DEFAULT 0,
+        unpaid {float} NOT NULL DEFAULT 0,
+        PRIMARY KEY (driver_id, day)
+    )
+    """,
+]
+
+INDEXES = [
+    # orders
+    "CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_driver_id ON orders(driver_id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_status_user ON orders(status, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_status_driver ON orders(status, driver_id)",
+    # Історія замовлень клієнта/водія (від нових до старих, без сортування)
+    "CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders(user_id, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_driver_created ON orders(driver_id, created_at DESC, id DESC)",
+    # Заробіток/статистика водія за період
+    "CREATE INDEX IF NOT EXISTS idx_orders_driver_status_created ON orders(driver_id, status, created_at)",
+    # drivers
+    "CREATE INDEX IF NOT EXISTS idx_drivers_tg_user_id ON drivers(tg_user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_drivers_status ON drivers(status)",
+    "CREATE INDEX IF NOT EXISTS idx_drivers_city ON drivers(city)",
+    "CREATE INDEX IF NOT EXISTS idx_drivers_online ON drivers(online)",
+    "CREATE INDEX IF NOT EXISTS idx_drivers_priority ON drivers(priority)",
+    "CREATE INDEX IF NOT EXISTS idx_drivers_status_online ON drivers(status, online)",
+    "CREATE INDEX IF NOT EXISTS idx_drivers_city_online ON drivers(city, online, status)",
+    # Keyset-пагінація списків адміна (status/role + created_at, id)
+    "CREATE INDEX IF NOT EXISTS idx_drivers_status_created ON drivers(status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_users_role_created ON users(role, created_at, user_id)",
+    # users
+    "CREATE INDEX IF NOT EXISTS idx_users_city ON users(city)",
+    "CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)",
+    "CREATE INDEX IF NOT EXISTS idx_users_is_blocked ON users(is_blocked)",
+    "CREATE INDEX IF NOT EXISTS idx_users_role_city ON users(role, city)",
+    # ratings
+    "CREATE INDEX IF NOT EXISTS idx_ratings_from_user ON ratings(from_user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ratings_to_user ON ratings(to_user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ratings_order_id ON ratings(order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_client_ratings ON client_ratings(client_id)",
+    # payments
+    "CREATE INDEX IF NOT EXISTS idx_payments_driver ON payments(driver_id)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_commission_paid ON payments(commission_paid)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_created_at ON payments(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_driver_unpaid ON payments(driver_id, commission_paid)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_driver_created ON payments(driver_id, created_at)",
+    # інші
+    "CREATE INDEX IF NOT EXISTS idx_saved_addresses_user ON saved_addresses(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_referrals_referrer ON referrals(referrer_id)",
+    "CREATE INDEX IF NOT EXISTS idx_referrals_code ON referrals(referral_code)",
+    "CREATE INDEX IF NOT EXISTS idx_surge_slot_overrides_slot ON surge_slot_overrides(weekday, hour)",
+    "CREATE INDEX IF NOT EXISTS idx_rejected_offers_order ON rejected_offers(order_id)",
+    # Чистка застарілих записів реєстру повідомлень
+    "CREATE INDEX IF NOT EXISTS idx_chat_messages_created ON chat_messages(created_at)",
+]
+
+
+async def upgrade(db, dialect) -> None:
+    for statement in TABLES:
+        await db.execute(dialect.sql(statement))
+    for statement in INDEXES:
+        await db.execute(statement)
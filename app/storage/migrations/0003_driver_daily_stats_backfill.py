@@ -0,0 +1,19 @@
+"""
+Заповнити driver_daily_stats з історії payments/orders/tips
+
+Таблицю створює 0002_baseline порожньою, а панель водія, нагадування про комісію
+і дашборд адміна читають лише її - на оновленій БД без перерахунку борг, чайові
+і заробіток за сьогодні були б 0. Надалі підсумки оновлюються разом із записами.
+"""
+from __future__ import annotations
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def upgrade(db, dialect) -> None:
+    from app.storage.db import fill_driver_daily_stats
+
+    rows = await fill_driver_daily_stats(db)
+    logger.info(f"✅ driver_daily_stats заповнено з історії: {rows} рядків (водій × день)")
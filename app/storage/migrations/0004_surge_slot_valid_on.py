@@ -0,0 +1,11 @@
+"""
+Разові ручні націнки: surge_slot_overrides.valid_on
+
+NULL - слот діє щотижня (як раніше), дата - лише в цю київську добу (свято, подія).
+"""
+from __future__ import annotations
+
+
+async def upgrade(db, dialect) -> None:
+    if "valid_on" not in await dialect.columns(db, "surge_slot_overrides"):
+        await db.execute(dialect.sql("ALTER TABLE surge_slot_overrides ADD COLUMN valid_on {date}"))
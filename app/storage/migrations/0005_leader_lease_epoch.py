@@ -0,0 +1,21 @@
+"""
+leader_leases.expires_at - секунди Unix замість мітки часу
+
+У SQLite мітка часу зберігалась як isoformat() і порівнювалась як TEXT: без мікросекунд
+рядок коротший (".ffffff" пропущено), і лексикографічний порядок ламався - оренда
+могла спливати зарано або запізно. Число порівнюється однаково в обох БД.
+
+Оренди короткочасні - таблиця створюється заново, процеси забирають оренду наступним циклом.
+"""
+from __future__ import annotations
+
+
+async def upgrade(db, dialect) -> None:
+    await db.execute("DROP TABLE IF EXISTS leader_leases")
+    await db.execute(dialect.sql("""
+        CREATE TABLE leader_leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at {float} NOT NULL
+        )
+    """))
@@ -0,0 +1,16 @@
+"""
+Таблиця fsm_states - стани FSM, спільні для процесів (MULTI_INSTANCE=1)
+
+Див. app/storage/fsm_storage.py.
+"""
+from __future__ import annotations
+
+
+async def upgrade(db, dialect) -> None:
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS fsm_states (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}'
+        )
+    """)
@@ -0,0 +1,290 @@
+"""
+Версійні міграції схеми БД (SQLite і PostgreSQL)
+
+Файли NNNN_назва.py в цьому пакеті застосовуються по порядку номерів, кожен -
+в окремій транзакції, і записуються в schema_migrations (версія, назва, checksum).
+Файл міграції - docstring з описом і функція:
+
+    async def upgrade(db, dialect: Dialect) -> None:
+        await db.execute(dialect.sql("CREATE TABLE ... (id {pk}, created_at {ts} NOT NULL)"))
+
+DDL спільний для обох БД: {pk}, {bigint}, {float}, {ts}, {date}, {bool}, {false}
+підставляються під діалект (dialect.sql).
+
+Старт бота, коли схема актуальна, - один запит MAX(version) без перевірок колонок.
+Запуск поза ботом: python migrate.py (див. --help).
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib
+import logging
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import ModuleType
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.storage.db_connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+_MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.py$")
+# Ключ pg_advisory_lock: два процеси не мігрують одночасно
+MIGRATIONS_LOCK_ID = 0x7461786921
+
+_TYPES = {
+    "sqlite": {
+        "pk": "INTEGER PRIMARY KEY AUTOINCREMENT",
+        "bigint": "INTEGER",
+        "float": "REAL",
+        "ts": "TEXT",
+        "date": "TEXT",
+        "bool": "INTEGER",
+        "false": "0",
+    },
+    "postgres": {
+        "pk": "SERIAL PRIMARY KEY",
+        "bigint": "BIGINT",
+        "float": "DOUBLE PRECISION",
+        "ts": "TIMESTAMP WITH TIME ZONE",
+        "date": "DATE",
+        "bool": "BOOLEAN",
+        "false": "FALSE",
+    },
+}
+
+SCHEMA_MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        applied_at {ts} NOT NULL,
+        duration_ms INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+
+class Dialect:
+    """Різниця між SQLite і PostgreSQL для файлів міграцій"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.is_postgres = name == "postgres"
+
+    def sql(self, statement: str) -> str:
+        """Підставити типи діалекту замість {pk}, {ts}, ..."""
+        return statement.format_map(_TYPES[self.name])
+
+    async def table_exists(self, db, table: str) -> bool:
+        if self.is_postgres:
+            query = (
+                "SELECT 1 FROM information_schema.tables "
+                "WHERE table_schema = current_schema() AND table_name = ?"
+            )
+        else:
+            query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+        return await db.fetchone(query, (table,)) is not None
+
+    async def columns(self, db, table: str) -> Set[str]:
+        if self.is_postgres:
+            rows = await db.fetchall(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = ?",
+                (table,),
+            )
+            return {row[0] for row in rows}
+        return {row[1] for row in await db.fetchall(f"PRAGMA table_info({table})")}
+
+
+def current_dialect() -> Dialect:
+    return Dialect("postgres" if db_manager.db_type == "postgres" else "sqlite")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    checksum: str
+    module: ModuleType
+
+    @property
+    def description(self) -> str:
+        lines = (self.module.__doc__ or "").strip().splitlines()
+        return lines[0] if lines else ""
+
+    def __str__(self) -> str:
+        return f"{self.version:04d}_{self.name}"
+
+
+@dataclass(frozen=True)
+class AppliedMigration:
+    version: int
+    name: str
+    checksum: str
+    applied_at: object
+
+
+@lru_cache(maxsize=1)
+def load_migrations() -> Tuple[Migration, ...]:
+    """Файли міграцій пакета, відсортовані за версією"""
+    package_dir = os.path.dirname(__file__)
+    migrations = []
+    for filename in sorted(os.listdir(package_dir)):
+        match = _MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(package_dir, filename), "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()[:16]
+        module = importlib.import_module(f"{__name__}.{filename[:-3]}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), checksum, module))
+
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Дублікати номерів міграцій: {versions}")
+    return tuple(migrations)
+
+
+def latest_version() -> int:
+    migrations = load_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+async def _schema_version(db) -> Optional[int]:
+    """Поточна версія схеми (None - таблиці schema_migrations ще немає)"""
+    try:
+        row = await db.fetchone("SELECT MAX(version) FROM schema_migrations")
+    except Exception:
+        return None
+    return (row[0] or 0) if row else 0
+
+
+async def _applied(db) -> Dict[int, AppliedMigration]:
+    rows = await db.fetchall("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row[0]: AppliedMigration(*row) for row in rows}
+
+
+@asynccontextmanager
+async def _migration_transaction(db, dialect: Dialect):
+    """
+    Транзакція, що охоплює і DDL.
+
+    sqlite3 сам відкриває транзакцію лише перед INSERT/UPDATE/DELETE - для DDL потрібен явний BEGIN.
+    """
+    if not dialect.is_postgres:
+        await db.execute("BEGIN")
+    async with db.transaction():
+        yield
+
+
+@asynccontextmanager
+async def _migration_lock(db, dialect: Dialect):
+    if not dialect.is_postgres:
+        yield
+        return
+    await db.fetchone("SELECT pg_advisory_lock(?)", (MIGRATIONS_LOCK_ID,))
+    try:
+        yield
+    finally:
+        await db.fetchone("SELECT pg_advisory_unlock(?)", (MIGRATIONS_LOCK_ID,))
+
+
+async def _apply(db, dialect: Dialect, migration: Migration) -> None:
+    started = time.monotonic()
+    await migration.module.upgrade(db, dialect)
+    duration_ms = int((time.monotonic() - started) * 1000)
+    await db.executemany(
+        "INSERT INTO schema_migrations (version, name, checksum, applied_at, duration_ms) VALUES (?, ?, ?, ?, ?)",
+        [(migration.version, migration.name, migration.checksum, datetime.now(timezone.utc), duration_ms)],
+    )
+    logger.info(f"✅ Міграція {migration} ({duration_ms} мс): {migration.description}")
+
+
+class _DryRunRollback(Exception):
+    pass
+
+
+async def migrate(db_path: str, dry_run: bool = False) -> List[Migration]:
+    """
+    Застосувати міграції, яких ще немає в schema_migrations.
+
+    dry_run=True - виконати всі нові міграції в одній транзакції і відкотити
+    (перевірка, що вони пройдуть на цій БД, без змін).
+
+    Returns:
+        Застосовані (або, для dry_run, ті, що були б застосовані) міграції
+    """
+    migrations = load_migrations()
+    target = latest_version()
+    dialect = current_dialect()
+
+    async with db_manager.connect(db_path) as db:
+        # Швидкий шлях: схема актуальна - один запит
+        if not dry_run and await _schema_version(db) == target:
+            logger.info(f"✅ Схема БД актуальна (версія {target})")
+            return []
+
+        async with _migration_lock(db, dialect):
+            if dry_run:
+                return await _dry_run(db, dialect, migrations)
+
+            await db.execute(dialect.sql(SCHEMA_MIGRATIONS_DDL))
+            await db.commit()
+            applied = await _applied(db)
+            pending = [m for m in migrations if m.version not in applied]
+            for migration in pending:
+                async with _migration_transaction(db, dialect):
+                    await _apply(db, dialect, migration)
+
+    if pending:
+        logger.info(f"🗄 Схема БД оновлена до версії {target} (міграцій: {len(pending)})")
+    return pending
+
+
+async def _dry_run(db, dialect: Dialect, migrations: Tuple[Migration, ...]) -> List[Migration]:
+    pending: List[Migration] = []
+    try:
+        async with _migration_transaction(db, dialect):
+            await db.execute(dialect.sql(SCHEMA_MIGRATIONS_DDL))
+            applied = await _applied(db)
+            pending = [m for m in migrations if m.version not in applied]
+            for migration in pending:
+                await _apply(db, dialect, migration)
+            raise _DryRunRollback
+    except _DryRunRollback:
+        logger.info(f"↩️ Dry run: {len(pending)} міграцій пройшли, зміни відкочено")
+    return pending
+
+
+async def get_status(db_path: str) -> List[Tuple[Migration, Optional[AppliedMigration]]]:
+    """Кожна міграція з кодом і її запис у schema_migrations (None - не застосована)"""
+    async with db_manager.connect(db_path) as db:
+        applied = await _applied(db) if await _schema_version(db) is not None else {}
+    return [(migration, applied.get(migration.version)) for migration in load_migrations()]
+
+
+async def verify(db_path: str) -> List[str]:
+    """
+    Розбіжності між файлами міграцій і БД (порожній список - все гаразд):
+    не застосовані, змінені після застосування, невідомі коду (БД новіша за код)
+    """
+    known = {m.version: m for m in load_migrations()}
+    async with db_manager.connect(db_path) as db:
+        applied = await _applied(db) if await _schema_version(db) is not None else {}
+
+    problems = []
+    for version, migration in known.items():
+        record = applied.get(version)
+        if record is None:
+            problems.append(f"{migration}: не застосована")
+        elif record.checksum != migration.checksum:
+            problems.append(f"{migration}: файл змінено після застосування ({record.checksum} → {migration.checksum})")
+    for version, record in applied.items():
+        if version not in known:
+            problems.append(f"{version:04d}_{record.name}: є в БД, але немає в коді")
+    return problems
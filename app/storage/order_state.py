@@ -0,0 +1,226 @@
+"""
+Машина станів замовлення
+
+Всі зміни orders.status проходять тут: кожен перехід - один умовний
+UPDATE ... WHERE status IN (...) RETURNING (compare-and-set), без
+попереднього SELECT. Якщо два водії одночасно тиснуть "Прийняти",
+рядок отримає лише перший - другий UPDATE не знайде status = 'pending'.
+
+pending ──offer──▶ offered ──reject──▶ pending
+pending ──accept──▶ accepted ──start──▶ in_progress ──complete──▶ completed
+pending/accepted ──cancel_by_client──▶ cancelled
+accepted/in_progress ──cancel_by_driver──▶ cancelled
+будь-який незавершений ──finalize──▶ completed (після оцінки)
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.storage.db import Order, _ORDER_ROW
+from app.storage.db_connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+PENDING = "pending"
+OFFERED = "offered"
+ACCEPTED = "accepted"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = (PENDING, OFFERED, ACCEPTED, IN_PROGRESS)
+
+
+@dataclass(frozen=True)
+class Transition:
+    """
+    Легальний перехід.
+
+    set_sql / where_sql - додаткові SET та умови з плейсхолдерами ?,
+    set_params / where_params - назви значень для цих плейсхолдерів (now - час переходу).
+    """
+    name: str
+    from_statuses: Tuple[str, ...]
+    to_status: str
+    set_sql: str = ""
+    set_params: Tuple[str, ...] = ()
+    where_sql: str = ""
+    where_params: Tuple[str, ...] = ()
+
+    @property
+    def sql(self) -> str:
+        set_sql = f"status = '{self.to_status}'" + (f", {self.set_sql}" if self.set_sql else "")
+        statuses = ", ".join(f"'{status}'" for status in self.from_statuses)
+        where_sql = f"id = ? AND status IN ({statuses})" + (f" AND {self.where_sql}" if self.where_sql else "")
+        return f"UPDATE orders SET {set_sql} WHERE {where_sql} RETURNING {_ORDER_ROW.select_sql}"
+
+
+TRANSITIONS: Dict[str, Transition] = {
+    t.name: t
+    for t in (
+        Transition("offer", (PENDING,), OFFERED, "driver_id = ?", ("driver_id",)),
+        Transition(
+            "accept", (PENDING,), ACCEPTED,
+            "driver_id = ?", ("driver_id",),
+            "driver_id IS NULL AND (SELECT car_class FROM drivers WHERE id = ?) = car_class", ("driver_id",),
+        ),
+        Transition("reject", (OFFERED,), PENDING, "driver_id = NULL"),
+        Transition(
+            "start", (ACCEPTED, IN_PROGRESS), IN_PROGRESS,
+            "started_at = COALESCE(started_at, ?)", ("now",),
+            "driver_id = ?", ("driver_id",),
+        ),
+        Transition(
+            "complete", (ACCEPTED, IN_PROGRESS), COMPLETED,
+            "finished_at = ?, fare_amount = ?, distance_m = ?, duration_s = ?, commission = ?",
+            ("now", "fare_amount", "distance_m", "duration_s", "commission"),
+            "driver_id = ?", ("driver_id",),
+        ),
+        Transition(
+            "cancel_by_client", (PENDING, ACCEPTED), CANCELLED,
+            "finished_at = ?", ("now",),
+            "user_id = ?", ("user_id",),
+        ),
+        Transition(
+            "cancel_by_driver", (ACCEPTED, IN_PROGRESS), CANCELLED,
+            "driver_id = NULL, finished_at = ?", ("now",),
+            "driver_id = ?", ("driver_id",),
+        ),
+        Transition("finalize", ACTIVE_STATUSES, COMPLETED, "finished_at = COALESCE(finished_at, ?)", ("now",)),
+    )
+}
+
+
+def can_transition(status: str, name: str) -> bool:
+    """Чи дозволений перехід name із поточного статусу"""
+    return status in TRANSITIONS[name].from_statuses
+
+
+@dataclass(frozen=True)
+class OrderTransition:
+    """Подія: замовлення перейшло в новий статус (order - рядок після UPDATE)"""
+    name: str
+    order: Order
+    from_statuses: Tuple[str, ...]
+    to_status: str
+    # Водій, який виконав перехід (для cancel_by_driver в order.driver_id вже NULL)
+    driver_id: Optional[int]
+    at: datetime
+
+
+TransitionListener = Callable[[OrderTransition], None]
+
+_listeners: List[TransitionListener] = []
+
+
+def add_transition_listener(listener: TransitionListener) -> None:
+    """Підписатися на переходи (синхронний виклик одразу після commit, без I/O)"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_transition_listener(listener: TransitionListener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def emit_transition(event: OrderTransition) -> None:
+    """Розіслати подію; помилка одного слухача не зупиняє інших"""
+    for listener in list(_listeners):
+        try:
+            listener(event)
+        except Exception as e:
+            logger.error(f"❌ Слухач переходу {event.name} замовлення #{event.order.id}: {e}", exc_info=True)
+
+
+def _update_demand_tracker(event: OrderTransition) -> None:
+    """Лічильники попиту/пропозиції для динамічного ціноутворення"""
+    from app.utils.demand_tracker import get_demand_tracker
+
+    tracker = get_demand_tracker()
+    if event.name in ("accept", "cancel_by_client"):
+        tracker.order_left_pending(event.order.id)
+    if event.to_status == ACCEPTED and event.driver_id:
+        tracker.driver_busy(event.driver_id)
+    elif event.name in ("complete", "cancel_by_client", "cancel_by_driver") and event.driver_id:
+        tracker.driver_free(event.driver_id)
+
+
+add_transition_listener(_update_demand_tracker)
+
+
+def emit_order_created(order: Order) -> None:
+    """Подія створення замовлення (insert_order) - псевдо-перехід 'create' без UPDATE"""
+    emit_transition(
+        OrderTransition(
+            name="create",
+            order=order,
+            from_statuses=(),
+            to_status=order.status,
+            driver_id=order.driver_id,
+            at=order.created_at or datetime.now(timezone.utc),
+        )
+    )
+
+
+async def apply_transition(
+    db,
+    name: str,
+    order_id: int,
+    now: Optional[datetime] = None,
+    **values: Any,
+) -> Optional[OrderTransition]:
+    """
+    Виконати перехід на відкритому підключенні (без commit і без розсилки події).
+
+    Для unit of work: викликати всередині db_manager.unit_of_work(), а emit_transition - після виходу з нього.
+    Повертає None, якщо замовлення вже не в from_statuses (хтось випередив) або умова не виконана.
+    """
+    transition = TRANSITIONS[name]
+    now = now or datetime.now(timezone.utc)
+    values["now"] = now
+    try:
+        params = (
+            *(values[param] for param in transition.set_params),
+            order_id,
+            *(values[param] for param in transition.where_params),
+        )
+    except KeyError as e:
+        raise ValueError(f"Перехід '{name}' потребує параметр {e}") from None
+
+    rows = await db.fetchall(transition.sql, params)
+    if not rows:
+        return None
+
+    order = _ORDER_ROW.map_row(rows[0])
+    return OrderTransition(
+        name=name,
+        order=order,
+        from_statuses=transition.from_statuses,
+        to_status=transition.to_status,
+        driver_id=values.get("driver_id", order.driver_id),
+        at=now,
+    )
+
+
+async def transition_order(db_path: str, name: str, order_id: int, **values: Any) -> Optional[Order]:
+    """
+    Перехід замовлення одним запитом: UPDATE ... RETURNING, commit, подія.
+
+    Returns:
+        Order після переходу або None, якщо перехід не відбувся
+    """
+    async with db_manager.connect(db_path) as db:
+        event = await apply_transition(db, name, order_id, **values)
+        await db.commit()
+
+    if event is None:
+        logger.info(f"⏭️ Перехід {name} замовлення #{order_id} не виконано (статус вже змінився або умова не виконана)")
+        return None
+
+    emit_transition(event)
+    return event.order
@@ -0,0 +1,157 @@
+"""Знімок тарифу та налаштувань ціноутворення (кеш без I/O для потоків замовлень)"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.storage.db import (
+    PricingSettings,
+    SurgeSlotOverride,
+    Tariff,
+    get_latest_tariff,
+    get_pricing_settings,
+    get_surge_slot_overrides,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Страховка на випадок зміни налаштувань іншим процесом (напр. скрипт init_tariffs.py)
+SNAPSHOT_MAX_AGE_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class PricingSnapshot:
+    """
+    Незмінний версіонований знімок ціноутворення.
+
+    Тримає копії Tariff та PricingSettings - змінювати їх не можна,
+    адмін-хендлери працюють з власними об'єктами з БД.
+    """
+    version: int
+    tariff: Optional[Tariff]
+    pricing: PricingSettings
+    loaded_at: float
+    surge_overrides: Tuple[SurgeSlotOverride, ...] = ()
+
+    @property
+    def commission_percent(self) -> float:
+        """Комісія сервісу (0.02 = 2%), дефолт якщо тариф не налаштований"""
+        return self.tariff.commission_percent if self.tariff else 0.02
+
+    @property
+    def class_multipliers(self) -> dict:
+        """Множники класів авто у форматі для calculate_fare_with_class"""
+        return {
+            "economy": self.pricing.economy_multiplier,
+            "standard": self.pricing.standard_multiplier,
+            "comfort": self.pricing.comfort_multiplier,
+            "business": self.pricing.business_multiplier,
+        }
+
+    def base_fare(self, distance_km: float, duration_minutes: float) -> Optional[float]:
+        """Базова вартість (економ, без динаміки) або None якщо тариф не налаштований"""
+        if not self.tariff:
+            return None
+        return max(
+            self.tariff.minimum,
+            self.tariff.base_fare
+            + (distance_km * self.tariff.per_km)
+            + (duration_minutes * self.tariff.per_minute),
+        )
+
+
+class PricingSnapshotCache:
+    """
+    Тримає поточний PricingSnapshot.
+
+    - Перше звернення читає БД (один раз, паралельні виклики чекають на той самий load)
+    - Далі get() повертає готовий знімок без жодного підключення до БД
+    - Збереження тарифу/налаштувань інвалідує знімок, новий підміняється атомарно
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[PricingSnapshot] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self._stale = False
+
+    def _is_fresh(self, snapshot: Optional[PricingSnapshot]) -> bool:
+        if snapshot is None or self._stale:
+            return False
+        return (time.monotonic() - snapshot.loaded_at) < SNAPSHOT_MAX_AGE_SECONDS
+
+    async def get(self, db_path: str) -> PricingSnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            # Інший виклик міг вже завантажити знімок поки ми чекали lock
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+            return await self._load(db_path)
+
+    async def reload(self, db_path: str) -> PricingSnapshot:
+        async with self._lock:
+            return await self._load(db_path)
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    async def _load(self, db_path: str) -> PricingSnapshot:
+        # Скидаємо прапорець ДО читання: якщо під час load прийде ще одна
+        # інвалідація - наступний get() перечитає БД ще раз
+        self._stale = False
+        tariff = await get_latest_tariff(db_path)
+        pricing = await get_pricing_settings(db_path)
+        overrides = await get_surge_slot_overrides(db_path)
+
+        self._version += 1
+        snapshot = PricingSnapshot(
+            version=self._version,
+            tariff=dataclasses.replace(tariff) if tariff else None,
+            pricing=dataclasses.replace(pricing) if pricing else PricingSettings(),
+            loaded_at=time.monotonic(),
+            surge_overrides=tuple(dataclasses.replace(o) for o in overrides),
+        )
+        # Атомарна підміна - читачі бачать або старий, або новий знімок цілком
+        self._snapshot = snapshot
+        logger.info(
+            f"💰 Pricing snapshot v{snapshot.version} завантажено "
+            f"(тариф: {'є' if snapshot.tariff else 'немає'}, "
+            f"налаштування: {'з БД' if pricing else 'дефолтні'}, ручних слотів: {len(overrides)})"
+        )
+        return snapshot
+
+
+# Глобальний екземпляр кешу
+_snapshot_cache = PricingSnapshotCache()
+
+
+async def get_pricing_snapshot(db_path: str) -> PricingSnapshot:
+    """
+    Отримати поточний знімок ціноутворення.
+
+    Після першого завантаження не робить запитів до БД.
+    """
+    return await _snapshot_cache.get(db_path)
+
+
+async def reload_pricing_snapshot(db_path: str) -> PricingSnapshot:
+    """Примусово перечитати тариф і налаштування з БД"""
+    return await _snapshot_cache.reload(db_path)
+
+
+def invalidate_pricing_snapshot() -> None:
+    """
+    Позначити знімок застарілим.
+
+    Викликається після збереження тарифу/налаштувань ціноутворення.
+    """
+    _snapshot_cache.invalidate()
@@ -0,0 +1,142 @@
+"""Швидке перетворення рядків БД (кортежів) у моделі"""
+from __future__ import annotations
+
+import logging
+from dataclasses import MISSING, fields
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Формати, які зустрічаються в старих записах SQLite (до переходу на isoformat)
+_LEGACY_DATETIME_FORMATS = (
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S.%f%z",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+)
+
+
+def parse_db_datetime(value: Any) -> Optional[datetime]:
+    """
+    datetime з БД.
+    - PostgreSQL (asyncpg) повертає готовий datetime - без жодного парсингу
+    - SQLite зберігає isoformat() - один виклик fromisoformat (C)
+    - strptime лише для старих записів, які fromisoformat не розуміє
+    """
+    if value is None or value.__class__ is datetime:
+        return value
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            for fmt in _LEGACY_DATETIME_FORMATS:
+                try:
+                    return datetime.strptime(value, fmt)
+                except ValueError:
+                    continue
+            logger.debug(f"parse_db_datetime: unsupported format '{value}'")
+            return None
+    return value
+
+
+class RowShape:
+    """
+    Форма запиту: які поля моделі і в якому порядку стоять у SELECT.
+
+    Список колонок оголошується один раз біля моделі, з нього ж будується
+    SQL (select_sql) і згенерована функція map_row(row) -> модель.
+
+    - datetime-поля знаходяться за анотаціями моделі і проходять через parse_db_datetime
+    - coalesce: NULL/порожнє значення замінюється дефолтом поля (car_class -> "economy")
+    - expressions: SQL-вираз замість назви колонки (COALESCE, CASE ...)
+    - converters: додаткове перетворення значення (наприклад bool)
+    """
+
+    __slots__ = ("model", "columns", "select_sql", "map_row")
+
+    def __init__(
+        self,
+        model: type,
+        columns: Sequence[str],
+        coalesce: Sequence[str] = (),
+        expressions: Optional[Dict[str, str]] = None,
+        converters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    ):
+        self.model = model
+        self.columns = tuple(columns)
+        expressions = expressions or {}
+        self.select_sql = ", ".join(expressions.get(column, column) for column in self.columns)
+        self.map_row = make_row_mapper(
+            model,
+            self.columns,
+            tuple(coalesce),
+            tuple(sorted((converters or {}).items())),
+        )
+
+    def map_rows(self, rows) -> list:
+        map_row = self.map_row
+        return [map_row(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def make_row_mapper(
+    model: type,
+    columns: Tuple[str, ...],
+    coalesce: Tuple[str, ...] = (),
+    converters: Tuple[Tuple[str, Callable[[Any], Any]], ...] = (),
+) -> Callable[[Sequence[Any]], Any]:
+    """
+    Згенерувати mapper для форми запиту.
+
+    Результат - одна функція без циклів і перевірок len(row):
+        def map_row(row):
+            return Order(row[0], row[1], ..., _dt(row[7]), ..., row[21] or _d21, ...)
+    Аргументи позиційні в порядку полів моделі, пропущені колонки - дефолти полів.
+    """
+    index = {column: i for i, column in enumerate(columns)}
+    unknown = set(index) - {f.name for f in fields(model)}
+    if unknown:
+        raise ValueError(f"{model.__name__}: невідомі колонки {sorted(unknown)}")
+
+    converter_map = dict(converters)
+    namespace: Dict[str, Any] = {"_model": model, "_dt": parse_db_datetime}
+    args = []
+    for n, f in enumerate(fields(model)):
+        if not f.init:
+            continue
+        if f.default is not MISSING:
+            namespace[f"_d{n}"] = f.default
+            default = f"_d{n}"
+        elif f.default_factory is not MISSING:
+            namespace[f"_f{n}"] = f.default_factory
+            default = f"_f{n}()"
+        else:
+            default = None
+
+        i = index.get(f.name)
+        if i is None:
+            if default is None:
+                raise ValueError(f"{model.__name__}: обов'язкове поле '{f.name}' відсутнє в запиті")
+            args.append(default)
+            continue
+
+        expr = f"row[{i}]"
+        if f.name in converter_map:
+            namespace[f"_c{n}"] = converter_map[f.name]
+            expr = f"_c{n}({expr})"
+        elif "datetime" in str(f.type):
+            expr = f"_dt({expr})"
+        if f.name in coalesce:
+            if default is None:
+                raise ValueError(f"{model.__name__}: поле '{f.name}' без дефолту не може бути в coalesce")
+            expr = f"({expr} or {default})"
+        args.append(expr)
+
+    source = f"def map_row(row):\n    return _model({', '.join(args)})\n"
+    exec(compile(source, f"<row_mapper {model.__name__}>", "exec"), namespace)
+    return namespace["map_row"]
@@ -0,0 +1,155 @@
+"""
+Очищення чату по реєстру повідомлень (app/storage/message_ledger.py)
+
+- Видалення пачками через deleteMessages (до 100 id за запит) замість delete_message по одному
+- Очищення запускається фоновою задачею - обробник не чекає на Telegram
+- Повідомлення процесу оформлення замовлення записуються автоматично:
+  OrderFlowLedgerMiddleware відкриває буфер на час обробника, а
+  MessageLedgerRequestMiddleware (сесія бота) додає в нього кожне надіслане ботом повідомлення
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from app.storage.message_ledger import ORDER_FLOW, pop_messages, record_messages
+
+logger = logging.getLogger(__name__)
+
+
+# Ліміт Telegram для deleteMessages
+DELETE_MESSAGES_BATCH = 100
+
+
+async def delete_messages_bulk(bot, chat_id: int, message_ids: Sequence[int]) -> int:
+    """
+    Видалити повідомлення пачками по DELETE_MESSAGES_BATCH.
+
+    deleteMessages пропускає id, які вже видалені або недоступні, тому одна пачка - один запит.
+    Returns:
+        Кількість id у пачках, які Telegram прийняв
+    """
+    deleted = 0
+    for i in range(0, len(message_ids), DELETE_MESSAGES_BATCH):
+        batch = list(message_ids[i:i + DELETE_MESSAGES_BATCH])
+        try:
+            await bot.delete_messages(chat_id=chat_id, message_ids=batch)
+            deleted += len(batch)
+        except Exception as e:
+            logger.debug(f"⚠️ deleteMessages в чаті {chat_id} ({len(batch)} id): {e}")
+    return deleted
+
+
+async def cleanup_chat(bot, db_path: str, chat_id: int, scope: str, before: Optional[datetime] = None) -> int:
+    """Видалити всі повідомлення scope з чату і з реєстру"""
+    message_ids = await pop_messages(db_path, chat_id, scope, before)
+    if not message_ids:
+        return 0
+    deleted = await delete_messages_bulk(bot, chat_id, message_ids)
+    logger.info(f"🧹 Чат {chat_id} ({scope}): видалено {deleted}/{len(message_ids)} повідомлень")
+    return deleted
+
+
+_cleanup_tasks: Set[asyncio.Task] = set()
+
+
+async def _run_cleanup(bot, db_path: str, chat_id: int, scope: str, before: datetime) -> None:
+    try:
+        await cleanup_chat(bot, db_path, chat_id, scope, before)
+    except Exception as e:
+        logger.error(f"❌ Помилка очищення чату {chat_id} ({scope}): {e}")
+
+
+def schedule_chat_cleanup(bot, db_path: str, chat_id: int, scope: str) -> None:
+    """
+    Запланувати очищення у фоні і одразу повернутися.
+
+    Видаляються лише повідомлення, записані до виклику - відповіді поточного обробника залишаються.
+    """
+    before = datetime.now(timezone.utc)
+    task = asyncio.create_task(_run_cleanup(bot, db_path, chat_id, scope, before))
+    _cleanup_tasks.add(task)
+    task.add_done_callback(_cleanup_tasks.discard)
+
+
+class _FlowBuffer:
+    """message_id одного оновлення (вхідне повідомлення + відповіді бота в тому ж чаті)"""
+
+    __slots__ = ("chat_id", "message_ids", "closed")
+
+    def __init__(self, chat_id: int):
+        self.chat_id = chat_id
+        self.message_ids: List[int] = []
+        self.closed = False
+
+
+_flow_buffer: ContextVar[Optional[_FlowBuffer]] = ContextVar("order_flow_buffer", default=None)
+
+
+def _is_order_flow_state(state: Optional[str]) -> bool:
+    return bool(state) and state.startswith("OrderStates:")
+
+
+class OrderFlowLedgerMiddleware(BaseMiddleware):
+    """
+    Записує повідомлення процесу оформлення замовлення в реєстр (scope ORDER_FLOW).
+
+    Оновлення належить процесу, якщо стан FSM до або після обробника - OrderStates.
+    Запис у БД - одним executemany після обробника.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        message = event.message if isinstance(event, CallbackQuery) else event
+        if not isinstance(message, Message) or message.chat.type != "private":
+            return await handler(event, data)
+
+        buffer = _FlowBuffer(message.chat.id)
+        if isinstance(event, Message):
+            buffer.message_ids.append(event.message_id)
+
+        token = _flow_buffer.set(buffer)
+        try:
+            return await handler(event, data)
+        finally:
+            buffer.closed = True
+            _flow_buffer.reset(token)
+            await self._flush(buffer, data)
+
+    async def _flush(self, buffer: _FlowBuffer, data: Dict[str, Any]) -> None:
+        try:
+            state = data.get("state")
+            state_after = await state.get_state() if state else None
+            if _is_order_flow_state(data.get("raw_state")) or _is_order_flow_state(state_after):
+                await record_messages(self.db_path, buffer.chat_id, ORDER_FLOW, buffer.message_ids)
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося записати повідомлення чату {buffer.chat_id} в реєстр: {e}")
+
+
+class MessageLedgerRequestMiddleware(BaseRequestMiddleware):
+    """Middleware сесії бота: надіслані повідомлення потрапляють у відкритий буфер обробника"""
+
+    async def __call__(self, make_request, bot, method):
+        response = await make_request(bot, method)
+
+        buffer = _flow_buffer.get()
+        if buffer is not None and not buffer.closed:
+            result = response.result
+            for sent in (result if isinstance(result, list) else (result,)):
+                if isinstance(sent, Message) and sent.chat.id == buffer.chat_id:
+                    buffer.message_ids.append(sent.message_id)
+        return response
@@ -0,0 +1,228 @@
+"""Лічильники попиту/пропозиції в пам'яті для динамічного ціноутворення"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Вікно для швидкості надходження замовлень
+ARRIVAL_WINDOW_SECONDS = 15 * 60
+# Як часто звіряти лічильники з БД
+RECONCILE_INTERVAL_SECONDS = 120
+
+# Ключ лічильника: (місто, клас авто); None = "всі міста" / "всі класи"
+_Key = Tuple[Optional[str], Optional[str]]
+
+
+def _keys(city: Optional[str], car_class: Optional[str]) -> Tuple[_Key, ...]:
+    """Всі агрегати, які зачіпає одна подія"""
+    return ((city, car_class), (city, None), (None, car_class), (None, None))
+
+
+class DemandTracker:
+    """
+    Попит і пропозиція по містах та класах авто.
+
+    - Оновлюється інкрементально подіями (створення/прийняття/скасування/завершення
+      замовлення, водій онлайн/офлайн)
+    - Читання лічильників - O(1), без запитів до БД
+    - Події ідемпотентні (ключ - id замовлення/водія), тому повтори нічого не ламають
+    - Раз на RECONCILE_INTERVAL_SECONDS стан перебудовується з БД: зміни в обхід
+      подій (адмінка, видалення водія) виправляються при наступній звірці
+    """
+
+    def __init__(self):
+        # order_id -> (city, car_class) для замовлень в статусі pending
+        self._pending: Dict[int, Tuple[Optional[str], str]] = {}
+        # driver_id -> (city, car_class) для онлайн водіїв
+        self._online: Dict[int, Tuple[Optional[str], str]] = {}
+        # Водії з активним замовленням (accepted/in_progress)
+        self._busy: Set[int] = set()
+
+        self._pending_counts: Dict[_Key, int] = defaultdict(int)
+        self._online_counts: Dict[_Key, int] = defaultdict(int)
+        self._busy_counts: Dict[_Key, int] = defaultdict(int)
+
+        # Час створення замовлень (sliding window)
+        self._arrivals: Dict[_Key, Deque[float]] = defaultdict(deque)
+
+        self._reconciled_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    # ==================== Події ====================
+
+    def order_created(self, order_id: int, city: Optional[str], car_class: str) -> None:
+        if order_id in self._pending:
+            return
+        self._pending[order_id] = (city, car_class)
+        now = time.monotonic()
+        for key in _keys(city, car_class):
+            self._pending_counts[key] += 1
+            self._arrivals[key].append(now)
+
+    def order_left_pending(self, order_id: int) -> None:
+        """Замовлення прийняте або скасоване - більше не чекає водія"""
+        entry = self._pending.pop(order_id, None)
+        if entry is None:
+            return
+        for key in _keys(*entry):
+            self._pending_counts[key] -= 1
+
+    def driver_online(self, driver_id: int, city: Optional[str], car_class: str) -> None:
+        if self._online.get(driver_id) == (city, car_class):
+            return
+        self.driver_offline(driver_id)
+        self._online[driver_id] = (city, car_class)
+        for key in _keys(city, car_class):
+            self._online_counts[key] += 1
+        if driver_id in self._busy:
+            for key in _keys(city, car_class):
+                self._busy_counts[key] += 1
+
+    def driver_offline(self, driver_id: int) -> None:
+        entry = self._online.pop(driver_id, None)
+        if entry is None:
+            return
+        for key in _keys(*entry):
+            self._online_counts[key] -= 1
+            if driver_id in self._busy:
+                self._busy_counts[key] -= 1
+
+    def driver_busy(self, driver_id: int) -> None:
+        if driver_id in self._busy:
+            return
+        self._busy.add(driver_id)
+        entry = self._online.get(driver_id)
+        if entry is not None:
+            for key in _keys(*entry):
+                self._busy_counts[key] += 1
+
+    def driver_free(self, driver_id: int) -> None:
+        if driver_id not in self._busy:
+            return
+        self._busy.discard(driver_id)
+        entry = self._online.get(driver_id)
+        if entry is not None:
+            for key in _keys(*entry):
+                self._busy_counts[key] -= 1
+
+    # ==================== Читання (O(1)) ====================
+
+    @property
+    def is_ready(self) -> bool:
+        """Чи був стан хоча б раз завантажений з БД"""
+        return self._reconciled_at is not None
+
+    def pending_orders(self, city: Optional[str] = None, car_class: Optional[str] = None) -> int:
+        return self._pending_counts.get((city, car_class), 0)
+
+    def online_drivers(self, city: Optional[str] = None, car_class: Optional[str] = None) -> int:
+        return self._online_counts.get((city, car_class), 0)
+
+    def available_drivers(self, city: Optional[str] = None, car_class: Optional[str] = None) -> int:
+        """Онлайн водії без активного замовлення"""
+        key = (city, car_class)
+        return self._online_counts.get(key, 0) - self._busy_counts.get(key, 0)
+
+    def arrival_rate(self, city: Optional[str] = None, car_class: Optional[str] = None) -> float:
+        """Нових замовлень за годину (по вікну ARRIVAL_WINDOW_SECONDS)"""
+        window = self._arrivals.get((city, car_class))
+        if not window:
+            return 0.0
+        cutoff = time.monotonic() - ARRIVAL_WINDOW_SECONDS
+        while window and window[0] < cutoff:
+            window.popleft()
+        return len(window) * 3600.0 / ARRIVAL_WINDOW_SECONDS
+
+    # ==================== Звірка з БД ====================
+
+    async def reconcile(self, db_path: str) -> None:
+        """Перебудувати лічильники з БД (швидкість надходження лишається з пам'яті)"""
+        from app.storage.db_connection import db_manager
+
+        async with self._lock:
+            async with db_manager.connect(db_path) as db:
+                pending_rows = await db.fetchall(
+                    "SELECT o.id, u.city, o.car_class FROM orders o "
+                    "LEFT JOIN users u ON u.user_id = o.user_id "
+                    "WHERE o.status = 'pending'"
+                )
+                online_rows = await db.fetchall(
+                    "SELECT id, city, car_class FROM drivers WHERE online = 1 AND status = 'approved'"
+                )
+                busy_rows = await db.fetchall(
+                    "SELECT DISTINCT driver_id FROM orders "
+                    "WHERE status IN ('accepted', 'in_progress') AND driver_id IS NOT NULL"
+                )
+
+            pending = {row[0]: (row[1], row[2] or "economy") for row in pending_rows}
+            online = {row[0]: (row[1], row[2] or "economy") for row in online_rows}
+            busy = {row[0] for row in busy_rows}
+
+            pending_counts: Dict[_Key, int] = defaultdict(int)
+            for entry in pending.values():
+                for key in _keys(*entry):
+                    pending_counts[key] += 1
+            online_counts: Dict[_Key, int] = defaultdict(int)
+            busy_counts: Dict[_Key, int] = defaultdict(int)
+            for driver_id, entry in online.items():
+                for key in _keys(*entry):
+                    online_counts[key] += 1
+                    if driver_id in busy:
+                        busy_counts[key] += 1
+
+            drift = (
+                self._pending_counts.get((None, None), 0) - pending_counts.get((None, None), 0),
+                self._online_counts.get((None, None), 0) - online_counts.get((None, None), 0),
+            )
+            if self.is_ready and drift != (0, 0):
+                logger.info(f"📊 Demand tracker: розбіжність з БД (замовлення {drift[0]:+d}, водії {drift[1]:+d}) виправлено")
+
+            # Атомарна підміна (між await тут немає)
+            self._pending, self._online, self._busy = pending, online, busy
+            self._pending_counts, self._online_counts, self._busy_counts = pending_counts, online_counts, busy_counts
+            self._reconciled_at = time.monotonic()
+
+    async def ensure_ready(self, db_path: str) -> None:
+        if not self.is_ready:
+            await self.reconcile(db_path)
+
+
+# Глобальний екземпляр
+_demand_tracker = DemandTracker()
+
+
+def get_demand_tracker() -> DemandTracker:
+    """Отримати глобальний трекер попиту"""
+    return _demand_tracker
+
+
+async def get_demand_state(db_path: str, city: Optional[str] = None):
+    """
+    Поточний DemandState міста для FareEngine.
+
+    Пропозиція - вільні онлайн водії, попит - замовлення що чекають водія.
+    Перше звернення (до старту звірки) завантажує стан з БД.
+    """
+    from app.handlers.fare_engine import DemandState
+
+    await _demand_tracker.ensure_ready(db_path)
+    return DemandState(
+        online_drivers=_demand_tracker.available_drivers(city),
+        pending_orders=_demand_tracker.pending_orders(city),
+    )
+
+
+async def demand_reconcile_task(db_path: str) -> None:
+    """Фонова звірка лічильників попиту з БД"""
+    while True:
+        try:
+            await _demand_tracker.reconcile(db_path)
+        except Exception as e:
+            logger.error(f"❌ Помилка звірки demand tracker: {e}")
+        await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
@@ -0,0 +1,268 @@
+"""Зональна динамічна націнка (сітка geohash, попит/пропозиція по районах)"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Deque, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Точність geohash: 6 символів ≈ 1.2 × 0.6 км (район міста)
+GEOHASH_PRECISION = 6
+# Вікно для подач (pickup) в зоні
+ZONE_WINDOW_SECONDS = 15 * 60
+# Вага сусідніх клітинок при згладжуванні (своя клітинка = 1.0)
+NEIGHBOUR_WEIGHT = 0.5
+# Націнка починається коли подач за вікно більше ніж водіїв поруч
+ZONE_RATIO_THRESHOLD = 1.0
+# +10% на кожну одиницю співвідношення понад поріг, але не більше +30%
+ZONE_SURGE_STEP = 0.10
+ZONE_SURGE_MAX = 1.30
+# Як часто чистити вікно та звіряти водіїв з БД
+ZONE_REFRESH_SECONDS = 60
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {ch: i for i, ch in enumerate(_BASE32)}
+
+
+def encode_geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Закодувати координати в geohash"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def decode_geohash_bbox(cell: str) -> Tuple[float, float, float, float]:
+    """Межі клітинки: (lat_lo, lat_hi, lon_lo, lon_hi)"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for ch in cell:
+        value = _BASE32_INDEX[ch]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+@lru_cache(maxsize=4096)
+def geohash_neighbours(cell: str) -> Tuple[str, ...]:
+    """8 сусідніх клітинок (результат кешується - сітка незмінна)"""
+    lat_lo, lat_hi, lon_lo, lon_hi = decode_geohash_bbox(cell)
+    lat_c = (lat_lo + lat_hi) / 2
+    lon_c = (lon_lo + lon_hi) / 2
+    d_lat = lat_hi - lat_lo
+    d_lon = lon_hi - lon_lo
+    neighbours = []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dx == 0 and dy == 0:
+                continue
+            lat = lat_c + dy * d_lat
+            if not -90.0 <= lat <= 90.0:
+                continue
+            lon = (lon_c + dx * d_lon + 180.0) % 360.0 - 180.0
+            neighbours.append(encode_geohash(lat, lon, len(cell)))
+    return tuple(neighbours)
+
+
+class ZoneSurgeTracker:
+    """
+    Попит/пропозиція по клітинках geohash.
+
+    - Подачі рахуються у ковзному вікні ZONE_WINDOW_SECONDS, водії - за останньою позицією
+    - Кожна подія перераховує множник лише своєї клітинки та 8 сусідів
+    - zone_multiplier() - O(1) читання готового значення
+    - Geohash глобальний, тож окрема сітка на місто не потрібна: клітинки міст не перетинаються
+    """
+
+    def __init__(self):
+        # (час, клітинка) подач в порядку надходження
+        self._pickups: Deque[Tuple[float, str]] = deque()
+        self._pickup_counts: Dict[str, int] = defaultdict(int)
+        # tg_user_id водія -> клітинка
+        self._driver_cells: Dict[int, str] = {}
+        self._driver_counts: Dict[str, int] = defaultdict(int)
+        # tg_user_id онлайн водіїв (позиції офлайн водіїв не враховуються)
+        self._online: Set[int] = set()
+        # Готові множники (лише для клітинок з націнкою)
+        self._multipliers: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    # ==================== Події ====================
+
+    def pickup_requested(self, lat: float, lon: float) -> None:
+        cell = encode_geohash(lat, lon)
+        self._pickups.append((time.monotonic(), cell))
+        self._pickup_counts[cell] += 1
+        self._recompute_around((cell,))
+
+    def driver_moved(self, tg_user_id: int, lat: float, lon: float) -> None:
+        if tg_user_id not in self._online:
+            return
+        cell = encode_geohash(lat, lon)
+        old = self._driver_cells.get(tg_user_id)
+        if old == cell:
+            return
+        self._remove_driver_position(tg_user_id)
+        self._driver_cells[tg_user_id] = cell
+        self._driver_counts[cell] += 1
+        self._recompute_around((cell,) if old is None else (cell, old))
+
+    def driver_online(self, tg_user_id: int, lat: Optional[float], lon: Optional[float]) -> None:
+        self._online.add(tg_user_id)
+        if lat is not None and lon is not None:
+            self.driver_moved(tg_user_id, lat, lon)
+
+    def driver_offline(self, tg_user_id: int) -> None:
+        self._online.discard(tg_user_id)
+        old = self._remove_driver_position(tg_user_id)
+        if old is not None:
+            self._recompute_around((old,))
+
+    def _remove_driver_position(self, tg_user_id: int) -> Optional[str]:
+        old = self._driver_cells.pop(tg_user_id, None)
+        if old is not None:
+            self._driver_counts[old] -= 1
+            if self._driver_counts[old] <= 0:
+                del self._driver_counts[old]
+        return old
+
+    # ==================== Множник ====================
+
+    def zone_multiplier(self, lat: Optional[float], lon: Optional[float]) -> float:
+        """Множник зони подачі (1.0 якщо координат немає або попит в нормі)"""
+        if lat is None or lon is None:
+            return 1.0
+        return self._multipliers.get(encode_geohash(lat, lon), 1.0)
+
+    def _recompute_around(self, cells: Iterable[str]) -> None:
+        affected = set()
+        for cell in cells:
+            affected.add(cell)
+            affected.update(geohash_neighbours(cell))
+        for cell in affected:
+            self._recompute_cell(cell)
+
+    def _recompute_cell(self, cell: str) -> None:
+        demand = float(self._pickup_counts.get(cell, 0))
+        supply = float(self._driver_counts.get(cell, 0))
+        for neighbour in geohash_neighbours(cell):
+            demand += NEIGHBOUR_WEIGHT * self._pickup_counts.get(neighbour, 0)
+            supply += NEIGHBOUR_WEIGHT * self._driver_counts.get(neighbour, 0)
+
+        ratio = demand / max(supply, 1.0)
+        if ratio <= ZONE_RATIO_THRESHOLD:
+            self._multipliers.pop(cell, None)
+            return
+        self._multipliers[cell] = min(
+            ZONE_SURGE_MAX,
+            1.0 + ZONE_SURGE_STEP * (ratio - ZONE_RATIO_THRESHOLD)
+        )
+
+    # ==================== Обслуговування ====================
+
+    def expire(self) -> None:
+        """Викинути подачі старші за вікно та перерахувати їх зони"""
+        cutoff = time.monotonic() - ZONE_WINDOW_SECONDS
+        changed = set()
+        while self._pickups and self._pickups[0][0] < cutoff:
+            _, cell = self._pickups.popleft()
+            self._pickup_counts[cell] -= 1
+            if self._pickup_counts[cell] <= 0:
+                del self._pickup_counts[cell]
+            changed.add(cell)
+        if changed:
+            self._recompute_around(changed)
+
+    async def reconcile_drivers(self, db_path: str) -> None:
+        """Перезавантажити онлайн водіїв та їх позиції з БД"""
+        from app.storage.db_connection import db_manager
+
+        async with self._lock:
+            async with db_manager.connect(db_path) as db:
+                rows = await db.fetchall(
+                    "SELECT tg_user_id, last_lat, last_lon FROM drivers WHERE online = 1 AND status = 'approved'"
+                )
+
+            online = {row[0] for row in rows}
+            driver_cells = {
+                row[0]: encode_geohash(row[1], row[2])
+                for row in rows
+                if row[1] is not None and row[2] is not None
+            }
+            driver_counts: Dict[str, int] = defaultdict(int)
+            for cell in driver_cells.values():
+                driver_counts[cell] += 1
+
+            changed = set(self._driver_counts) | set(driver_counts)
+            self._online, self._driver_cells, self._driver_counts = online, driver_cells, driver_counts
+            self._recompute_around(changed)
+
+
+# Глобальний екземпляр
+_zone_tracker = ZoneSurgeTracker()
+
+
+def get_zone_tracker() -> ZoneSurgeTracker:
+    """Отримати глобальний трекер зональної націнки"""
+    return _zone_tracker
+
+
+def get_zone_multiplier(lat: Optional[float], lon: Optional[float]) -> float:
+    """Множник зони подачі для FareEngine (O(1))"""
+    return _zone_tracker.zone_multiplier(lat, lon)
+
+
+async def zone_surge_task(db_path: str) -> None:
+    """Фонове обслуговування зон: чистка вікна подач та звірка водіїв з БД"""
+    while True:
+        try:
+            _zone_tracker.expire()
+            await _zone_tracker.reconcile_drivers(db_path)
+        except Exception as e:
+            logger.error(f"❌ Помилка оновлення зональної націнки: {e}")
+        await asyncio.sleep(ZONE_REFRESH_SECONDS)
@@ -0,0 +1,66 @@
+"""Київський час (Europe/Kyiv) для тарифів та статистики"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _load_kyiv_tz() -> tzinfo:
+    try:
+        from zoneinfo import ZoneInfo
+        try:
+            return ZoneInfo("Europe/Kyiv")
+        except Exception:
+            # Старі бази tzdata знають лише стару назву
+            return ZoneInfo("Europe/Kiev")
+    except Exception as e:
+        logger.warning(f"⚠️ Часова зона Europe/Kyiv недоступна ({e}), використовую UTC+2 без переходу на літній час")
+        return timezone(timedelta(hours=2), "EET")
+
+
+KYIV_TZ = _load_kyiv_tz()
+
+# Кількість годинних слотів у тижні
+HOURS_PER_WEEK = 168
+
+
+def kyiv_now() -> datetime:
+    """Поточний час у Києві (timezone-aware)"""
+    return datetime.now(KYIV_TZ)
+
+
+def to_kyiv(dt: datetime) -> datetime:
+    """Перевести datetime в київський час (naive вважається UTC - так пишемо в БД)"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(KYIV_TZ)
+
+
+def hour_of_week(dt: datetime) -> int:
+    """Слот тижня 0..167 за київським часом (0 = понеділок 00:00)"""
+    local = to_kyiv(dt)
+    return local.weekday() * 24 + local.hour
+
+
+def kyiv_day_start(dt: Optional[datetime] = None) -> datetime:
+    """Початок київської доби (00:00) для моменту dt (за замовчуванням - зараз)"""
+    local = kyiv_now() if dt is None else to_kyiv(dt)
+    return local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def kyiv_days_range(days: int = 1, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    Напіввідкритий інтервал [start, end) за останні `days` київських діб, включно з сьогоднішньою.
+
+    Межі повертаються в UTC - саме так час зберігається в БД.
+    """
+    today = kyiv_day_start(now)
+    # Через переходи на літній час доба буває 23/25 год - рахуємо по календарю, не timedelta(hours=24)
+    start_date = today.date() - timedelta(days=days - 1)
+    end_date = today.date() + timedelta(days=1)
+    start = datetime(start_date.year, start_date.month, start_date.day, tzinfo=KYIV_TZ)
+    end = datetime(end_date.year, end_date.month, end_date.day, tzinfo=KYIV_TZ)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
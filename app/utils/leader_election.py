@@ -0,0 +1,181 @@
+"""
+Вибір лідера для фонових задач (кілька процесів бота)
+
+MULTI_INSTANCE=1: webhook приймає кожен процес, а задачі, які мають виконуватись
+рівно один раз (нагадування про комісію, чистка таблиць), запускає лише лідер -
+власник оренди в таблиці leader_leases.
+
+- Лідер продовжує оренду кожні LEADER_RENEW_SECONDS
+- Якщо лідер зник (крах, деплой), інший процес забирає оренду через LEADER_LEASE_SECONDS
+- При зупинці лідер звільняє оренду - наступний процес стає лідером одразу
+- Втративши оренду, процес зупиняє свої задачі лідера
+
+Кеші в пам'яті (попит, зональна націнка, метрики адмінки) оновлюються в кожному процесі окремо.
+Стани FSM (кроки замовлення, реєстрації, адреси з WebApp) мають бути спільними - сусідні
+оновлення користувача приходять у різні процеси, тому main бере DatabaseStorage
+(app/storage/fsm_storage.py) замість MemoryStorage.
+
+Без MULTI_INSTANCE процес один, і оренда передає роботу під час деплою: новий процес
+готується паралельно зі старим і приймає оновлення Telegram лише ставши лідером
+(див. app/utils/startup.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Callable, List, Optional
+
+from app.storage.db_connection import db_manager
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+MULTI_INSTANCE = os.getenv("MULTI_INSTANCE", "0") == "1"
+# Скільки живе оренда без продовження
+LEADER_LEASE_SECONDS = int(os.getenv("LEADER_LEASE_SECONDS", "15"))
+# Як часто лідер продовжує оренду, а інші процеси пробують її забрати
+LEADER_RENEW_SECONDS = max(1, LEADER_LEASE_SECONDS // 3)
+
+SCHEDULER_LEASE = "scheduler"
+
+# Оренда вільна, прострочена або вже наша -> забрати/продовжити; інакше рядок не повертається.
+# expires_at - секунди Unix (число порівнюється однаково в SQLite і PostgreSQL)
+ACQUIRE_LEASE_SQL = """
+    INSERT INTO leader_leases (name, holder, expires_at) VALUES (?, ?, ?)
+    ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+    WHERE leader_leases.holder = excluded.holder OR leader_leases.expires_at < ?
+    RETURNING holder
+"""
+
+
+async def try_acquire_lease(db_path: str, name: str, holder: str, ttl_seconds: float) -> bool:
+    """Взяти або продовжити оренду (один запит, compare-and-set)"""
+    now = time.time()
+    async with db_manager.connect(db_path) as db:
+        rows = await db.fetchall(ACQUIRE_LEASE_SQL, (name, holder, now + ttl_seconds, now))
+        await db.commit()
+    return bool(rows)
+
+
+async def release_lease(db_path: str, name: str, holder: str) -> None:
+    async with db_manager.connect(db_path) as db:
+        await db.execute("DELETE FROM leader_leases WHERE name = ? AND holder = ?", (name, holder))
+        await db.commit()
+
+
+LeaderJobs = Callable[[], List[asyncio.Task]]
+
+
+class LeaderElector:
+    """Цикл оренди одного процесу: стати лідером -> запустити задачі, втратити -> зупинити"""
+
+    def __init__(
+        self,
+        db_path: str,
+        start_jobs: LeaderJobs,
+        name: str = SCHEDULER_LEASE,
+        lease_seconds: float = LEADER_LEASE_SECONDS,
+        renew_seconds: float = LEADER_RENEW_SECONDS,
+    ):
+        self.db_path = db_path
+        self.name = name
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._start_jobs = start_jobs
+        self._lease_seconds = lease_seconds
+        self._renew_seconds = renew_seconds
+        self._jobs: List[asyncio.Task] = []
+        self._renewed_at: Optional[float] = None
+        self._leader_event = asyncio.Event()
+        self.is_leader = False
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                held = await try_acquire_lease(self.db_path, self.name, self.instance_id, self._lease_seconds)
+            except Exception as e:
+                logger.error(f"❌ Оренда лідера '{self.name}': {e}")
+                # БД недоступна: лідер тримається, поки його оренда точно не скінчилась
+                held = self.is_leader and (loop.time() - self._renewed_at) < self._lease_seconds
+
+            if held:
+                self._renewed_at = loop.time()
+                if not self.is_leader:
+                    self._become_leader()
+            elif self.is_leader:
+                await self._step_down()
+
+            await asyncio.sleep(self._renew_seconds)
+
+    async def wait_leader(self) -> None:
+        """Дочекатися оренди (старий процес звільнив її або вона спливла)"""
+        await self._leader_event.wait()
+
+    def _become_leader(self) -> None:
+        self.is_leader = True
+        self._leader_event.set()
+        self._jobs = self._start_jobs()
+        logger.info(f"👑 {self.instance_id} - лідер '{self.name}', запущено задач: {len(self._jobs)}")
+
+    async def _step_down(self) -> None:
+        self.is_leader = False
+        self._leader_event.clear()
+        jobs, self._jobs = self._jobs, []
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        logger.warning(f"⚠️ {self.instance_id} більше не лідер '{self.name}', задачі зупинено")
+
+    async def stop(self) -> None:
+        """Зупинити задачі і звільнити оренду (інший процес підхопить одразу)"""
+        if not self.is_leader:
+            return
+        await self._step_down()
+        try:
+            await release_lease(self.db_path, self.name, self.instance_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося звільнити оренду '{self.name}': {e}")
+
+
+_elector: Optional[LeaderElector] = None
+_elector_task: Optional[asyncio.Task] = None
+
+
+def start_leader_election(db_path: str, start_jobs: LeaderJobs) -> LeaderElector:
+    """Запустити цикл оренди у фоні (один на процес)"""
+    global _elector, _elector_task
+    if _elector is None:
+        _elector = LeaderElector(db_path, start_jobs)
+        _elector_task = asyncio.create_task(_elector.run())
+        logger.info(f"🗳 Вибір лідера: екземпляр {_elector.instance_id}, оренда {LEADER_LEASE_SECONDS}s")
+    return _elector
+
+
+async def stop_leader_election() -> None:
+    """Зупинка процесу: звільнити оренду, щоб лідером одразу став інший екземпляр"""
+    global _elector, _elector_task
+    if _elector_task is not None:
+        _elector_task.cancel()
+        await asyncio.gather(_elector_task, return_exceptions=True)
+    if _elector is not None:
+        await _elector.stop()
+    _elector, _elector_task = None, None
+
+
+async def wait_for_leadership() -> None:
+    """Чекати, поки процес стане лідером (вибір лідера має бути запущений)"""
+    if _elector is not None:
+        await _elector.wait_leader()
+
+
+def is_leader() -> bool:
+    """Чи виконує цей процес задачі лідера"""
+    return _elector is not None and _elector.is_leader
+
+
+metrics.gauge("taxi_leader", "1 if this process runs leader-only jobs", lambda: int(is_leader()))
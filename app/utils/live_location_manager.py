@@ -7,6 +7,8 @@ import logging
 from typing import Dict, Optional
 from datetime import datetime, timezone
 
+from app.utils import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -163,3 +165,6 @@ class LiveLocationManager:
         for order_id in order_ids:
             await cls.stop_tracking(order_id)
         logger.info(f"📍 All live location tracking stopped ({len(order_ids)} orders)")
+
+
+metrics.gauge("taxi_live_tracking_sessions", "Orders with live driver location tracking", LiveLocationManager.get_active_count)
@@ -0,0 +1,149 @@
+"""
+Логування процесу: рівні по модулях, JSON-формат, запис поза event loop, семплінг
+
+setup_logging() - на початку main() замість logging.basicConfig:
+- LOG_LEVEL (INFO) - рівень кореня; LOG_LEVELS="app.handlers.order=DEBUG,aiogram=WARNING" - по модулях
+- LOG_FORMAT=json - один JSON-об'єкт на рядок (ts, level, logger, msg, trace_id, exc);
+  за замовчуванням - текст у попередньому форматі
+- корінь пише лише в чергу (QueueHandler); форматування і запис у stderr -
+  у потоці QueueListener, тож event loop не чекає на I/O логів
+- LOG_SAMPLE="aiogram.event=10" - з INFO/DEBUG записів модуля проходить кожен N-й
+  (WARNING і вище - завжди); за замовчуванням так семплюються "Update id=... is handled"
+
+У гарячих шляхах - logger.debug("... %s", value) замість f-рядків: вимкнений рівень
+відсікається до форматування, а ввімкнений форматується вже в потоці логування.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.utils.tracing import current_trace_id
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Часті службові записи: aiogram пише рядок на кожне оброблене оновлення
+DEFAULT_LOG_SAMPLE = "aiogram.event=10"
+
+_listener: Optional[QueueListener] = None
+
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    """"a=1,b.c=2" -> {"a": "1", "b.c": "2"}"""
+    pairs = {}
+    for item in value.split(","):
+        name, sep, setting = item.partition("=")
+        if sep and name.strip() and setting.strip():
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+class JsonFormatter(logging.Formatter):
+    """Запис -> один рядок JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """З INFO/DEBUG записів логера (і його дочірніх) пропускає кожен N-й"""
+
+    def __init__(self, every: Dict[str, int]):
+        super().__init__()
+        self.every = every
+        self._counters: Dict[str, int] = {}
+        self._prefix_by_logger: Dict[str, Optional[str]] = {}
+
+    def _prefix(self, name: str) -> Optional[str]:
+        if name not in self._prefix_by_logger:
+            matches = [p for p in self.every if name == p or name.startswith(p + ".")]
+            self._prefix_by_logger[name] = max(matches, key=len) if matches else None
+        return self._prefix_by_logger[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        prefix = self._prefix(record.name)
+        if prefix is None:
+            return True
+        count = self._counters.get(prefix, 0)
+        self._counters[prefix] = count + 1
+        return count % self.every[prefix] == 0
+
+
+class TraceContextFilter(logging.Filter):
+    """trace_id поточної траси (app/utils/tracing.py) - береться в потоці, що логує"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id()
+        return True
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    Черга в межах процесу: запис передається як є.
+
+    Стандартний QueueHandler.prepare форматує повідомлення до постановки в чергу
+    (для передачі між процесами) - тут це робить обробник у потоці QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging() -> None:
+    """Налаштувати кореневий логер (повторний виклик переналаштовує)"""
+    global _listener
+    stop_logging()
+
+    formatter = JsonFormatter() if os.getenv("LOG_FORMAT", "").lower() == "json" else logging.Formatter(TEXT_FORMAT)
+    output = logging.StreamHandler()
+    output.setFormatter(formatter)
+
+    handler = _LocalQueueHandler(queue.SimpleQueue())
+    sample = {
+        name: max(1, int(every))
+        for name, every in _parse_pairs(os.getenv("LOG_SAMPLE", DEFAULT_LOG_SAMPLE)).items()
+        if every.isdigit()
+    }
+    if sample:
+        handler.addFilter(SamplingFilter(sample))
+    handler.addFilter(TraceContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    for name, level in _parse_pairs(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Дописати чергу і зупинити потік логування"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,12 +1,63 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
 import aiohttp
 import asyncio
 import logging
+import os
+import time
+
+from app.utils import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
+GEO_SECONDS = metrics.histogram("taxi_geo_request_seconds", "OSRM/Nominatim/Overpass HTTP request latency", ("service",))
+GEO_ERRORS = metrics.counter("taxi_geo_request_errors_total", "Failed OSRM/Nominatim/Overpass requests", ("service",))
+GEO_CACHE = metrics.counter("taxi_geo_cache_total", "Geo cache lookups by result (hit/miss)", ("service", "result"))
+
+# Скільки тримати відповіді OSRM/Nominatim (0 - кеш вимкнено)
+GEO_CACHE_TTL_SECONDS = float(os.getenv("GEO_CACHE_TTL_SECONDS", "3600"))
+GEO_CACHE_SIZE = 2000
+# Округлення координат ключа кешу: 4 знаки ≈ 11 м
+GEO_CACHE_PRECISION = 4
+
+
+class GeoCache:
+    """LRU з TTL для успішних відповідей геосервісів (влучання кешу не чекають ліміту Nominatim)"""
+
+    def __init__(self, service: str):
+        self.service = service
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            GEO_CACHE.inc(self.service, "hit")
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        GEO_CACHE.inc(self.service, "miss")
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if GEO_CACHE_TTL_SECONDS <= 0 or value is None:
+            return
+        self._entries[key] = (time.monotonic() + GEO_CACHE_TTL_SECONDS, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > GEO_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+
+def _coords_key(*coords: float) -> Tuple[float, ...]:
+    return tuple(round(c, GEO_CACHE_PRECISION) for c in coords)
+
+
+_route_cache = GeoCache("osrm")
+_geocode_cache = GeoCache("nominatim_search")
+_reverse_cache = GeoCache("nominatim_reverse")
+
 # Затримка між запитами до Nominatim (обов'язкова згідно з правилами)
 _last_nominatim_request = 0
 NOMINATIM_DELAY = 1.0  # 1 секунда між запитами
@@ -15,13 +66,13 @@ NOMINATIM_DELAY = 1.0  # 1 секунда між запитами
 async def _wait_for_nominatim():
     """Затримка між запитами до Nominatim (1 запит/сек)"""
     global _last_nominatim_request
-    import time
     
     now = time.time()
     time_since_last = now - _last_nominatim_request
     
     if time_since_last < NOMINATIM_DELAY:
-        await asyncio.sleep(NOMINATIM_DELAY - time_since_last)
+        with tracing.span("nominatim_wait"):
+            await asyncio.sleep(NOMINATIM_DELAY - time_since_last)
     
     _last_nominatim_request = time.time()
 
@@ -39,6 +90,11 @@ async def get_distance_and_duration(
     
     Returns (distance_meters, duration_seconds) or None
     """
+    cache_key = _coords_key(origin_lat, origin_lon, dest_lat, dest_lon)
+    cached = _route_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         # OSRM API - безкоштовний, публічний
         url = (
@@ -47,12 +103,14 @@ async def get_distance_and_duration(
             f"?overview=false&steps=false"
         )
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=15) as resp:
-                if resp.status != 200:
-                    logger.error(f"OSRM API HTTP error: {resp.status}")
-                    return None
-                data = await resp.json()
+        with GEO_SECONDS.time("osrm"), tracing.span("osrm"):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, timeout=15) as resp:
+                    if resp.status != 200:
+                        GEO_ERRORS.inc("osrm")
+                        logger.error(f"OSRM API HTTP error: {resp.status}")
+                        return None
+                    data = await resp.json()
         
         if data.get("code") != "Ok":
             logger.warning(f"⚠️ OSRM API код: {data.get('code')}")
@@ -71,10 +129,13 @@ async def get_distance_and_duration(
             logger.warning("⚠️ OSRM API: немає distance/duration")
             return None
         
-        logger.info(f"✅ OSRM: {distance:.0f}м, {duration:.0f}сек")
-        return (int(distance), int(duration))
+        logger.debug("✅ OSRM: %.0fм, %.0fсек", distance, duration)
+        result = (int(distance), int(duration))
+        _route_cache.put(cache_key, result)
+        return result
         
     except Exception as e:
+        GEO_ERRORS.inc("osrm")
         logger.error(f"❌ OSRM API exception: {type(e).__name__}: {str(e)}")
         return None
 
@@ -92,6 +153,11 @@ async def geocode_address(api_key: str, address: str) -> Optional[Tuple[float, f
     if "україна" not in address.lower() and "ukraine" not in address.lower():
         address = f"{address}, Україна"
     
+    cache_key = " ".join(address.lower().split())
+    cached = _geocode_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     # Затримка для Nominatim
     await _wait_for_nominatim()
     
@@ -106,12 +172,14 @@ async def geocode_address(api_key: str, address: str) -> Optional[Tuple[float, f
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=15) as resp:
-                if resp.status != 200:
-                    logger.error(f"Nominatim Geocoding HTTP error: {resp.status}")
-                    return None
-                data = await resp.json()
+        with GEO_SECONDS.time("nominatim_search"), tracing.span("nominatim_search"):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, headers=headers, timeout=15) as resp:
+                    if resp.status != 200:
+                        GEO_ERRORS.inc("nominatim_search")
+                        logger.error(f"Nominatim Geocoding HTTP error: {resp.status}")
+                        return None
+                    data = await resp.json()
         
         if not data or len(data) == 0:
             logger.warning(f"⚠️ Nominatim не знайшов адресу: {address}")
@@ -125,10 +193,13 @@ async def geocode_address(api_key: str, address: str) -> Optional[Tuple[float, f
             logger.warning(f"⚠️ Nominatim: немає координат в результаті")
             return None
         
-        logger.info(f"✅ Nominatim geocoded: {address} → {lat},{lon}")
-        return (float(lat), float(lon))
+        logger.debug("✅ Nominatim geocoded: %s → %s,%s", address, lat, lon)
+        result = (float(lat), float(lon))
+        _geocode_cache.put(cache_key, result)
+        return result
         
     except Exception as e:
+        GEO_ERRORS.inc("nominatim_search")
         logger.error(f"❌ Nominatim Geocoding exception: {type(e).__name__}: {str(e)}")
         return None
 
@@ -140,6 +211,11 @@ async def reverse_geocode(api_key: str, lat: float, lon: float) -> Optional[str]
     
     Returns address string or None
     """
+    cache_key = _coords_key(lat, lon)
+    cached = _reverse_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     # Затримка для Nominatim
     await _wait_for_nominatim()
     
@@ -153,12 +229,14 @@ async def reverse_geocode(api_key: str, lat: float, lon: float) -> Optional[str]
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=15) as resp:
-                if resp.status != 200:
-                    logger.error(f"Nominatim Reverse Geocoding HTTP error: {resp.status}")
-                    return None
-                data = await resp.json()
+        with GEO_SECONDS.time("nominatim_reverse"), tracing.span("nominatim_reverse"):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, headers=headers, timeout=15) as resp:
+                    if resp.status != 200:
+                        GEO_ERRORS.inc("nominatim_reverse")
+                        logger.error(f"Nominatim Reverse Geocoding HTTP error: {resp.status}")
+                        return None
+                    data = await resp.json()
         
         # Отримати адресу
         display_name = data.get("display_name")
@@ -200,14 +278,17 @@ async def reverse_geocode(api_key: str, lat: float, lon: float) -> Optional[str]
         # Якщо є структурована адреса - використати її
         if parts:
             formatted = ", ".join(parts)
-            logger.info(f"✅ Nominatim reverse: {lat},{lon} → {formatted}")
+            logger.debug("✅ Nominatim reverse: %s,%s → %s", lat, lon, formatted)
+            _reverse_cache.put(cache_key, formatted)
             return formatted
         
         # Fallback на display_name (якщо структура недоступна)
-        logger.info(f"✅ Nominatim reverse (fallback): {lat},{lon} → {display_name}")
+        logger.debug("✅ Nominatim reverse (fallback): %s,%s → %s", lat, lon, display_name)
+        _reverse_cache.put(cache_key, display_name)
         return display_name
         
     except Exception as e:
+        GEO_ERRORS.inc("nominatim_reverse")
         logger.error(f"❌ Nominatim Reverse Geocoding exception: {type(e).__name__}: {str(e)}")
         return None
 
@@ -288,16 +369,18 @@ async def search_places_nearby(lat: float, lon: float, radius: int = 100) -> lis
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                overpass_url, 
-                data={"data": query},
-                headers=headers,
-                timeout=15
-            ) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
+        with GEO_SECONDS.time("overpass"), tracing.span("overpass"):
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    overpass_url, 
+                    data={"data": query},
+                    headers=headers,
+                    timeout=15
+                ) as resp:
+                    if resp.status != 200:
+                        GEO_ERRORS.inc("overpass")
+                        return []
+                    data = await resp.json()
         
         elements = data.get("elements", [])
         places = []
@@ -310,5 +393,6 @@ async def search_places_nearby(lat: float, lon: float, radius: int = 100) -> lis
         return places[:3]  # Максимум 3 об'єкти
         
     except Exception as e:
+        GEO_ERRORS.inc("overpass")
         logger.debug(f"Overpass API помилка: {e}")
         return []
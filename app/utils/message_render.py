@@ -0,0 +1,183 @@
+"""
+Координатор редагування повідомлень (групові замовлення, статуси клієнта)
+
+Одне повідомлення редагують кілька шляхів (таймаут "ТЕРМІНОВЕ", підняття ціни,
+скасування, прийняття). Щоб не ловити "message is not modified" і не витрачати запити:
+- для кожного (chat_id, message_id) пам'ятається хеш останнього показаного вмісту -
+  однакове редагування не йде в API
+- редагування одного повідомлення йдуть по черзі; все, що прийшло за
+  RENDER_COALESCE_SECONDS після попереднього, зливається в одне (перемагає останнє)
+- get_render_stats() показує, скільки запитів зекономлено
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Вікно злиття редагувань одного повідомлення
+RENDER_COALESCE_SECONDS = 0.5
+# Скільки повідомлень пам'ятати (найстаріші витісняються)
+RENDER_CACHE_SIZE = 5000
+
+_Key = Tuple[int, int]
+
+
+@dataclass
+class RenderStats:
+    requested: int = 0
+    sent: int = 0
+    skipped_identical: int = 0
+    coalesced: int = 0
+    not_modified: int = 0
+
+    @property
+    def saved(self) -> int:
+        """Запити, які не пішли в Telegram"""
+        return self.skipped_identical + self.coalesced
+
+
+def _digest(text: str, kwargs: Dict[str, Any]) -> str:
+    parts = [text]
+    for name in sorted(kwargs):
+        value = kwargs[name]
+        dump = getattr(value, "model_dump_json", None)
+        parts.append(f"{name}={dump() if dump else value!r}")
+    return hashlib.blake2b("\x00".join(parts).encode(), digest_size=16).hexdigest()
+
+
+class _Pending:
+    """Останнє запитане редагування і ті, хто на нього чекає"""
+
+    __slots__ = ("text", "kwargs", "digest", "waiters")
+
+    def __init__(self, text: str, kwargs: Dict[str, Any], digest: str):
+        self.text = text
+        self.kwargs = kwargs
+        self.digest = digest
+        self.waiters: List[asyncio.Future] = []
+
+
+class MessageRenderCoordinator:
+    """Хеші показаного вмісту + по одному worker-у на повідомлення, що зараз редагується"""
+
+    def __init__(self, window: float = RENDER_COALESCE_SECONDS, cache_size: int = RENDER_CACHE_SIZE):
+        self._window = window
+        self._cache_size = cache_size
+        self._rendered: "OrderedDict[_Key, str]" = OrderedDict()
+        self._pending: Dict[_Key, _Pending] = {}
+        self._workers: Dict[_Key, asyncio.Task] = {}
+        self.stats = RenderStats()
+
+    async def edit_text(self, bot, chat_id: int, message_id: int, text: str, **kwargs: Any) -> bool:
+        """
+        Відредагувати текст повідомлення (reply_markup, parse_mode ... - як у bot.edit_message_text).
+
+        Returns:
+            True - повідомлення показує цей вміст (відредаговано, вже було таким або злито з новішим)
+        Raises:
+            Помилки Telegram, крім "message is not modified"
+        """
+        key = (chat_id, message_id)
+        digest = _digest(text, kwargs)
+        self.stats.requested += 1
+
+        if key not in self._workers and self._rendered.get(key) == digest:
+            self.stats.skipped_identical += 1
+            return True
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending(text, kwargs, digest)
+        else:
+            # Попереднє ще не надіслане - замінюємо його новішим
+            self.stats.coalesced += 1
+            pending.text, pending.kwargs, pending.digest = text, kwargs, digest
+
+        waiter = asyncio.get_running_loop().create_future()
+        pending.waiters.append(waiter)
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._worker(bot, key))
+        return await waiter
+
+    async def _worker(self, bot, key: _Key) -> None:
+        try:
+            while key in self._pending:
+                pending = self._pending.pop(key)
+                try:
+                    result = await self._send(bot, key, pending)
+                except Exception as e:
+                    for waiter in pending.waiters:
+                        if not waiter.done():
+                            waiter.set_exception(e)
+                else:
+                    for waiter in pending.waiters:
+                        if not waiter.done():
+                            waiter.set_result(result)
+                # Редагування, що прийдуть за цей час, зіллються в одне
+                await asyncio.sleep(self._window)
+        finally:
+            self._workers.pop(key, None)
+
+    async def _send(self, bot, key: _Key, pending: _Pending) -> bool:
+        if self._rendered.get(key) == pending.digest:
+            self.stats.skipped_identical += 1
+            return True
+
+        chat_id, message_id = key
+        try:
+            await bot.edit_message_text(pending.text, chat_id=chat_id, message_id=message_id, **pending.kwargs)
+            self.stats.sent += 1
+        except Exception as e:
+            if "message is not modified" not in str(e).lower():
+                raise
+            self.stats.not_modified += 1
+        self._remember(key, pending.digest)
+        return True
+
+    def _remember(self, key: _Key, digest: str) -> None:
+        self._rendered[key] = digest
+        self._rendered.move_to_end(key)
+        while len(self._rendered) > self._cache_size:
+            self._rendered.popitem(last=False)
+
+    def forget(self, chat_id: int, message_id: int) -> None:
+        """Забути вміст (повідомлення видалене або змінене в обхід координатора)"""
+        self._rendered.pop((chat_id, message_id), None)
+
+
+# Глобальний екземпляр координатора
+_coordinator = MessageRenderCoordinator()
+
+metrics.gauge(
+    "taxi_message_render_total",
+    "Message edit requests by outcome (sent, skipped_identical, coalesced, not_modified)",
+    lambda: {
+        (outcome,): getattr(_coordinator.stats, outcome)
+        for outcome in ("requested", "sent", "skipped_identical", "coalesced", "not_modified")
+    },
+    ("outcome",),
+    kind="counter",
+)
+
+
+async def edit_message_text(bot, chat_id: int, message_id: int, text: str, **kwargs: Any) -> bool:
+    """bot.edit_message_text через координатор (без однакових і зайвих проміжних редагувань)"""
+    return await _coordinator.edit_text(bot, chat_id, message_id, text, **kwargs)
+
+
+def forget_message(chat_id: int, message_id: int) -> None:
+    _coordinator.forget(chat_id, message_id)
+
+
+def get_render_stats() -> RenderStats:
+    """Лічильники координатора (saved - скільки запитів до Telegram зекономлено)"""
+    return _coordinator.stats
@@ -0,0 +1,224 @@
+"""
+Метрики процесу у форматі Prometheus (/metrics) без зовнішніх залежностей
+
+Реєстр живе в пам'яті процесу, запис на гарячих шляхах - одне оновлення dict:
+- counter(...)   - лічильник з мітками:  REQUESTS.inc("sendMessage")
+- histogram(...) - розподіл тривалостей: DB_SECONDS.observe(0.012, "get_order")
+                                          with DB_SECONDS.time("get_order"): ...
+- gauge(...)     - значення, що читається при кожному запиті /metrics (розмір словника таймерів,
+                   готові лічильники модулів) - на гарячому шляху нічого не коштує
+
+Метрики оголошуються на рівні модуля, що їх пише; повторне оголошення з тією ж назвою
+повертає ту саму метрику. render_metrics() - текст для /metrics.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+# Межі кошиків гістограм (секунди): від 5 мс (запит до БД) до 10 с (OSRM/Nominatim з таймаутом)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_Labels = Tuple[str, ...]
+GaugeValue = Union[float, Dict[_Labels, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: _Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Лічильник, що лише зростає"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[_Labels, float] = {}
+
+    def inc(self, *labels: str, value: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class _Timer:
+    """with histogram.time(...): - тривалість блоку, в тому числі якщо він впав"""
+
+    __slots__ = ("_histogram", "_labels", "_started")
+
+    def __init__(self, histogram: "Histogram", labels: _Labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._histogram.observe(time.perf_counter() - self._started, *self._labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Розподіл значень по кошиках + сума і кількість (для середнього і квантилів у Prometheus)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # мітки -> [кількість у кожному кошику (останній - понад усі межі), сума]
+        self._series: Dict[_Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, *labels: str) -> _Timer:
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Значення, яке рахує функція під час запиту /metrics.
+
+    Функція повертає число або {мітки: число}. kind="counter" - для готових лічильників
+    модулів (статистика рендеру, підписників подій), що ведуться без реєстру.
+    """
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], GaugeValue], labelnames: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, help_text, labelnames)
+        self.kind = kind
+        self._collect = collect
+
+    def render(self) -> List[str]:
+        try:
+            value = self._collect()
+        except Exception as e:
+            logger.debug(f"Метрика {self.name} не зібрана: {e}")
+            return []
+        if not isinstance(value, dict):
+            return [f"{self.name} {_format_value(value)}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(item)}"
+            for labels, item in sorted(value.items())
+        ]
+
+
+class MetricsRegistry:
+    """Усі метрики процесу за назвою (в порядку оголошення)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Метрика {metric.name} вже оголошена з іншим типом або мітками")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, collect: Callable[[], GaugeValue], labelnames: Sequence[str] = (), kind: str = "gauge") -> Gauge:
+        metric = self._register(Gauge(name, help_text, collect, labelnames, kind))
+        metric._collect = collect  # Повторна реєстрація (новий Dispatcher/storage) - свіже джерело
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            body = metric.render()
+            if body:
+                lines.extend(metric.header())
+                lines.extend(body)
+        return "\n".join(lines) + "\n"
+
+
+# Глобальний реєстр процесу
+_registry = MetricsRegistry()
+
+
+def counter(name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _registry.counter(name, help_text, labelnames)
+
+
+def histogram(name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _registry.histogram(name, help_text, labelnames, buckets)
+
+
+def gauge(name: str, help_text: str, collect: Callable[[], GaugeValue], labelnames: Sequence[str] = (), kind: str = "gauge") -> Gauge:
+    return _registry.gauge(name, help_text, collect, labelnames, kind)
+
+
+def render_metrics() -> str:
+    """Текст усіх метрик у форматі Prometheus (text/plain; version=0.0.4)"""
+    return _registry.render()
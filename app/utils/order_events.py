@@ -0,0 +1,294 @@
+"""
+Шина подій замовлення (асинхронна, в пам'яті процесу)
+
+Обробник лише фіксує зміну статусу (commit), а все інше - зупинка таймерів,
+live location, очищення чату водія - робиться підписниками у фоні:
+
+    order.created    OrderCreated
+    order.accepted   OrderAccepted
+    order.started    OrderStarted
+    order.completed  OrderCompleted
+    order.cancelled  OrderCancelled (by = "client" | "driver")
+
+- Кожен підписник - окрема asyncio задача: підписники йдуть паралельно і не блокують обробник
+- Помилка одного підписника логується і не зачіпає інших
+- Для кожного підписника рахуються виклики, помилки і час виконання (get_order_event_stats)
+- Події приходять з машини станів (order_state) - окремо публікувати їх у хендлерах не треба
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, ClassVar, Dict, List, Optional, Set, Tuple
+
+from app.storage.db import Order
+from app.storage.order_state import OrderTransition, add_transition_listener
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+ORDER_CREATED = "order.created"
+ORDER_ACCEPTED = "order.accepted"
+ORDER_STARTED = "order.started"
+ORDER_COMPLETED = "order.completed"
+ORDER_CANCELLED = "order.cancelled"
+
+# Підписник, повільніший за цей поріг, потрапляє в лог як warning
+SLOW_SUBSCRIBER_MS = 2000
+
+
+@dataclass(frozen=True)
+class OrderEvent:
+    """Подія замовлення: order - рядок одразу після переходу, at - час переходу"""
+    topic: ClassVar[str] = ""
+    order: Order
+    at: datetime
+
+    @property
+    def order_id(self) -> int:
+        return self.order.id
+
+
+@dataclass(frozen=True)
+class OrderCreated(OrderEvent):
+    topic: ClassVar[str] = ORDER_CREATED
+
+
+@dataclass(frozen=True)
+class OrderAccepted(OrderEvent):
+    topic: ClassVar[str] = ORDER_ACCEPTED
+    driver_id: int
+
+
+@dataclass(frozen=True)
+class OrderStarted(OrderEvent):
+    topic: ClassVar[str] = ORDER_STARTED
+    driver_id: int
+
+
+@dataclass(frozen=True)
+class OrderCompleted(OrderEvent):
+    topic: ClassVar[str] = ORDER_COMPLETED
+    driver_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class OrderCancelled(OrderEvent):
+    topic: ClassVar[str] = ORDER_CANCELLED
+    by: str
+    # Водій замовлення на момент скасування (для cancel_by_driver в order.driver_id вже NULL)
+    driver_id: Optional[int]
+
+
+OrderEventHandler = Callable[[OrderEvent], Awaitable[None]]
+
+
+@dataclass
+class SubscriberStats:
+    """Лічильники одного підписника"""
+    name: str
+    topic: str
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class OrderEventBus:
+    """Підписки topic -> [(handler, stats)] і задачі підписників, що ще виконуються"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Tuple[OrderEventHandler, SubscriberStats]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def subscribe(self, topic: str, handler: OrderEventHandler, name: Optional[str] = None) -> None:
+        """Підписатися на topic (повторна підписка того ж обробника ігнорується)"""
+        subscribers = self._subscribers.setdefault(topic, [])
+        if any(existing is handler for existing, _ in subscribers):
+            return
+        name = name or getattr(handler, "__qualname__", repr(handler))
+        subscribers.append((handler, SubscriberStats(name=name, topic=topic)))
+        logger.debug(f"📨 Підписник {name} -> {topic}")
+
+    def unsubscribe(self, topic: str, handler: OrderEventHandler) -> None:
+        subscribers = self._subscribers.get(topic, [])
+        self._subscribers[topic] = [(h, s) for h, s in subscribers if h is not handler]
+
+    def publish(self, event: OrderEvent) -> int:
+        """
+        Запустити підписників у фоні і одразу повернутися.
+
+        Returns:
+            Кількість запущених підписників
+        """
+        subscribers = self._subscribers.get(event.topic)
+        if not subscribers:
+            return 0
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning(f"⚠️ {event.topic} #{event.order_id}: немає event loop, підписників не запущено")
+            return 0
+
+        for handler, stats in list(subscribers):
+            task = loop.create_task(self._run(handler, stats, event), name=f"{event.topic}:{stats.name}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(subscribers)
+
+    async def _run(self, handler: OrderEventHandler, stats: SubscriberStats, event: OrderEvent) -> None:
+        started = time.perf_counter()
+        try:
+            await handler(event)
+        except Exception as e:
+            stats.errors += 1
+            logger.error(f"❌ Підписник {stats.name} ({event.topic} #{event.order_id}): {e}", exc_info=True)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            if elapsed_ms > stats.max_ms:
+                stats.max_ms = elapsed_ms
+            if elapsed_ms > SLOW_SUBSCRIBER_MS:
+                logger.warning(f"🐢 Підписник {stats.name} ({event.topic} #{event.order_id}): {elapsed_ms:.0f} мс")
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Дочекатися підписників, що ще виконуються (зупинка бота, скрипти).
+
+        Returns:
+            True якщо всі завершились, False якщо вийшов timeout
+        """
+        while self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            if pending:
+                logger.warning(f"⚠️ Не дочекались {len(pending)} підписників подій замовлення")
+                return False
+        return True
+
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def stats(self) -> List[SubscriberStats]:
+        return [stats for subscribers in self._subscribers.values() for _, stats in subscribers]
+
+
+# Глобальний екземпляр шини
+_bus = OrderEventBus()
+
+
+def _subscriber_metric(value: Callable[[SubscriberStats], float]) -> Callable[[], Dict[Tuple[str, str], float]]:
+    return lambda: {(stats.topic, stats.name): value(stats) for stats in _bus.stats()}
+
+
+_SUBSCRIBER_LABELS = ("topic", "subscriber")
+metrics.gauge("taxi_order_event_calls_total", "Order event subscriber runs", _subscriber_metric(lambda s: s.calls), _SUBSCRIBER_LABELS, kind="counter")
+metrics.gauge("taxi_order_event_errors_total", "Order event subscriber runs that raised", _subscriber_metric(lambda s: s.errors), _SUBSCRIBER_LABELS, kind="counter")
+metrics.gauge("taxi_order_event_seconds_total", "Time spent in order event subscribers", _subscriber_metric(lambda s: s.total_ms / 1000), _SUBSCRIBER_LABELS, kind="counter")
+metrics.gauge("taxi_order_events_in_flight", "Order event subscriber tasks still running", _bus.pending)
+
+
+def get_order_event_bus() -> OrderEventBus:
+    return _bus
+
+
+def subscribe_order_event(topic: str, handler: OrderEventHandler, name: Optional[str] = None) -> None:
+    """Підписатися на подію замовлення (order.created, order.accepted, ...)"""
+    _bus.subscribe(topic, handler, name)
+
+
+def publish_order_event(event: OrderEvent) -> int:
+    """Опублікувати подію (підписники запускаються у фоні)"""
+    return _bus.publish(event)
+
+
+async def drain_order_events(timeout: Optional[float] = None) -> bool:
+    """Дочекатися всіх підписників у польоті"""
+    return await _bus.drain(timeout)
+
+
+def get_order_event_stats() -> List[SubscriberStats]:
+    """Виклики / помилки / час кожного підписника"""
+    return _bus.stats()
+
+
+def _event_from_transition(transition: OrderTransition) -> Optional[OrderEvent]:
+    """Перехід машини станів -> подія шини (offer/reject подій не мають)"""
+    order, at = transition.order, transition.at
+    if transition.name == "create":
+        return OrderCreated(order=order, at=at)
+    if transition.name == "accept":
+        return OrderAccepted(order=order, at=at, driver_id=transition.driver_id)
+    if transition.name == "start":
+        return OrderStarted(order=order, at=at, driver_id=transition.driver_id)
+    if transition.name in ("complete", "finalize"):
+        return OrderCompleted(order=order, at=at, driver_id=order.driver_id)
+    if transition.name == "cancel_by_client":
+        return OrderCancelled(order=order, at=at, by="client", driver_id=order.driver_id)
+    if transition.name == "cancel_by_driver":
+        return OrderCancelled(order=order, at=at, by="driver", driver_id=transition.driver_id)
+    return None
+
+
+def _publish_transition(transition: OrderTransition) -> None:
+    event = _event_from_transition(transition)
+    if event is not None:
+        _bus.publish(event)
+
+
+add_transition_listener(_publish_transition)
+
+_default_subscribers_registered = False
+
+
+def register_order_event_subscribers(bot, db_path: str) -> None:
+    """
+    Стандартні підписники (викликати один раз після створення бота).
+
+    - accepted/completed/cancelled: скасувати таймер пошуку і пріоритетний таймер
+    - completed/cancelled: зупинити live location
+    - completed: очистити чат водія від повідомлень замовлення
+    """
+    global _default_subscribers_registered
+    if _default_subscribers_registered:
+        return
+    _default_subscribers_registered = True
+
+    async def release_timers(event: OrderEvent) -> None:
+        from app.utils.order_timeout import cancel_order_timeout
+        from app.utils.priority_order_manager import PriorityOrderManager
+
+        cancel_order_timeout(event.order_id)
+        PriorityOrderManager.cancel_priority_timer(event.order_id)
+
+    async def stop_live_location(event: OrderEvent) -> None:
+        from app.utils.live_location_manager import LiveLocationManager
+
+        await LiveLocationManager.stop_tracking(event.order_id)
+
+    async def clear_driver_chat(event: OrderCompleted) -> None:
+        from app.storage.db import get_driver_by_id
+        from app.storage.message_ledger import order_scope
+        from app.utils.chat_cleanup import cleanup_chat
+
+        if not event.driver_id:
+            return
+        driver = await get_driver_by_id(db_path, event.driver_id)
+        if driver:
+            await cleanup_chat(bot, db_path, driver.tg_user_id, order_scope(event.order_id))
+
+    for topic in (ORDER_ACCEPTED, ORDER_COMPLETED, ORDER_CANCELLED):
+        subscribe_order_event(topic, release_timers, "release_timers")
+    for topic in (ORDER_COMPLETED, ORDER_CANCELLED):
+        subscribe_order_event(topic, stop_live_location, "stop_live_location")
+    subscribe_order_event(ORDER_COMPLETED, clear_driver_chat, "clear_driver_chat")
+
+    logger.info(f"📨 Підписники подій замовлення зареєстровані ({len(_bus.stats())})")
@@ -7,6 +7,9 @@ from datetime import datetime, timezone
 from aiogram import Bot
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from app.utils import metrics
+from app.utils.message_render import edit_message_text
+
 logger = logging.getLogger(__name__)
 
 
@@ -157,10 +160,11 @@ class OrderTimeoutManager:
                     # Безпечне форматування суми
                     fare_text = f"{order.fare_amount:.0f} грн" if order.fare_amount else "Уточнюється"
                     
-                    await bot.edit_message_text(
-                        chat_id=group_chat_id,
-                        message_id=group_message_id,
-                        text=(
+                    await edit_message_text(
+                        bot,
+                        group_chat_id,
+                        group_message_id,
+                        (
                             f"🔴 <b>ТЕРМІНОВЕ ЗАМОВЛЕННЯ #{order_id}</b>\n"
                             f"⚠️ <b>Вже чекає {timeout_count * 3}+ хвилин!</b>\n\n"
                             f"📍 Звідки: {order.pickup_address or 'Не вказано'}\n"
@@ -172,8 +176,7 @@ class OrderTimeoutManager:
                     )
                     logger.info(f"📤 Повідомлення в групі оновлено: ТЕРМІНОВЕ #{order_id} ({timeout_count * 3} хв)")
                 except Exception as e:
-                    if "message is not modified" not in str(e):
-                        logger.error(f"❌ Не вдалося оновити повідомлення в групі: {e}")
+                    logger.error(f"❌ Не вдалося оновити повідомлення в групі: {e}")
             
             # Перезапустити таймер на ще 3 хвилини
             await self.start_timeout(
@@ -196,6 +199,8 @@ class OrderTimeoutManager:
 # Глобальний екземпляр менеджера таймаутів
 _timeout_manager = OrderTimeoutManager()
 
+metrics.gauge("taxi_order_timeout_timers", "Active order timeout timers", lambda: len(_timeout_manager._timers))
+
 
 async def start_order_timeout(
     bot: Bot,
@@ -218,6 +223,6 @@ def cancel_order_timeout(order_id: int) -> None:
     """
     Скасувати таймер (коли водій прийняв замовлення).
     
-    Викликати одразу після accept_order.
+    Викликає підписник order.accepted/completed/cancelled (app/utils/order_events.py).
     """
     _timeout_manager.cancel_timeout(order_id)
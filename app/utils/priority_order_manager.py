@@ -9,12 +9,16 @@ from typing import List, Optional
 from aiogram import Bot
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from app.utils import metrics
+
 logger = logging.getLogger(__name__)
 
 # Словник для зберігання активних таймерів пріоритетних замовлень
 # order_id -> task
 _priority_timers: dict[int, asyncio.Task] = {}
 
+metrics.gauge("taxi_priority_order_timers", "Active priority-driver offer timers", lambda: len(_priority_timers))
+
 
 class PriorityOrderManager:
     """Менеджер для роботи з пріоритетними замовленнями"""
@@ -1,5 +1,4 @@
-"""Генерація QR-кодів для оплати"""
-import qrcode
+"""Генерація QR-кодів для оплати (qrcode/PIL імпортуються лише при першій генерації)"""
 from io import BytesIO
 from typing import Optional
 
@@ -25,6 +24,8 @@ def generate_payment_qr(card_number: str, amount: float, comment: Optional[str]
     if comment:
         payment_data += f"\nComment: {comment}"
     
+    import qrcode
+
     # Створення QR-коду
     qr = qrcode.QRCode(
         version=1,  # Розмір QR (1-40)
@@ -61,6 +62,8 @@ def generate_monobank_qr(phone: str, amount: float) -> BytesIO:
     # Формат MonoBank: https://send.monobank.ua/{phone}/{amount}
     monobank_url = f"https://send.monobank.ua/{phone.replace('+', '')}/{amount}"
     
+    import qrcode
+
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -90,6 +93,8 @@ def generate_simple_qr(text: str) -> BytesIO:
     Returns:
         BytesIO об'єкт з зображенням QR-коду
     """
+    import qrcode
+
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
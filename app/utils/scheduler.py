@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 from datetime import datetime, time, timezone
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
 if TYPE_CHECKING:
     from aiogram import Bot
@@ -86,6 +86,22 @@ async def commission_reminder_task(bot: Bot, db_path: str) -> None:
             await asyncio.sleep(60)
 
 
+def start_leader_jobs(bot: Bot, db_path: str) -> List[asyncio.Task]:
+    """
+    Задачі, які мають виконуватись в одному процесі (розсилки, чистка таблиць).
+    
+    Повертає задачі, щоб лідер міг їх зупинити, втративши оренду.
+    """
+    from app.storage.message_ledger import message_ledger_prune_task
+    
+    return [
+        # Нагадування про комісію (картка береться з БД автоматично)
+        asyncio.create_task(commission_reminder_task(bot, db_path)),
+        # Реєстр повідомлень: прибрати записи, старші за 48 год (Telegram їх уже не видалить)
+        asyncio.create_task(message_ledger_prune_task(db_path)),
+    ]
+
+
 async def start_scheduler(bot: Bot, db_path: str) -> None:
     """
     Start all scheduled tasks
@@ -96,8 +112,23 @@ async def start_scheduler(bot: Bot, db_path: str) -> None:
         
     ⚠️ payment_card більше не потрібен - картка береться з БД!
     """
-    # Start commission reminder task (картка береться з БД автоматично)
-    asyncio.create_task(commission_reminder_task(bot, db_path))
+    # Звірка лічильників попиту/пропозиції (динамічне ціноутворення) з БД
+    from app.utils.demand_tracker import demand_reconcile_task
+    asyncio.create_task(demand_reconcile_task(db_path))
+    
+    # Зональна націнка: чистка вікна подач та звірка позицій водіїв
+    from app.utils.geo_surge import zone_surge_task
+    asyncio.create_task(zone_surge_task(db_path))
+    
+    # Метрики адмін-панелі: тримати кеш теплим (ADMIN_METRICS_REFRESH_SECONDS=0 - вимкнути)
+    from app.storage.admin_metrics import ADMIN_METRICS_REFRESH_SECONDS, admin_metrics_task
+    if ADMIN_METRICS_REFRESH_SECONDS > 0:
+        asyncio.create_task(admin_metrics_task(db_path))
+    
+    # Задачі "рівно один раз" - лише в процесі-лідері
+    # (без MULTI_INSTANCE оренда переходить від старого процесу до нового під час деплою)
+    from app.utils.leader_election import start_leader_election
+    start_leader_election(db_path, lambda: start_leader_jobs(bot, db_path))
     
     # ❌ ВИМКНЕНО: Location tracking task (перевірка геолокації кожні 5 хв)
     # Водій ділиться геолокацією ТІЛЬКИ під час виконання замовлення
@@ -0,0 +1,112 @@
+"""
+Запуск бота по фазах і готовність процесу (/ready)
+
+Замість фіксованої затримки на Render новий процес:
+- одразу готує БД, роутери і кеші (ціни, попит, зональна націнка, метрики адмінки)
+- паралельно чекає оренду лідера - старий процес звільняє її при зупинці
+  (або вона спливає через LEADER_LEASE_SECONDS, якщо старий процес впав)
+- лише після цього встановлює webhook / запускає polling і стає готовим
+
+Тривалість кожної фази (імпорт, БД, роутери, webhook, ...) пишеться в лог і віддається на /ready.
+Час імпорту по модулях: python benchmark_startup.py (python -X importtime).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """Тривалість фаз запуску і прапорець готовності"""
+
+    def __init__(self):
+        self._started = time.monotonic()
+        self.phases: Dict[str, float] = {}
+        self.ready = False
+        self.ready_after: Optional[float] = None
+
+    @asynccontextmanager
+    async def phase(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.phases[name] = round(elapsed, 3)
+            logger.info(f"⏱ Старт: {name} - {elapsed * 1000:.0f} мс")
+
+    def record(self, name: str, started: float) -> None:
+        """Фаза, що почалась до створення профілю (імпорт модулів): started - time.monotonic()"""
+        elapsed = time.monotonic() - started
+        self.phases[name] = round(elapsed, 3)
+        self._started = min(self._started, started)
+        logger.info(f"⏱ Старт: {name} - {elapsed * 1000:.0f} мс")
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.ready_after = round(time.monotonic() - self._started, 3)
+        summary = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        logger.info(f"✅ Бот готовий через {self.ready_after:.2f}s ({summary})")
+
+    def mark_not_ready(self) -> None:
+        """Процес зупиняється - балансувальник має перестати слати запити"""
+        self.ready = False
+
+    def as_dict(self) -> dict:
+        return {"ready": self.ready, "ready_after": self.ready_after, "phases": dict(self.phases)}
+
+
+# Глобальний профіль запуску процесу
+_profile = StartupProfile()
+
+metrics.gauge("taxi_ready", "1 once the process accepts updates (/ready)", lambda: int(_profile.ready))
+metrics.gauge("taxi_startup_phase_seconds", "Duration of each startup phase", lambda: {(name,): seconds for name, seconds in _profile.phases.items()}, ("phase",))
+
+
+def get_startup_profile() -> StartupProfile:
+    return _profile
+
+
+def is_ready() -> bool:
+    return _profile.ready
+
+
+async def _warm(name: str, coro) -> None:
+    started = time.monotonic()
+    try:
+        await coro
+        logger.info(f"🔥 Кеш {name}: {(time.monotonic() - started) * 1000:.0f} мс")
+    except Exception as e:
+        # Не фатально: кеш дозавантажиться при першому зверненні або фоновою задачею
+        logger.warning(f"⚠️ Не вдалося прогріти кеш {name}: {e}")
+
+
+async def _warm_fare_engine(db_path: str) -> None:
+    from app.handlers.fare_engine import get_fare_engine
+    from app.storage.pricing_snapshot import get_pricing_snapshot
+
+    snapshot = await get_pricing_snapshot(db_path)
+    get_fare_engine(snapshot).surge_table()
+
+
+async def warm_caches(db_path: str) -> None:
+    """Заповнити кеші в пам'яті до прийому оновлень (паралельно)"""
+    from app.storage.admin_metrics import ADMIN_METRICS_REFRESH_SECONDS, refresh_admin_metrics
+    from app.utils.demand_tracker import get_demand_tracker
+    from app.utils.geo_surge import get_zone_tracker
+
+    jobs = [
+        _warm("тарифів", _warm_fare_engine(db_path)),
+        _warm("попиту", get_demand_tracker().reconcile(db_path)),
+        _warm("зон (geohash)", get_zone_tracker().reconcile_drivers(db_path)),
+    ]
+    if ADMIN_METRICS_REFRESH_SECONDS > 0:
+        jobs.append(_warm("метрик адмінки", refresh_admin_metrics(db_path)))
+    await asyncio.gather(*jobs)
@@ -0,0 +1,139 @@
+"""
+Метрики і трасування aiogram: оновлення, обробники, виклики Telegram API, стани FSM
+
+instrument_dispatcher(dp, bot) викликається в main після реєстрації роутерів:
+- outer middleware dp.update - траса на кожне оновлення (app/utils/tracing.py),
+  усі вхідні оновлення за типом і повний час обробки
+- inner middleware на спостерігачах кожного роутера - лише коли обробник знайдено:
+  виклики/помилки за (роутер, обробник), тривалість за роутером
+- middleware сесії бота - тривалість і помилки вихідних запитів за методом API (+ спан траси)
+- gauge кількості користувачів у кожному стані FSM (MemoryStorage)
+"""
+from __future__ import annotations
+
+import importlib
+import time
+from collections import Counter as _Tally
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher, Router
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.event.bases import CancelHandler, SkipHandler
+
+from app.utils import metrics, tracing
+
+UPDATES = metrics.counter("taxi_updates_total", "Incoming Telegram updates by type", ("type",))
+UPDATE_SECONDS = metrics.histogram("taxi_update_seconds", "Full update processing time by type", ("type",))
+HANDLER_CALLS = metrics.counter("taxi_handler_calls_total", "Handler invocations", ("router", "handler"))
+HANDLER_ERRORS = metrics.counter("taxi_handler_errors_total", "Handler invocations that raised", ("router", "handler"))
+HANDLER_SECONDS = metrics.histogram("taxi_handler_seconds", "Handler latency by router", ("router",))
+TELEGRAM_SECONDS = metrics.histogram("taxi_telegram_api_seconds", "Outbound Telegram Bot API call latency", ("method",))
+TELEGRAM_ERRORS = metrics.counter("taxi_telegram_api_errors_total", "Failed Telegram Bot API calls", ("method", "error"))
+
+GAUGE_MODULES = (
+    "app.utils.live_location_manager",
+    "app.utils.order_timeout",
+    "app.utils.priority_order_manager",
+)
+
+
+class UpdateTraceMiddleware(BaseMiddleware):
+    """Outer middleware dp.update: корінь траси оновлення (повільні пишуться в лог)"""
+
+    async def __call__(self, handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]], event: Any, data: Dict[str, Any]) -> Any:
+        update_type = getattr(event, "event_type", "unknown")
+        user = getattr(getattr(event, "event", None), "from_user", None)
+        with tracing.start_trace(f"update:{update_type}", update_id=getattr(event, "update_id", None), user_id=getattr(user, "id", None)):
+            return await handler(event, data)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer middleware dp.update: кожне оновлення, навіть без обробника"""
+
+    async def __call__(self, handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]], event: Any, data: Dict[str, Any]) -> Any:
+        update_type = getattr(event, "event_type", "unknown")
+        UPDATES.inc(update_type)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_SECONDS.observe(time.perf_counter() - started, update_type)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware роутера: викликається лише для обробника, що пройшов фільтри"""
+
+    def __init__(self, router_name: str):
+        self.router_name = router_name
+
+    async def __call__(self, handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]], event: Any, data: Dict[str, Any]) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        name = getattr(callback, "__name__", "unknown")
+        tracing.annotate(router=self.router_name, handler=name)
+        started = time.perf_counter()
+        # SkipHandler/CancelHandler - обробник відмовився від оновлення: не виклик і не помилка
+        try:
+            result = await handler(event, data)
+        except (SkipHandler, CancelHandler):
+            raise
+        except Exception:
+            HANDLER_ERRORS.inc(self.router_name, name)
+            self._record(name, started)
+            raise
+        self._record(name, started)
+        return result
+
+    def _record(self, name: str, started: float) -> None:
+        HANDLER_SECONDS.observe(time.perf_counter() - started, self.router_name)
+        HANDLER_CALLS.inc(self.router_name, name)
+
+
+class TelegramApiMetricsRequestMiddleware(BaseRequestMiddleware):
+    """Middleware сесії бота: тривалість кожного запиту до Bot API і код помилки"""
+
+    async def __call__(self, make_request, bot, method):
+        api_method = getattr(method, "__api_method__", type(method).__name__)
+        started = time.perf_counter()
+        try:
+            with tracing.span("telegram", method=api_method):
+                return await make_request(bot, method)
+        except Exception as e:
+            # TelegramBadRequest (400), TelegramForbiddenError (403), TelegramRetryAfter (429), TelegramNetworkError...
+            TELEGRAM_ERRORS.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            TELEGRAM_SECONDS.observe(time.perf_counter() - started, api_method)
+
+
+def _instrument_router(router: Router) -> None:
+    middleware = HandlerMetricsMiddleware(router.name)
+    for event_name, observer in router.observers.items():
+        if event_name != "update":
+            observer.middleware(middleware)
+    for sub_router in router.sub_routers:
+        _instrument_router(sub_router)
+
+
+def instrument_dispatcher(dp: Dispatcher, bot: Bot) -> None:
+    """Підключити метрики до диспетчера (після include_router) і сесії бота"""
+    dp.update.outer_middleware(UpdateTraceMiddleware())
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    for router in dp.sub_routers:
+        _instrument_router(router)
+    bot.session.middleware(TelegramApiMetricsRequestMiddleware())
+
+    # Модулі з таймерами/сесіями імпортуються ліниво, а свої gauge реєструють при імпорті -
+    # вони мають бути на /metrics з першого запиту
+    for module in GAUGE_MODULES:
+        importlib.import_module(module)
+
+    records = getattr(dp.storage, "storage", None)
+    if records is not None:
+        # MemoryStorage: {StorageKey: запис зі state}; інші сховища стани не рахують
+        metrics.gauge(
+            "taxi_fsm_states",
+            "Users currently in each FSM state",
+            lambda: {(state,): count for state, count in _Tally(r.state for r in list(records.values()) if r.state).items()},
+            ("state",),
+        )
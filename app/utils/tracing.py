@@ -0,0 +1,181 @@
+"""
+Трасування оновлень: дерево спанів (БД, OSRM/Nominatim, Telegram API) для повільних запитів
+
+Трасу відкриває middleware диспетчера на кожне оновлення (start_trace), поточний спан
+передається через contextvar - тому спани всередині обробника, його корутин і задач,
+створених з нього (asyncio.create_task копіює контекст), потрапляють у ту саму трасу:
+
+    with tracing.span("osrm"):
+        ...
+
+Траса, довша за TRACE_SLOW_MS, пишеться в лог одним JSON-рядком з деревом спанів.
+TRACE_SAMPLE_RATE - частка оновлень, що трасуються (решта не створює жодних об'єктів).
+Поза трасою span() - спільний no-op без алокацій.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Частка оновлень, що трасуються (0 - вимкнено, 1 - всі)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+# Траса довша за цей поріг пишеться в лог
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "2000"))
+# Більше спанів в одній трасі не зберігається (цикли, довгі фонові задачі)
+TRACE_MAX_SPANS = 200
+
+SLOW_TRACES = metrics.counter("taxi_slow_traces_total", "Traces over TRACE_SLOW_MS by root name", ("name",))
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+
+class Trace:
+    """Одна траса: корінний спан і всі вкладені в порядку відкриття"""
+
+    __slots__ = ("trace_id", "started", "spans", "dropped", "finished")
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.finished = False
+
+    @property
+    def root(self) -> "Span":
+        return self.spans[0]
+
+    def finish(self) -> None:
+        self.finished = True
+        root = self.root
+        if root.duration * 1000 < TRACE_SLOW_MS:
+            return
+        SLOW_TRACES.inc(root.name)
+        logger.warning(json.dumps(self.as_dict(), ensure_ascii=False, default=str))
+
+    def as_dict(self) -> Dict[str, Any]:
+        nodes = {}
+        for span in self.spans:
+            node = {
+                "name": span.name,
+                "start_ms": round((span.started - self.started) * 1000, 1),
+                "ms": round(span.duration * 1000, 1) if span.duration is not None else None,
+            }
+            if span.attrs:
+                node["attrs"] = span.attrs
+            if span.error:
+                node["error"] = span.error
+            nodes[id(span)] = node
+            if span.parent is not None:
+                nodes[id(span.parent)].setdefault("spans", []).append(node)
+
+        tree = nodes[id(self.root)]
+        return {
+            "event": "slow_trace",
+            "trace_id": self.trace_id,
+            **tree,
+            "dropped_spans": self.dropped,
+        }
+
+
+class Span:
+    """Відрізок траси; with span: - робить його поточним для вкладених спанів"""
+
+    __slots__ = ("trace", "name", "attrs", "parent", "started", "duration", "error", "_token")
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict[str, Any], parent: Optional["Span"]):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def __enter__(self) -> "Span":
+        self.started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.duration = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        if self.parent is None:
+            self.trace.finish()
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class _NoopSpan:
+    """Спан поза трасою або понад TRACE_MAX_SPANS"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def start_trace(name: str, **attrs: Any):
+    """Корінний спан нової траси (з імовірністю TRACE_SAMPLE_RATE); всередині траси - звичайний спан"""
+    if _current_span.get() is not None:
+        return span(name, **attrs)
+    if TRACE_SAMPLE_RATE <= 0 or (TRACE_SAMPLE_RATE < 1 and random.random() >= TRACE_SAMPLE_RATE):
+        return _NOOP
+    trace = Trace()
+    root = Span(trace, name, attrs, None)
+    trace.spans.append(root)
+    return root
+
+
+def span(name: str, **attrs: Any):
+    """Вкладений спан поточної траси (no-op, якщо траси немає)"""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    trace = parent.trace
+    if trace.finished:
+        # Фонова задача пережила оновлення - її спани вже не потраплять у лог
+        return _NOOP
+    if len(trace.spans) >= TRACE_MAX_SPANS:
+        trace.dropped += 1
+        return _NOOP
+    child = Span(trace, name, attrs, parent)
+    trace.spans.append(child)
+    return child
+
+
+def annotate(**attrs: Any) -> None:
+    """Додати атрибути до кореня поточної траси (наприклад, обробник, що спрацював)"""
+    current = _current_span.get()
+    if current is not None:
+        current.trace.root.attrs.update(attrs)
+
+
+def current_trace_id() -> Optional[str]:
+    """ID поточної траси (для кореляції логів) або None"""
+    current = _current_span.get()
+    return current.trace.trace_id if current is not None else None
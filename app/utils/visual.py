@@ -2,7 +2,10 @@
 Модуль з візуальними покращеннями для Telegram бота
 Містить функції для красивого форматування повідомлень
 """
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from app.storage.driver_stats import DriverPeriodStats
 
 
 # ============ КОЛЬОРОВІ ЕМОДЗІ ДЛЯ СТАТУСІВ ============
@@ -336,43 +339,39 @@ def format_earnings_infographic(
     return infographic
 
 
-def format_driver_stats(
-    total_trips: int,
-    rating: float,
-    karma: int,
-    completed_today: int = 0
-) -> str:
+def format_driver_stats(stats: "DriverPeriodStats", title: str, period_text: str) -> str:
     """
-    Форматує статистику водія з візуальними елементами
+    Форматує статистику водія за період
     
     Args:
-        total_trips: Загальна кількість поїздок
-        rating: Рейтинг водія
-        karma: Карма водія
-        completed_today: Завершено поїздок сьогодні
+        stats: Агрегати за період (app.storage.driver_stats.get_driver_period_stats)
+        title: Заголовок (наприклад, "СТАТИСТИКА ЗА ТИЖДЕНЬ")
+        period_text: Підпис періоду внизу
         
     Returns:
         Форматована статистика
     """
-    # Зірки для рейтингу
-    stars = '⭐' * int(rating)
-    empty_stars = '☆' * (5 - int(rating))
-    rating_visual = f"{stars}{empty_stars} {rating:.1f}"
-    
-    # Карма з кольором
-    karma_formatted = format_karma(karma)
-    
-    stats = f"""📊 <b>ВАША СТАТИСТИКА</b>
-
-🚕 <b>Поїздок загалом:</b> {total_trips}
-📅 <b>Сьогодні:</b> {completed_today}
-
-{rating_visual}
-
-{karma_formatted}
-{get_karma_level_text(karma)}"""
-    
-    return stats
+    text = (
+        f"📊 <b>{title}</b>\n\n"
+        f"━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"📦 <b>Всього замовлень:</b> {stats.total_orders}\n"
+        f"✅ <b>Виконано:</b> {stats.completed_orders}\n"
+        f"❌ <b>Скасовано:</b> {stats.cancelled_orders}\n\n"
+        f"💰 <b>Заробіток:</b> {stats.earnings:.0f} грн\n"
+        f"   💵 Готівка: {stats.cash:.0f} грн | 💳 Картка: {stats.card:.0f} грн\n"
+        f"💳 <b>Комісія ({stats.commission_percent:.0f}%):</b> {stats.commission:.0f} грн\n"
+        f"💵 <b>Чистий:</b> {stats.net:.0f} грн\n"
+    )
+    if stats.tips:
+        text += f"🎁 <b>Чайові:</b> {stats.tips:.0f} грн\n"
+    text += f"\n⏱️ <b>Години в дорозі:</b> {stats.hours_worked:.1f}\n"
+    if stats.days > 1:
+        text += f"📈 <b>Середнє/день:</b> {stats.avg_per_day:.0f} грн\n"
+    text += (
+        f"\n━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"📅 {period_text}"
+    )
+    return text
 
 
 # ============ РЕЙТИНГ З ВІЗУАЛІЗАЦІЄЮ ============
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Перерахунок денних підсумків водіїв (driver_daily_stats) з історії
+
+Після оновлення таблицю заповнює міграція 0003 (init_db); скрипт - якщо
+підсумки розійшлися з payments/orders/tips:
+python backfill_driver_daily_stats.py
+"""
+import asyncio
+from app.config.config import load_config
+from app.storage.db import init_db, rebuild_driver_daily_stats
+
+
+async def main():
+    config = load_config()
+    await init_db(config.database_path)
+
+    rows = await rebuild_driver_daily_stats(config.database_path)
+    print(f"✅ driver_daily_stats перераховано: {rows} рядків (водій × день)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
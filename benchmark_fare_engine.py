@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Мікро-бенчмарк розрахунку вартості
+
+Порівнює старий шлях (calculate_fare_with_class + calculate_dynamic_price
+для кожного класу) з FareEngine (всі класи за один прохід, batch).
+
+python benchmark_fare_engine.py [кількість_поїздок]
+"""
+import asyncio
+import logging
+import random
+import sys
+import time
+
+from app.handlers.car_classes import calculate_fare_with_class
+from app.handlers.dynamic_pricing import calculate_dynamic_price
+from app.handlers.fare_engine import CLASS_ORDER, DemandState, FareEngine
+from app.storage.db import PricingSettings, Tariff
+from app.storage.pricing_snapshot import PricingSnapshot
+
+
+def build_snapshot() -> PricingSnapshot:
+    tariff = Tariff(
+        id=1,
+        base_fare=50.0,
+        per_km=8.0,
+        per_minute=2.0,
+        minimum=60.0,
+        commission_percent=0.02,
+    )
+    return PricingSnapshot(version=1, tariff=tariff, pricing=PricingSettings(), loaded_at=time.monotonic())
+
+
+async def legacy_quote(snapshot: PricingSnapshot, km: float, minutes: float, demand: DemandState) -> dict:
+    pricing = snapshot.pricing
+    base_fare = snapshot.base_fare(km, minutes)
+    prices = {}
+    for class_key in CLASS_ORDER:
+        class_fare = calculate_fare_with_class(base_fare, class_key, snapshot.class_multipliers)
+        final_price, _, _ = await calculate_dynamic_price(
+            class_fare, "Київ", demand.online_drivers, demand.pending_orders,
+            pricing.night_percent, pricing.weather_percent,
+            pricing.peak_hours_percent, pricing.weekend_percent,
+            pricing.monday_morning_percent, pricing.no_drivers_percent,
+            pricing.demand_very_high_percent, pricing.demand_high_percent,
+            pricing.demand_medium_percent, pricing.demand_low_discount_percent
+        )
+        prices[class_key] = final_price
+    return prices
+
+
+async def main():
+    # Старий шлях пише INFO на кожен клас - в бенчмарку рахуємо лише обчислення
+    logging.disable(logging.INFO)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(42)
+    trips = [(rng.uniform(1, 40), rng.uniform(5, 90)) for _ in range(count)]
+    demand = DemandState(online_drivers=10, pending_orders=5)
+    snapshot = build_snapshot()
+
+    start = time.perf_counter()
+    legacy = [await legacy_quote(snapshot, km, minutes, demand) for km, minutes in trips]
+    legacy_time = time.perf_counter() - start
+
+    engine = FareEngine(snapshot)
+
+    start = time.perf_counter()
+    single = [engine.quote(km, minutes, demand) for km, minutes in trips]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = engine.quote_batch(trips, demand)
+    batch_time = time.perf_counter() - start
+
+    # Перевірка що результати збігаються
+    for old, new_single, new_batch in zip(legacy, single, batch):
+        for key in CLASS_ORDER:
+            assert abs(old[key] - new_single.prices[key]) < 1e-9
+            assert abs(old[key] - new_batch.prices[key]) < 1e-9
+
+    print(f"📊 Поїздок: {count} (x{len(CLASS_ORDER)} класи)")
+    print(f"   Старий шлях:        {legacy_time * 1000:8.1f} мс ({legacy_time / count * 1e6:6.1f} мкс/поїздка)")
+    print(f"   FareEngine.quote:   {single_time * 1000:8.1f} мс ({single_time / count * 1e6:6.1f} мкс/поїздка)")
+    print(f"   FareEngine.batch:   {batch_time * 1000:8.1f} мс ({batch_time / count * 1e6:6.1f} мкс/поїздка)")
+    print(f"✅ Результати збігаються, прискорення: x{legacy_time / single_time:.1f} / x{legacy_time / batch_time:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
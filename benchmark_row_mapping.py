@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Мікро-бенчмарк перетворення рядків БД у моделі
+
+Порівнює старий шлях (dataclass з __dict__, ручний конструктор з kwargs,
+_parse_datetime з перебором форматів) з RowShape (slots + згенерований mapper)
+на рядках orders у вигляді SQLite (рядки isoformat) та PostgreSQL (datetime).
+
+python benchmark_row_mapping.py [кількість_рядків]
+"""
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.storage.db import _ORDER_ROW, Order
+
+
+# Order до переходу на slots (ті самі поля, звичайний dataclass)
+LegacyOrder = make_dataclass(
+    "LegacyOrder",
+    [(f.name, f.type, f) for f in fields(Order)],
+)
+
+
+def legacy_parse_datetime(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except Exception:
+            for fmt in ("%Y-%m-%d %H:%M:%S%z", "%Y-%m-%d %H:%M:%S.%f%z", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
+                try:
+                    return datetime.strptime(value, fmt)
+                except Exception:
+                    continue
+            return None
+    return value
+
+
+def legacy_map(row):
+    return LegacyOrder(
+        id=row[0],
+        user_id=row[1],
+        name=row[2],
+        phone=row[3],
+        pickup_address=row[4],
+        destination_address=row[5],
+        comment=row[6],
+        created_at=legacy_parse_datetime(row[7]),
+        pickup_lat=row[8],
+        pickup_lon=row[9],
+        dest_lat=row[10],
+        dest_lon=row[11],
+        driver_id=row[12],
+        distance_m=row[13],
+        duration_s=row[14],
+        fare_amount=row[15],
+        commission=row[16],
+        status=row[17],
+        started_at=(legacy_parse_datetime(row[18]) if row[18] else None),
+        finished_at=(legacy_parse_datetime(row[19]) if row[19] else None),
+        group_message_id=row[20],
+        car_class=row[21] if row[21] else "economy",
+        tip_amount=row[22],
+        payment_method=row[23] if row[23] else "cash",
+    )
+
+
+def build_rows(count: int, as_text: bool) -> list:
+    rng = random.Random(42)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        created = base + timedelta(minutes=i)
+        started = created + timedelta(minutes=5)
+        finished = started + timedelta(minutes=rng.randint(5, 60))
+        dates = [d.isoformat() if as_text else d for d in (created, started, finished)]
+        rows.append((
+            i, 1000 + i % 500, "Клієнт", "+380000000000", "вул. Хрещатик, 1", "вул. Саксаганського, 10", None, dates[0],
+            50.45, 30.52, 50.44, 30.51,
+            i % 50, rng.randint(1000, 20000), rng.randint(300, 3600), rng.uniform(80, 400), 4.0, "completed",
+            dates[1], dates[2], None,
+            rng.choice(["economy", "standard", None]), None, rng.choice(["cash", "card", None]),
+        ))
+    return rows
+
+
+def measure(fn, rows):
+    start = time.perf_counter()
+    fn(rows)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = fn(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    for backend, as_text in (("SQLite (рядки)", True), ("PostgreSQL (datetime)", False)):
+        rows = build_rows(count, as_text)
+        legacy_time, legacy_peak, legacy = measure(lambda rs: [legacy_map(r) for r in rs], rows)
+        new_time, new_peak, new = measure(_ORDER_ROW.map_rows, rows)
+
+        # Перевірка що результати збігаються
+        for old, fresh in zip(legacy, new):
+            for f in fields(Order):
+                assert getattr(old, f.name) == getattr(fresh, f.name), f.name
+
+        print(f"📊 {backend}: {count} рядків orders")
+        print(f"   Старий шлях: {legacy_time * 1000:8.1f} мс ({legacy_time / count * 1e6:5.2f} мкс/рядок), пам'ять {legacy_peak / 1024:8.0f} КБ")
+        print(f"   RowShape:    {new_time * 1000:8.1f} мс ({new_time / count * 1e6:5.2f} мкс/рядок), пам'ять {new_peak / 1024:8.0f} КБ")
+        print(f"✅ Прискорення x{legacy_time / new_time:.1f}, пам'ять -{(1 - new_peak / legacy_peak) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
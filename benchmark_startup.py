@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк холодного старту: час імпорту (python -X importtime)
+
+Порівнює:
+- до:    import app.main + усі модулі обробників (як було з імпортами роутерів на рівні модуля)
+- після: import app.main (aiogram і обробники вантажаться у потоці паралельно з init_db, див. ROUTERS)
+
+Кожен варіант - окремий процес з холодним sys.modules (кеш .pyc вже прогрітий першим запуском).
+Виводить медіану часу процесу, сумарний час імпорту, найважчі модулі і
+перевіряє, що qrcode/PIL не імпортуються на старті.
+
+python benchmark_startup.py [кількість_запусків] [топ_модулів]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+VARIANTS = {
+    "до": "import app.main; app.main.import_router_factories()",
+    "після": "import app.main",
+}
+
+# Важкі необов'язкові залежності - не повинні потрапляти в імпорт старту
+LAZY_MODULES = ("qrcode", "PIL")
+
+_LAZY_CHECK = (
+    "; import sys; "
+    f"loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]; "
+    "print(','.join(loaded))"
+)
+
+
+def run_importtime(code: str):
+    """Запустити code з -X importtime: (секунди процесу, {модуль: (self мкс, cumulative мкс)}, завантажені LAZY_MODULES)"""
+    env = dict(os.environ, BOT_TOKEN=os.environ.get("BOT_TOKEN", "0:benchmark"))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code + _LAZY_CHECK],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.exit(f"❌ Помилка імпорту:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    lines = result.stdout.strip().splitlines()
+    loaded = [m for m in lines[-1].split(",") if m] if lines else []
+    return elapsed, modules, loaded
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    run_importtime(VARIANTS["після"])  # прогріти .pyc
+
+    totals = {}
+    for variant, code in VARIANTS.items():
+        timings = []
+        for _ in range(runs):
+            elapsed, modules, loaded = run_importtime(code)
+            timings.append(elapsed)
+        imported_us = sum(self_us for self_us, _ in modules.values())
+        app_us = sum(self_us for name, (self_us, _) in modules.items() if name.startswith("app"))
+        totals[variant] = statistics.median(timings)
+
+        print(f"📊 {variant}: {code}")
+        print(f"   Процес (медіана з {runs}): {totals[variant] * 1000:8.1f} мс")
+        print(f"   Імпорт модулів:           {imported_us / 1000:8.1f} мс ({len(modules)} модулів, з них app.*: {app_us / 1000:.1f} мс)")
+        if loaded:
+            print(f"   ⚠️ На старті імпортовано: {', '.join(loaded)}")
+
+    print("\n🐢 Найважчі модулі імпорту до main() (self, мкс):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda m: -m[1][0])[:top]:
+        print(f"   {self_us:8d}  (cumulative {cumulative_us:8d})  {name}")
+
+    saved = totals["до"] - totals["після"]
+    print(f"\n✅ Імпорт до main(): -{saved * 1000:.0f} мс (x{totals['до'] / totals['після']:.2f}); "
+          f"aiogram і обробники тепер імпортуються паралельно з init_db")
+
+
+if __name__ == "__main__":
+    main()
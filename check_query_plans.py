@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Перевірка планів запитів SQLite (регресія індексів)
+
+Створює тимчасову БД через init_db і перевіряє через EXPLAIN QUERY PLAN,
+що запити заробітку водія йдуть по складених індексах, а не скануванням таблиці.
+
+python check_query_plans.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from app.storage.db import (
+    DRIVER_COMPLETED_ORDERS_PERIOD_QUERY,
+    DRIVER_PAYMENTS_PERIOD_QUERY,
+    init_db,
+)
+
+# (назва, запит, індекс який має бути в плані)
+EXPECTED_PLANS = [
+    ("Заробіток водія (payments)", DRIVER_PAYMENTS_PERIOD_QUERY, "idx_payments_driver_created"),
+    ("Поїздки водія (orders)", DRIVER_COMPLETED_ORDERS_PERIOD_QUERY, "idx_orders_driver_status_created"),
+]
+
+
+def explain(conn: sqlite3.Connection, query: str) -> list:
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=1)
+    params = (1, start.isoformat(" "), end.isoformat(" "))
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+async def main() -> int:
+    # DATABASE_URL вмикає PostgreSQL - перевірка лише для SQLite
+    os.environ.pop("DATABASE_URL", None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "plans.sqlite3")
+        await init_db(db_path)
+
+        conn = sqlite3.connect(db_path)
+        failed = 0
+        try:
+            for name, query, index_name in EXPECTED_PLANS:
+                plan = explain(conn, query)
+                ok = any(index_name in step and "created_at>" in step for step in plan)
+                print(f"{'✅' if ok else '❌'} {name}: очікується {index_name}")
+                for step in plan:
+                    print(f"     {step}")
+                if not ok:
+                    failed += 1
+        finally:
+            conn.close()
+
+    if failed:
+        print(f"❌ Планів з помилками: {failed}")
+        return 1
+    print("✅ Всі запити використовують індекси")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
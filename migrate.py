@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Міграції схеми БД поза процесом бота (app/storage/migrations)
+
+python migrate.py              # застосувати нові міграції
+python migrate.py --dry-run    # прогнати нові міграції в транзакції і відкотити
+python migrate.py status       # список міграцій і коли застосовані
+python migrate.py verify       # розбіжності коду і БД (код виходу 1, якщо є)
+
+БД - як у бота: DATABASE_URL (PostgreSQL) або DB_PATH (SQLite);
+--db шлях.sqlite3 - інший файл SQLite без конфігу бота (BOT_TOKEN не потрібен).
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.config.config import load_config
+from app.storage.migrations import get_status, latest_version, migrate, verify
+
+
+async def main(args: argparse.Namespace) -> int:
+    db_path = args.db or load_config().database_path
+
+    if args.command == "status":
+        for migration, applied in await get_status(db_path):
+            mark = f"✅ {applied.applied_at}" if applied else "⏳ не застосована"
+            print(f"{migration}  {mark}  - {migration.description}")
+        return 0
+
+    if args.command == "verify":
+        problems = await verify(db_path)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print(f"✅ Схема відповідає коду (версія {latest_version()})")
+        return 1 if problems else 0
+
+    applied = await migrate(db_path, dry_run=args.dry_run)
+    verb = "Пройшли б" if args.dry_run else "Застосовано"
+    print(f"{verb} міграцій: {len(applied)}" + "".join(f"\n  {m}" for m in applied))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Міграції схеми БД таксі-бота")
+    parser.add_argument("command", nargs="?", choices=("run", "status", "verify"), default="run")
+    parser.add_argument("--dry-run", action="store_true", help="виконати в транзакції і відкотити")
+    parser.add_argument("--db", help="файл SQLite (за замовчуванням - з конфігу бота)")
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    sys.exit(asyncio.run(main(parser.parse_args())))